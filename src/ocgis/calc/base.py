@@ -9,13 +9,14 @@ import six
 from ocgis import constants
 from ocgis import env
 from ocgis.base import get_variables, get_dimension_names, AbstractOcgisObject
+from ocgis.calc.segmented import get_segment_selection, segmented_sample_size, get_segment_sizes
 from ocgis.constants import TagName, DimensionMapKey, HeaderName
 from ocgis.exc import SampleSizeNotImplemented, DefinitionValidationError, UnitsValidationError
 from ocgis.util.broadcaster import broadcast_array_by_dimension_names
 from ocgis.util.helpers import get_default_or_apply, get_iter
 from ocgis.util.logging_ocgis import ocgis_lh
 from ocgis.util.units import get_are_units_equal_by_string_or_cfunits
-from ocgis.variable.base import Variable, VariableCollection, get_default_fill_value_from_dtype
+from ocgis.variable.base import Variable, VariableCollection, get_default_fill_value_from_dtype, SourcedVariable
 from six.moves import zip_longest
 
 # Standard dimension order for data arrays.
@@ -80,6 +81,10 @@ class AbstractFunction(AbstractOcgisObject):
     #: The output data type is NumPy's default float representation. This may be overloaded by subclasses.
     dtype_default = 'float'
 
+    #: If ``True``, the function implements :meth:`calculate_segmented` and all temporal groups are reduced with a
+    #: single call. Otherwise, :meth:`calculate` is called for each temporal group.
+    has_segmented_calculation = False
+
     #: The calculation's output units. Modify :meth:`get_output_units` for more complex units calculations. If the units
     #: are left as the default '_input_' then the input variable units are maintained. Otherwise, they will be set to
     #: units attribute value. The string flag is used to allow ``None`` units to be applied.
@@ -149,6 +154,25 @@ class AbstractFunction(AbstractOcgisObject):
 
         pass
 
+    def calculate_segmented(self, values, offsets, **kwargs):
+        """
+        Optional method to overload for reducing every temporal group with a single call. Only used when
+        :attr:`has_segmented_calculation` is ``True``. The time axis of ``values`` is sorted so that each temporal group
+        is a contiguous segment. The default calls :meth:`calculate` for each segment.
+
+        :param values: A three-dimensional array with dimensions (time, row, column).
+        :type values: :class:`numpy.ma.MaskedArray`
+        :param offsets: The start index of each temporal group along the time axis. See :meth:`numpy.ufunc.reduceat`.
+        :type offsets: :class:`numpy.ndarray`
+        :param kwargs: Any keyword parameters for the function.
+        :returns: A three-dimensional array with dimensions (group, row, column).
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+
+        ret = [self.calculate(values[start:stop], **kwargs) for start, stop in
+               zip(offsets, get_segment_sizes(values, offsets) + offsets)]
+        return np.ma.array([np.ma.getdata(r) for r in ret], mask=[np.ma.getmaskarray(r) for r in ret])
+
     def execute(self):
         """
         Execute the computation over the input field.
@@ -466,17 +490,34 @@ class AbstractFunction(AbstractOcgisObject):
         else:
             fill_sample_size = None
 
+        # Reduce all temporal groups with a single call if the function supports it. The per-group loop is the
+        # fallback.
+        segments = None
+        if self.has_segmented_calculation and f == self.calculate and not self.spatial_aggregation:
+            segments = get_segment_selection(getattr(self.tgd, 'group_indices', None),
+                                             variable.shape[time_axis])
+
         if not file_only:
             # Get value arrays.
-            arr = self.get_variable_value(variable)
             arr_fill = self.get_variable_value(fill)
             if self.calc_sample_size:
                 arr_fill_sample_size = self.get_variable_value(fill_sample_size)
             else:
                 arr_fill_sample_size = None
 
+            # Segmented calculations reduce each element independently. Values of unloaded source variables may be
+            # read and reduced slab by slab.
+            lazy_value = None
+            if segments is not None:
+                lazy_value = self._get_lazy_value_(variable, crosswalk)
+            if lazy_value is None:
+                blocks = [(self.get_variable_value(variable), arr_fill, arr_fill_sample_size)]
+            else:
+                blocks = self._iter_value_slabs_(lazy_value, arr_fill, arr_fill_sample_size)
+
             # Extra dimensions are not standard field dimensions.
-            for yld in self._iter_conformed_arrays_(crosswalk, variable.shape, arr, arr_fill, arr_fill_sample_size):
+            for yld in itertools.chain.from_iterable(
+                    self._iter_conformed_arrays_(crosswalk, block[0].shape, *block) for block in blocks):
                 if not self.calc_sample_size:
                     carr, carr_fill = yld
                     carr_fill_sample_size = None
@@ -488,6 +529,21 @@ class AbstractFunction(AbstractOcgisObject):
 
                 # Standard field dimension iterators.
                 standard_itrs = [list(range(carr.shape[ii])) for ii in [0, 2]]
+
+                if segments is not None:
+                    selection, offsets = segments
+                    for ir, il in itertools.product(*standard_itrs):
+                        calculation_value = carr[ir, selection, il, :, :]
+                        res = self.calculate_segmented(calculation_value, offsets, **parms)
+                        carr_fill.data[ir, :, il, :, :] = res.data
+                        carr_fill.mask[ir, :, il, :, :] = np.ma.getmaskarray(res)
+
+                        if self.calc_sample_size:
+                            ss = segmented_sample_size(calculation_value, offsets)
+                            carr_fill_sample_size.data[ir, :, il, :, :] = ss.data
+                            carr_fill_sample_size.mask[ir, :, il, :, :] = ss.mask
+                    continue
+
                 standard_itrs.append(list(range(self.tgd.shape[0])))
 
                 # Execute the calculation.
@@ -522,6 +578,41 @@ class AbstractFunction(AbstractOcgisObject):
 
         return {'fill': fill, 'sample_size': fill_sample_size}
 
+    @staticmethod
+    def _get_lazy_value_(variable, crosswalk):
+        """
+        :param variable: The calculation target.
+        :type variable: :class:`~ocgis.Variable`
+        :param list crosswalk: See :meth:`~ocgis.calc.base.AbstractFunction._get_dimension_crosswalk_`.
+        :returns: A lazy value reading slabs along the variable's ``Y`` axis or largest non-temporal axis. ``None`` if
+         ``ocgis.env.USE_LAZY_VALUES`` is ``False`` or the variable's value may not be read lazily.
+        :rtype: :class:`~ocgis.variable.lazy.LazyArray` | None
+        """
+        if not env.USE_LAZY_VALUES or not isinstance(variable, SourcedVariable):
+            return None
+        candidates = [idx for idx, c in enumerate(crosswalk) if c != DimensionMapKey.TIME]
+        if len(candidates) == 0:
+            return None
+        if DimensionMapKey.Y in crosswalk:
+            axis = crosswalk.index(DimensionMapKey.Y)
+        else:
+            axis = max(candidates, key=lambda idx: variable.shape[idx])
+        return variable.get_lazy_value(axis=axis)
+
+    @staticmethod
+    def _iter_value_slabs_(lazy_value, arr_fill, arr_fill_sample_size):
+        """
+        :returns: Yields tuples ``(arr, arr_fill, arr_fill_sample_size)`` for each slab of ``lazy_value``. The fill
+         arrays are views of the corresponding slab in the input fill arrays.
+        :rtype: tuple
+        """
+        for slc, arr in lazy_value.iter_slabs():
+            if arr_fill_sample_size is None:
+                slab_fill_sample_size = None
+            else:
+                slab_fill_sample_size = arr_fill_sample_size[slc]
+            yield arr, arr_fill[slc], slab_fill_sample_size
+
     def _iter_conformed_arrays_(self, crosswalk, variable_shape, arr, arr_fill, arr_fill_sample_size):
         # Allow sample size array to be set to None.
         if arr_fill_sample_size is None:
@@ -0,0 +1,191 @@
+"""
+Evaluation of string expressions used by :class:`~ocgis.calc.eval_function.EvalFunction`. Expressions are parsed into
+a validated syntax tree once. Only arithmetic operators, numeric constants, variable names, and the NumPy functions in
+:attr:`ocgis.constants.ENABLED_NUMPY_UFUNCS` are allowed. The tree is evaluated in blocks written directly into the
+output array so temporary arrays are limited to the block size. If ``ocgis.env.USE_NUMEXPR`` is ``True`` (the default
+is ``False``), blocks are evaluated with :mod:`numexpr`.
+"""
+import ast
+import operator
+
+import numpy as np
+import six
+
+from ocgis import constants, env
+from ocgis.base import AbstractOcgisObject
+from ocgis.util.helpers import iter_array_blocks
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+_BINARY_OPERATORS = {ast.Add: (operator.add, '+'),
+                     ast.Sub: (operator.sub, '-'),
+                     ast.Mult: (operator.mul, '*'),
+                     ast.Div: (operator.truediv, '/'),
+                     ast.Pow: (operator.pow, '**'),
+                     ast.Mod: (operator.mod, '%')}
+_UNARY_OPERATORS = {ast.UAdd: (operator.pos, '+'),
+                    ast.USub: (operator.neg, '-')}
+# Maps enabled NumPy functions to their numexpr representation.
+_NUMEXPR_FUNCTIONS = {'exp': 'exp({})', 'log': 'log({})', 'abs': 'abs({})', 'power': '({})**({})'}
+
+
+class Expression(AbstractOcgisObject):
+    """
+    A parsed and validated arithmetic expression.
+
+    :param str expr: The expression to evaluate (the right-hand side of an eval function string).
+    :param names: The variable names the expression may reference.
+    :type names: `sequence` of str
+    :raises: ValueError
+    """
+
+    def __init__(self, expr, names):
+        self.expr = expr
+        try:
+            tree = ast.parse(expr.strip(), mode='eval')
+        except SyntaxError:
+            raise ValueError('Unable to parse expression string: "{0}".'.format(expr))
+
+        self._allowed_names = set(names)
+        #: Variable names referenced by the expression in order of appearance.
+        self.names = []
+        self._root = self._fold_(tree.body)
+
+    def evaluate(self, arrays, out, block_bytes=None):
+        """
+        Evaluate the expression writing the result into ``out``.
+
+        :param dict arrays: Maps variable names to their arrays.
+        :param out: The output array. Its data and mask are filled in place.
+        :type out: :class:`numpy.ma.MaskedArray`
+        :param int block_bytes: The maximum size in bytes of a block. Defaults to
+         :attr:`ocgis.constants.CALC_EXPRESSION_BLOCK_BYTES`.
+        """
+        if block_bytes is None:
+            block_bytes = constants.CALC_EXPRESSION_BLOCK_BYTES
+        max_elements = max(1, block_bytes // max(out.dtype.itemsize, 1))
+        # Only arrays with the output shape are split into blocks. Other arrays are broadcast.
+        blocked = [n for n in self.names if np.shape(arrays[n]) == out.shape]
+        out_data = out.data
+        out_mask = np.ma.getmaskarray(out)
+
+        use_numexpr = env.USE_NUMEXPR and numexpr is not None
+        if use_numexpr:
+            try:
+                numexpr_expr = self._to_numexpr_(self._root)
+            except KeyError:
+                # The function is not supported by numexpr.
+                use_numexpr = False
+        for slc in iter_array_blocks(out.shape, max_elements):
+            local = {}
+            for name in self.names:
+                arr = arrays[name]
+                local[name] = arr[slc] if name in blocked else arr
+            if use_numexpr:
+                data, mask = self._evaluate_numexpr_(numexpr_expr, local)
+            else:
+                res = self._evaluate_(self._root, local)
+                data, mask = np.ma.getdata(res), np.ma.getmaskarray(res)
+            out_data[slc] = data
+            out_mask[slc] = mask
+        if np.ma.getmask(out) is np.ma.nomask:
+            out.mask = out_mask
+
+    def _evaluate_(self, node, local):
+        # Operators applied to masked arrays follow the masked semantics of evaluating the string with NumPy.
+        if isinstance(node, _Constant):
+            ret = node.value
+        elif isinstance(node, ast.Name):
+            ret = local[node.id]
+        elif isinstance(node, ast.BinOp):
+            ret = _BINARY_OPERATORS[type(node.op)][0](self._evaluate_(node.left, local),
+                                                      self._evaluate_(node.right, local))
+        elif isinstance(node, ast.UnaryOp):
+            ret = _UNARY_OPERATORS[type(node.op)][0](self._evaluate_(node.operand, local))
+        else:
+            ret = getattr(np, node.func.id)(*[self._evaluate_(arg, local) for arg in node.args])
+        return ret
+
+    def _evaluate_numexpr_(self, expr, local):
+        data = {k: np.ma.getdata(v) for k, v in local.items()}
+        res = numexpr.evaluate(expr, local_dict=data)
+        # numexpr has no masked semantics. Masked inputs and invalid results are masked.
+        mask = np.zeros(res.shape, dtype=bool)
+        for v in local.values():
+            mask |= np.ma.getmaskarray(v)
+        if np.issubdtype(res.dtype, np.inexact):
+            mask |= np.invert(np.isfinite(res))
+        return res, mask
+
+    def _fold_(self, node):
+        # Validate the node and replace sub-expressions without variables with their value.
+        if isinstance(node, ast.Name):
+            if node.id not in self._allowed_names:
+                msg = 'Unable to parse expression string: "{0}". Ensure appropriate variables have been requested. ' \
+                      'The problem string value is "{1}".'
+                raise ValueError(msg.format(self.expr, node.id))
+            if node.id not in self.names:
+                self.names.append(node.id)
+            return node
+        elif _is_number_(node):
+            return _Constant(_get_number_(node))
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            node.left = self._fold_(node.left)
+            node.right = self._fold_(node.right)
+            children = [node.left, node.right]
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            node.operand = self._fold_(node.operand)
+            children = [node.operand]
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and \
+                node.func.id in constants.ENABLED_NUMPY_UFUNCS and len(node.keywords) == 0 and \
+                getattr(node, 'starargs', None) is None and getattr(node, 'kwargs', None) is None and \
+                len(node.args) == getattr(np, node.func.id).nin:
+            node.args = [self._fold_(arg) for arg in node.args]
+            children = node.args
+        else:
+            msg = 'Unable to parse expression string: "{0}". Only arithmetic operators, numbers, variable names, ' \
+                  'and the enabled NumPy functions {1} are allowed.'
+            raise ValueError(msg.format(self.expr, constants.ENABLED_NUMPY_UFUNCS))
+
+        if all([isinstance(c, _Constant) for c in children]):
+            node = _Constant(self._evaluate_(node, {}))
+        return node
+
+    def _to_numexpr_(self, node):
+        if isinstance(node, _Constant):
+            ret = '({!r})'.format(getattr(node.value, 'item', lambda: node.value)())
+        elif isinstance(node, ast.Name):
+            ret = node.id
+        elif isinstance(node, ast.BinOp):
+            ret = '({}{}{})'.format(self._to_numexpr_(node.left), _BINARY_OPERATORS[type(node.op)][1],
+                                    self._to_numexpr_(node.right))
+        elif isinstance(node, ast.UnaryOp):
+            ret = '({}{})'.format(_UNARY_OPERATORS[type(node.op)][1], self._to_numexpr_(node.operand))
+        else:
+            ret = _NUMEXPR_FUNCTIONS[node.func.id].format(*[self._to_numexpr_(arg) for arg in node.args])
+        return ret
+
+
+class _Constant(object):
+    # A folded constant value.
+
+    def __init__(self, value):
+        self.value = value
+
+
+def _get_number_(node):
+    try:
+        return node.n
+    except AttributeError:
+        return node.value
+
+
+def _is_number_(node):
+    if type(node).__name__ == 'Num':
+        # Python versions older than 3.8.
+        return True
+    return type(node).__name__ == 'Constant' and isinstance(node.value, six.integer_types + (float,)) and \
+           not isinstance(node.value, bool)
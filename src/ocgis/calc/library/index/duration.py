@@ -3,8 +3,9 @@ from collections import OrderedDict
 import numpy as np
 from ocgis import env
 from ocgis.calc import base
+from ocgis.calc.run_length import get_run_lengths, get_run_length_frequencies, get_run_length_segments, \
+    summarize_run_lengths
 from ocgis.exc import DefinitionValidationError
-from ocgis.util.helpers import iter_array
 
 
 class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
@@ -15,6 +16,7 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
     description = 'Summarizes consecutive occurrences in a sequence where the logical operation returns TRUE. The summary operation is applied to the sequences within a temporal aggregation.'
     standard_name = 'duration'
     long_name = 'Duration'
+    has_segmented_calculation = True
 
     def calculate(self, values, threshold=None, operation=None, summary='mean'):
         """
@@ -27,37 +29,27 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
         """
 
         assert (len(values.shape) == 3)
-        # storage array for counts
-        shp_out = values.shape[-2:]
-        store = np.zeros(shp_out, dtype=self.dtype).flatten()
-        # get the summary operation from the numpy library
-        summary_operation = getattr(np, summary)
-
-        # find longest sequence for each geometry across time dimension
-        for ii, fill in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            # case of only a singular occurrence
-            if len(fill) > 1:
-                fill = summary_operation(fill)
-            else:
-                try:
-                    fill = fill[0]
-                # value is likely masked
-                except IndexError:
-                    fill = 0
-            store[ii] = fill
-
-        store.resize(shp_out)
-
-        # update the output mask. this only applies to geometries so pick the
-        # first masked time field
-        store = np.ma.array(store, mask=values.mask[0, :, :])
+        offsets = np.array([0])
+        return self.calculate_segmented(values, offsets, threshold=threshold, operation=operation, summary=summary)[0]
+
+    def calculate_segmented(self, values, offsets, threshold=None, operation=None, summary='mean'):
+        shp_out = (len(offsets),) + values.shape[-2:]
+        keys, lengths = self._get_run_lengths_(values, threshold, operation, offsets)
+        store = summarize_run_lengths(keys, lengths, int(np.prod(shp_out)), summary)
+        store = store.astype(self.dtype, copy=False).reshape(shp_out)
+
+        # Update the output mask. This only applies to geometries so pick the first masked time field of each group.
+        store = np.ma.array(store, mask=np.ma.getmaskarray(values)[offsets, :, :])
 
         return store
 
-    def _iter_consecutive_(self, values, threshold, operation):
-        # time index reference
-        ref = np.arange(0, values.shape[0])
-        # perform requested logical operation
+    def _get_run_lengths_(self, values, threshold, operation, offsets):
+        """
+        :returns: Sorted run keys and lengths. See :func:`~ocgis.calc.run_length.get_run_lengths`.
+        :rtype: tuple
+        """
+
+        # Perform requested logical operation. Masked values never extend a run.
         if operation == 'gt':
             arr = values > threshold
         elif operation == 'lt':
@@ -66,27 +58,21 @@ class Duration(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFun
             arr = values >= threshold
         elif operation == 'lte':
             arr = values <= threshold
+        arr = np.ma.filled(arr, False) & np.invert(np.ma.getmaskarray(values))
+
+        keys, lengths = get_run_lengths(arr, offsets=offsets)
 
-        # find longest sequence for each geometry across time dimension
-        for rowidx, colidx in iter_array(values[0, :, :], use_mask=False):
-            vec = arr[:, rowidx, colidx].reshape(-1)
-            # check first if there is a longer series than 1
-            if np.any(np.diff(ref[vec]) == 1):
-                # find locations where the values switch
-                diff_idx = np.diff(vec)
-                if diff_idx.shape != ref.shape:
-                    diff_idx = np.append(diff_idx, [False])
-                split_idx = ref[diff_idx] + 1
-                splits = np.array_split(vec, split_idx)
-                fill = [a.sum() for a in splits if np.all(a)]
-            # case of only a singular occurrence
-            elif np.any(vec):
-                fill = [1]
-            # case for no occurrence
-            else:
-                fill = [0]
-
-            yield (fill)
+        # Groups having only singular occurrences report a single occurrence.
+        ukeys, starts = get_run_length_segments(keys)
+        counts = np.diff(np.append(starts, keys.shape[0]))
+        singular = lengths[starts + counts - 1] == 1
+        remove = np.repeat(singular, counts)
+        remove[starts] = False
+        if remove.any():
+            keep = np.invert(remove)
+            keys, lengths = keys[keep], lengths[keep]
+
+        return keys, lengths
 
     @classmethod
     def validate(cls, ops):
@@ -112,15 +98,33 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
         :type operation: str
         """
 
-        shp_out = values.shape[-2:]
-        store = np.zeros(shp_out, dtype=object).flatten()
-        for ii, duration in enumerate(self._iter_consecutive_(values, threshold, operation)):
-            summary = self._get_summary_(duration)
-            store[ii] = summary
-        store.resize(shp_out)
+        offsets = np.array([0])
+        return self.calculate_segmented(values, offsets, threshold=threshold, operation=operation)[0]
+
+    def calculate_segmented(self, values, offsets, threshold=None, operation=None):
+        shp_out = (len(offsets),) + values.shape[-2:]
+        keys, lengths = self._get_run_lengths_(values, threshold, operation, offsets)
+        fkeys, durations, counts = get_run_length_frequencies(keys, lengths)
 
-        # Update the output mask. this only applies to geometries so pick the first masked time field
-        store = np.ma.array(store, mask=values.mask[0, :, :])
+        store = np.empty(int(np.prod(shp_out)), dtype=object)
+        ukeys, starts = get_run_length_segments(fkeys)
+
+        # Groups with no occurrences have a single zero duration.
+        empty = np.zeros(1, dtype=self.structure_dtype)
+        empty['count'] = 1
+        for key in np.setdiff1d(np.arange(store.shape[0]), ukeys, assume_unique=True):
+            store[key] = empty.copy()
+
+        stops = np.append(starts[1:], fkeys.shape[0])
+        for key, start, stop in zip(ukeys, starts, stops):
+            summary = np.empty(stop - start, dtype=self.structure_dtype)
+            summary['duration'] = durations[start:stop]
+            summary['count'] = counts[start:stop]
+            store[key] = summary
+        store = store.reshape(shp_out)
+
+        # Update the output mask. This only applies to geometries so pick the first masked time field of each group.
+        store = np.ma.array(store, mask=np.ma.getmaskarray(values)[offsets, :, :])
 
         return store
 
@@ -131,23 +135,3 @@ class FrequencyDuration(base.AbstractKeyedOutputFunction, Duration):
     @classmethod
     def validate(cls, ops):
         Duration.validate(ops)
-
-    def _get_summary_(self, duration):
-        """
-        :param duration: List of duration elements for frequency target.
-        :type duration: list
-        
-        >>> duration = [3, 5, 2, 2]
-        
-        :returns: NumPy structure with dimension equal to the count of unique elements
-         in the `duration` sequence.
-        """
-
-        set_duration = set(duration)
-        ret = np.empty(len(set_duration), dtype=self.structure_dtype)
-        for ii, sd in enumerate(set_duration):
-            idx = np.array(duration) == sd
-            count = idx.sum()
-            ret[ii]['duration'] = sd
-            ret[ii]['count'] = count
-        return ret
@@ -1,7 +1,7 @@
 import datetime as dt
 
 import numpy as np
-from ocgis import env
+from ocgis import constants, env
 from ocgis.calc import base
 from ocgis.util.units import get_are_units_equal_by_string_or_cfunits
 
@@ -45,7 +45,7 @@ class FreezeThaw(base.AbstractUnivariateSetFunction, base.AbstractParameterizedF
                                                       try_cfunits=env.USE_CFUNITS):
             tas = values - 273.15
 
-        out = np.apply_along_axis(freezethaw1d, 0, tas, threshold=threshold)
+        out = freezethawnd(tas, threshold)
         return np.ma.masked_invalid(out)
 
 
@@ -108,3 +108,110 @@ def freezethaw1d(x, threshold):
 
     # Return the number of transitions from frozen to thawed or vice-versa
     return float(len(cycles) - 2)  # There are two "artificial" transitions
+
+
+def freezethawnd(x, threshold):
+    """
+    Return the number of freeze-thaw transitions for every series along the
+    first axis. This is the vectorized equivalent of :func:`freezethaw1d`.
+
+    Parameters
+    ----------
+    x : ndarray
+      The daily temperature series (C) with time as the first axis.
+    threshold : float
+      The threshold in degree-days above or below the freezing point at
+      which we consider the soil thawed or frozen.
+
+    Returns
+    -------
+    out : ndarray
+      The number of transitions with the shape of the non-time axes. Series
+      with all values masked are NaN.
+    """
+
+    x = np.ma.asarray(x)
+    shape = x.shape[1:]
+    x = x.reshape(x.shape[0], -1)
+    out = np.empty(x.shape[1], dtype=float)
+
+    # Limit the size of the range tables by processing blocks of series.
+    levels = int(np.log2(x.shape[0] + 1)) + 1
+    nbytes = (x.shape[0] + 1) * (2 * levels + 8) * np.dtype(float).itemsize
+    block_size = max(1, constants.CALC_FREEZE_THAW_BLOCK_BYTES // nbytes)
+    for start in range(0, x.shape[1], block_size):
+        sl = slice(start, start + block_size)
+        out[sl] = _freezethaw_block_(x[:, sl], threshold)
+
+    out[np.ma.getmaskarray(x).all(axis=0)] = np.nan
+    return out.reshape(shape)
+
+
+def _freezethaw_block_(x, threshold):
+    # Masked values contribute nothing to the cumulative degree days and keep the freezing state of the previous value.
+    # This is equivalent to compressing the series as in freezethaw1d.
+    n = x.shape[0] + 1
+    mask = np.zeros((n, x.shape[1]), dtype=bool)
+    mask[1:] = np.ma.getmaskarray(x)
+    data = np.zeros((n, x.shape[1]), dtype=float)
+    data[1:] = np.ma.getdata(x)
+    data[mask] = 0
+    cx = np.cumsum(data, axis=0)
+
+    over = data >= 0
+    previous = np.where(mask, 0, np.arange(n).reshape(-1, 1))
+    np.maximum.accumulate(previous, axis=0, out=previous)
+    over = np.take_along_axis(over, previous, axis=0)
+    cross = np.zeros(over.shape, dtype=bool)
+    cross[0] = True
+    cross[:-1] |= over[1:] != over[:-1]
+
+    # For each starting position, find the first position where the cumulative degree days reach the threshold using
+    # binary lifting on range maximum and minimum tables.
+    tables = [(cx, cx)]
+    length = 1
+    while length * 2 <= n:
+        high, low = tables[-1]
+        tables.append((np.maximum(high[:-length], high[length:]), np.minimum(low[:-length], low[length:])))
+        length *= 2
+    position = np.repeat(np.arange(n).reshape(-1, 1), x.shape[1], axis=1)
+    for level in range(len(tables) - 1, -1, -1):
+        high, low = tables[level]
+        length = 2 ** level
+        valid = position + length <= n
+        index = np.minimum(position, high.shape[0] - 1)
+        jump = valid & (np.take_along_axis(high, index, axis=0) - cx < threshold) & \
+               (np.take_along_axis(low, index, axis=0) - cx > -threshold)
+        position += jump * length
+    del tables
+    found = position < n
+    event = np.minimum(position, n - 1)
+    sign = np.sign(np.take_along_axis(cx, event, axis=0) - cx)
+    sign[np.invert(found & cross)] = 0
+
+    # The next crossing at or after each position whose event is thawing or freezing.
+    following = {}
+    for s in (-1, 1):
+        nxt = np.empty((n + 1, x.shape[1]), dtype=int)
+        nxt[-1] = n
+        nxt[:-1] = np.where(sign == s, np.arange(n).reshape(-1, 1), n)
+        following[s] = np.minimum.accumulate(nxt[::-1], axis=0)[::-1]
+
+    # Alternate freeze and thaw events. Crossings before the last event are skipped.
+    columns = np.arange(x.shape[1])
+    last_position = np.zeros(x.shape[1], dtype=int)
+    last_sign = np.zeros(x.shape[1], dtype=int)
+    count = np.zeros(x.shape[1], dtype=int)
+    active = np.ones(x.shape[1], dtype=bool)
+    while active.any():
+        thaw = following[1][last_position, columns]
+        freeze = following[-1][last_position, columns]
+        current = np.where(last_sign > 0, freeze, np.where(last_sign < 0, thaw, np.minimum(thaw, freeze)))
+        active &= current < n
+        current = current[active]
+        count[active] += 1
+        last_position[active] = event[current, columns[active]]
+        last_sign[active] = sign[current, columns[active]]
+
+    # There are two "artificial" transitions.
+    return count - 1.
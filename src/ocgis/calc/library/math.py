@@ -1,6 +1,7 @@
 import numpy as np
 
 from ocgis.calc import base
+from ocgis.calc.segmented import segmented_sum
 from ocgis.util.helpers import iter_array
 
 
@@ -36,10 +37,14 @@ class Sum(base.AbstractUnivariateSetFunction):
 
     standard_name = 'sum'
     long_name = 'Sum'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.sum(values, axis=0)
 
+    def calculate_segmented(self, values, offsets):
+        return segmented_sum(values, offsets)
+
     def aggregate_spatial(self, values, weights):
         # All element values contribute in their entirety. Weights are not applied.
         return np.ma.sum(values)
@@ -6,6 +6,10 @@ from datetime import datetime
 import numpy as np
 from ocgis.calc import base
 from ocgis.calc.base import AbstractUnivariateFunction, AbstractParameterizedFunction
+from ocgis import constants
+from ocgis.calc.moving_window import moving_window_reduce
+from ocgis.calc.segmented import segmented_max, segmented_mean, segmented_median, segmented_min, segmented_percentile, \
+    segmented_std
 from ocgis.exc import DefinitionValidationError
 
 
@@ -35,43 +39,34 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
         :param str mode: See: http://docs.scipy.org/doc/numpy/reference/generated/numpy.convolve.html. The output mode
          ``full`` is not supported.
         :rtype: :class:`numpy.ma.core.MaskedArray`
-        :raises: AssertionError, NotImplementedError
+        :raises: AssertionError, ValueError, NotImplementedError
         """
 
         # 'full' is not supported as this would add dates to the temporal dimension
         assert mode in ('same', 'valid')
         assert values.ndim == 5
         assert operation in self._potential_operations
-
-        operation = getattr(np, operation)
+        self._validate_k_(k)
 
         fill = values.copy()
+        fill.mask = np.ma.getmaskarray(fill)
+        shift = int((k - 1) / 2)
+        if mode == 'valid':
+            time_slice = slice(shift, max(values.shape[1] - shift, shift))
+        else:
+            time_slice = slice(None)
 
-        # perform the moving average on the time axis
+        # Perform the moving window operation on the time axis for all windows at once.
         axes = [0, 2]
         itrs = [list(range(values.shape[axis])) for axis in axes]
         for ie, il in itertools.product(*itrs):
             values_slice = values[ie, :, il, :, :]
-            build = True
-            for origin, values_kernel in self._iter_kernel_values_(values_slice, k, mode=mode):
-                if build:
-                    # if only the valid region is returned, this index will determine where the start index for the
-                    # field/fill slice is
-                    idx_start = origin
-                    build = False
-                fill[ie, origin, il, :, :] = operation(values_kernel, axis=0)
+            fill[ie, time_slice, il, :, :] = moving_window_reduce(values_slice, k, operation, mode=mode)
 
         if mode == 'valid':
-            # slice the field and fill arrays
-            # self.field = self.field[:, idx_start:origin + 1, :, :, :]
             # Mask the invalid regions.
             fill.mask[:] = True
-            fill.mask[:, idx_start:origin + 1, :, :, :] = False
-            # self._finalize_slice = [slice(None), slice(idx_start, origin + 1), slice(None), slice(None), slice(None)]
-        elif mode == 'same':
-            pass
-        else:
-            raise NotImplementedError(mode)
+            fill.mask[:, time_slice, :, :, :] = False
 
         return fill
 
@@ -82,6 +77,18 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
             msg = 'Moving window calculations may not have a temporal grouping.'
             raise DefinitionValidationError(CalcGrouping, msg)
 
+    @classmethod
+    def validate_definition(cls, definition):
+        super(MovingWindow, cls).validate_definition(definition)
+
+        k = definition[constants.CALC_KEY_KEYWORDS].get('k')
+        if k is not None:
+            try:
+                cls._validate_k_(int(k))
+            except ValueError as e:
+                from ocgis.ops.parms.definition import Calc
+                raise DefinitionValidationError(Calc, str(e))
+
     @staticmethod
     def _iter_kernel_values_(values, k, mode='valid'):
         """
@@ -134,6 +141,11 @@ class MovingWindow(AbstractUnivariateFunction, AbstractParameterizedFunction):
         else:
             raise NotImplementedError(mode)
 
+    @staticmethod
+    def _validate_k_(k):
+        if k is None or k % 2 == 0 or k < 3:
+            raise ValueError('The moving window width "k" must be an odd integer >= 3: {}'.format(k))
+
 
 class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterizedFunction):
     key = 'daily_perc'
@@ -187,6 +199,9 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
         Creates a dictionary with keys=calendar day (month,day) and values=numpy.ndarray (2D)
         Example - to get the 2D percentile array corresponding to the 15th May: percentile_dict[5,15]
 
+        Masked and NaN values are excluded from the percentile computation. The percentile is masked where all window
+        values are masked.
+
         :param arr: array of values
         :type arr: :class:`numpy.ndarray` (3D) of float
         :param dt_arr: Corresponding time steps vector (base period: usually 1961-1990).
@@ -209,39 +224,98 @@ class DailyPercentile(base.AbstractUnivariateFunction, base.AbstractParameterize
             raise NotImplementedError(arr.ndim)
         dt_arr = dt_arr.squeeze()
 
-        # step1: creation of the dictionary with all calendar days:
-        dic_caldays = self.get_dict_caldays(dt_arr)
-
-        percentile_dict = OrderedDict()
-
-        dt_hour = dt_arr[
-            0].hour  # (we get hour of a date only one time, because usually the hour is the same for all dates in input dt_arr)
-
-        for month in list(dic_caldays.keys()):
-            for day in dic_caldays[month]:
-                # step2: we do a mask for the datetime vector for current calendar day (day/month)
-                dt_arr_mask = self.get_mask_dt_arr(dt_arr, month, day, dt_hour, window_width, only_leap_years)
-
-                # step3: we are looking for the indices of non-masked dates (i.e. where dt_arr_mask==False)
-                indices_non_masked = np.where(dt_arr_mask == False)[0]
+        # Build every calendar day window at once. Windows are stored contiguously in the index array.
+        caldays, indices, offsets = self.get_calendar_day_windows(dt_arr, window_width,
+                                                                  only_leap_years=only_leap_years)
 
-                # step4: we subset our arr
-                arr_subset = arr[indices_non_masked, :, :]
+        # Compute percentiles for blocks of calendar days limiting the size of the stacked window values.
+        sizes = np.diff(np.append(offsets, indices.shape[0]))
+        nbytes = sizes.max() * int(np.prod(arr.shape[1:])) * np.dtype(float).itemsize
+        block_size = max(1, constants.CALC_DAILY_PERCENTILE_BLOCK_BYTES // nbytes)
 
-                # step5: we compute the percentile for current arr_subset
-                ############## WARNING: type(arr_subset) = numpy.ndarray. Numpy.percentile does not work with masked arrays,
-                ############## so if arr_subset has aberrant values like 999999 or 1e+20, the result will be wrong.
-                ############## Check with numpy.nanpercentile (Numpy version 1.9) !!!
-                arr_percentille_current_calday = np.percentile(arr_subset, percentile, axis=0)
+        percentile_dict = OrderedDict()
+        for start in range(0, len(caldays), block_size):
+            stop = min(start + block_size, len(caldays))
+            block_start = offsets[start]
+            block_stop = offsets[stop] if stop < len(caldays) else indices.shape[0]
+            arr_subset = arr[indices[block_start:block_stop], :, :]
+            block = segmented_percentile(arr_subset, offsets[start:stop] - block_start, percentile)
+            for ii, calday in enumerate(caldays[start:stop]):
+                percentile_dict[calday] = block[ii]
 
-                # step6: we add to the dictionnary...
-                percentile_dict[month, day] = arr_percentille_current_calday
+        return percentile_dict
 
-                # print 'Creating percentile dictionary: month ', month, '---> OK'
+    @staticmethod
+    def get_calendar_day_windows(dt_arr, window_width, only_leap_years=False):
+        """
+        Find the time indices in the window centered on each calendar day (month-day) present in ``dt_arr``. This
+        follows the inclusion rules of :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_masked` using integer
+        day arithmetic on the whole time vector.
 
-        # print 'Percentile dictionary is created.'
+        :param dt_arr: Time steps vector.
+        :type dt_arr: :class:`numpy.ndarray` (1D) of :class:`datetime.datetime` objects
+        :param int window_width: Window width - must be odd.
+        :param bool only_leap_years: See :meth:`~ocgis.calc.library.statistics.DailyPercentile.get_masked`.
+        :returns: A tuple ``(caldays, indices, offsets)``. ``caldays`` is a sorted list of ``(month, day)`` tuples.
+         ``indices`` contains the time indices of every window stored contiguously with each window starting at the
+         corresponding ``offsets`` element.
+        :rtype: tuple
+        """
 
-        return percentile_dict
+        microseconds_per_day = 86400 * 10 ** 6
+        try:
+            dt64 = np.asarray(dt_arr, dtype='datetime64[us]')
+        except (TypeError, ValueError):
+            # Objects not recognized by numpy (i.e. "netcdftime" objects).
+            dt64 = np.array([datetime(d.year, d.month, d.day, d.hour, d.minute, d.second) for d in dt_arr],
+                            dtype='datetime64[us]')
+        days = dt64.astype('datetime64[D]')
+        # Time of day for each time step and the reference time of day used for all windows.
+        time_of_day = (dt64 - days).astype(np.int64)
+        reference = dt_arr[0].hour * 3600 * 10 ** 6
+
+        def _get_caldays_(target):
+            month_start = target.astype('datetime64[M]')
+            month = month_start.astype(np.int64) % 12 + 1
+            day = (target - month_start.astype('datetime64[D]')).astype(np.int64) + 1
+            return month * 100 + day
+
+        codes = np.unique(_get_caldays_(days))
+        half = window_width / 2.
+        reach = int(np.floor(half)) + 1
+
+        # A time step is in a calendar day's window if it is within half a window of that calendar day in a nearby year.
+        # Candidate calendar days are found by shifting each time step by whole days.
+        shifts = np.arange(-reach, reach + 1)
+        time_index = np.repeat(np.arange(days.shape[0]), shifts.shape[0])
+        shift = np.tile(shifts, days.shape[0])
+        target_codes = _get_caldays_(days[time_index] - shift)
+        difference = shift * microseconds_per_day + time_of_day[time_index] - reference
+        select = np.abs(difference) // microseconds_per_day <= half
+        time_index, target_codes = time_index[select], target_codes[select]
+
+        # February 29th windows in non-leap years are centered between February 28th and March 1st.
+        feb29 = 229
+        if feb29 in codes and not only_leap_years:
+            year = days.astype('datetime64[Y]')
+            year_value = year.astype(np.int64) + 1970
+            is_leap = ((year_value % 4 == 0) & (year_value % 100 != 0)) | (year_value % 400 == 0)
+            feb28 = year.astype('datetime64[D]') + 58
+            difference = (days - feb28).astype(np.int64) * microseconds_per_day + time_of_day - reference
+            difference = difference // microseconds_per_day
+            nonleap = np.where(np.invert(is_leap) & (difference >= -half + 1) & (difference <= half))[0]
+            time_index = np.append(time_index, nonleap)
+            target_codes = np.append(target_codes, np.repeat(feb29, nonleap.shape[0]))
+
+        # Only calendar days present in the time vector have windows.
+        present = np.isin(target_codes, codes)
+        time_index, target_codes = time_index[present], target_codes[present]
+        order = np.lexsort((time_index, target_codes))
+        time_index, target_codes = time_index[order], target_codes[order]
+        offsets = np.searchsorted(target_codes, codes)
+        caldays = [(int(c // 100), int(c % 100)) for c in codes]
+
+        return caldays, time_index, offsets
 
     @staticmethod
     def get_dict_caldays(dt_arr):
@@ -359,6 +433,7 @@ class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParam
 
     standard_name = 'frequency_percentile'
     long_name = 'Frequency Percentile'
+    has_segmented_calculation = True
 
     def calculate(self, values, percentile=None):
         """
@@ -366,8 +441,13 @@ class FrequencyPercentile(base.AbstractUnivariateSetFunction, base.AbstractParam
         :type percentile: float on the interval [0,100]
         """
 
-        ret = np.percentile(values, percentile, axis=0)
-        ret = np.ma.array(ret, mask=values.mask[0, :, :])
+        return self.calculate_segmented(values, np.array([0]), percentile=percentile)[0]
+
+    def calculate_segmented(self, values, offsets, percentile=None):
+        # Like numpy.percentile, the percentile is computed from the data under the mask. Output is masked where the
+        # first value in the group is masked.
+        ret = segmented_percentile(np.ma.getdata(values), offsets, percentile, skipna=False)
+        ret.mask = np.logical_or(ret.mask, np.ma.getmaskarray(values)[offsets])
         return ret
 
 
@@ -377,10 +457,14 @@ class Max(base.AbstractUnivariateSetFunction):
 
     standard_name = 'max'
     long_name = 'max'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.max(values, axis=0)
 
+    def calculate_segmented(self, values, offsets):
+        return segmented_max(values, offsets)
+
 
 class Min(base.AbstractUnivariateSetFunction):
     description = 'Min value for the series.'
@@ -388,20 +472,28 @@ class Min(base.AbstractUnivariateSetFunction):
 
     standard_name = 'min'
     long_name = 'Min'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.min(values, axis=0)
 
+    def calculate_segmented(self, values, offsets):
+        return segmented_min(values, offsets)
+
 
 class Mean(base.AbstractUnivariateSetFunction):
     description = 'Compute mean value of the set.'
     key = 'mean'
     standard_name = 'mean'
     long_name = 'Mean'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.mean(values, axis=0)
 
+    def calculate_segmented(self, values, offsets):
+        return segmented_mean(values, offsets)
+
 
 class Median(base.AbstractUnivariateSetFunction):
     description = 'Compute median value of the set.'
@@ -409,10 +501,14 @@ class Median(base.AbstractUnivariateSetFunction):
 
     standard_name = 'median'
     long_name = 'median'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.median(values, axis=0)
 
+    def calculate_segmented(self, values, offsets):
+        return segmented_median(values, offsets)
+
 
 class StandardDeviation(base.AbstractUnivariateSetFunction):
     description = 'Compute standard deviation of the set.'
@@ -420,6 +516,10 @@ class StandardDeviation(base.AbstractUnivariateSetFunction):
 
     standard_name = 'standard_deviation'
     long_name = 'Standard Deviation'
+    has_segmented_calculation = True
 
     def calculate(self, values):
         return np.ma.std(values, axis=0)
+
+    def calculate_segmented(self, values, offsets):
+        return segmented_std(values, offsets)
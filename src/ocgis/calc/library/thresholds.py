@@ -1,6 +1,7 @@
 import numpy as np
 
 from ocgis.calc import base
+from ocgis.calc.segmented import segmented_sum
 
 
 class Between(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFunction):
@@ -32,6 +33,7 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
     standard_name = 'threshold'
     long_name = 'threshold'
     parms_required = ('threshold', 'operation')
+    has_segmented_calculation = True
 
     def calculate(self, values, threshold=None, operation=None):
         """
@@ -41,6 +43,16 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
         :type operation: str
         """
 
+        idx = self._get_threshold_index_(values, threshold, operation)
+        ret = np.ma.sum(idx, axis=0)
+        return ret
+
+    def calculate_segmented(self, values, offsets, threshold=None, operation=None):
+        idx = self._get_threshold_index_(values, threshold, operation)
+        return segmented_sum(idx, offsets)
+
+    @staticmethod
+    def _get_threshold_index_(values, threshold, operation):
         # perform requested logical operation
         if operation == 'gt':
             idx = values > threshold
@@ -52,9 +64,7 @@ class Threshold(base.AbstractUnivariateSetFunction, base.AbstractParameterizedFu
             idx = values <= threshold
         else:
             raise NotImplementedError
-
-        ret = np.ma.sum(idx, axis=0)
-        return ret
+        return idx
 
     def _aggregate_spatial_(self, values, weights):
         return np.ma.sum(values)
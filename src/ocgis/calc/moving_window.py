@@ -0,0 +1,178 @@
+"""
+Vectorized centered moving window reductions along the time axis. Every window position is reduced at once instead of
+iterating over window origins. Masked values are excluded from the reductions and a window is masked if all its values
+are masked. The ``'median'`` operation follows :func:`numpy.median`, which ignores the mask. In ``'same'`` mode, windows overlapping the ends of the time axis are truncated.
+"""
+import numpy as np
+
+from ocgis import constants
+
+try:
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    # NumPy versions older than 1.20.
+    sliding_window_view = None
+
+
+def moving_window_reduce(values, k, operation, mode='valid'):
+    """
+    Reduce a centered window of width ``k`` around each time coordinate.
+
+    :param values: A three-dimensional array with dimensions (time, row, column).
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param int k: The odd window width.
+    :param str operation: One of ``'mean'``, ``'min'``, ``'max'``, ``'median'``, ``'var'``, or ``'std'``.
+    :param str mode: If ``'valid'``, only windows fully overlapping the time axis are reduced and the output time
+     dimension has length ``values.shape[0] - k + 1``. If ``'same'``, the output has the same shape as ``values``.
+    :rtype: :class:`numpy.ma.MaskedArray`
+    :raises: NotImplementedError
+    """
+
+    if mode not in ('same', 'valid'):
+        raise NotImplementedError(mode)
+
+    values = np.ma.asarray(values)
+    if operation == 'median':
+        return _get_window_medians_(values, k, mode)
+
+    data = values.data
+    mask = np.ma.getmaskarray(values)
+    if mode == 'same':
+        # Masked padding truncates the windows at the ends of the time axis.
+        shift = (k - 1) // 2
+        pad = [(shift, shift)] + [(0, 0)] * (values.ndim - 1)
+        data = np.pad(data, pad, mode='constant')
+        mask = np.pad(mask, pad, mode='constant', constant_values=True)
+
+    nwindows = data.shape[0] - k + 1
+    if nwindows <= 0:
+        return _get_empty_windows_(values)
+
+    valid = np.invert(mask)
+    count = _get_window_sums_(valid.astype(int), k)
+
+    if operation in ('mean', 'var', 'std'):
+        ret = _get_window_mean_(data, valid, count, k)
+        if operation != 'mean':
+            ret = _get_window_variances_(data, mask, count, ret, k)
+            if operation == 'std':
+                ret = np.sqrt(ret)
+    elif operation in ('min', 'max'):
+        if operation == 'min':
+            ufunc, fill_value = np.minimum, np.ma.minimum_fill_value(values)
+        else:
+            ufunc, fill_value = np.maximum, np.ma.maximum_fill_value(values)
+        ret = _get_window_extremes_(np.where(valid, data, fill_value), k, ufunc)
+    else:
+        raise NotImplementedError(operation)
+
+    # Masked windows hold the same values as the numpy.ma reductions.
+    masked = count == 0
+    if operation in ('min', 'max'):
+        ret[masked] = np.ma.default_fill_value(ret)
+    else:
+        ret[masked] = 0
+    return np.ma.array(ret, mask=masked)
+
+
+def _get_empty_windows_(values):
+    return np.ma.array(np.zeros((0,) + values.shape[1:], dtype=values.dtype), mask=True)
+
+
+def _get_window_extremes_(data, k, ufunc):
+    # van Herk/Gil-Werman algorithm: the time axis is split into blocks of width k. Each window spans at most two
+    # blocks and its extreme is found from the suffix accumulation of the first block and the prefix accumulation of the
+    # second block.
+    nwindows = data.shape[0] - k + 1
+    nblocks = -(-data.shape[0] // k)
+    pad = [(0, nblocks * k - data.shape[0])] + [(0, 0)] * (data.ndim - 1)
+    blocks = np.pad(data, pad, mode='edge').reshape((nblocks, k) + data.shape[1:])
+    prefix = ufunc.accumulate(blocks, axis=1).reshape((-1,) + data.shape[1:])
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + data.shape[1:])
+    return ufunc(suffix[:nwindows], prefix[k - 1:k - 1 + nwindows])
+
+
+def _get_window_mean_(data, valid, count, k):
+    if np.issubdtype(data.dtype, np.integer):
+        # Integer running sums are exact.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _get_window_sums_(np.where(valid, data, 0).astype(np.int64), k) / count.astype(float)
+
+    # Values are centered on their mean before accumulating to limit round-off in the running sums.
+    data = np.where(valid, data, 0).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = data.sum(axis=0) / valid.sum(axis=0)
+    center[np.invert(np.isfinite(center))] = 0
+    data = np.where(valid, data - center, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _get_window_sums_(data, k) / count + center
+
+
+def _get_window_medians_(values, k, mode):
+    # Every window is reduced with np.median to keep its results for masked values. In 'same' mode, the truncated
+    # windows at the ends of the time axis are reduced one at a time.
+    data = values.data
+    mask = np.ma.getmaskarray(values)
+    shift = (k - 1) // 2
+    size = values.shape[0]
+
+    ret = []
+    if size - k + 1 > 0:
+        for _, windows, mask_windows in _iter_window_blocks_(data, mask, k):
+            ret.append(np.ma.asarray(np.median(np.ma.array(windows, mask=mask_windows), axis=-1)))
+    if mode == 'same':
+        head = [_get_truncated_median_(values, origin, shift) for origin in range(min(shift, size))]
+        tail = [_get_truncated_median_(values, origin, shift) for origin in range(max(size - shift, shift), size)]
+        ret = head + ret + tail
+
+    if len(ret) == 0:
+        ret = _get_empty_windows_(values)
+    else:
+        ret = np.ma.concatenate(ret)
+    return ret
+
+
+def _get_truncated_median_(values, origin, shift):
+    window = values[max(origin - shift, 0):origin + shift + 1]
+    return np.ma.asarray(np.median(window, axis=0))[np.newaxis]
+
+
+def _get_window_variances_(data, mask, count, mean, k):
+    # The variance is computed from the deviations from the running mean. Computing it from running sums of squares is
+    # subject to cancellation for windows with little variation.
+    ret = np.zeros(mean.shape, dtype=float)
+    for sl, windows, mask_windows in _iter_window_blocks_(data, mask, k):
+        deviations = windows - mean[sl][..., np.newaxis]
+        deviations[mask_windows] = 0
+        ret[sl] = np.sum(deviations * deviations, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ret / count
+
+
+def _get_window_sums_(data, k):
+    # Running sums from the differences of a prefix sum.
+    cumulative = np.zeros((data.shape[0] + 1,) + data.shape[1:], dtype=data.dtype)
+    np.cumsum(data, axis=0, out=cumulative[1:])
+    return cumulative[k:] - cumulative[:-k]
+
+
+def _get_windows_(arr, k):
+    # Read-only view with a trailing window dimension.
+    if sliding_window_view is not None:
+        ret = sliding_window_view(arr, k, axis=0)
+    else:
+        shape = (arr.shape[0] - k + 1,) + arr.shape[1:] + (k,)
+        strides = arr.strides + (arr.strides[0],)
+        ret = np.lib.stride_tricks.as_strided(arr, shape=shape, strides=strides, writeable=False)
+    return ret
+
+
+def _iter_window_blocks_(data, mask, k):
+    # Yield blocks of window positions limiting the size of the copied window values.
+    windows = _get_windows_(data, k)
+    mask_windows = _get_windows_(mask, k)
+    nbytes = k * int(np.prod(data.shape[1:])) * np.dtype(float).itemsize
+    block_size = max(1, constants.CALC_MOVING_WINDOW_BLOCK_BYTES // max(nbytes, 1))
+    for start in range(0, windows.shape[0], block_size):
+        sl = slice(start, start + block_size)
+        yield sl, windows[sl], mask_windows[sl]
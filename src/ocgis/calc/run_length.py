@@ -0,0 +1,132 @@
+"""
+Vectorized run-length kernels along the time axis. A run is a sequence of consecutive ``True`` values for a single
+element (i.e. a grid cell). Runs are found for all elements and all temporal segments at once. Segments follow the
+convention of :mod:`ocgis.calc.segmented` with runs never crossing a segment boundary.
+
+Runs are identified by a key combining the segment and element index: ``key = segment * n_elements + element``.
+"""
+import numpy as np
+
+
+def get_run_lengths(arr, offsets=None):
+    """
+    Find the length of every run of ``True`` values along the first axis.
+
+    :param arr: Boolean array with time as the first axis. Masked values do not participate in runs.
+    :type arr: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+    :param offsets: Start index of each temporal segment. If ``None``, the time axis is a single segment.
+    :type offsets: :class:`numpy.ndarray`
+    :returns: A tuple ``(keys, lengths)``. ``keys`` contains the run key for each run. Runs are sorted by key and then
+     by length.
+    :rtype: tuple
+    """
+
+    arr = np.ma.filled(arr, False).astype(bool)
+    ntime = arr.shape[0]
+    arr = arr.reshape(ntime, -1)
+    if offsets is None:
+        offsets = np.array([0])
+    else:
+        offsets = np.asarray(offsets)
+
+    # A run starts where the previous value is false and ends where the next value is false. Segment boundaries are
+    # treated as false values.
+    previous = np.zeros_like(arr)
+    previous[1:] = arr[:-1]
+    previous[offsets] = False
+    starts = arr & np.invert(previous)
+    del previous
+    following = np.zeros_like(arr)
+    following[:-1] = arr[1:]
+    following[offsets[1:] - 1] = False
+    ends = arr & np.invert(following)
+    del following
+
+    # Element-major ordering pairs each start with its end.
+    start_element, start_time = np.nonzero(starts.T)
+    _, end_time = np.nonzero(ends.T)
+    lengths = end_time - start_time + 1
+    segments = np.searchsorted(offsets, start_time, side='right') - 1
+    keys = segments * arr.shape[1] + start_element
+
+    order = np.lexsort((lengths, keys))
+    return keys[order], lengths[order]
+
+
+def get_run_length_frequencies(keys, lengths):
+    """
+    Count the occurrences of each run length.
+
+    :param keys: Sorted run keys from :func:`~ocgis.calc.run_length.get_run_lengths`.
+    :param lengths: Run lengths from :func:`~ocgis.calc.run_length.get_run_lengths`.
+    :returns: A tuple ``(keys, durations, counts)`` with one entry for each unique key and run length. Entries are
+     sorted by key and then by run length.
+    :rtype: tuple
+    """
+
+    boundaries = np.ones(keys.shape[0], dtype=bool)
+    boundaries[1:] = (keys[1:] != keys[:-1]) | (lengths[1:] != lengths[:-1])
+    starts = np.nonzero(boundaries)[0]
+    counts = np.diff(np.append(starts, keys.shape[0]))
+    return keys[starts], lengths[starts], counts
+
+
+def get_run_length_segments(keys):
+    """
+    :param keys: Sorted run keys.
+    :returns: A tuple ``(unique keys, start index of each key's runs)``.
+    :rtype: tuple
+    """
+
+    boundaries = np.ones(keys.shape[0], dtype=bool)
+    boundaries[1:] = keys[1:] != keys[:-1]
+    starts = np.nonzero(boundaries)[0]
+    return keys[starts], starts
+
+
+def summarize_run_lengths(keys, lengths, size, summary, fill=0):
+    """
+    Summarize the runs for each key.
+
+    :param keys: Sorted run keys from :func:`~ocgis.calc.run_length.get_run_lengths`.
+    :param lengths: Run lengths from :func:`~ocgis.calc.run_length.get_run_lengths`.
+    :param int size: The number of keys (number of segments times the number of elements).
+    :param str summary: Name of the summary operation. ``'max'``, ``'mean'``, ``'median'``, ``'min'``, and ``'std'``
+     are vectorized. Other names are looked up in :mod:`numpy` and applied to each key's runs.
+    :param fill: The value for keys with no runs.
+    :returns: The summary for each key. A key with a single run reports that run's length (i.e. ``'std'`` is not zero).
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    ret = np.empty(size, dtype=float)
+    ret.fill(fill)
+    if keys.shape[0] == 0:
+        return ret
+
+    ukeys, starts = get_run_length_segments(keys)
+    counts = np.diff(np.append(starts, keys.shape[0]))
+    lengths = lengths.astype(float)
+
+    # Lengths are sorted within each key.
+    if summary == 'max':
+        ret[ukeys] = lengths[starts + counts - 1]
+    elif summary == 'min':
+        ret[ukeys] = lengths[starts]
+    elif summary == 'median':
+        ret[ukeys] = (lengths[starts + (counts - 1) // 2] + lengths[starts + counts // 2]) / 2.
+    elif summary in ('mean', 'std'):
+        means = np.add.reduceat(lengths, starts) / counts
+        if summary == 'mean':
+            ret[ukeys] = means
+        else:
+            deviations = (lengths - np.repeat(means, counts)) ** 2
+            ret[ukeys] = np.sqrt(np.add.reduceat(deviations, starts) / counts)
+    else:
+        summary_operation = getattr(np, summary)
+        for key, values in zip(ukeys, np.split(lengths, starts[1:])):
+            ret[key] = summary_operation(values)
+
+    # Keys with a single run report the run length regardless of the summary operation.
+    single = counts == 1
+    ret[ukeys[single]] = lengths[starts[single]]
+    return ret
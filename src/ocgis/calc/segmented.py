@@ -0,0 +1,223 @@
+"""
+Segmented reductions along the time axis. Temporal groups are stored contiguously in a time-sorted array with group
+start indices (``offsets``) following the convention of :meth:`numpy.ufunc.reduceat`. Each function reduces all groups
+in a single call and follows the masked semantics of the equivalent :mod:`numpy.ma` reduction (the output is masked
+where all values in a group are masked).
+"""
+import numpy as np
+
+
+def get_segment_order_statistics(values, offsets):
+    """
+    Sort the values of every segment with a single call. Values are ordered by segment and then by value with masked
+    and NaN values placed at the end of each segment.
+
+    :param values: The values to sort.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param offsets: The start index of each segment.
+    :returns: A tuple ``(ordered, count, nan_count)``. ``ordered`` is the sorted data array. ``count`` is the number of
+     values in each segment that are not masked or NaN. ``nan_count`` is the number of unmasked NaN values in each
+     segment.
+    :rtype: tuple
+    """
+
+    data = np.ma.getdata(values)
+    mask = np.ma.getmaskarray(values)
+    if np.issubdtype(data.dtype, np.floating):
+        is_nan = np.logical_and(np.isnan(data), np.invert(mask))
+        missing = np.logical_or(mask, is_nan)
+    else:
+        is_nan = np.zeros(data.shape, dtype=bool)
+        missing = mask
+
+    segment = np.repeat(np.arange(len(offsets)), get_segment_sizes(values, offsets))
+    segment = np.broadcast_to(segment.reshape((-1,) + (1,) * (values.ndim - 1)), values.shape)
+    order = np.lexsort((data, missing, segment), axis=0)
+    ordered = np.take_along_axis(data, order, axis=0)
+
+    count = np.add.reduceat(np.invert(missing), offsets, axis=0, dtype=int)
+    nan_count = np.add.reduceat(is_nan, offsets, axis=0, dtype=int)
+    return ordered, count, nan_count
+
+
+def get_segment_selection(group_indices, size):
+    """
+    Create the time selection and segment offsets for a sequence of temporal groups.
+
+    :param group_indices: Sequence of integer index arrays defining the temporal groups.
+    :type group_indices: `sequence` of :class:`numpy.ndarray`
+    :param int size: The length of the time axis.
+    :returns: A tuple ``(selection, offsets)``. ``selection`` orders the time axis so groups are contiguous. It is a
+     slice if the groups are already contiguous and sorted. ``offsets`` contains the start index of each group in the
+     ordered time axis. ``None`` is returned if there are no groups or any group is empty.
+    :rtype: tuple | None
+    """
+
+    if group_indices is None or len(group_indices) == 0:
+        return None
+    sizes = np.array([len(gidx) for gidx in group_indices])
+    if (sizes == 0).any():
+        return None
+
+    offsets = np.zeros(len(sizes), dtype=int)
+    offsets[1:] = np.cumsum(sizes)[:-1]
+    selection = np.concatenate(group_indices)
+    if selection.shape[0] == size and (selection == np.arange(size)).all():
+        selection = slice(None)
+    return selection, offsets
+
+
+def get_segment_sizes(values, offsets):
+    """
+    :returns: The number of time steps in each segment.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    return np.diff(np.append(offsets, values.shape[0]))
+
+
+def segmented_count(values, offsets):
+    """
+    :returns: Count of unmasked values in each segment.
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    return np.add.reduceat(np.invert(np.ma.getmaskarray(values)), offsets, axis=0, dtype=int)
+
+
+def segmented_max(values, offsets):
+    return _segmented_extreme_(values, offsets, np.maximum, np.ma.maximum_fill_value(values))
+
+
+def segmented_mean(values, offsets, count=None):
+    if count is None:
+        count = segmented_count(values, offsets)
+    sums = np.add.reduceat(values.filled(0), offsets, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data = sums * 1. / count
+    return np.ma.array(data, mask=count == 0)
+
+
+def segmented_min(values, offsets):
+    return _segmented_extreme_(values, offsets, np.minimum, np.ma.minimum_fill_value(values))
+
+
+def segmented_median(values, offsets, order_statistics=None):
+    """
+    Segmented version of :func:`numpy.ma.median`. The median of segments with unmasked NaN values is NaN.
+
+    :param order_statistics: The return value of :func:`~ocgis.calc.segmented.get_segment_order_statistics`. If
+     ``None``, it is computed.
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    if order_statistics is None:
+        order_statistics = get_segment_order_statistics(values, offsets)
+    ordered, count, nan_count = order_statistics
+    if not np.issubdtype(ordered.dtype, np.inexact):
+        ordered = ordered.astype(float)
+
+    half = count // 2
+    lower = np.where(count % 2 == 1, half, np.maximum(half - 1, 0))
+    a = _take_segment_position_(ordered, offsets, lower)
+    b = _take_segment_position_(ordered, offsets, half)
+    with np.errstate(invalid='ignore'):
+        data = (a + b) / 2.
+    data[nan_count > 0] = np.nan
+    return np.ma.array(data, mask=(count + nan_count) == 0)
+
+
+def segmented_percentile(values, offsets, percentile, skipna=True, order_statistics=None):
+    """
+    Linearly interpolated percentile of each segment matching :func:`numpy.percentile`. Masked values are excluded.
+
+    :param values: The values to reduce.
+    :type values: :class:`numpy.ma.MaskedArray`
+    :param offsets: The start index of each segment.
+    :param percentile: The percentile or sequence of percentiles to compute on the interval [0, 100]. If a sequence
+     is provided, the output has a leading percentile dimension.
+    :type percentile: float | sequence
+    :param bool skipna: If ``True``, exclude NaN values. Otherwise, the percentile of segments with NaN values is NaN.
+    :param order_statistics: The return value of :func:`~ocgis.calc.segmented.get_segment_order_statistics`. If
+     ``None``, it is computed.
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    if order_statistics is None:
+        order_statistics = get_segment_order_statistics(values, offsets)
+    ordered, count, nan_count = order_statistics
+    # Floating point values are interpolated in their own precision like numpy.
+    if not np.issubdtype(ordered.dtype, np.inexact):
+        ordered = ordered.astype(float)
+
+    ret = []
+    for p in np.atleast_1d(percentile):
+        index = (count - 1) * (p / 100.)
+        lower = np.floor(index).astype(int)
+        np.clip(lower, 0, None, out=lower)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+        a = _take_segment_position_(ordered, offsets, lower)
+        b = _take_segment_position_(ordered, offsets, upper)
+
+        # Use the same interpolation as numpy to avoid differences in the last digit.
+        t = index - lower
+        diff = b - a
+        with np.errstate(invalid='ignore'):
+            data = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+        if skipna:
+            mask = count == 0
+        else:
+            data[nan_count > 0] = np.nan
+            mask = (count + nan_count) == 0
+        ret.append(np.ma.array(data, mask=mask))
+
+    if np.ndim(percentile) == 0:
+        ret = ret[0]
+    else:
+        ret = np.ma.array([r.data for r in ret], mask=[r.mask for r in ret])
+    return ret
+
+
+def segmented_sample_size(values, offsets):
+    """
+    Segmented version of :meth:`~ocgis.calc.base.AbstractFunction.get_sample_size`. The sample size is masked if the
+    first value in the segment is masked.
+
+    :rtype: :class:`numpy.ma.MaskedArray`
+    """
+
+    count = segmented_count(values, offsets)
+    return np.ma.array(count, mask=np.ma.getmaskarray(values)[offsets])
+
+
+def segmented_std(values, offsets, ddof=0):
+    count = segmented_count(values, offsets)
+    mean = segmented_mean(values, offsets, count=count)
+    anomaly = values - np.repeat(mean.data, get_segment_sizes(values, offsets), axis=0)
+    squared = np.add.reduceat(np.ma.filled(anomaly * anomaly, 0), offsets, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data = np.sqrt(squared / (count - ddof))
+    return np.ma.array(data, mask=(count - ddof) <= 0)
+
+
+def segmented_sum(values, offsets):
+    count = segmented_count(values, offsets)
+    if values.dtype == bool:
+        dtype = int
+    else:
+        dtype = None
+    data = np.add.reduceat(values.filled(0), offsets, axis=0, dtype=dtype)
+    return np.ma.array(data, mask=count == 0)
+
+
+def _segmented_extreme_(values, offsets, ufunc, fill_value):
+    count = segmented_count(values, offsets)
+    data = ufunc.reduceat(values.filled(fill_value), offsets, axis=0)
+    return np.ma.array(data, mask=count == 0)
+
+
+def _take_segment_position_(ordered, offsets, position):
+    # Select values from each segment of a segment-sorted array. "position" has one leading element per segment.
+    index = position + offsets.reshape((-1,) + (1,) * (position.ndim - 1))
+    index = np.minimum(index, ordered.shape[0] - 1)
+    return np.take_along_axis(ordered, index, axis=0)
@@ -3,16 +3,28 @@ import itertools
 import numpy as np
 
 
-def get_tile_schema(nrow, ncol, tdim, origin=0):
+def get_tile_schema(nrow, ncol, tdim, origin=0, offset=(0, 0)):
+    """
+    Split a grid into tiles.
+
+    :param int nrow: The number of grid rows.
+    :param int ncol: The number of grid columns.
+    :param tdim: The tile dimension. If an integer, tiles are square. Otherwise, a ``(row, column)`` tile shape.
+    :type tdim: int | tuple
+    :param int origin: The start index of the first tile.
+    :param tuple offset: The ``(row, column)`` index offset of the grid. Tile boundaries are placed on multiples of the
+     tile shape after adding the offset. The first tile is truncated if the offset is not a multiple of the tile shape.
+    :returns: A dictionary mapping tile identifiers to dictionaries with ``'row'`` and ``'col'`` ``[start, stop]``
+     index pairs.
+    :rtype: dict
+    """
     ret = {}
-    row_idx = np.arange(origin, nrow + tdim, step=tdim, dtype=int)
-    if row_idx[-1] > nrow:
-        row_idx[-1] = nrow
-    col_idx = np.arange(origin, ncol + tdim, step=tdim, dtype=int)
-    if col_idx[-1] > ncol:
-        col_idx[-1] = ncol
-    row_slices = get_slices(row_idx)
-    col_slices = get_slices(col_idx)
+    try:
+        trow, tcol = tdim
+    except TypeError:
+        trow, tcol = tdim, tdim
+    row_slices = get_slices(_get_tile_boundaries_(nrow, trow, origin, offset[0]))
+    col_slices = get_slices(_get_tile_boundaries_(ncol, tcol, origin, offset[1]))
     tile_id = 0
     for row, col in itertools.product(list(range(len(row_slices))), list(range(len(col_slices)))):
         ret.update({tile_id: {'row': row_slices[row], 'col': col_slices[col]}})
@@ -20,6 +32,36 @@ def get_tile_schema(nrow, ncol, tdim, origin=0):
     return (ret)
 
 
+def get_tile_shape(nrow, ncol, max_cells, chunks=None):
+    """
+    Choose a tile shape containing at most ``max_cells`` grid cells. Tiles span complete rows when possible as these
+    are contiguous in row-major storage. Otherwise, tiles span a single row of chunks.
+
+    :param int nrow: The number of grid rows.
+    :param int ncol: The number of grid columns.
+    :param int max_cells: The maximum number of grid cells in a tile.
+    :param tuple chunks: The ``(row, column)`` chunk shape of the source data. Tile dimensions are multiples of the
+     chunk dimensions. If ``None`` or a chunk has more than ``max_cells`` grid cells, the chunk shape is ``(1, 1)``.
+    :returns: The ``(row, column)`` tile shape.
+    :rtype: tuple
+    """
+    if chunks is None:
+        chunks = (1, 1)
+    crow = max(1, min(int(chunks[0]), nrow))
+    ccol = max(1, min(int(chunks[1]), ncol))
+    max_cells = max(1, int(max_cells))
+    if crow * ccol > max_cells:
+        crow, ccol = 1, 1
+
+    if max_cells >= crow * ncol:
+        tcol = ncol
+        trow = max(crow, max_cells // ncol // crow * crow)
+    else:
+        trow = crow
+        tcol = max(ccol, max_cells // crow // ccol * ccol)
+    return min(trow, nrow), min(tcol, ncol)
+
+
 def get_slices(arr):
     ret = [None] * (arr.shape[0] - 1)
     for idx in range(arr.shape[0]):
@@ -30,3 +72,9 @@ def get_slices(arr):
         except IndexError:
             break
     return (ret)
+
+
+def _get_tile_boundaries_(n, tdim, origin, offset):
+    ret = np.arange(origin - offset % tdim, n + tdim, step=tdim, dtype=int)
+    ret = np.unique(np.clip(ret, origin, n))
+    return ret
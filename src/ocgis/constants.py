@@ -18,6 +18,9 @@ DEFAULT_TEMPORAL_UNITS = 'days since 0001-01-01 00:00:00'
 #: Default name for the time dimension.
 DEFAULT_TEMPORAL_NAME = 'time'
 
+#: Value for ``format_time`` selecting integer date parts as the time backend.
+FORMAT_TIME_PARTS = 'parts'
+
 #: Default sample size variable standard name.
 DEFAULT_SAMPLE_SIZE_STANDARD_NAME = 'sample_size'
 
@@ -91,6 +94,11 @@ class HeaderName(object):
 OCGIS_UNIQUE_GEOMETRY_IDENTIFIER = HeaderName.ID_SELECTION_GEOMETRY.upper()
 
 
+class ExecutorName(object):
+    PROCESS = 'process'
+    SERIAL = 'serial'
+
+
 class OutputFormatName(object):
     CSV = 'csv'
     CSV_SHAPEFILE = 'csv-shp'
@@ -116,6 +124,22 @@ CALC_MONTH_CENTROID = 16
 CALC_YEAR_CENTROID_MONTH = 7
 #: The default day value for year centroids.
 CALC_YEAR_CENTROID_DAY = 1
+#: Maximum number of bytes of stacked window values used by the daily percentile calculation at a time.
+CALC_DAILY_PERCENTILE_BLOCK_BYTES = 268435456
+#: Maximum number of bytes of window values sorted at a time by moving window median and variance calculations.
+CALC_MOVING_WINDOW_BLOCK_BYTES = 268435456
+#: Maximum number of bytes of cumulative degree day range tables used by the freeze-thaw calculation at a time.
+CALC_FREEZE_THAW_BLOCK_BYTES = 268435456
+#: Maximum number of bytes of output values computed at a time when evaluating string expressions.
+CALC_EXPRESSION_BLOCK_BYTES = 1048576
+#: Default maximum number of bytes of array data held in memory by tiled computations.
+LARGE_ARRAY_MEMORY_BUDGET = 536870912
+#: Maximum number of bytes of a block read when gathering fancy indices from a NetCDF variable.
+NETCDF_READ_BLOCK_BYTES = 268435456
+#: Maximum number of bytes of a slab read from source by lazy variable values.
+VALUE_SLAB_BYTES = 67108864
+#: Maximum number of bytes of aggregated geometry values buffered in memory by netCDF time series output.
+NETCDF_TIMESERIES_BUFFER_BYTES = 268435456
 
 #: The number of values to use when calculating data resolution.
 RESOLUTION_LIMIT = 100
@@ -286,6 +310,7 @@ class MPIWriteMode(Enum):
     WRITE = 0
     APPEND = 2
     ASYNCHRONOUS = 3
+    SHARD = 4
 
 
 class TagName(object):
@@ -338,6 +363,7 @@ class KeywordArgument(object):
     IS_EMPTY = 'is_empty'
     ITER_KWARGS = 'iter_kwargs'
     KEEP_TOUCHES = 'keep_touches'
+    LAZY_VALUE = 'lazy_value'
     MASK = 'mask'
     MELTED = 'melted'
     NAME = 'name'
@@ -359,6 +385,7 @@ class KeywordArgument(object):
     SIZE = 'size'
     SNIPPET = 'snippet'
     STANDARDIZE = 'standardize'
+    STREAMING = 'streaming'
     STRICT = 'strict'
     TAG = 'tag'
     UGID = 'ugid'
@@ -371,6 +398,7 @@ class KeywordArgument(object):
     VALUE = 'value'
     VARIABLE = 'variable'
     VARIABLE_KWARGS = 'variable_kwargs'
+    VARIABLE_KWARGS_BY_NAME = 'variable_kwargs_by_name'
     WITH_PROJ4 = 'with_proj4'
     WRAPPED_STATE = 'wrapped_state'
     X = 'x'
@@ -514,6 +542,13 @@ class GridChunkerConstants(object):
                      'src_template': 'split_src_{}.nc',
                      'wgt_template': 'esmf_weights_{}.nc',
                      'index_file': '01-split_index.nc'}
+    # Number of elements along the leading extra (non-spatial) dimension to regrid at a time with the sparse SMM engine.
+    SMM_BLOCK_SIZE = 100
+
+    class SMMEngine(object):
+        AUTO = 'auto'
+        ESMF = 'esmf'
+        SCIPY = 'scipy'
 
     class IndexFile(object):
         NAME_DESTINATION_VARIABLE = 'grid_chunker_destination'
@@ -203,6 +203,17 @@ class AbstractCollectionConverter(AbstractFileConverter):
                         for subset_field in list(coll.children.values()):
                             subset_field.write(ugeom_fiona_path, write_mode=write_mode, driver=DriverVector)
 
+        self._write_auxiliary_files_()
+
+        # Return the internal path unless overloaded by subclasses.
+        ret = self._get_return_()
+
+        return ret
+
+    def _write_auxiliary_files_(self):
+        """
+        Write the metadata, dataset descriptor, and source metadata files next to the output.
+        """
         # The metadata and dataset descriptor files may only be written if OCGIS operations are present.
         ops = self.ops
         if ops is not None and self.add_auxiliary_files and MPI_RANK == 0:
@@ -228,11 +239,6 @@ class AbstractCollectionConverter(AbstractFileConverter):
                 path = os.path.join(self.outdir, self.prefix + '_source_metadata.txt')
                 _write_source_meta_(path, ops)
 
-        # Return the internal path unless overloaded by subclasses.
-        ret = self._get_return_()
-
-        return ret
-
 
 @six.add_metaclass(abc.ABCMeta)
 class AbstractTabularConverter(AbstractCollectionConverter):
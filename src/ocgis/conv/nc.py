@@ -1,21 +1,26 @@
 import datetime
+import logging
+from collections import OrderedDict
 
 import numpy as np
 import ocgis
 import six
 from ocgis import RequestDataset
-from ocgis import env
+from ocgis import constants, env, vm
 from ocgis.calc.base import AbstractMultivariateFunction, AbstractKeyedOutputFunction
 from ocgis.calc.engine import CalculationEngine
 from ocgis.calc.eval_function import MultivariateEvalFunction
 from ocgis.constants import DimensionName
 from ocgis.constants import HeaderName, VariableName
-from ocgis.constants import KeywordArgument
+from ocgis.constants import KeywordArgument, MPIWriteMode
 from ocgis.conv.base import AbstractCollectionConverter
 from ocgis.driver.nc import DriverNetcdf
 from ocgis.environment import get_dtype
 from ocgis.exc import DefinitionValidationError
 from ocgis.ops.engine import get_data_model
+from ocgis.util.logging_ocgis import ocgis_lh
+from ocgis.variable.base import is_string
+from ocgis.variable.geom import GeometryVariable
 
 
 class NcConverter(AbstractCollectionConverter):
@@ -24,21 +29,31 @@ class NcConverter(AbstractCollectionConverter):
 
     :param options: (``=None``) The following options are valid:
 
-    +------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
-    | Option                 | Description                                                                                                                            |
-    +========================+========================================================================================================================================+
-    | data_model             | The netCDF data model: http://unidata.github.io/netcdf4-python/#netCDF4.Dataset.                                                       |
-    +------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
-    | variable_kwargs        | Dictionary of keyword parameters to use for netCDF variable creation. See: http://unidata.github.io/netcdf4-python/#netCDF4.Variable.  |
-    +------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
-    | unlimited_to_fixedsize | If ``True``, convert the unlimited dimension to fixed size. Only applies to time and level dimensions.                                 |
-    +------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
-    | geom_dim               | The name of the dimension storing aggregated (unioned) outputs. Only applies when ``aggregate is True``.                               |
-    +------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | Option                  | Description                                                                                                                            |
+    +=========================+========================================================================================================================================+
+    | data_model              | The netCDF data model: http://unidata.github.io/netcdf4-python/#netCDF4.Dataset.                                                       |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | variable_kwargs         | Dictionary of keyword parameters to use for netCDF variable creation. See: http://unidata.github.io/netcdf4-python/#netCDF4.Variable.  |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | variable_kwargs_by_name | Dictionary mapping variable names to keyword parameters for netCDF variable creation. These update ``variable_kwargs`` for the named   |
+    |                         | variables (i.e. ``zlib``, ``complevel``, ``chunksizes``, ``shuffle``).                                                                 |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | unlimited_to_fixedsize  | If ``True``, convert the unlimited dimension to fixed size. Only applies to time and level dimensions.                                 |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | geom_dim                | The name of the dimension storing aggregated (unioned) outputs. Only applies when ``aggregate is True``.                               |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | buffer_bytes            | Maximum size in bytes of aggregated outputs buffered in memory. Buffered outputs are written in blocks along the geometry              |
+    |                         | dimension. Only applies when ``aggregate is True``. See :attr:`ocgis.constants.NETCDF_TIMESERIES_BUFFER_BYTES`.                        |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
+    | streaming               | If ``True``, define all variables before writing values. Values of unloaded source variables are read and written in slabs along the   |
+    |                         | unlimited (time) dimension. See :attr:`ocgis.constants.VALUE_SLAB_BYTES`.                                                              |
+    +-------------------------+----------------------------------------------------------------------------------------------------------------------------------------+
 
 
     >>> options = {'data_model': 'NETCDF4_CLASSIC'}
     >>> options = {'variable_kwargs': {'zlib': True, 'complevel': 4}}
+    >>> options = {'streaming': True, 'variable_kwargs_by_name': {'tas': {'zlib': True, 'chunksizes': (1, 64, 128)}}}
 
     :type options: str
     """
@@ -111,6 +126,17 @@ class NcConverter(AbstractCollectionConverter):
                   'or aggregated (aggregate=True).'
             _raise_(msg, OutputFormat)
 
+    def write(self):
+        # Aggregated outputs for each selection geometry are written to a single time series file. Buffer these and
+        # write them in blocks instead of appending to the file for each geometry.
+        if self.ops is None or not self.ops.aggregate or vm.size > 1:
+            return super(NcConverter, self).write()
+
+        ocgis_lh('starting buffered time series write', self._log, logging.DEBUG)
+        self._write_timeseries_()
+        self._write_auxiliary_files_()
+        return self._get_return_()
+
     def _preformatting_(self, i, coll):
         """
         Modify in place the collections so they can be saved as discrete
@@ -213,9 +239,9 @@ class NcConverter(AbstractCollectionConverter):
             gid = field[HeaderName.ID_GEOMETRY]
             gid.attrs['cf_role'] = 'timeseries_id'
 
-            # Name of spatial dimension
+            # Name of spatial dimension. Rename on the field so variables reference the new dimension name.
             if self.options.get('geom_dim', None):
-                gdim.set_name(self.options.get('geom_dim', None))
+                field.rename_dimension(gdim.name, self.options.get('geom_dim', None))
 
             return coll
 
@@ -281,6 +307,9 @@ class NcConverter(AbstractCollectionConverter):
         unlimited_to_fixedsize = self.options.get(KeywordArgument.UNLIMITED_TO_FIXED_SIZE, False)
         variable_kwargs[KeywordArgument.UNLIMITED_TO_FIXED_SIZE] = unlimited_to_fixedsize
         write_kwargs[KeywordArgument.VARIABLE_KWARGS] = variable_kwargs
+        write_kwargs[KeywordArgument.VARIABLE_KWARGS_BY_NAME] = self.options.get(
+            KeywordArgument.VARIABLE_KWARGS_BY_NAME, {})
+        write_kwargs[KeywordArgument.STREAMING] = self.options.get(KeywordArgument.STREAMING, False)
         write_kwargs[KeywordArgument.DATASET_KWARGS] = {KeywordArgument.FORMAT: self._get_file_format_()}
 
         # This is the output path. The driver handles MPI writing.
@@ -304,3 +333,112 @@ class NcConverter(AbstractCollectionConverter):
         """:type arch: :class:`ocgis.Field`"""
 
         self._write_archetype_(arch, ds, self._variable_kwargs)
+
+    def _write_timeseries_(self):
+        """
+        Write aggregated collections to a single time series file. The first collection is formatted as a template for
+        the output variables (see :meth:`~ocgis.conv.nc.NcConverter._preformatting_`). Values of each collection are
+        copied into buffers along the geometry dimension. Buffers are written when full and after the last collection.
+        """
+        max_bytes = self.options.get('buffer_bytes', constants.NETCDF_TIMESERIES_BUFFER_BYTES)
+
+        field = None
+        start = 0
+        for i, coll in enumerate(self):
+            values = _get_timeseries_values_(coll)
+
+            if field is None:
+                field = self._preformatting_(i, coll).archetype_field
+                gdim = field[HeaderName.ID_GEOMETRY].dimensions[0]
+                variables = [v for v in field.iter_variables_by_dimensions([gdim]) if
+                             not isinstance(v, GeometryVariable)]
+                length = _get_timeseries_buffer_length_(variables, gdim, max_bytes)
+                buffers = OrderedDict()
+                for var in variables:
+                    shape = list(var.shape)
+                    shape[var.dimension_names.index(gdim.name)] = length
+                    if is_string(var.dtype) or var.is_string_object:
+                        dtype = object
+                    else:
+                        dtype = var.dtype
+                    buffers[var.name] = (np.zeros(shape, dtype=dtype), np.zeros(shape, dtype=bool))
+            elif i - start == length:
+                self._write_timeseries_block_(field, gdim, variables, buffers, start, length)
+                start = i
+
+            for var in variables:
+                data, mask = buffers[var.name]
+                value = values[var.name]
+                slc = [slice(None)] * data.ndim
+                slc[var.dimension_names.index(gdim.name)] = i - start
+                data[tuple(slc)] = np.ma.getdata(value)
+                mask[tuple(slc)] = np.ma.getmaskarray(value)
+
+        if field is not None:
+            self._write_timeseries_block_(field, gdim, variables, buffers, start, i - start + 1)
+
+    def _write_timeseries_block_(self, field, gdim, variables, buffers, start, count):
+        """
+        Write a block of buffered time series values. The first block creates the output file.
+
+        :param field: The template field.
+        :type field: :class:`~ocgis.Field`
+        :param gdim: The geometry dimension.
+        :type gdim: :class:`~ocgis.Dimension`
+        :param list variables: The template variables with the geometry dimension.
+        :param dict buffers: Maps variable names to buffered value and mask arrays.
+        :param int start: The global index of the first geometry in the block.
+        :param int count: The number of buffered geometries.
+        """
+        size = gdim.size
+        gdim.set_size(count)
+        for var in variables:
+            data, mask = buffers[var.name]
+            slc = [slice(None)] * data.ndim
+            slc[var.dimension_names.index(gdim.name)] = slice(0, count)
+            data = data[tuple(slc)]
+            if data.dtype == object:
+                data = data.astype(str)
+                if start == 0:
+                    # The first block defines the length of the string dimension.
+                    lengths = [len(v) for v in data.flat] + [var.string_max_length_global or 0]
+                    var.set_string_max_length_global(value=max(lengths))
+            var.set_value(data)
+            mask = mask[tuple(slc)]
+            if var.has_mask or mask.any():
+                var.set_mask(mask)
+
+        gdim.set_size(size)
+        for var in field.iter_variables_by_dimensions([gdim]):
+            var.dimensions_dict[gdim.name].bounds_local = (start, start + count)
+
+        if start == 0:
+            write_mode = None
+        else:
+            write_mode = MPIWriteMode.APPEND
+        write_kwargs = {KeywordArgument.PATH: self.path, KeywordArgument.WRITE_MODE: write_mode}
+        self._write_archetype_(field, write_kwargs, self._variable_kwargs)
+
+
+def _get_timeseries_buffer_length_(variables, gdim, max_bytes):
+    # The number of geometries buffered in memory. At least one geometry is always buffered.
+    nbytes = 0
+    for var in variables:
+        nbytes += (np.dtype(var.dtype).itemsize + 1) * var.size // gdim.size
+    return int(min(max(max_bytes // max(nbytes, 1), 1), gdim.size))
+
+
+def _get_timeseries_values_(coll):
+    # Values of an aggregated collection to write for its selection geometry. The unioned geometry dimension of the
+    # collection has a single element which is removed from the values.
+    ugid = list(coll.properties.keys())[0]
+    field = coll.archetype_field
+    lon, lat = coll.geoms[ugid].centroid.xy
+
+    ret = {field.x.name: lon[0], field.y.name: lat[0]}
+    ret.update(coll.properties[ugid])
+    udim = field.dimensions[DimensionName.UNIONED_GEOMETRY]
+    for var in field.iter_variables_by_dimensions([udim]):
+        if var.name not in ret and not isinstance(var, GeometryVariable):
+            ret[var.name] = var.get_masked_value().take(0, axis=var.dimension_names.index(udim.name))
+    return ret
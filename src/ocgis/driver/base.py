@@ -8,12 +8,14 @@ from warnings import warn
 import numpy as np
 import six
 from ocgis import constants, GridUnstruct
-from ocgis import vm
+from ocgis import vm, env
 from ocgis.base import AbstractOcgisObject, raise_if_empty
 from ocgis.base import get_variable_names
 from ocgis.collection.field import Field
 from ocgis.constants import MPIWriteMode, TagName, KeywordArgument, OcgisConvention, VariableName, DecompositionType
 from ocgis.driver.dimension_map import DimensionMap
+from ocgis.driver.metadata_cache import metadata_cache, get_metadata_cache_key
+from ocgis.driver.pool import dataset_pool
 from ocgis.exc import DefinitionValidationError, NoDataVariablesFound, DimensionMapError, VariableMissingMetadataError, \
     GridDeficientError, OcgWarning
 from ocgis.util.helpers import get_group
@@ -41,6 +43,7 @@ class AbstractDriver(AbstractOcgisObject):
     _esmf_grid_class = constants.ESMFGridClass.GRID  # The ESMF grid class type.
     _is_unstructured = False  # Flag to indicate if the driver is for unstructured grids
     _priority = False
+    pool_handles = False  # If True, read-only file handles may be borrowed from the dataset handle pool.
 
     def __init__(self, rd):
         self.rd = rd
@@ -72,7 +75,24 @@ class AbstractDriver(AbstractOcgisObject):
     @property
     def dimension_map_raw(self):
         if self._dimension_map_raw is None:
-            self._dimension_map_raw = create_dimension_map_raw(self, self.metadata_raw)
+            key = None
+            if self.rd is not None and self.rd.predicate is None:
+                key = get_metadata_cache_key(self)
+                # Items for a source share its key. The rotated pole priority is part of the item name.
+                name = 'dimension_map_raw_{}'.format(int(self.rd.rotated_pole_priority))
+            if key is not None:
+                try:
+                    self._dimension_map_raw = metadata_cache.get(key, name)
+                except KeyError:
+                    pass
+            if self._dimension_map_raw is None:
+                # Dimension map creation may modify the environment (i.e. for rotated pole coordinate systems). Do not
+                # cache the dimension map if this happens.
+                original_env = (env.SET_GRID_AXIS_ATTRS, env.COORDSYS_ACTUAL)
+                self._dimension_map_raw = create_dimension_map_raw(self, self.metadata_raw)
+                new_env = (env.SET_GRID_AXIS_ATTRS, env.COORDSYS_ACTUAL)
+                if key is not None and all([o is n for o, n in zip(original_env, new_env)]):
+                    metadata_cache.set(key, name, self._dimension_map_raw)
         return self._dimension_map_raw
 
     @property
@@ -443,7 +463,8 @@ class AbstractDriver(AbstractOcgisObject):
         :rtype: dict
         """
 
-        metadata_subclass = self._get_metadata_main_()
+        metadata_subclass = metadata_cache.get_or_create(get_metadata_cache_key(self), 'metadata',
+                                                         self._get_metadata_main_)
 
         # Use the predicate (filter) if present on the request dataset.
         # TODO: Should handle groups?
@@ -569,6 +590,20 @@ class AbstractDriver(AbstractOcgisObject):
     def get_variable_value(self, variable):
         """Get value for the variable."""
 
+    def get_variable_value_reader(self, variable):
+        """
+        Get a function reading parts of the variable's value from source. Used to read values in slabs. See
+        :class:`~ocgis.variable.lazy.LazyArray`.
+
+        :param variable: The source variable.
+        :type variable: :class:`~ocgis.SourcedVariable`
+        :returns: A tuple ``(key, reader)``. ``key`` is hashable and identifies the source selection. ``reader`` takes
+         a tuple of slices (one for each dimension) relative to the variable's current selection and returns the value
+         for those slices. ``None`` if the driver does not support partial reads for the variable.
+        :rtype: tuple | None
+        """
+        return None
+
     @classmethod
     def get_variable_write_dtype(cls, variable):
         return cls.get_variable_for_writing(variable).dtype
@@ -961,19 +996,30 @@ def driver_scope(ocgis_driver, opened_or_path=None, mode='r', **kwargs):
     else:
         rd = None
 
+    pool_key = None
     if ocgis_driver.inquire_opened_state(opened_or_path):
         should_close = False
     else:
-        should_close = True
         if rd is not None and rd.driver_kwargs is not None:
             kwargs.update(rd.driver_kwargs)
-        opened_or_path = ocgis_driver.open(uri=opened_or_path, mode=mode, rd=rd, **kwargs)
+        if mode == 'r' and ocgis_driver.pool_handles and env.USE_DATASET_POOL:
+            # Borrow a read-only handle from the pool. The pool is responsible for closing it.
+            should_close = False
+            pool_key, opened_or_path = dataset_pool.borrow(ocgis_driver, opened_or_path, mode=mode, rd=rd, **kwargs)
+        else:
+            should_close = True
+            # Pooled handles for a file being modified are stale.
+            if mode != 'r' and len(dataset_pool) > 0:
+                dataset_pool.invalidate(opened_or_path)
+            opened_or_path = ocgis_driver.open(uri=opened_or_path, mode=mode, rd=rd, **kwargs)
 
     try:
         yield opened_or_path
     finally:
         if should_close:
             ocgis_driver.close(opened_or_path)
+        elif pool_key is not None:
+            dataset_pool.release(pool_key)
 
 
 def find_variable_by_attribute(variables_metadata, attribute_name, attribute_value):
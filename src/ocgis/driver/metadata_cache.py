@@ -0,0 +1,270 @@
+"""
+Persistent, on-disk cache for driver metadata. Cached items are pickled to files under ``ocgis.env.DIR_CACHE`` and are
+keyed by the driver, the source paths, the paths' modification time, size, and inode, and the driver keyword arguments.
+Modified files therefore miss the cache. The cache is disabled if ``ocgis.env.DIR_CACHE`` is ``None``. The total cache
+size is limited by ``ocgis.env.METADATA_CACHE_MAX_BYTES`` with least recently used entries removed first.
+"""
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import six
+from six.moves import cPickle
+
+import ocgis
+from ocgis import env
+from ocgis.base import AbstractOcgisObject
+
+# Subdirectory of the cache directory holding metadata entries.
+_SUBDIRECTORY = 'metadata'
+_EXTENSION = '.pkl'
+
+
+class MetadataCache(AbstractOcgisObject):
+    """
+    :param str directory: The cache directory. If ``None``, use ``ocgis.env.DIR_CACHE``.
+    """
+
+    #: Subdirectory of the cache directory holding the cache's entries.
+    _subdirectory = _SUBDIRECTORY
+
+    def __init__(self, directory=None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        """
+        :returns: The directory containing cache entries or ``None`` if caching is disabled.
+        :rtype: str | None
+        """
+        ret = self._directory
+        if ret is None:
+            ret = env.DIR_CACHE
+        if ret is not None:
+            ret = os.path.join(ret, self._subdirectory)
+        return ret
+
+    @property
+    def max_bytes(self):
+        """
+        :returns: The maximum total size of the cache entries in bytes or ``None`` if there is no limit.
+        :rtype: int | None
+        """
+        return env.METADATA_CACHE_MAX_BYTES
+
+    def get(self, key, name):
+        """
+        Get a cached item.
+
+        :param tuple key: Entry key from :func:`~ocgis.driver.metadata_cache.get_metadata_cache_key`.
+        :param str name: Name of the cached item (i.e. ``'metadata'``).
+        :raises: KeyError
+        """
+        path = self._get_path_(key, name)
+        if path is None:
+            raise KeyError(name)
+        try:
+            with open(path, 'rb') as f:
+                ret = cPickle.load(f)
+        except (IOError, OSError, EOFError, cPickle.UnpicklingError):
+            raise KeyError(name)
+        # Touch the entry to track least recently used entries.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return ret
+
+    def get_or_create(self, key, name, func):
+        """
+        Get a cached item. If it is not in the cache, create it by calling ``func`` and add it to the cache.
+
+        :param tuple key: See :meth:`~ocgis.driver.metadata_cache.MetadataCache.get`. If ``None``, always call ``func``.
+        :param str name: See :meth:`~ocgis.driver.metadata_cache.MetadataCache.get`.
+        :param func: Function with no arguments returning the item to cache.
+        """
+        if key is None or self.directory is None:
+            return func()
+        try:
+            ret = self.get(key, name)
+        except KeyError:
+            ret = func()
+            self.set(key, name, ret)
+        return ret
+
+    def invalidate(self, uri=None):
+        """
+        Remove cache entries.
+
+        :param uri: If provided, only remove entries for this path or sequence of paths. Otherwise, remove all entries.
+        :type uri: str | sequence
+        """
+        directory = self.directory
+        if directory is None or not os.path.exists(directory):
+            return
+        if uri is None:
+            prefix = ''
+        else:
+            prefix = _get_digest_(get_cache_uris(uri))
+        for fn in os.listdir(directory):
+            if fn.startswith(prefix) and fn.endswith(_EXTENSION):
+                _remove_(os.path.join(directory, fn))
+
+    def set(self, key, name, value):
+        """
+        Add an item to the cache. Entries for the same source paths with a different key (i.e. modified files) are
+        removed.
+
+        :param tuple key: See :meth:`~ocgis.driver.metadata_cache.MetadataCache.get`.
+        :param str name: See :meth:`~ocgis.driver.metadata_cache.MetadataCache.get`.
+        :param value: The picklable item to cache.
+        """
+        path = self._get_path_(key, name)
+        if path is None:
+            return
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have created the directory.
+                if not os.path.isdir(directory):
+                    raise
+
+        # Remove stale entries for the source paths.
+        uri_prefix = _get_digest_(key[1])
+        key_prefix = '{}-{}'.format(uri_prefix, _get_digest_(key))
+        for fn in os.listdir(directory):
+            if fn.startswith(uri_prefix) and not fn.startswith(key_prefix):
+                _remove_(os.path.join(directory, fn))
+
+        # Write to a temporary file and rename it so readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                cPickle.dump(value, f, protocol=cPickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, path)
+        except (cPickle.PicklingError, TypeError, AttributeError):
+            # Objects that cannot be pickled are not cached.
+            _remove_(tmp_path)
+            return
+        except:
+            _remove_(tmp_path)
+            raise
+
+        self._evict_()
+
+    def _evict_(self):
+        max_bytes = self.max_bytes
+        if max_bytes is None:
+            return
+        directory = self.directory
+        entries = []
+        total = 0
+        for fn in os.listdir(directory):
+            if fn.endswith(_EXTENSION):
+                path = os.path.join(directory, fn)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        # Remove the least recently used entries first.
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            _remove_(path)
+            total -= size
+
+    def _get_path_(self, key, name):
+        directory = self.directory
+        if directory is None:
+            return None
+        uris = key[1]
+        fn = '{}-{}-{}{}'.format(_get_digest_(uris), _get_digest_(key), name, _EXTENSION)
+        return os.path.join(directory, fn)
+
+
+def get_cache_uris(uri):
+    """
+    :returns: A tuple of absolute paths for a path or sequence of paths.
+    :rtype: tuple
+    """
+    if isinstance(uri, six.string_types):
+        uri = [uri]
+    return tuple([os.path.abspath(u) for u in uri])
+
+
+def get_is_equal_metadata(left, right):
+    """
+    Compare metadata dictionaries. Attribute values may be NumPy arrays which do not support ``==`` comparisons of
+    containers.
+
+    :param left: The metadata to compare.
+    :param right: The metadata to compare.
+    :rtype: bool
+    """
+    if isinstance(left, dict) and isinstance(right, dict):
+        ret = set(left.keys()) == set(right.keys()) and \
+              all([get_is_equal_metadata(left[k], right[k]) for k in left])
+    elif isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        ret = type(left) == type(right) and len(left) == len(right) and \
+              all([get_is_equal_metadata(l, r) for l, r in zip(left, right)])
+    elif isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+        ret = type(left) == type(right) and left.dtype == right.dtype and np.array_equal(left, right)
+    else:
+        try:
+            ret = bool(left == right)
+        except ValueError:
+            ret = False
+    return ret
+
+
+def get_metadata_cache_key(driver):
+    """
+    Create the cache key for a driver's source. The key includes the modification time, size, and inode of each
+    source path.
+
+    :param driver: The driver with a request dataset.
+    :type driver: :class:`~ocgis.driver.base.AbstractDriver`
+    :returns: ``None`` if the source is not cacheable (i.e. an opened dataset or remote URIs).
+    :rtype: tuple | None
+    """
+    rd = driver.rd
+    if rd is None or rd.opened is not None or rd._uri is None:
+        return None
+
+    uris = rd.uri
+    if isinstance(uris, six.string_types):
+        uris = [uris]
+    stats = []
+    for u in uris:
+        try:
+            st = os.stat(u)
+        except (OSError, TypeError):
+            # Remote URIs (i.e. OPeNDAP) are not cached.
+            return None
+        stats.append((st.st_mtime, st.st_size, st.st_ino))
+
+    driver_kwargs = rd.driver_kwargs
+    if driver_kwargs is None:
+        driver_kwargs = {}
+    driver_kwargs = tuple(sorted([(k, repr(v)) for k, v in driver_kwargs.items()]))
+
+    return ocgis.__version__, get_cache_uris(uris), tuple(stats), driver.key, driver.__class__.__name__, driver_kwargs
+
+
+def _get_digest_(obj):
+    return hashlib.sha1(repr(obj).encode('utf-8')).hexdigest()
+
+
+def _remove_(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+metadata_cache = MetadataCache()
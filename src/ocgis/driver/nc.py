@@ -1,3 +1,4 @@
+import hashlib
 import itertools
 import logging
 from abc import ABCMeta
@@ -15,6 +16,9 @@ from ocgis.collection.field import Field
 from ocgis.constants import MPIWriteMode, DimensionMapKey, KeywordArgument, DriverKey, CFName, SourceIndexType, \
     DecompositionType
 from ocgis.driver.base import AbstractDriver, driver_scope
+from ocgis.driver.metadata_cache import get_metadata_cache_key
+from ocgis.driver.read_plan import read_planned, get_chunk_shape
+from ocgis.driver.shard import is_shardable, write_shards
 from ocgis.exc import ProjectionDoesNotMatch, PayloadProtectedError, NoDataVariablesFound, \
     GridDeficientError
 from ocgis.util.helpers import itersubclasses, get_iter, get_formatted_slice, get_by_key_list, is_auto_dtype, get_group
@@ -39,6 +43,7 @@ class DriverNetcdf(AbstractDriver):
     key = DriverKey.NETCDF
     output_formats = 'all'
     common_extension = 'nc'
+    pool_handles = True
 
     @property
     def data_model(self):
@@ -55,6 +60,37 @@ class DriverNetcdf(AbstractDriver):
     def get_variable_value(self, variable):
         return get_value_from_request_dataset(variable)
 
+    def get_variable_value_reader(self, variable):
+        # Multi-file time values require special handling. Time values are not read in slabs.
+        if isinstance(variable, TemporalVariable):
+            return None
+
+        rd = variable._request_dataset
+        group = variable.group
+        desired_name = variable.source_name or rd.variable
+        slc = get_variable_slice(variable.dimensions)
+
+        # The source selection identifies cached slabs.
+        sha = hashlib.sha1()
+        for s in slc:
+            if isinstance(s, slice):
+                sha.update(repr((s.start, s.stop, s.step)).encode('utf-8'))
+            else:
+                sha.update(np.ascontiguousarray(s).tobytes())
+        # File statistics in the source key invalidate slabs of modified files.
+        source_key = get_metadata_cache_key(rd.driver)
+        if source_key is None:
+            # Opened datasets and remote URIs have no file statistics.
+            source_key = repr(rd.uri)
+        key = (source_key, repr(group), desired_name, sha.hexdigest())
+
+        def _reader_(refine):
+            with driver_scope(rd.driver) as source:
+                ncvar = get_source_variable(source, group, desired_name)
+                return read_variable_slice(ncvar, get_refined_slice(slc, refine))
+
+        return key, _reader_
+
     @classmethod
     def write_variable(cls, var, dataset, write_mode=MPIWriteMode.NORMAL, **kwargs):
         """
@@ -66,6 +102,9 @@ class DriverNetcdf(AbstractDriver):
         :keyword bool file_only: (``=False``) If ``True``, do not write the value to the output file. Create an empty
          netCDF file.
         :keyword bool unlimited_to_fixed_size: (``=False``) If ``True``, convert the unlimited dimension to a fixed size.
+        :keyword lazy_value: (``=None``) If provided, write the value from this proxy slab by slab instead of the
+         variable's value. See :func:`~ocgis.driver.nc.get_lazy_write_value`.
+        :type lazy_value: :class:`~ocgis.variable.lazy.LazyArray`
         """
         # There should never be any write operations associated with an empty variable.
         raise_if_empty(var)
@@ -80,6 +119,7 @@ class DriverNetcdf(AbstractDriver):
 
         file_only = kwargs.pop(KeywordArgument.FILE_ONLY, False)
         unlimited_to_fixed_size = kwargs.pop(KeywordArgument.UNLIMITED_TO_FIXED_SIZE, False)
+        lazy_value = kwargs.pop(KeywordArgument.LAZY_VALUE, None)
 
         # No data should be written during a global write. Data will be filled in during the append process.
         if write_mode == MPIWriteMode.TEMPLATE:
@@ -119,7 +159,11 @@ class DriverNetcdf(AbstractDriver):
 
             # Only use the fill value if something is masked.
             is_nc3 = dataset.data_model.startswith('NETCDF3')
-            if ((len(dimensions) > 0 and var.has_masked_values) and (
+            if lazy_value is not None:
+                # Lazy values are only used with a fill value attribute. Checking for masked values would load the
+                # value.
+                fill_value = cls.get_variable_write_fill_value(var)
+            elif ((len(dimensions) > 0 and var.has_masked_values) and (
                     write_mode == MPIWriteMode.TEMPLATE or not file_only)) or (
                     is_nc3 and not var.has_allocated_value and len(
                 dimensions) > 0) or (env.USE_NETCDF4_MPI and var.has_mask and vm.size > 1):
@@ -141,7 +185,12 @@ class DriverNetcdf(AbstractDriver):
 
         # Do not fill values on file_only calls. Also, only fill values for variables with dimension greater than zero.
         if not file_only and not var.is_empty and not isinstance(var, CoordinateReferenceSystem):
-            if not var.is_string_object and isinstance(var.dtype, ObjectType) and not isinstance(var, TemporalVariable):
+            if lazy_value is not None:
+                fill_slice = get_slice_sequence_using_local_bounds(var)
+                for slab_slice, slab in lazy_value.iter_slabs():
+                    ncvar.__setitem__(get_refined_slice(fill_slice, slab_slice), slab)
+            elif not var.is_string_object and isinstance(var.dtype, ObjectType) and \
+                    not isinstance(var, TemporalVariable):
                 bounds_local = var.dimensions[0].bounds_local
                 for idx in range(bounds_local[0], bounds_local[1]):
                     ncvar[idx] = np.array(var.get_value()[idx - bounds_local[0]])
@@ -151,14 +200,11 @@ class DriverNetcdf(AbstractDriver):
                 # Only write allocated values.
                 if data_value is not None:
                     if var.dtype == str or var.is_string_object:
-                        for idx in range(fill_slice[0].start, fill_slice[0].stop):
-                            try:
-                                curr_value = data_value[idx - fill_slice[0].start]
-                            except Exception as e:
-                                msg = "Variable name is '{}'. Original message: ".format(var.name) + str(e)
-                                raise e.__class__(msg)
-                            for sidx, sval in enumerate(curr_value):
-                                ncvar[idx, sidx] = sval
+                        try:
+                            ncvar[fill_slice[0]] = get_character_array(data_value, ncvar.shape[1])
+                        except Exception as e:
+                            msg = "Variable name is '{}'. Original message: ".format(var.name) + str(e)
+                            raise e.__class__(msg)
                     elif var.ndim == 0:
                         ncvar[:] = data_value
                     else:
@@ -173,14 +219,21 @@ class DriverNetcdf(AbstractDriver):
             if var.units is not None:
                 ncvar.setncattr('units', str(var.units))
 
-        dataset.sync()
-
     @classmethod
     def _write_variable_collection_main_(cls, vc, opened_or_path, write_mode, **kwargs):
         assert write_mode is not None
 
-        dataset_kwargs = kwargs.get('dataset_kwargs', {})
-        variable_kwargs = kwargs.get('variable_kwargs', {})
+        if write_mode == MPIWriteMode.SHARD:
+            return cls._write_variable_collection_shards_(vc, opened_or_path, **kwargs)
+
+        dataset_kwargs = kwargs.get(KeywordArgument.DATASET_KWARGS, {})
+        variable_kwargs = kwargs.get(KeywordArgument.VARIABLE_KWARGS, {})
+        variable_kwargs_by_name = kwargs.get(KeywordArgument.VARIABLE_KWARGS_BY_NAME, {})
+        # Streaming writes define unloaded source variables before writing their values in slabs. Template writes only
+        # define variables.
+        streaming = kwargs.get(KeywordArgument.STREAMING, False) and \
+                    write_mode in (MPIWriteMode.NORMAL, MPIWriteMode.FILL) and \
+                    not variable_kwargs.get(KeywordArgument.FILE_ONLY, False)
 
         # When filling a dataset, we use append mode.
         if write_mode == MPIWriteMode.FILL:
@@ -207,14 +260,32 @@ class DriverNetcdf(AbstractDriver):
                         vc.write_attributes_to_netcdf_object(dataset)
                     # This is the main variable write loop.
                     variables_to_write = get_variables_to_write(vc)
+                    to_fill = []
                     for variable in variables_to_write:
                         # Load the variable's data before orphaning. The variable needs its parent to know which
-                        # group it is in.
-                        variable.load()
+                        # group it is in. Values of unloaded source variables may instead be written in slabs.
+                        lazy_value = get_lazy_write_value(variable, write_mode, variable_kwargs, streaming=streaming)
+                        if lazy_value is None:
+                            variable.load()
+                        current_kwargs = variable_kwargs.copy()
+                        current_kwargs.update(variable_kwargs_by_name.get(variable.name, {}))
+                        if lazy_value is not None:
+                            current_kwargs[KeywordArgument.LAZY_VALUE] = lazy_value
+                        if streaming and lazy_value is not None:
+                            # Only define the variable. Its value is written once all variables are defined.
+                            to_fill.append((variable, current_kwargs))
+                            if write_mode == MPIWriteMode.FILL:
+                                continue
+                            current_kwargs = current_kwargs.copy()
+                            current_kwargs[KeywordArgument.FILE_ONLY] = True
                         # Call the individual variable write method in fill mode. Orphaning is required as a
                         # variable will attempt to write its parent first.
                         with orphaned(variable, keep_dimensions=True):
-                            variable.write(dataset, write_mode=write_mode, **variable_kwargs)
+                            variable.write(dataset, write_mode=write_mode, **current_kwargs)
+                    # Write the values of streamed variables slab by slab.
+                    for variable, current_kwargs in to_fill:
+                        with orphaned(variable, keep_dimensions=True):
+                            variable.write(dataset, write_mode=MPIWriteMode.FILL, **current_kwargs)
                     # Recurse the children.
                     for child in list(vc.children.values()):
                         if write_mode != MPIWriteMode.FILL:
@@ -225,6 +296,21 @@ class DriverNetcdf(AbstractDriver):
                     dataset.sync()
             vm.barrier()
 
+    @classmethod
+    def _write_variable_collection_shards_(cls, vc, path, **kwargs):
+        variable_kwargs = kwargs.get(KeywordArgument.VARIABLE_KWARGS, {})
+        if variable_kwargs.get(KeywordArgument.FILE_ONLY, False):
+            return
+
+        # Grouped collections and variable length arrays are filled rank by rank.
+        variables_to_write = get_variables_to_write(vc)
+        if len(vc.children) > 0 or not is_shardable(variables_to_write):
+            return cls._write_variable_collection_main_(vc, path, MPIWriteMode.FILL, **kwargs)
+
+        for variable in variables_to_write:
+            variable.load()
+        write_shards(path, variables_to_write, cls)
+
     def _get_metadata_main_(self):
         with driver_scope(self) as ds:
             ret = parse_metadata(ds)
@@ -238,6 +324,8 @@ class DriverNetcdf(AbstractDriver):
         if env.USE_NETCDF4_MPI and the_vm.size > 1:
             if dataset_kwargs.get('format', 'NETCDF4') == 'NETCDF4' and dataset_kwargs.get('parallel', True):
                 ret = [MPIWriteMode.ASYNCHRONOUS]
+        if env.USE_NETCDF_SHARDS and ret == [MPIWriteMode.TEMPLATE, MPIWriteMode.FILL]:
+            ret = [MPIWriteMode.TEMPLATE, MPIWriteMode.SHARD]
         return ret
 
     def _init_variable_from_source_main_(self, variable, variable_object):
@@ -601,6 +689,26 @@ def init_variable_using_metadata_for_netcdf(variable, metadata):
             variable_attrs['units'] = conform_units_to
 
 
+def get_character_array(value, length):
+    """
+    Convert string values to a netCDF character array.
+
+    :param value: The string values or a two-dimensional character array.
+    :type value: `sequence` of str | :class:`numpy.ndarray`
+    :param int length: The number of characters for each string. Shorter strings are padded with null characters.
+    :returns: A character array with shape ``(len(value), length)``.
+    :rtype: :class:`numpy.ndarray`
+    """
+    value = np.ma.getdata(value)
+    if np.ndim(value) == 2:
+        ret = np.zeros((value.shape[0], length), dtype='S1')
+        ret[:, 0:value.shape[1]] = value
+    else:
+        value = np.array(value, dtype='S{}'.format(length))
+        ret = value.view('S1').reshape(value.shape + (length,))
+    return ret
+
+
 def get_coordinate_system_variable_name(driver_object, group_metadata):
     rd = driver_object.rd
     crs_name = None
@@ -620,16 +728,10 @@ def get_value_from_request_dataset(variable):
 
     rd = variable._request_dataset
     with driver_scope(rd.driver) as source:
-        if variable.group is not None:
-            for vg in variable.group:
-                if vg is None:
-                    continue
-                else:
-                    source = source.groups[vg]
         desired_name = variable.source_name or rd.variable
 
         # Reference the variable in the source dataset.
-        ncvar = source.variables[desired_name]
+        ncvar = get_source_variable(source, variable.group, desired_name)
 
         # Allow multi-unit time values for temporal variables.
         if isinstance(variable, TemporalVariable) and isinstance(source, MFDataset) and rd.format_time:
@@ -644,6 +746,74 @@ def get_value_from_request_dataset(variable):
     return ret
 
 
+def get_lazy_write_value(variable, write_mode, variable_kwargs, streaming=False):
+    """
+    Get a lazy value used to write a variable slab by slab without loading its value. Requires
+    ``ocgis.env.USE_LAZY_VALUES`` or a streaming write. Asynchronous writes require the same write calls on all ranks
+    and do not use lazy values.
+
+    :param variable: The variable to write.
+    :type variable: :class:`~ocgis.Variable`
+    :param write_mode: The write mode.
+    :type write_mode: :class:`~ocgis.constants.MPIWriteMode`
+    :param dict variable_kwargs: Keyword arguments to the variable write.
+    :param bool streaming: If ``True``, this is a streaming write. Slabs are read along the unlimited dimension if
+     there is one. Variables without a fill value attribute are written with the default fill value.
+    :rtype: :class:`~ocgis.variable.lazy.LazyArray` | None
+    """
+    if not (env.USE_LAZY_VALUES or streaming) or variable_kwargs.get(KeywordArgument.FILE_ONLY, False) or \
+            write_mode in (MPIWriteMode.TEMPLATE, MPIWriteMode.ASYNCHRONOUS):
+        return None
+    if not isinstance(variable, SourcedVariable):
+        return None
+    if streaming:
+        unlimited = [idx for idx, d in enumerate(variable.dimensions) if d.is_unlimited]
+        axis = unlimited[0] if len(unlimited) > 0 else 0
+    elif '_FillValue' in variable.attrs:
+        # The fill value must be known without checking for masked values.
+        axis = 0
+    else:
+        return None
+    return variable.get_lazy_value(axis=axis)
+
+
+def get_refined_slice(slc, refine):
+    """
+    :param tuple slc: A formatted source slice with a slice or integer array for each dimension. See
+     :func:`~ocgis.driver.nc.get_variable_slice`.
+    :param tuple refine: A slice for each dimension relative to the selection of ``slc``.
+    :returns: The source slice for the refined selection.
+    :rtype: tuple
+    """
+    ret = list(slc)
+    for idx, r in enumerate(refine):
+        s = ret[idx]
+        if isinstance(s, slice):
+            start, stop, step = r.indices(s.stop - s.start)
+            ret[idx] = slice(s.start + start, s.start + stop, step)
+        else:
+            ret[idx] = np.asarray(s)[r]
+    return tuple(ret)
+
+
+def get_source_variable(source, group, name):
+    """
+    :param source: An open dataset.
+    :type source: :class:`netCDF4.Dataset`
+    :param group: The group sequence containing the variable. ``None`` for the root group.
+    :type group: `sequence` of :class:`str`
+    :param str name: The source variable name.
+    :rtype: :class:`netCDF4.Variable`
+    """
+    if group is not None:
+        for vg in group:
+            if vg is None:
+                continue
+            else:
+                source = source.groups[vg]
+    return source.variables[name]
+
+
 def get_variables_to_write(vc):
     from ocgis.variable.geom import GeometryVariable
     ret = []
@@ -656,6 +826,16 @@ def get_variables_to_write(vc):
 
 
 def get_variable_value(variable, dimensions):
+    return read_variable_slice(variable, get_variable_slice(dimensions))
+
+
+def get_variable_slice(dimensions):
+    """
+    :param dimensions: The variable's dimensions.
+    :type dimensions: `sequence` of :class:`~ocgis.Dimension`
+    :returns: The formatted slice of the dimensions' source indices.
+    :rtype: tuple | slice
+    """
     if dimensions is not None and len(dimensions) > 0:
         to_format = [None] * len(dimensions)
         for idx in range(len(dimensions)):
@@ -676,8 +856,23 @@ def get_variable_value(variable, dimensions):
         slc = get_formatted_slice(to_format, len(dimensions))
     else:
         slc = slice(None)
+    return slc
+
+
+def read_variable_slice(variable, slc):
+    """
+    :param variable: The source variable.
+    :type variable: :class:`netCDF4.Variable` | :class:`netCDF4.MFTime`
+    :param slc: See :func:`~ocgis.driver.nc.get_variable_slice`.
+    :rtype: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+    """
     try:
-        ret = variable.__getitem__(slc)
+        if isinstance(variable, nc.Variable) and any([isinstance(s, np.ndarray) for s in get_iter(slc)]) and \
+                get_chunk_shape(variable) is not None:
+            # Fancy indices on chunked variables are merged into chunk-aware block reads.
+            ret = read_planned(variable, slc)
+        else:
+            ret = variable.__getitem__(slc)
     except IndexError:
         # TODO: Hack! Slicing the top-level MFTime variable does not work with multifiles.
         ret = super(MFTime, variable).__getitem__(slc)
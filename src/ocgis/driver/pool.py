@@ -0,0 +1,161 @@
+"""
+Pool of open, read-only dataset handles shared by :func:`~ocgis.driver.base.driver_scope`. Handles are kept open
+after use and reused by later scopes targeting the same URI, mode, and driver keyword arguments. The pool is enabled
+with ``ocgis.env.USE_DATASET_POOL``. ``ocgis.env.DATASET_POOL_MAX_OPEN`` limits the number of open idle handles (least
+recently used handles are closed first) and ``ocgis.env.DATASET_POOL_IDLE_TIMEOUT`` closes handles unused for the
+given number of seconds.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import six
+
+from ocgis import env
+from ocgis.base import AbstractOcgisObject
+
+
+class DatasetHandlePool(AbstractOcgisObject):
+    """
+    Least recently used pool of open dataset handles. Handles are borrowed with :meth:`borrow` and returned with
+    :meth:`release`. A handle may be borrowed more than once at a time. Only handles not currently borrowed are
+    closed by the pool.
+    """
+
+    def __init__(self):
+        # Maps handle keys to entry lists: [handle, driver class, borrow count, last used time, uris].
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def borrow(self, driver, uri, mode='r', rd=None, **kwargs):
+        """
+        Borrow an open handle for the URI, opening it if there is no pooled handle.
+
+        :param driver: The driver class or instance used to open and close the handle.
+        :type driver: :class:`~ocgis.driver.base.AbstractDriver`
+        :param uri: Path or sequence of paths to open.
+        :type uri: str | sequence
+        :param str mode: The open mode.
+        :param rd: The request dataset passed to the driver open method.
+        :type rd: :class:`~ocgis.RequestDataset`
+        :param dict kwargs: Keyword arguments to the driver open method.
+        :return: A tuple ``(key, handle)``. ``key`` is used to release the handle.
+        :rtype: tuple
+        """
+        key = get_handle_key(driver, uri, mode, kwargs)
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                handle = driver.open(uri=uri, mode=mode, rd=rd, **kwargs)
+                entry = [handle, driver, 0, None, get_uris(uri)]
+            entry[2] += 1
+            entry[3] = time.time()
+            # The most recently used handle is last.
+            self._entries[key] = entry
+            self._evict_()
+            return key, entry[0]
+
+    def clear(self):
+        """
+        Close all handles that are not currently borrowed and remove them from the pool.
+        """
+        self.invalidate()
+
+    def detach(self):
+        """
+        Remove all handles from the pool without closing them. Forked child processes call this so they do not share
+        handles opened by the parent process. The lock is replaced as it may have been held by another thread when the
+        process was forked.
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def invalidate(self, uri=None):
+        """
+        Close and remove handles that are not currently borrowed.
+
+        :param uri: If provided, only close handles opened from this path or sequence of paths.
+        :type uri: str | sequence
+        """
+        if uri is not None:
+            uris = set(get_uris(uri))
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry[2] == 0 and (uri is None or len(uris.intersection(entry[4])) > 0):
+                    self._close_entry_(key)
+
+    def release(self, key):
+        """
+        Return a borrowed handle to the pool.
+
+        :param key: The key returned by :meth:`borrow`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[2] -= 1
+                entry[3] = time.time()
+                self._evict_()
+
+    def _close_entry_(self, key):
+        entry = self._entries.pop(key)
+        entry[1].close(entry[0])
+
+    def _evict_(self):
+        max_open = env.DATASET_POOL_MAX_OPEN
+        idle_timeout = env.DATASET_POOL_IDLE_TIMEOUT
+        now = time.time()
+        idle = [key for key, entry in self._entries.items() if entry[2] == 0]
+        to_close = len(self._entries) - max_open
+        for key in idle:
+            if to_close > 0:
+                self._close_entry_(key)
+                to_close -= 1
+            elif idle_timeout is not None and now - self._entries[key][3] > idle_timeout:
+                self._close_entry_(key)
+
+
+def get_handle_key(driver, uri, mode, kwargs):
+    """
+    Create the pool key for a handle. The key includes the modification time, size, and inode of local files so
+    modified files are reopened.
+
+    :rtype: tuple
+    """
+    uris = get_uris(uri)
+    stats = []
+    for u in uris:
+        try:
+            st = os.stat(u)
+        except OSError:
+            # Remote URIs (i.e. OPeNDAP) have no local file statistics.
+            stats.append(None)
+        else:
+            stats.append((st.st_mtime, st.st_size, st.st_ino))
+    kwargs_key = tuple(sorted([(k, repr(v)) for k, v in kwargs.items()]))
+    return getattr(driver, 'key', repr(driver)), uris, tuple(stats), mode, kwargs_key
+
+
+def get_uris(uri):
+    """
+    :returns: A tuple of absolute paths for a path or sequence of paths. Remote URIs are not modified.
+    :rtype: tuple
+    """
+    if isinstance(uri, six.string_types):
+        uri = [uri]
+    ret = []
+    for u in uri:
+        if os.path.exists(u):
+            u = os.path.abspath(u)
+        ret.append(u)
+    return tuple(ret)
+
+
+dataset_pool = DatasetHandlePool()
+atexit.register(dataset_pool.clear)
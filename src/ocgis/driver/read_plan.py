@@ -0,0 +1,165 @@
+"""
+Chunk-aware reads of NetCDF variables with fancy (integer array) indices. Indexing a NetCDF variable with an irregular
+integer array reads each index separately, decompressing the same chunks many times. The planner merges the requested
+indices along each dimension into runs. A run is split only where the gap between indices contains a whole chunk that
+is not needed so each chunk is read by a single block. Blocks are read with slices and the requested values are gathered
+in memory.
+"""
+import itertools
+import logging
+
+import numpy as np
+
+from ocgis import constants
+from ocgis.util.logging_ocgis import ocgis_lh
+
+
+def get_chunk_shape(variable):
+    """
+    :param variable: The NetCDF variable.
+    :type variable: :class:`netCDF4.Variable`
+    :returns: The variable's chunk shape. ``None`` if the variable is contiguous.
+    :rtype: tuple | None
+    """
+
+    try:
+        chunking = variable.chunking()
+    except (AttributeError, RuntimeError):
+        chunking = 'contiguous'
+    if chunking == 'contiguous' or chunking is None:
+        ret = None
+    else:
+        ret = tuple([int(c) for c in chunking])
+    return ret
+
+
+def get_index_runs(index, chunk_size, max_length=None):
+    """
+    Merge sorted unique indices into runs. Consecutive indices belong to the same run unless the gap between them
+    contains a whole chunk.
+
+    :param index: Sorted unique integer indices.
+    :type index: :class:`numpy.ndarray`
+    :param int chunk_size: The chunk size along the dimension.
+    :param int max_length: If provided, runs are split at chunk boundaries so no run spans more than ``max_length``
+     indices. Rounded down to a multiple of ``chunk_size`` with a minimum of ``chunk_size``.
+    :returns: A sequence of ``(start, stop, first, last)`` tuples. ``start`` and ``stop`` bound the indices read for the
+     run. ``first`` and ``last`` bound the run's positions in ``index``.
+    :rtype: list
+    """
+
+    chunk_ids = index // chunk_size
+    breaks = np.diff(chunk_ids) > 1
+    run_ids = np.zeros(index.shape[0], dtype=int)
+    np.cumsum(breaks, out=run_ids[1:])
+    if max_length is not None:
+        max_length = max(chunk_size, max_length // chunk_size * chunk_size)
+        # Number pieces from the first chunk of each run so that pieces start on chunk boundaries.
+        starts = np.ones(index.shape[0], dtype=bool)
+        starts[1:] = breaks
+        run_base = (index[starts] // chunk_size * chunk_size)[run_ids]
+        pieces = (index - run_base) // max_length
+        breaks = breaks | (np.diff(pieces) != 0)
+
+    positions = np.append(np.append(0, np.nonzero(breaks)[0] + 1), index.shape[0])
+    ret = []
+    for first, last in zip(positions[:-1], positions[1:]):
+        ret.append((int(index[first]), int(index[last - 1]) + 1, int(first), int(last)))
+    return ret
+
+
+def read_planned(variable, slc, max_block_bytes=None):
+    """
+    Read a NetCDF variable using a formatted slice containing integer or boolean arrays. The result is the same as
+    ``variable[slc]``. Contiguous variables are read directly as there are no chunks to decompress more than once.
+
+    :param variable: The NetCDF variable.
+    :type variable: :class:`netCDF4.Variable`
+    :param tuple slc: A slice tuple with a slice or one-dimensional array for each dimension.
+    :param int max_block_bytes: The maximum size of a block in bytes. Defaults to
+     :attr:`ocgis.constants.NETCDF_READ_BLOCK_BYTES`.
+    :rtype: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+    """
+
+    if max_block_bytes is None:
+        max_block_bytes = constants.NETCDF_READ_BLOCK_BYTES
+    chunks = get_chunk_shape(variable)
+    if chunks is None:
+        return variable[slc]
+    shape = variable.shape
+    itemsize = variable.dtype.itemsize
+
+    # The extent and sorted unique indices of each dimension. Slices are read as-is.
+    extents = [None] * len(slc)
+    uniques = [None] * len(slc)
+    inverses = [None] * len(slc)
+    for idx, s in enumerate(slc):
+        if isinstance(s, slice):
+            extents[idx] = len(range(*s.indices(shape[idx])))
+        else:
+            s = np.asarray(s)
+            if s.dtype == bool:
+                s = np.nonzero(s)[0]
+            s = np.where(s < 0, s + shape[idx], s)
+            if s.shape[0] == 0:
+                return variable[slc]
+            uniques[idx], inverses[idx] = np.unique(s, return_inverse=True)
+            extents[idx] = uniques[idx].shape[0]
+
+    runs = [None] * len(slc)
+    for idx, s in enumerate(slc):
+        if uniques[idx] is None:
+            runs[idx] = [(s, None, None, None)]
+        else:
+            # Runs are limited in length using the full extent of the other dimensions.
+            other_bytes = itemsize * int(np.prod([shape[ii] for ii in range(len(shape)) if ii != idx]))
+            max_length = max_block_bytes // max(other_bytes, 1)
+            runs[idx] = get_index_runs(uniques[idx], chunks[idx], max_length=max_length)
+
+    ret = None
+    is_masked = False
+    fill_value = None
+    bytes_read = 0
+    nblocks = 0
+    for block_runs in itertools.product(*runs):
+        read_slc = []
+        gather = []
+        fill_slc = []
+        for idx, (start, stop, first, last) in enumerate(block_runs):
+            if uniques[idx] is None:
+                read_slc.append(start)
+                fill_slc.append(slice(None))
+            else:
+                read_slc.append(slice(start, stop))
+                gather.append((idx, uniques[idx][first:last] - start))
+                fill_slc.append(slice(first, last))
+        block = variable[tuple(read_slc)]
+        nblocks += 1
+        bytes_read += block.size * itemsize
+        if isinstance(block, np.ma.MaskedArray):
+            is_masked = True
+            # The source fill value is only set on blocks with masked elements.
+            if np.ma.is_masked(block):
+                fill_value = block.fill_value
+        for axis, local in gather:
+            block = block.take(local, axis=axis)
+        if ret is None:
+            ret = np.ma.array(np.empty(extents, dtype=block.dtype), mask=np.zeros(extents, dtype=bool))
+        ret[tuple(fill_slc)] = block
+
+    # Restore the requested order and any repeated indices.
+    for idx, inverse in enumerate(inverses):
+        if inverse is not None and (inverse.shape[0] != uniques[idx].shape[0] or np.any(np.diff(inverse) != 1)):
+            ret = ret.take(inverse, axis=idx)
+
+    if is_masked:
+        # Use the source fill value like a direct read.
+        if fill_value is not None and np.ma.is_masked(ret):
+            ret.fill_value = fill_value
+    else:
+        ret = ret.data
+    bytes_needed = itemsize * int(np.prod(ret.shape))
+    msg = 'planned read of "{}": {} block(s), {} bytes read, {} bytes needed'.format(variable.name, nblocks,
+                                                                                        bytes_read, bytes_needed)
+    ocgis_lh(msg=msg, logger='driver.nc', level=logging.DEBUG)
+    return ret
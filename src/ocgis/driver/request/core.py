@@ -8,6 +8,7 @@ from ocgis import constants
 from ocgis import env
 from ocgis.constants import DMK, DriverKey, DecompositionType
 from ocgis.driver.dimension_map import DimensionMap
+from ocgis.driver.metadata_cache import metadata_cache, get_metadata_cache_key, get_is_equal_metadata
 from ocgis.driver.registry import get_driver_class, driver_registry
 from ocgis.driver.request.base import AbstractRequestObject
 from ocgis.exc import RequestValidationError, NoDataVariablesFound, VariableNotFoundError
@@ -115,6 +116,10 @@ class RequestDataset(AbstractRequestObject):
     :type rename_variable: `sequence` of :class:`str`
     :param dict metadata: Overload the metadata that would normally be loaded by the driver. If metadata is provided and
      ``uri`` is ``None``, a field will be created by interpreting the provided metadata.
+    :param format_time: If ``False``, do not convert numeric times to Python date objects. If ``'parts'``, use integer
+     date parts for time operations and only create Python date objects for output. See
+     :class:`~ocgis.TemporalVariable`.
+    :type format_time: bool | str
     :param opened: An open file used as a write target for the driver.
     :type opened: varies by ``driver`` class
     :param int uid: A unique identifier for the request dataset.
@@ -284,7 +289,14 @@ class RequestDataset(AbstractRequestObject):
     @property
     def crs(self):
         if self._crs == 'auto':
-            ret = self.driver.get_crs(self.metadata)
+            key = None
+            # Only use cached coordinate systems if caching is enabled and the request metadata matches the source
+            # metadata.
+            if self.predicate is None and metadata_cache.directory is not None and \
+                    get_is_equal_metadata(self.metadata, self.driver.metadata_raw):
+                key = get_metadata_cache_key(self.driver)
+            name = 'crs_{}'.format(int(self.rotated_pole_priority))
+            ret = metadata_cache.get_or_create(key, name, lambda: self.driver.get_crs(self.metadata))
         else:
             ret = self._crs
         return ret
@@ -0,0 +1,265 @@
+"""
+Concurrent parallel netCDF writes using shard files. Writer ranks write the values of their variables as pieces to a
+shard file next to the output file. A piece is the local block of a variable's value together with the start index of
+the block in the output variable. The root rank then copies the pieces into the output file created by the template
+write and removes the shards. With aggregator ranks, pieces of the other ranks are gathered to the writer ranks using
+``Gatherv``.
+"""
+import os
+
+import netCDF4 as nc
+import numpy as np
+
+from ocgis import env, vm
+from ocgis.variable.base import ObjectType
+from ocgis.variable.crs import CoordinateReferenceSystem
+from ocgis.variable.lazy import get_slab_length
+from ocgis.variable.temporal import TemporalVariable
+from ocgis.vmachine.mpi import gatherv_array
+
+# Attribute storing the name of the output variable for a shard piece.
+_TARGET = '_ocgis_target'
+# Attribute storing the start index of a shard piece in the output variable.
+_START = '_ocgis_start'
+# Suffix of shard variables storing the mask of a piece.
+_MASK_SUFFIX = '_mask'
+
+
+def gather_shard_pieces(pieces, comm, root=0):
+    """
+    Gather shard pieces to the root rank. Piece values and masks are sent as a single byte buffer for each rank using
+    ``Gatherv``. Only piece metadata is pickled.
+
+    This function is collective across ``comm``.
+
+    :param list pieces: The local pieces. See :func:`~ocgis.driver.shard.get_shard_pieces`.
+    :param comm: The communicator.
+    :type comm: :class:`mpi4py.MPI.Comm`
+    :param int root: The root rank.
+    :returns: The pieces of all ranks on the root rank. An empty list on the other ranks.
+    :rtype: list
+    """
+    metadata = []
+    buffers = []
+    for name, start, value in pieces:
+        has_mask = np.ma.getmask(value) is not np.ma.nomask
+        metadata.append((name, start, value.dtype.str, value.shape, has_mask))
+        buffers.append(np.ascontiguousarray(np.ma.getdata(value)).view(np.uint8).reshape(-1))
+        if has_mask:
+            buffers.append(np.ascontiguousarray(np.ma.getmaskarray(value)).view(np.uint8).reshape(-1))
+    if len(buffers) == 0:
+        sendbuf = np.zeros(0, dtype=np.uint8)
+    else:
+        sendbuf = np.concatenate(buffers)
+
+    gathered = comm.gather((metadata, sendbuf.shape[0]), root=root)
+    is_root = comm.Get_rank() == root
+    if is_root:
+        counts = [g[1] for g in gathered]
+        use_buffers = sum(counts) <= np.iinfo(np.int32).max
+    else:
+        use_buffers = None
+    use_buffers = comm.bcast(use_buffers, root=root)
+
+    # Vector collective counts are limited to 32-bit integers.
+    if not use_buffers:
+        gathered_pieces = comm.gather(pieces, root=root)
+        if is_root:
+            return [piece for rank_pieces in gathered_pieces for piece in rank_pieces]
+        return []
+
+    if is_root:
+        displs = np.append(0, np.cumsum(counts)[:-1]).tolist()
+        blocks = [((displ, displ + count),) for displ, count in zip(displs, counts)]
+        fill = np.empty(sum(counts), dtype=np.uint8)
+    else:
+        blocks, fill = None, None
+    gatherv_array(sendbuf, blocks, fill, root=root, comm=comm)
+    if not is_root:
+        return []
+
+    ret = []
+    for (metadata, _), displ in zip(gathered, displs):
+        offset = displ
+        for name, start, dtype, shape, has_mask in metadata:
+            dtype = np.dtype(dtype)
+            size = int(np.prod(shape))
+            value = fill[offset:offset + size * dtype.itemsize].view(dtype).reshape(shape)
+            offset += size * dtype.itemsize
+            if has_mask:
+                mask = fill[offset:offset + size].view(bool).reshape(shape)
+                offset += size
+                value = np.ma.array(value, mask=mask)
+            ret.append((name, start, value))
+    return ret
+
+
+def get_shard_path(path, rank):
+    """
+    :param str path: The output file path.
+    :param int rank: The writer rank.
+    :returns: The path of the rank's shard file.
+    :rtype: str
+    """
+    return '{}.{}.shard'.format(path, rank)
+
+
+def get_shard_pieces(variables, driver, include_replicated=True):
+    """
+    :param variables: The variables to write. Values should be loaded.
+    :type variables: `sequence` of :class:`~ocgis.Variable`
+    :param driver: The driver class used for the write.
+    :type driver: :class:`ocgis.driver.nc.DriverNetcdf`
+    :param bool include_replicated: If ``False``, skip variables without a distributed dimension. These have the same
+     value on all ranks.
+    :returns: A sequence of tuples ``(name, start, value)``. ``start`` is the start index of ``value`` for each
+     dimension of the output variable.
+    :rtype: list
+    """
+    from ocgis.driver.nc import get_character_array
+
+    ret = []
+    for var in variables:
+        if var.is_empty or isinstance(var, CoordinateReferenceSystem):
+            continue
+        if not include_replicated and not any([d.dist for d in var.dimensions]):
+            continue
+        value = driver.get_variable_write_value(var)
+        if value is None:
+            continue
+        if var.dtype == str or var.is_string_object:
+            value = get_character_array(value, var.string_max_length_global)
+            start = (var.dimensions[0].bounds_local[0], 0)
+        else:
+            value = np.asanyarray(value)
+            start = tuple([d.bounds_local[0] for d in var.dimensions])
+        ret.append((var.name, start, value))
+    return ret
+
+
+def is_shardable(variables):
+    """
+    :param variables: The variables to write.
+    :type variables: `sequence` of :class:`~ocgis.Variable`
+    :returns: ``True`` if the values of all variables may be written to shard files. Variable length arrays may not.
+    :rtype: bool
+    """
+    for var in variables:
+        if isinstance(var, CoordinateReferenceSystem):
+            continue
+        if not var.is_string_object and isinstance(var.dtype, ObjectType) and not isinstance(var, TemporalVariable):
+            return False
+    return True
+
+
+def stitch_shards(path, shard_paths, remove=True):
+    """
+    Copy the pieces of shard files into the output file. Pieces are copied in slabs along their first axis. Slab sizes
+    follow :attr:`ocgis.constants.VALUE_SLAB_BYTES`.
+
+    :param str path: The output file path. Variables must exist in the output file.
+    :param shard_paths: The shard file paths.
+    :type shard_paths: `sequence` of str
+    :param bool remove: If ``True``, remove shard files after copying their pieces or if copying fails.
+    """
+    try:
+        with nc.Dataset(path, 'a') as target:
+            for shard_path in shard_paths:
+                with nc.Dataset(shard_path) as shard:
+                    shard.set_auto_maskandscale(False)
+                    shard.set_auto_chartostring(False)
+                    for name, piece in shard.variables.items():
+                        if _TARGET not in piece.ncattrs():
+                            continue
+                        ncvar = target.variables[piece.getncattr(_TARGET)]
+                        mask_var = shard.variables.get(name + _MASK_SUFFIX)
+                        if piece.ndim == 0:
+                            ncvar[...] = piece[...]
+                            continue
+                        start = np.atleast_1d(piece.getncattr(_START)).tolist()
+                        length = get_slab_length(piece.shape, piece.dtype.itemsize, 0)
+                        for lower in range(0, piece.shape[0], length):
+                            block = piece[lower:lower + length]
+                            if mask_var is not None:
+                                block = np.ma.array(block, mask=mask_var[lower:lower + length].astype(bool))
+                            slc = [slice(start[0] + lower, start[0] + lower + block.shape[0])]
+                            for s, size in zip(start[1:], piece.shape[1:]):
+                                slc.append(slice(s, s + size))
+                            ncvar[tuple(slc)] = block
+    finally:
+        # Shard files are also removed if stitching fails.
+        if remove:
+            for shard_path in shard_paths:
+                if os.path.exists(shard_path):
+                    os.remove(shard_path)
+
+
+def write_shard(path, pieces):
+    """
+    Write pieces to a shard file.
+
+    :param str path: The shard file path.
+    :param list pieces: See :func:`~ocgis.driver.shard.get_shard_pieces`.
+    """
+    with nc.Dataset(path, 'w') as ds:
+        ds.set_auto_maskandscale(False)
+        for idx, (name, start, value) in enumerate(pieces):
+            dimensions = []
+            for didx, size in enumerate(value.shape):
+                dimension_name = 'piece{}_{}'.format(idx, didx)
+                ds.createDimension(dimension_name, size)
+                dimensions.append(dimension_name)
+            piece_name = 'piece{}'.format(idx)
+            piece = ds.createVariable(piece_name, value.dtype, dimensions=dimensions)
+            piece.setncattr(_TARGET, name)
+            if len(start) > 0:
+                piece.setncattr(_START, np.array(start, dtype=np.int64))
+            piece.set_auto_chartostring(False)
+            piece[...] = np.ma.getdata(value)
+            mask = np.ma.getmask(value)
+            if mask is not np.ma.nomask and mask.any():
+                mask_var = ds.createVariable(piece_name + _MASK_SUFFIX, np.uint8, dimensions=dimensions)
+                mask_var[...] = mask.astype(np.uint8)
+
+
+def write_shards(path, variables, driver, aggregators=None):
+    """
+    Write variable values to the variables of an output file concurrently using shard files. The output file must
+    exist and contain the variables (i.e. following a template write).
+
+    This function is collective across the current :class:`~ocgis.OcgVM`.
+
+    :param str path: The output file path.
+    :param variables: See :func:`~ocgis.driver.shard.get_shard_pieces`.
+    :param driver: See :func:`~ocgis.driver.shard.get_shard_pieces`.
+    :param int aggregators: The number of ranks writing shard files. Values of the other ranks are gathered to these
+     ranks. If ``None``, use ``ocgis.env.NETCDF_SHARD_AGGREGATORS``. If this is also ``None``, all ranks write a shard
+     file.
+    """
+    if aggregators is None:
+        aggregators = env.NETCDF_SHARD_AGGREGATORS
+
+    # Values of variables without a distributed dimension are the same on all ranks. Only the root writes these.
+    pieces = get_shard_pieces(variables, driver, include_replicated=vm.rank == 0)
+    if aggregators is None or aggregators >= vm.size:
+        is_writer = True
+    else:
+        # Group consecutive ranks. The lowest rank in each group is its writer.
+        color = vm.rank * max(aggregators, 1) // vm.size
+        comm = vm.comm.Split(color, vm.rank)
+        try:
+            pieces = gather_shard_pieces(pieces, comm)
+            is_writer = comm.Get_rank() == 0
+        finally:
+            comm.Free()
+
+    if is_writer and len(pieces) > 0:
+        shard_path = get_shard_path(path, vm.rank)
+        write_shard(shard_path, pieces)
+    else:
+        shard_path = None
+
+    shard_paths = vm.gather(shard_path)
+    if vm.rank == 0:
+        stitch_shards(path, [p for p in shard_paths if p is not None])
+    vm.barrier()
@@ -69,11 +69,27 @@ class Environment(AbstractOcgisObject):
         self.ENABLE_FILE_LOGGING = EnvParm('ENABLE_FILE_LOGGING', False, formatter=self._format_bool_)
         self.DEBUG = EnvParm('DEBUG', False, formatter=self._format_bool_)
         self.DIR_BIN = EnvParm('DIR_BIN', None)
+        # Directory for persistent caches (i.e. source metadata). If None, persistent caching is disabled.
+        self.DIR_CACHE = EnvParm('DIR_CACHE', None)
+        # Maximum total size in bytes of the persistent metadata cache. If None, there is no limit.
+        self.METADATA_CACHE_MAX_BYTES = EnvParm('METADATA_CACHE_MAX_BYTES', 256 * 1024 ** 2, formatter=int)
+        # If True, persist the overlap weights of grid elements and selection geometries used for spatial averaging in
+        # DIR_CACHE. Later aggregations with the same grid and selection geometries do not intersect geometries.
+        self.USE_WEIGHT_CACHE = EnvParm('USE_WEIGHT_CACHE', False, formatter=self._format_bool_)
+        # Maximum total size in bytes of the persistent overlap weight cache. If None, there is no limit.
+        self.WEIGHT_CACHE_MAX_BYTES = EnvParm('WEIGHT_CACHE_MAX_BYTES', 1024 ** 3, formatter=int)
+        # If True, NetCDF writes and segmented temporal calculations read values of unloaded source variables in slabs.
+        self.USE_LAZY_VALUES = EnvParm('USE_LAZY_VALUES', False, formatter=self._format_bool_)
+        # Maximum total size in bytes of value slabs cached in memory by lazy variable values.
+        self.VALUE_CACHE_BYTES = EnvParm('VALUE_CACHE_BYTES', 256 * 1024 ** 2, formatter=int)
         self.USE_SPATIAL_INDEX = EnvParmImport('USE_SPATIAL_INDEX', None, 'rtree')
         self.USE_CFUNITS = EnvParmImport('USE_CFUNITS', None, ('cf_units', 'cfunits'))
         self.USE_ESMF = EnvParmImport('USE_ESMF', None, 'ESMF')
         self.USE_ICCLIM = EnvParmImport('USE_ICCLIM', None, 'icclim')
         self.USE_MPI4PY = EnvParmImport('USE_MPI4PY', None, 'mpi4py')
+        # If True and numexpr is available, evaluate string function calculations with numexpr. numexpr has no masked
+        # semantics so masked outputs may differ from the NumPy evaluation.
+        self.USE_NUMEXPR = EnvParm('USE_NUMEXPR', False, formatter=self._format_bool_)
         self.USE_MEMORY_OPTIMIZATIONS = EnvParm('USE_MEMORY_OPTIMIZATIONS', False, formatter=self._format_bool_)
         self.USE_NETCDF4_MPI = EnvParm('USE_NETCDF4_MPI', None, formatter=self._format_bool_)
         self.CONF_PATH = EnvParm('CONF_PATH', os.path.expanduser('~/.config/ocgis.conf'))
@@ -86,6 +102,9 @@ class Environment(AbstractOcgisObject):
         self.ADD_OPS_MPI_BARRIER = EnvParm('ADD_OPS_MPI_BARRIER', True, formatter=self._format_bool_)
         # If True, prefer using netcdftime if available. If None, automatically detect which to use.
         self.PREFER_NETCDFTIME = EnvParm('PREFER_NETCDFTIME', None, formatter=self._format_bool_)
+        # If True, formatted time variables use integer date parts computed from numeric time. Python date objects are
+        # only created for output.
+        self.USE_TIME_PARTS = EnvParm('USE_TIME_PARTS', False, formatter=self._format_bool_)
         # If True, add units and possibly calendar for time variables on bounds variables.
         self.CLOBBER_UNITS_ON_BOUNDS = EnvParm('CLOBBER_UNITS_ON_BOUNDS', True, formatter=self._format_bool_)
         # If True, add axis attributes to grid coordinate variables when the grid is initialized.
@@ -95,6 +114,20 @@ class Environment(AbstractOcgisObject):
         self.COORDSYS_ACTUAL = EnvParm('COORDSYS_ACTUAL', None)
         # The maximum string length to use when creating NetCDF string variables.
         self.STRING_MAX_LENGTH = EnvParm('STRING_MAX_LENGTH', 255)
+        # If True, keep read-only dataset handles open in a pool for reuse by driver scopes.
+        self.USE_DATASET_POOL = EnvParm('USE_DATASET_POOL', False, formatter=self._format_bool_)
+        # The maximum number of idle handles to keep open in the dataset handle pool.
+        self.DATASET_POOL_MAX_OPEN = EnvParm('DATASET_POOL_MAX_OPEN', 32, formatter=int)
+        # Close pooled dataset handles that have not been used for this many seconds. If None, there is no timeout.
+        self.DATASET_POOL_IDLE_TIMEOUT = EnvParm('DATASET_POOL_IDLE_TIMEOUT', 300., formatter=float)
+        # If True, find the grid elements intersecting all selection geometries with a single spatial index query.
+        self.BATCH_SPATIAL_SUBSET = EnvParm('BATCH_SPATIAL_SUBSET', True, formatter=self._format_bool_)
+        # If True and parallel netCDF4 writes are not used, ranks write their values to shard files concurrently. The
+        # shards are then stitched into the output file by the root rank.
+        self.USE_NETCDF_SHARDS = EnvParm('USE_NETCDF_SHARDS', False, formatter=self._format_bool_)
+        # The number of ranks writing shard files. Values of the other ranks are gathered to these ranks. If None, all
+        # ranks write a shard file.
+        self.NETCDF_SHARD_AGGREGATORS = EnvParm('NETCDF_SHARD_AGGREGATORS', None, formatter=int)
 
         if self.PREFER_NETCDFTIME is None:
             self.PREFER_NETCDFTIME = get_netcdftime_preference()
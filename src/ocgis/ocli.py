@@ -231,7 +231,10 @@ def chunked_rwg(source, destination, weight, nchunks_dst, merge, esmf_src_type,
               help='Path to the destination grid NetCDF file. Needed if using --insert_weighted.')
 @click.option('--data_variables', default='auto', type=str,
               help='List of comma-separated data variable names to overload auto-discovery.')
-def chunked_smm(wd, index_path, insert_weighted, destination, data_variables):
+@click.option('--engine', default='auto', type=click.Choice(['auto', 'esmf', 'scipy']),
+              help="Sparse matrix multiplication engine. 'scipy' applies weights without ESMF. 'auto' uses ESMF if it "
+                   "is available.")
+def chunked_smm(wd, index_path, insert_weighted, destination, data_variables, engine):
     if wd is None:
         wd = os.getcwd()
 
@@ -249,7 +252,7 @@ def chunked_smm(wd, index_path, insert_weighted, destination, data_variables):
 
     # ------------------------------------------------------------------------------------------------------------------
 
-    GridChunker.smm(index_path, wd, data_variables=data_variables)
+    GridChunker.smm(index_path, wd, data_variables=data_variables, engine=engine)
     if insert_weighted:
         with ocgis.vm.scoped_barrier(first=True, last=True):
             with ocgis.vm.scoped('insert weighted', [0]):
@@ -2,6 +2,7 @@ from ocgis import vm
 from ocgis.base import AbstractOcgisObject
 from ocgis.conv.meta import MetaOCGISConverter
 from ocgis.ops.engine import OperationsEngine
+from ocgis.ops.executor import ProcessPoolExecutor
 from ocgis.ops.interpreter import OcgInterpreter
 from ocgis.ops.parms.base import AbstractParameter
 from ocgis.ops.parms.definition import *
@@ -61,8 +62,9 @@ class OcgOperations(AbstractOcgisObject):
     :param slice: A five-element list to use for slicing the input data. This will override any other susetting.
     :type slice: list
     :param format_time: If ``True`` (the default), attempt to coerce time values to datetime stamps. If ``False``, pass
-     values through without a coercion attempt. This only affects :class:`~ocgis.RequestDataset` objects.
-    :type format_time: bool
+     values through without a coercion attempt. If ``'parts'``, use integer date parts for time operations. This only
+     affects :class:`~ocgis.RequestDataset` objects. If ``True``, a request dataset's ``'parts'`` value is kept.
+    :type format_time: bool | str
     :param calc_sample_size: If `True`, calculate statistical sample sizes for calculations.
     :type calc_sample_size: bool
     :param output_crs: If provided, all output geometries will be projected to match the provided CRS.
@@ -115,6 +117,11 @@ class OcgOperations(AbstractOcgisObject):
      coordinate systems.
     :param bool optimized_bbox_subset: If ``True``, only perform the bounding box subset ignoring other subsetting
      procedures such as spatial operations on geometry objects using a spatial index.
+    :param str executor: If ``'serial'`` (the default), execute operations in the current process. If ``'process'``,
+     execute each dataset and selection geometry combination using a pool of worker processes. Collections are returned
+     in the same order as serial execution. Not available with regridding or when running with more than one MPI rank.
+    :param int workers: The maximum number of worker processes for the ``'process'`` executor. If ``None``, use the
+     number of available processors.
     """
 
     def __init__(self, dataset=None, spatial_operation='intersects', geom=None, geom_select_sql_where=None,
@@ -126,7 +133,8 @@ class OcgOperations(AbstractOcgisObject):
                  add_auxiliary_files=True, optimizations=None, callback=None, time_range=None, time_region=None,
                  time_subset_func=None, level_range=None, conform_units_to=None, select_nearest=False,
                  regrid_destination=None, regrid_options=None, melted=False, output_format_options=None,
-                 spatial_wrapping=None, spatial_reorder=False, optimized_bbox_subset=False):
+                 spatial_wrapping=None, spatial_reorder=False, optimized_bbox_subset=False, executor='serial',
+                 workers=None):
 
         # Tells "__setattr__" to not perform global validation until all values are initially set.
         self._is_init = True
@@ -175,6 +183,8 @@ class OcgOperations(AbstractOcgisObject):
         self.melted = Melted(init_value=env.MELTED or melted)
         self.spatial_wrapping = SpatialWrapping(spatial_wrapping)
         self.spatial_reorder = SpatialReorder(spatial_reorder)
+        self.executor = Executor(executor)
+        self.workers = Workers(workers)
 
         # These values are left in to perhaps be added back in at a later date.
         self.output_grouping = None
@@ -346,6 +356,16 @@ class OcgOperations(AbstractOcgisObject):
                 msg = 'Regridding not allowed with spatial "clip" operation.'
                 raise DefinitionValidationError(SpatialOperation, msg)
 
+        # Process pools are not used in parallel or with regridding. Regridding may require ESMF which is not safe to
+        # use in forked processes.
+        if self.executor == constants.ExecutorName.PROCESS:
+            if ProcessPoolExecutor is None:
+                _raise_('The "concurrent.futures" module is required for process execution.', obj=Executor)
+            if vm.size > 1:
+                _raise_('Process execution is not available in parallel.', obj=Executor)
+            if self.regrid_destination is not None:
+                _raise_('Process execution is not available with regridding.', obj=Executor)
+
         # Collect unique coordinate systems. None is returned if one is not parsable.
         projections = []
         for element in dataset:
@@ -1,6 +1,9 @@
 import logging
+import multiprocessing
 from copy import deepcopy
 
+import numpy as np
+
 from ocgis import env, constants
 from ocgis import vm
 from ocgis.base import raise_if_empty, AbstractOcgisObject
@@ -10,7 +13,10 @@ from ocgis.collection.spatial import SpatialCollection
 from ocgis.constants import WrappedState, HeaderName, WrapAction, SubcommName, KeywordArgument
 from ocgis.exc import ExtentError, EmptySubsetError, BoundsAlreadyAvailableError, SubcommNotFoundError, \
     NoDataVariablesFound, WrappedStateEvalTargetMissing
+from ocgis.ops.executor import iter_process_collections
+from ocgis.spatial.grid import Grid, get_intersects_index_sets
 from ocgis.spatial.spatial_subset import SpatialSubsetOperation
+from ocgis.spatial.weight_cache import get_cached_overlap_weights
 from ocgis.util.helpers import get_default_or_apply
 from ocgis.util.logging_ocgis import ocgis_lh, ProgressOcgOperations
 from ocgis.variable.base import create_typed_variable_from_data_model
@@ -36,6 +42,7 @@ class OperationsEngine(AbstractOcgisObject):
         self._progress = progress or ProgressOcgOperations()
         self._original_subcomm = deepcopy(vm.current_comm_name)
         self._backtransform = {}
+        self._selection_geometries = None
 
         # Create the calculation engine is calculations are present.
         if self.ops.calc is None or self._request_base_size_only:
@@ -60,21 +67,14 @@ class OperationsEngine(AbstractOcgisObject):
                 ocgis_lh('__iter__ yielding', self._subset_log, level=logging.DEBUG)
                 yield coll
         finally:
-            # Try and remove any subcommunicators associated with operations.
-            for v in SubcommName.__members__.values():
-                try:
-                    vm.free_subcomm(name=v)
-                except SubcommNotFoundError:
-                    pass
-            vm.set_comm(self._original_subcomm)
-
-            # Remove any back transformations.
-            for v in constants.BackTransform.__members__.values():
-                self._backtransform.pop(v, None)
-
-    def _iter_collections_(self):
-        """:rtype: :class:`ocgis.collection.base.AbstractCollection`"""
+            self._reset_state_()
 
+    def _get_request_dataset_groups_(self):
+        """
+        :returns: A list of request dataset sequences. Each sequence is processed as a unit by
+         :meth:`~ocgis.ops.engine.OperationsEngine._process_subsettables_`.
+        :rtype: list
+        """
         # Multivariate calculations require datasets come in as a list with all variable inputs part of the same
         # sequence.
         if self._has_multivariate_calculations:
@@ -82,6 +82,26 @@ class OperationsEngine(AbstractOcgisObject):
         # Otherwise, process geometries expects a single element sequence.
         else:
             itr_rd = [[rd] for rd in self.ops.dataset]
+        return itr_rd
+
+    def _get_work_units_(self, itr_rd):
+        """
+        :param list itr_rd: Request dataset groups from
+         :meth:`~ocgis.ops.engine.OperationsEngine._get_request_dataset_groups_`.
+        :returns: A list of ``(request dataset group index, selection geometry index)`` tuples in processing order. The
+         geometry index is ``None`` if there are no selection geometries.
+        :rtype: list
+        """
+        if self.ops.slice is None and self.ops.geom is not None:
+            geom_indices = list(range(len(self.ops.geom)))
+        else:
+            geom_indices = [None]
+        return [(ii, jj) for ii in range(len(itr_rd)) for jj in geom_indices]
+
+    def _iter_collections_(self):
+        """:rtype: :class:`ocgis.collection.base.AbstractCollection`"""
+
+        itr_rd = self._get_request_dataset_groups_()
 
         # Configure the progress object.
         self._progress.n_subsettables = len(itr_rd)
@@ -104,61 +124,100 @@ class OperationsEngine(AbstractOcgisObject):
                 format(', '.join([_['func'] for _ in self.ops.calc]))
         ocgis_lh(msg=msg, logger=self._subset_log)
 
-        # Process the incoming datasets. Convert from request datasets to fields as needed.
-        for rds in itr_rd:
-
-            try:
-                msg = 'Processing URI(s): {0}'.format([rd.uri for rd in rds])
-            except AttributeError:
-                # Field objects have no URIs. Multivariate calculations change how the request dataset iterator is
-                # configured as well.
-                msg = []
-                for rd in rds:
-                    try:
-                        msg.append(rd.uri)
-                    except AttributeError:
-                        # Likely a field object which does have a name.
-                        msg.append(rd.name)
-                msg = 'Processing URI(s) / field names: {0}'.format(msg)
+        if self.ops.executor == constants.ExecutorName.PROCESS:
+            # Work units are executed by worker processes. Collections are returned in the serial processing order.
+            units = self._get_work_units_(itr_rd)
+            workers = self.ops.workers or multiprocessing.cpu_count()
+            msg = 'Processing {0} work unit(s) with {1} worker process(es).'.format(len(units), workers)
             ocgis_lh(msg=msg, logger=self._subset_log)
+            n_marks = max(self._progress.n_calculations, 1)
+            for coll in iter_process_collections(self, units, workers):
+                for _ in range(n_marks):
+                    self._progress.mark()
+                ocgis_lh('_iter_collections_ yielding', self._subset_log, level=logging.DEBUG)
+                yield coll
+        else:
+            # Process the incoming datasets. Convert from request datasets to fields as needed.
+            for rds in itr_rd:
+                for coll in self._iter_processed_collections_(rds):
+                    ocgis_lh('_iter_collections_ yielding', self._subset_log, level=logging.DEBUG)
+                    yield coll
 
-            for coll in self._process_subsettables_(rds):
-                # If there are calculations, do those now and return a collection.
-                if not vm.is_null and self.cengine is not None:
-                    ocgis_lh('Starting calculations.', self._subset_log)
-                    raise_if_empty(coll)
+    def _iter_processed_collections_(self, rds, geom_index=None):
+        """
+        Yield collections for a request dataset group with all operations, including calculations, applied.
 
-                    # Look for any temporal grouping optimizations.
-                    if self.ops.optimizations is None:
-                        tgds = None
-                    else:
-                        tgds = self.ops.optimizations.get('tgds')
-
-                    # Execute the calculations.
-                    coll = self.cengine.execute(coll, file_only=self.ops.file_only, tgds=tgds)
-
-                    # If we need to spatially aggregate and calculations used raw values, update the collection
-                    # fields and subset geometries.
-                    if self.ops.aggregate and self.ops.calc_raw:
-                        coll_to_itr = coll.copy()
-                        for sfield, container in coll_to_itr.iter_fields(yield_container=True):
-                            sfield = _update_aggregation_wrapping_crs_(self, None, sfield, container, None)
-                            coll.add_field(sfield, container, force=True)
-                else:
-                    # If there are no calculations, mark progress to indicate a geometry has been completed.
-                    self._progress.mark()
+        :param rds: Sequence of :class:~`ocgis.RequestDataset` objects.
+        :type rds: sequence
+        :param int geom_index: If provided, only process the selection geometry at this index.
+        :rtype: :class:`ocgis.collection.base.AbstractCollection`
+        """
+
+        try:
+            msg = 'Processing URI(s): {0}'.format([rd.uri for rd in rds])
+        except AttributeError:
+            # Field objects have no URIs. Multivariate calculations change how the request dataset iterator is
+            # configured as well.
+            msg = []
+            for rd in rds:
+                try:
+                    msg.append(rd.uri)
+                except AttributeError:
+                    # Likely a field object which does have a name.
+                    msg.append(rd.name)
+            msg = 'Processing URI(s) / field names: {0}'.format(msg)
+        ocgis_lh(msg=msg, logger=self._subset_log)
+
+        for coll in self._process_subsettables_(rds, geom_index=geom_index):
+            # If there are calculations, do those now and return a collection.
+            if not vm.is_null and self.cengine is not None:
+                ocgis_lh('Starting calculations.', self._subset_log)
+                raise_if_empty(coll)
 
-                # Conversion of groups.
-                if self.ops.output_grouping is not None:
-                    raise NotImplementedError
+                # Look for any temporal grouping optimizations.
+                if self.ops.optimizations is None:
+                    tgds = None
                 else:
-                    ocgis_lh('_iter_collections_ yielding', self._subset_log, level=logging.DEBUG)
-                    yield coll
+                    tgds = self.ops.optimizations.get('tgds')
+
+                # Execute the calculations.
+                coll = self.cengine.execute(coll, file_only=self.ops.file_only, tgds=tgds)
+
+                # If we need to spatially aggregate and calculations used raw values, update the collection
+                # fields and subset geometries.
+                if self.ops.aggregate and self.ops.calc_raw:
+                    coll_to_itr = coll.copy()
+                    for sfield, container in coll_to_itr.iter_fields(yield_container=True):
+                        sfield = _update_aggregation_wrapping_crs_(self, None, sfield, container, None)
+                        coll.add_field(sfield, container, force=True)
+            else:
+                # If there are no calculations, mark progress to indicate a geometry has been completed.
+                self._progress.mark()
+
+            # Conversion of groups.
+            if self.ops.output_grouping is not None:
+                raise NotImplementedError
+            else:
+                yield coll
+
+    def _reset_state_(self):
+        # Try and remove any subcommunicators associated with operations.
+        for v in SubcommName.__members__.values():
+            try:
+                vm.free_subcomm(name=v)
+            except SubcommNotFoundError:
+                pass
+        vm.set_comm(self._original_subcomm)
+
+        # Remove any back transformations.
+        for v in constants.BackTransform.__members__.values():
+            self._backtransform.pop(v, None)
 
-    def _process_subsettables_(self, rds):
+    def _process_subsettables_(self, rds, geom_index=None):
         """
         :param rds: Sequence of :class:~`ocgis.RequestDataset` objects.
         :type rds: sequence
+        :param int geom_index: If provided, only process the selection geometry at this index.
         :rtype: :class:`ocgis.collection.base.AbstractCollection`
         """
 
@@ -196,8 +255,12 @@ class OperationsEngine(AbstractOcgisObject):
                 field = [None] * len_rds
                 for ii in range(len_rds):
                     rds_element = rds[ii]
+                    format_time = self.ops.format_time
+                    # Keep a request dataset's integer date parts unless the operations change time formatting.
+                    if format_time is True and getattr(rds_element, 'format_time', None) == constants.FORMAT_TIME_PARTS:
+                        format_time = constants.FORMAT_TIME_PARTS
                     try:
-                        field_object = rds_element.get(format_time=self.ops.format_time,
+                        field_object = rds_element.get(format_time=format_time,
                                                        grid_abstraction=self.ops.abstraction)
                     except (AttributeError, TypeError):
                         # Likely a field object which does not need to be loaded from source.
@@ -274,6 +337,11 @@ class OperationsEngine(AbstractOcgisObject):
             itr = [None]
         else:
             itr = [None] if self.ops.geom is None else self.ops.geom
+            if geom_index is not None:
+                # Selection geometries are loaded once as work units will request other indices.
+                if self._selection_geometries is None:
+                    self._selection_geometries = list(itr)
+                itr = [self._selection_geometries[geom_index]]
 
         for coll in self._process_geometries_(itr, field, alias):
             # Conform units following the spatial subset.
@@ -296,11 +364,20 @@ class OperationsEngine(AbstractOcgisObject):
         assert isinstance(field, Field)
 
         ocgis_lh('processing geometries', self._subset_log, level=logging.DEBUG)
+        # Use cached overlap weights for spatial averaging if possible. Otherwise, find the grid elements intersecting
+        # all selection geometries at once if possible.
+        itr, overlap_weights = self._get_overlap_weights_(itr, field)
+        if overlap_weights is None:
+            itr, index_sets = self._get_batched_index_sets_(itr, field)
+        else:
+            index_sets = None
         # Process each geometry.
-        for subset_field in itr:
+        for ctr, subset_field in enumerate(itr):
 
             # Initialize the collection storage.
             coll = self._get_initialized_collection_()
+            # Spatial averaging weights and unioned geometry for the selection geometry if overlap weights are used.
+            subset_weights = None
             if vm.is_null:
                 sfield = field
             else:
@@ -345,7 +422,17 @@ class OperationsEngine(AbstractOcgisObject):
                 if subset_field is None:
                     sfield = field
                 else:
-                    sfield = self._get_spatially_subsetted_field_(alias, field, subset_field, subset_ugid)
+                    if overlap_weights is not None:
+                        hint_mask, weights, unioned = overlap_weights.get_subset(ctr)
+                        subset_weights = (weights, unioned)
+                    elif index_sets is None:
+                        hint_mask = None
+                    else:
+                        hint_mask = np.ones(field.grid.shape, dtype=bool)
+                        hint_mask.flat[index_sets[ctr]] = False
+                    sfield = self._get_spatially_subsetted_field_(alias, field, subset_field, subset_ugid,
+                                                                  hint_mask=hint_mask,
+                                                                  hint_only=overlap_weights is not None)
 
                 ocgis_lh(msg='after self._get_spatially_subsetted_field_', logger=self._subset_log, level=logging.DEBUG)
 
@@ -371,7 +458,8 @@ class OperationsEngine(AbstractOcgisObject):
                                 if self.ops.calc is None or (self.ops.calc is not None and not self.ops.calc_raw):
                                     # Update spatial aggregation, wrapping, and coordinate systems.
                                     sfield = _update_aggregation_wrapping_crs_(self, alias, sfield, subset_field,
-                                                                               subset_ugid)
+                                                                               subset_ugid,
+                                                                               subset_weights=subset_weights)
                                     ocgis_lh('after _update_aggregation_wrapping_crs_ in _process_geometries_',
                                              self._subset_log,
                                              level=logging.DEBUG)
@@ -384,6 +472,100 @@ class OperationsEngine(AbstractOcgisObject):
 
             yield coll
 
+    def _get_batched_index_sets_(self, itr, field):
+        """
+        Find the grid elements intersecting each selection geometry with a single bulk spatial index query. This
+        replaces a scan of the grid for each selection geometry. The selection geometries are prepared as they are for
+        the individual spatial subsets.
+
+        :param itr: An iterator yielding :class:`~ocgis.Field` objects for subsetting.
+        :type itr: [None] or [:class:`~ocgis.Field`, ...]
+        :param field: The target field for operations.
+        :type field: :class:`~ocgis.Field`
+        :returns: A tuple ``(itr, index_sets)``. ``itr`` replaces the input iterator. ``index_sets`` contains the flat
+         grid indices intersecting each selection geometry. It is ``None`` if the batched subset is not used.
+        :rtype: tuple
+        """
+
+        if not env.BATCH_SPATIAL_SUBSET or vm.size > 1 or vm.is_null:
+            return itr, None
+        if not isinstance(field.grid, Grid) or isinstance(field.crs, CFRotatedPole):
+            return itr, None
+        if self.ops.spatial_operation not in ('intersects', 'clip') or self.ops.optimized_bbox_subset or \
+                self.ops.slice is not None:
+            return itr, None
+
+        subset_fields = list(itr)
+        if len(subset_fields) < 2 or any([subset_field is None for subset_field in subset_fields]):
+            return subset_fields, None
+
+        ocgis_lh('finding intersecting elements for all selection geometries', self._subset_log, level=logging.DEBUG)
+        subset_geometries = self._get_prepared_subset_geometries_(field, subset_fields)
+        # This is None if bulk spatial index queries are not available.
+        index_sets = get_intersects_index_sets(field.grid, subset_geometries)
+        return subset_fields, index_sets
+
+    def _get_overlap_weights_(self, itr, field):
+        """
+        Get the overlap weights of the grid elements and selection geometries from the persistent weight cache. Weights
+        are only used for spatial averages of polygon grids.
+
+        :param itr: An iterator yielding :class:`~ocgis.Field` objects for subsetting.
+        :type itr: [None] or [:class:`~ocgis.Field`, ...]
+        :param field: The target field for operations.
+        :type field: :class:`~ocgis.Field`
+        :returns: A tuple ``(itr, overlap_weights)``. ``itr`` replaces the input iterator. ``overlap_weights`` is
+         ``None`` if the weight cache is not used.
+        :rtype: tuple(`sequence`, :class:`~ocgis.spatial.weight_cache.OverlapWeights`)
+        """
+
+        if not env.USE_WEIGHT_CACHE or env.DIR_CACHE is None or vm.size > 1 or vm.is_null:
+            return itr, None
+        ops = self.ops
+        if not ops.aggregate or (ops.calc is not None and ops.calc_raw) or ops.regrid_destination is not None:
+            return itr, None
+        if not isinstance(field.grid, Grid) or isinstance(field.crs, CFRotatedPole) or \
+                field.grid.abstraction != 'polygon':
+            return itr, None
+        if ops.spatial_operation not in ('intersects', 'clip') or ops.optimized_bbox_subset or ops.select_nearest or \
+                ops.slice is not None:
+            return itr, None
+
+        subset_fields = list(itr)
+        if any([subset_field is None for subset_field in subset_fields]):
+            return subset_fields, None
+
+        ocgis_lh('getting overlap weights for all selection geometries', self._subset_log, level=logging.DEBUG)
+        subset_geometries = self._get_prepared_subset_geometries_(field, subset_fields)
+        subset_ugids = [subset_field.geom.ugid.get_value()[0] for subset_field in subset_fields]
+        # This is None if bulk spatial index queries are not available.
+        overlap_weights = get_cached_overlap_weights(field.grid, subset_geometries, subset_ugids,
+                                                     ops.spatial_operation)
+        return subset_fields, overlap_weights
+
+    def _get_prepared_subset_geometries_(self, field, subset_fields):
+        """
+        Prepare the selection geometries as they are prepared for the individual spatial subsets.
+
+        :param field: The target field for operations.
+        :type field: :class:`~ocgis.Field`
+        :param subset_fields: The selection fields.
+        :type subset_fields: `sequence` of :class:`~ocgis.Field`
+        :returns: The selection geometries in the field's coordinate system and wrapped state.
+        :rtype: list
+        """
+
+        sso = SpatialSubsetOperation(field)
+        ret = [None] * len(subset_fields)
+        for idx, subset_field in enumerate(subset_fields):
+            subset_field = deepcopy(subset_field)
+            if subset_field.crs is not None and subset_field.crs != field.crs:
+                subset_field.update_crs(field.crs)
+            subset_field = self._get_buffered_subset_geometry_if_point_(field, subset_field)
+            prepared = sso._prepare_geometry_(subset_field.geom)
+            ret[idx] = prepared.get_value().flatten()[0]
+        return ret
+
     def _get_nonspatial_subset_(self, field):
         """
         
@@ -471,7 +653,8 @@ class OperationsEngine(AbstractOcgisObject):
             field = field.get_field_slice(the_slice, strict=False, distributed=True)
         return field
 
-    def _get_spatially_subsetted_field_(self, alias, field, subset_field, subset_ugid):
+    def _get_spatially_subsetted_field_(self, alias, field, subset_field, subset_ugid, hint_mask=None,
+                                        hint_only=False):
         """
         Spatially subset a field with a selection field.
 
@@ -480,6 +663,10 @@ class OperationsEngine(AbstractOcgisObject):
         :type field: :class:`ocgis.Field`
         :param subset_field: The field to use for subsetting.
         :type subset_field: :class:`ocgis.Field`
+        :param hint_mask: See :meth:`~ocgis.spatial.spatial_subset.SpatialSubsetOperation.get_spatial_subset`.
+        :type hint_mask: :class:`numpy.ndarray`
+        :param bool hint_only: If ``True``, the unmasked elements of ``hint_mask`` are the subset. No geometric
+         operations are performed.
         :rtype: :class:`ocgis.Field`
         :raises: AssertionError, ExtentError
         """
@@ -488,12 +675,24 @@ class OperationsEngine(AbstractOcgisObject):
 
         ocgis_lh('executing spatial subset operation', self._subset_log, level=logging.DEBUG, alias=alias,
                  ugid=subset_ugid)
+        if hint_only:
+            # The hint mask is applied to the grid without testing element geometries. The mask is cascaded to the
+            # field's variables in place. The variables of a shallow copy receive their own masks so the source field's
+            # masks are not modified.
+            field = field.copy()
+            for variable in list(field.values()):
+                if variable.has_allocated_mask:
+                    variable.set_mask(variable.get_mask().copy())
+            spatial_operation, optimized_bbox_subset = 'intersects', True
+        else:
+            spatial_operation, optimized_bbox_subset = self.ops.spatial_operation, self.ops.optimized_bbox_subset
         sso = SpatialSubsetOperation(field)
         try:
             # Execute the spatial subset and return the subsetted field.
-            sfield = sso.get_spatial_subset(self.ops.spatial_operation, subset_field.geom,
+            sfield = sso.get_spatial_subset(spatial_operation, subset_field.geom,
                                             select_nearest=self.ops.select_nearest,
-                                            optimized_bbox_subset=self.ops.optimized_bbox_subset)
+                                            optimized_bbox_subset=optimized_bbox_subset,
+                                            hint_mask=hint_mask)
         except EmptySubsetError as e:
             if self.ops.allow_empty:
                 ocgis_lh(alias=alias, ugid=subset_ugid, msg='Empty geometric operation but empty returns allowed.',
@@ -570,7 +769,7 @@ class OperationsEngine(AbstractOcgisObject):
                 ocgis_lh(msg=msg, logger=self._subset_log, level=logging.WARN)
 
 
-def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ugid):
+def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ugid, subset_weights=None):
     raise_if_empty(sfield)
 
     ocgis_lh('entering _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
@@ -587,9 +786,14 @@ def _update_aggregation_wrapping_crs_(obj, alias, sfield, subset_sdim, subset_ug
         ocgis_lh('after sfield.set_abstraction_geom in _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
                  ugid=subset_ugid, level=logging.DEBUG)
 
-        # Union the geometries and spatially average the data variables.
+        # Union the geometries and spatially average the data variables. Overlap weights provide the weights and the
+        # unioned geometry.
         # with vm.scoped(vm.get_live_ranks_from_object(sfield)):
-        sfield = sfield.geom.get_unioned(spatial_average=sfield.data_variables)
+        if subset_weights is None:
+            weights, unioned = None, None
+        else:
+            weights, unioned = subset_weights
+        sfield = sfield.geom.get_unioned(spatial_average=sfield.data_variables, weights=weights, unioned=unioned)
         ocgis_lh('after sfield.geom.get_unioned in _update_aggregation_wrapping_crs_', obj._subset_log, alias=alias,
                  ugid=subset_ugid, level=logging.DEBUG)
 
@@ -0,0 +1,222 @@
+"""
+Process pool execution for :class:`~ocgis.ops.engine.OperationsEngine`. Operations are split into work units composed
+of a request dataset group and a selection geometry index. Work units are executed by worker processes and the
+resulting collections are returned to the parent process in the serial processing order. When
+:mod:`multiprocessing.shared_memory` is available, large numpy arrays are returned through shared memory blocks
+instead of being copied through the result pipe.
+"""
+import io
+import itertools
+import multiprocessing
+import os
+import pickle
+from collections import deque
+
+import numpy as np
+from six.moves import cPickle
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    # Python 2 without the "futures" backport.
+    ProcessPoolExecutor = None
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    # Python versions older than 3.8.
+    shared_memory = None
+    resource_tracker = None
+
+#: Arrays with fewer bytes are pickled with the collections instead of using a shared memory block.
+SHARED_MEMORY_MIN_NBYTES = 65536
+
+# Operations engine used by a worker process. Set by the pool initializer.
+_WORKER_ENGINE = None
+
+
+class _SharedMemoryPickler(pickle.Pickler):
+    """
+    Pickler copying large numpy arrays into shared memory blocks. Only the block names, shapes, and data types are
+    pickled for these arrays.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pickle.Pickler.__init__(self, *args, **kwargs)
+        self.blocks = []
+        self._pids = {}
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.dtype.fields is not None or \
+                obj.nbytes < SHARED_MEMORY_MIN_NBYTES:
+            return None
+        # Arrays referenced more than once share a block.
+        try:
+            return self._pids[id(obj)]
+        except KeyError:
+            pass
+        block = shared_memory.SharedMemory(create=True, size=obj.nbytes)
+        self.blocks.append(block)
+        dst = np.ndarray(obj.shape, dtype=obj.dtype, buffer=block.buf)
+        dst[...] = obj
+        del dst
+        ret = (block.name, obj.shape, obj.dtype.str)
+        self._pids[id(obj)] = ret
+        return ret
+
+
+class _SharedMemoryUnpickler(pickle.Unpickler):
+    """
+    Unpickler copying arrays out of the shared memory blocks created by :class:`_SharedMemoryPickler`. Blocks are
+    unlinked after their array is copied.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pickle.Unpickler.__init__(self, *args, **kwargs)
+        self._arrays = {}
+
+    def persistent_load(self, pid):
+        name, shape, dtype = pid
+        try:
+            return self._arrays[name]
+        except KeyError:
+            pass
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            src = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            ret = src.copy()
+            del src
+        finally:
+            block.close()
+            block.unlink()
+        self._arrays[name] = ret
+        return ret
+
+
+def dump_collections(colls):
+    """
+    Serialize collections for return to the parent process.
+
+    :param list colls: The collections to serialize.
+    :returns: A tuple ``(block names, pickled bytes)``. Block names are the shared memory blocks holding array data
+     that must be loaded or released by the parent process.
+    :rtype: tuple
+    """
+    if shared_memory is None:
+        return [], cPickle.dumps(colls, protocol=cPickle.HIGHEST_PROTOCOL)
+
+    buf = io.BytesIO()
+    pickler = _SharedMemoryPickler(buf, protocol=pickle.HIGHEST_PROTOCOL)
+    try:
+        pickler.dump(colls)
+    except:
+        release_blocks([b.name for b in pickler.blocks])
+        raise
+    finally:
+        for block in pickler.blocks:
+            block.close()
+    return [b.name for b in pickler.blocks], buf.getvalue()
+
+
+def iter_process_collections(engine, units, workers):
+    """
+    Execute work units using a process pool and yield the resulting collections in work unit order. At most two work
+    units per worker are pending at a time.
+
+    :param engine: The operations engine. Its operations are sent to the worker processes once.
+    :type engine: :class:`~ocgis.ops.engine.OperationsEngine`
+    :param list units: Work units from :meth:`~ocgis.ops.engine.OperationsEngine._get_work_units_`.
+    :param int workers: The number of worker processes.
+    :rtype: :class:`~ocgis.SpatialCollection`
+    """
+    if resource_tracker is not None and os.name == 'posix':
+        # Start the tracker in the parent so worker processes share it. Blocks created by workers are then unregistered
+        # when they are unlinked by the parent.
+        resource_tracker.ensure_running()
+
+    units = iter(units)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=_get_context_(), initializer=_initialize_worker_,
+                                   initargs=(engine.ops, engine._request_base_size_only))
+    try:
+        for unit in itertools.islice(units, 2 * workers):
+            pending.append(executor.submit(_execute_work_unit_, unit))
+        while len(pending) > 0:
+            payload = pending.popleft().result()
+            for unit in itertools.islice(units, 1):
+                pending.append(executor.submit(_execute_work_unit_, unit))
+            for coll in load_collections(payload):
+                yield coll
+    finally:
+        # Release shared memory held by work units not consumed (i.e. an exception or the iterator was closed).
+        for future in pending:
+            if not future.cancel():
+                try:
+                    release_blocks(future.result()[0])
+                except Exception:
+                    pass
+        executor.shutdown(wait=True)
+
+
+def load_collections(payload):
+    """
+    Load collections serialized by :func:`~ocgis.ops.executor.dump_collections`.
+
+    :param tuple payload: The serialized collections.
+    :rtype: list
+    """
+    names, data = payload
+    try:
+        if shared_memory is None:
+            ret = cPickle.loads(data)
+        else:
+            ret = _SharedMemoryUnpickler(io.BytesIO(data)).load()
+    finally:
+        # Blocks are unlinked when loaded. This removes any blocks remaining after a load error.
+        release_blocks(names)
+    return ret
+
+
+def release_blocks(names):
+    """
+    Unlink shared memory blocks ignoring blocks that no longer exist.
+
+    :param sequence names: The shared memory block names.
+    """
+    for name in names:
+        try:
+            block = shared_memory.SharedMemory(name=name)
+        except (OSError, ValueError):
+            continue
+        block.close()
+        block.unlink()
+
+
+def _execute_work_unit_(unit):
+    rd_index, geom_index = unit
+    engine = _WORKER_ENGINE
+    rds = engine._get_request_dataset_groups_()[rd_index]
+    try:
+        colls = list(engine._iter_processed_collections_(rds, geom_index=geom_index))
+    finally:
+        engine._reset_state_()
+    return dump_collections(colls)
+
+
+def _get_context_():
+    # Forking avoids pickling the operations which may contain objects like lambda functions.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ret = multiprocessing.get_context('fork')
+    else:
+        ret = None
+    return ret
+
+
+def _initialize_worker_(ops, request_base_size_only):
+    global _WORKER_ENGINE
+    from ocgis.driver.pool import dataset_pool
+    from ocgis.ops.engine import OperationsEngine
+
+    # Handles inherited from a forked parent are not used by the worker.
+    dataset_pool.detach()
+    _WORKER_ENGINE = OperationsEngine(ops, request_base_size_only=request_base_size_only)
@@ -590,6 +590,19 @@ class DirOutput(base.StringParameter):
             raise DefinitionValidationError(self, 'Path does not exist: {}'.format(value))
 
 
+class Executor(base.StringOptionParameter):
+    name = 'executor'
+    default = constants.ExecutorName.SERIAL
+    valid = (constants.ExecutorName.SERIAL, constants.ExecutorName.PROCESS)
+
+    def _get_meta_(self):
+        if self.value == constants.ExecutorName.SERIAL:
+            ret = 'Operations executed serially in the current process.'
+        else:
+            ret = 'Operations executed by a pool of worker processes.'
+        return ret
+
+
 class FileOnly(base.BooleanParameter):
     meta_true = 'File written with empty data.'
     meta_false = 'Actual data written to file.'
@@ -602,6 +615,27 @@ class FormatTime(base.BooleanParameter):
     default = True
     meta_true = 'Time values converted to datetime stamps.'
     meta_false = 'Time values left in original form.'
+    meta_parts = 'Time values converted to integer date parts.'
+    _check_output_type = False
+
+    def _get_meta_(self):
+        if self.value == constants.FORMAT_TIME_PARTS:
+            ret = self.meta_parts
+        else:
+            ret = super(FormatTime, self)._get_meta_()
+        return ret
+
+    def _parse_string_(self, value):
+        if value == constants.FORMAT_TIME_PARTS:
+            ret = value
+        else:
+            ret = super(FormatTime, self)._parse_string_(value)
+        return ret
+
+    def _validate_(self, value):
+        if not isinstance(value, bool) and value != constants.FORMAT_TIME_PARTS:
+            msg = 'Time formatting must be a boolean or "{}".'.format(constants.FORMAT_TIME_PARTS)
+            raise DefinitionValidationError(self, msg)
 
 
 class Geom(base.AbstractParameter):
@@ -1352,3 +1386,22 @@ class VectorWrap(base.BooleanParameter):
     default = True
     meta_true = 'Geographic coordinates wrapped from -180 to 180 degrees longitude.'
     meta_false = 'Geographic coordinates match the target dataset coordinate wrapping and may be in the range 0 to 360.'
+
+
+class Workers(base.AbstractParameter):
+    name = 'workers'
+    nullable = True
+    default = None
+    input_types = [int]
+    return_type = [int]
+
+    def _get_meta_(self):
+        if self.value is None:
+            msg = 'The number of worker processes is the number of available processors.'
+        else:
+            msg = 'A maximum of {0} worker processes were used.'.format(self.value)
+        return msg
+
+    def _validate_(self, value):
+        if value < 1:
+            raise DefinitionValidationError(self, msg='must be >= 1')
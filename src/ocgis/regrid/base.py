@@ -12,6 +12,7 @@ from ocgis.base import AbstractOcgisObject, get_dimension_names, iter_dict_slice
 from ocgis.collection.field import Field
 from ocgis.constants import DMK, GridChunkerConstants, DecompositionType
 from ocgis.exc import RegriddingError, CornersInconsistentError
+from ocgis.regrid.sparse import get_chunked_smm_filenames
 from ocgis.spatial.grid import Grid, expand_grid
 from ocgis.spatial.spatial_subset import SpatialSubsetOperation
 from ocgis.util.broadcaster import broadcast_scope, broadcast_variable
@@ -942,42 +943,22 @@ def smm(index_path, wd=None, data_variables='auto'):
     :param str wd: Path to the directory containing the chunk files.
     :param list data_variables: Optional list of data variables. Otherwise, auto-discovery is used.
     """
-    # Assume the current working directory
-    if wd is None:
-        wd = ''
     # Turn on auto-discovery
     if data_variables == 'auto':
         v = None
     else:
         v = data_variables
 
-    # Get the attribute host
-    index_field = RequestDataset(index_path).get()
-    gs_index_v = index_field[GridChunkerConstants.IndexFile.NAME_INDEX_VARIABLE]
-
-    # Collect the source filenames
-    src_filenames = gs_index_v.attrs[GridChunkerConstants.IndexFile.NAME_SOURCE_VARIABLE]
-    src_filenames = index_field[src_filenames]
-    src_filenames = src_filenames.join_string_value()
-
-    # Collect the destination file names
-    dst_filenames = gs_index_v.attrs[GridChunkerConstants.IndexFile.NAME_DESTINATION_VARIABLE]
-    dst_filenames = index_field[dst_filenames]
-    dst_filenames = dst_filenames.join_string_value()
-
-    # Collect the weight filenames
-    wgt_filenames = gs_index_v.attrs[GridChunkerConstants.IndexFile.NAME_WEIGHTS_VARIABLE]
-    wgt_filenames = index_field[wgt_filenames]
-    wgt_filenames = wgt_filenames.join_string_value()
+    src_filenames, dst_filenames, wgt_filenames = get_chunked_smm_filenames(index_path, wd=wd)
 
     # Main loop for executing the SMM
     for ii in range(src_filenames.size):
         ocgis_lh(msg="Running SMM {} of {}".format(ii + 1, src_filenames.size), level=10, logger='regrid.base')
-        src_path = os.path.join(wd, src_filenames[ii])
+        src_path = src_filenames[ii]
         src_field = RequestDataset(src_path, variable=v, decomp_type=DecompositionType.ESMF).create_field()
         src_field.load()
 
-        dst_path = os.path.join(wd, dst_filenames[ii])
+        dst_path = dst_filenames[ii]
         dst_field = RequestDataset(dst_path, decomp_type=DecompositionType.ESMF).create_field()
         dst_field.load()
 
@@ -0,0 +1,214 @@
+"""
+ESMF-free sparse matrix multiplication (SMM) for weight files produced by ESMF and the
+:class:`~ocgis.spatial.grid_chunker.GridChunker`. Weight files use the SCRIP-like ``row``, ``col``, and ``S`` variables
+with one-based destination (``row``) and source (``col``) indices into the flattened spatial grids.
+"""
+import logging
+import os
+
+import netCDF4 as nc
+import numpy as np
+import six
+
+from ocgis import RequestDataset, vm
+from ocgis.constants import GridChunkerConstants
+from ocgis.exc import RegriddingError
+from ocgis.util.logging_ocgis import ocgis_lh
+from ocgis.variable.base import Variable
+
+# Sparse matrices keyed by the weight file path, its modification time, and the matrix shape.
+_MATRIX_CACHE = {}
+
+
+def apply_sparse_matrix(matrix, values):
+    """
+    Apply a sparse weight matrix to the trailing (flattened spatial) axis of ``values``.
+
+    A destination element is masked if it has no weights or any contributing source element is masked.
+
+    :param matrix: The weight matrix with shape ``(destination size, source size)``.
+    :type matrix: :class:`scipy.sparse.csr_matrix`
+    :param values: Two-dimensional array with shape ``(n, source size)``.
+    :type values: :class:`numpy.ndarray` | :class:`numpy.ma.MaskedArray`
+    :rtype: :class:`numpy.ma.MaskedArray` with shape ``(n, destination size)``
+    """
+
+    mask = np.ma.getmaskarray(values)
+    data = np.ma.filled(values, 0)
+    ret = matrix.dot(data.T).T
+
+    # Destination elements without weights are unmapped.
+    ret_mask = np.zeros(ret.shape, dtype=bool)
+    ret_mask[:, np.diff(matrix.indptr) == 0] = True
+    if mask.any():
+        pattern = matrix.copy()
+        pattern.data = np.ones_like(pattern.data)
+        ret_mask = np.logical_or(ret_mask, pattern.dot(mask.T.astype(int)).T > 0)
+
+    return np.ma.array(ret, mask=ret_mask)
+
+
+def get_chunked_smm_filenames(index_path, wd=None):
+    """
+    Get the source, destination, and weight file paths from a chunked regridding index file.
+
+    :param str index_path: Path to chunked operation's index file.
+    :param str wd: Path to the directory containing the chunk files.
+    :return: A tuple of arrays ``(source paths, destination paths, weight paths)``.
+    :rtype: tuple
+    """
+
+    if wd is None:
+        wd = ''
+
+    index_field = RequestDataset(index_path).get()
+    gs_index_v = index_field[GridChunkerConstants.IndexFile.NAME_INDEX_VARIABLE]
+
+    ret = []
+    for name in [GridChunkerConstants.IndexFile.NAME_SOURCE_VARIABLE,
+                 GridChunkerConstants.IndexFile.NAME_DESTINATION_VARIABLE,
+                 GridChunkerConstants.IndexFile.NAME_WEIGHTS_VARIABLE]:
+        filenames = index_field[gs_index_v.attrs[name]].join_string_value()
+        # Weight filenames may be stored with their full path. Joining will not modify these.
+        ret.append(np.array([os.path.join(wd, f) for f in filenames]))
+    return tuple(ret)
+
+
+def get_sparse_matrix(path, shape):
+    """
+    Create a sparse weight matrix from a weight file. Matrices are cached using the path, the file's modification
+    time, and the requested shape.
+
+    :param str path: Path to the weight file containing ``row``, ``col``, and ``S`` variables.
+    :param tuple shape: The matrix shape ``(destination size, source size)``.
+    :rtype: :class:`scipy.sparse.csr_matrix`
+    """
+    from scipy.sparse import csr_matrix
+
+    key = (os.path.abspath(path), os.path.getmtime(path), tuple(shape))
+    try:
+        ret = _MATRIX_CACHE[key]
+    except KeyError:
+        with nc.Dataset(path, 'r') as ds:
+            row = ds.variables['row'][:]
+            col = ds.variables['col'][:]
+            weights = ds.variables['S'][:]
+        # Indices are one-based.
+        ret = csr_matrix((np.ma.filled(weights, 0), (np.ma.filled(row) - 1, np.ma.filled(col) - 1)), shape=shape)
+        _MATRIX_CACHE[key] = ret
+    return ret
+
+
+def regrid_field_sparse(source, destination, weights, block_size=GridChunkerConstants.SMM_BLOCK_SIZE):
+    """
+    Regrid ``source`` data to match the grid of ``destination`` using a weight file. Data variables are read and
+    regridded in blocks along their leading extra (non-spatial) dimension.
+
+    :param source: The source field.
+    :type source: :class:`ocgis.Field`
+    :param destination: The destination field.
+    :type destination: :class:`ocgis.Field`
+    :param weights: Path to the weight file or a sparse matrix with shape ``(destination size, source size)``.
+    :type weights: str | :class:`scipy.sparse.csr_matrix`
+    :param int block_size: The number of elements along the leading extra dimension to regrid at a time.
+    :rtype: :class:`ocgis.Field`
+    :raises: RegriddingError
+    """
+
+    src_grid = source.grid
+    dst_grid = destination.grid
+    src_names = [dim.name for dim in src_grid.dimensions]
+    dst_shape = tuple([len(dim) for dim in dst_grid.dimensions])
+    src_size = int(np.prod([len(dim) for dim in src_grid.dimensions]))
+    dst_size = int(np.prod(dst_shape))
+
+    if isinstance(weights, six.string_types):
+        matrix = get_sparse_matrix(weights, (dst_size, src_size))
+    else:
+        matrix = weights
+
+    # Prepare the regridded sourced field. This amounts to exchanging the grids between the objects.
+    regridded_source = source.copy()
+    regridded_source.grid.extract(clean_break=True)
+    regridded_source.set_grid(dst_grid.extract())
+
+    fills = []
+    for source_variable in source.data_variables:
+        extra_dimensions = [dim for dim in source_variable.dimensions if dim.name not in src_names]
+        extra_shape = tuple([len(dim) for dim in extra_dimensions])
+        # Transpose source values so the spatial dimensions are last.
+        axes = [source_variable.dimension_names.index(name) for name in
+                [dim.name for dim in extra_dimensions] + src_names]
+
+        fill = np.ma.array(np.zeros(extra_shape + dst_shape, dtype=source_variable.dtype),
+                           mask=np.zeros(extra_shape + dst_shape, dtype=bool))
+        if len(extra_dimensions) == 0:
+            blocks = [None]
+        else:
+            blocks = [slice(start, start + block_size) for start in range(0, extra_shape[0], block_size)]
+
+        for block in blocks:
+            if block is None:
+                sub = source_variable
+            else:
+                sub = source_variable[{extra_dimensions[0].name: block}]
+            values = np.ma.transpose(sub.get_masked_value(), axes)
+            block_shape = values.shape[:len(extra_shape)]
+            values = values.reshape(-1, src_size)
+            regridded = apply_sparse_matrix(matrix, values).reshape(block_shape + dst_shape)
+            if block is None:
+                fill[:] = regridded
+            else:
+                fill[block] = regridded
+
+        if fill.mask.all():
+            msg = 'All regridded elements are masked. Do the input spatial extents overlap?'
+            raise RegriddingError(msg)
+
+        new_variable = Variable(name=source_variable.name, dimensions=extra_dimensions + list(dst_grid.dimensions),
+                                dtype=source_variable.dtype, fill_value=source_variable.fill_value,
+                                attrs=source_variable.attrs)
+        new_variable.set_value(fill.data)
+        new_variable.set_mask(fill.mask)
+        fills.append(new_variable)
+
+    for new_variable in fills:
+        regridded_source.add_variable(new_variable, is_data=True, force=True)
+
+    return regridded_source
+
+
+def smm(index_path, wd=None, data_variables='auto', block_size=GridChunkerConstants.SMM_BLOCK_SIZE):
+    """
+    Run a chunked sparse matrix multiplication without ESMF. Chunks are distributed across the current
+    :class:`~ocgis.OcgVM` ranks. Regridded data is written to the destination chunk files.
+
+    :param str index_path: Path to chunked operation's index file.
+    :param str wd: Path to the directory containing the chunk files.
+    :param list data_variables: Optional list of data variables. Otherwise, auto-discovery is used.
+    :param int block_size: See :func:`~ocgis.regrid.sparse.regrid_field_sparse`.
+    """
+
+    # Turn on auto-discovery
+    if data_variables == 'auto':
+        v = None
+    else:
+        v = data_variables
+
+    src_filenames, dst_filenames, wgt_filenames = get_chunked_smm_filenames(index_path, wd=wd)
+
+    # Each rank processes its chunks using a communicator containing only itself. The rank groups are disjoint which
+    # allows a single collective communicator creation.
+    rank, size = vm.rank, vm.size
+    with vm.scoped('sparse smm', [rank]):
+        for ii in range(rank, src_filenames.size, size):
+            ocgis_lh(msg="Running sparse SMM {} of {}".format(ii + 1, src_filenames.size), level=logging.DEBUG,
+                     logger='regrid.sparse')
+            src_field = RequestDataset(src_filenames[ii], variable=v).create_field()
+            dst_path = dst_filenames[ii]
+            dst_field = RequestDataset(dst_path).create_field()
+            # The destination file is overwritten with the regridded data.
+            dst_field.load()
+
+            regridded = regrid_field_sparse(src_field, dst_field, wgt_filenames[ii], block_size=block_size)
+            regridded.write(dst_path)
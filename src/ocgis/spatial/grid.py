@@ -22,6 +22,14 @@ from ocgis.vmachine.mpi import MPI_SIZE
 from shapely.geometry import Polygon, Point, box
 from shapely.geometry.base import BaseGeometry, BaseMultipartGeometry
 
+try:
+    # Vectorized geometry constructors are available in Shapely >= 2.0.
+    from shapely import box as shapely_box, points as shapely_points, polygons as shapely_polygons, STRtree
+except ImportError:
+    _SHAPELY_VECTORIZED = False
+else:
+    _SHAPELY_VECTORIZED = True
+
 CreateGeometryFromWkb, Geometry, wkbGeometryCollection, wkbPoint = ogr.CreateGeometryFromWkb, ogr.Geometry, \
                                                                    ogr.wkbGeometryCollection, ogr.wkbPoint
 
@@ -40,64 +48,34 @@ class GridGeometryProcessor(GeometryProcessor):
         geometry_iterable = self.get_geometry_iterable()
         super(GridGeometryProcessor, self).__init__(geometry_iterable, subset_geometry, keep_touches=keep_touches)
 
-    def get_geometry_iterable(self):
+    def get_geometry_array(self, fill=None):
+        """
+        Construct the grid's geometries in bulk. Elements masked by the hint mask are not filled.
+
+        :param fill: The two-dimensional object array to fill. If ``None``, an array filled with ``None`` is created.
+        :type fill: :class:`numpy.ndarray`
+        :rtype: :class:`numpy.ndarray`
+        """
         grid = self.grid
-        hint_mask = self.hint_mask
-        is_vectorized = grid.is_vectorized
+        if fill is None:
+            fill = np.empty(grid.shape, dtype=object)
         if self.use_bounds:
             abstraction = grid.abstraction
         else:
             abstraction = 'point'
 
         if abstraction == 'point':
-            x_data = grid.x.get_value()
-            y_data = grid.y.get_value()
-            for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
-                if hint_mask is not None and hint_mask[idx_row, idx_col]:
-                    yld = None
-                else:
-                    if is_vectorized:
-                        y = y_data[idx_row]
-                        x = x_data[idx_col]
-                    else:
-                        y = y_data[idx_row, idx_col]
-                        x = x_data[idx_row, idx_col]
-                    yld = Point(x, y)
-                yield (idx_row, idx_col), yld
+            ret = get_point_geometry_array(grid, fill, hint_mask=self.hint_mask)
         elif abstraction == 'polygon':
-            if grid.has_bounds:
-                # We want geometries for everything even if masked.
-                x_bounds = grid.x.bounds.get_value()
-                y_bounds = grid.y.bounds.get_value()
-                range_row = list(range(grid.shape[0]))
-                range_col = list(range(grid.shape[1]))
-                if is_vectorized:
-                    for row, col in itertools.product(range_row, range_col):
-                        if hint_mask is not None and hint_mask[row, col]:
-                            polygon = None
-                        else:
-                            min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
-                            min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
-                            polygon = box(min_x, min_y, max_x, max_y)
-                        yield (row, col), polygon
-                else:
-                    # TODO: We should be able to avoid the creation of this corners array.
-                    corners = np.vstack((y_bounds, x_bounds))
-                    corners = corners.reshape([2] + list(x_bounds.shape))
-                    for row, col in itertools.product(range_row, range_col):
-                        if hint_mask is not None and hint_mask[row, col]:
-                            polygon = None
-                        else:
-                            current_corner = corners[:, row, col]
-                            coords = np.hstack((current_corner[1, :].reshape(-1, 1),
-                                                current_corner[0, :].reshape(-1, 1)))
-                            polygon = Polygon(coords)
-                        yield (row, col), polygon
-            else:
-                msg = 'A grid must have bounds/corners to construct polygons. Consider using "set_extrapolated_bounds".'
-                raise GridDeficientError(msg)
+            ret = get_polygon_geometry_array(grid, fill, hint_mask=self.hint_mask)
         else:
             raise NotImplementedError(abstraction)
+        return ret
+
+    def get_geometry_iterable(self):
+        geometry_array = self.get_geometry_array()
+        for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in geometry_array.shape]):
+            yield (idx_row, idx_col), geometry_array[idx_row, idx_col]
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -1127,57 +1105,147 @@ def update_crs_with_geometry_collection(src_sr, to_sr, value_row, value_col):
         value_row[ii] = geom.GetY()
 
 
-def get_polygon_geometry_array(grid, fill):
-    is_vectorized = grid.is_vectorized
-
-    if grid.has_bounds:
-        # We want geometries for everything even if masked.
-        x_bounds = grid.x.bounds.get_value()
-        y_bounds = grid.y.bounds.get_value()
-        range_row = list(range(grid.shape[0]))
-        range_col = list(range(grid.shape[1]))
-        if is_vectorized:
-            for row, col in itertools.product(range_row, range_col):
-                min_x, max_x = np.min(x_bounds[col, :]), np.max(x_bounds[col, :])
-                min_y, max_y = np.min(y_bounds[row, :]), np.max(y_bounds[row, :])
-                polygon = box(min_x, min_y, max_x, max_y)
-                fill[row, col] = polygon
-        else:
-            # TODO: We should be able to avoid the creation of this corners array.
-            corners = np.vstack((y_bounds, x_bounds))
-            corners = corners.reshape([2] + list(x_bounds.shape))
-            for row, col in itertools.product(range_row, range_col):
-                current_corner = corners[:, row, col]
-                coords = np.hstack((current_corner[1, :].reshape(-1, 1),
-                                    current_corner[0, :].reshape(-1, 1)))
-                polygon = Polygon(coords)
-                fill[row, col] = polygon
-    else:
+def get_polygon_geometry_array(grid, fill, hint_mask=None):
+    """
+    Create polygon geometries from the grid's bounds/corners. Geometries are constructed in bulk when vectorized
+    geometry constructors are available (Shapely >= 2.0). Geometries are created for all elements regardless if the data
+    is masked.
+
+    :param grid: The source grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param fill: The two-dimensional object array to fill with geometries.
+    :type fill: :class:`numpy.ndarray`
+    :param hint_mask: If provided, elements that are ``True`` in the mask are not filled.
+    :type hint_mask: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ndarray`
+    """
+
+    if not grid.has_bounds:
         msg = 'A grid must have bounds/corners to construct polygons. Consider using "set_extrapolated_bounds".'
         raise GridDeficientError(msg)
 
+    x_bounds = grid.x.bounds.get_value()
+    y_bounds = grid.y.bounds.get_value()
+    select = _get_geometry_array_select_(grid, hint_mask)
+
+    if grid.is_vectorized:
+        min_x, max_x = [_broadcast_vectorized_(grid, arr, 1) for arr in (x_bounds.min(axis=1), x_bounds.max(axis=1))]
+        min_y, max_y = [_broadcast_vectorized_(grid, arr, 0) for arr in (y_bounds.min(axis=1), y_bounds.max(axis=1))]
+        min_x, min_y, max_x, max_y = [arr[select] for arr in (min_x, min_y, max_x, max_y)]
+        if _SHAPELY_VECTORIZED:
+            geoms = shapely_box(min_x, min_y, max_x, max_y)
+        else:
+            geoms = [box(*bbox) for bbox in zip(min_x, min_y, max_x, max_y)]
+    else:
+        # Coordinate array with shape (element count, corner count, 2).
+        coords = np.stack((x_bounds[select], y_bounds[select]), axis=-1)
+        if _SHAPELY_VECTORIZED:
+            geoms = shapely_polygons(coords)
+        else:
+            geoms = [Polygon(c) for c in coords]
+
+    _set_geometry_array_values_(fill, select, geoms)
     return fill
 
 
-def get_point_geometry_array(grid, fill):
-    """Create geometries for all the underlying coordinates regardless if the data is masked."""
+def get_point_geometry_array(grid, fill, hint_mask=None):
+    """
+    Create point geometries for all the underlying coordinates regardless if the data is masked. Geometries are
+    constructed in bulk when vectorized geometry constructors are available (Shapely >= 2.0).
+
+    :param grid: The source grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param fill: The two-dimensional object array to fill with geometries.
+    :type fill: :class:`numpy.ndarray`
+    :param hint_mask: If provided, elements that are ``True`` in the mask are not filled.
+    :type hint_mask: :class:`numpy.ndarray`
+    :rtype: :class:`numpy.ndarray`
+    """
 
     x_data = grid.x.get_value()
     y_data = grid.y.get_value()
-    is_vectorized = grid.is_vectorized
+    if grid.is_vectorized:
+        x_data = _broadcast_vectorized_(grid, x_data, 1)
+        y_data = _broadcast_vectorized_(grid, y_data, 0)
+    select = _get_geometry_array_select_(grid, hint_mask)
+    x_data = x_data[select]
+    y_data = y_data[select]
+
+    if _SHAPELY_VECTORIZED:
+        geoms = shapely_points(x_data, y_data)
+    else:
+        geoms = [Point(x, y) for x, y in zip(x_data, y_data)]
 
-    for idx_row, idx_col in itertools.product(*[list(range(ii)) for ii in grid.shape]):
-        if is_vectorized:
-            y = y_data[idx_row]
-            x = x_data[idx_col]
-        else:
-            y = y_data[idx_row, idx_col]
-            x = x_data[idx_row, idx_col]
-        pt = Point(x, y)
-        fill[idx_row, idx_col] = pt
+    _set_geometry_array_values_(fill, select, geoms)
     return fill
 
 
+def _broadcast_vectorized_(grid, arr, axis):
+    # Broadcast a one-dimensional coordinate array along the grid's other axis.
+    shape = [1, 1]
+    shape[axis] = -1
+    return np.broadcast_to(arr.reshape(shape), grid.shape)
+
+
+def _get_geometry_array_select_(grid, hint_mask):
+    if hint_mask is None:
+        ret = np.ones(grid.shape, dtype=bool)
+    else:
+        ret = np.invert(hint_mask)
+    return ret
+
+
+def _set_geometry_array_values_(fill, select, geoms):
+    # Copy into an object array first to avoid NumPy interpreting geometries as sequences.
+    values = np.empty(len(geoms), dtype=object)
+    for idx, geom in enumerate(geoms):
+        values[idx] = geom
+    fill[select] = values
+
+
+def get_intersects_index_sets(grid, subset_geometries, use_bounds='auto'):
+    """
+    Find the grid elements intersecting each subset geometry. A spatial index is built over the grid element geometries
+    near the subset geometries and queried with all subset geometries at once.
+
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param subset_geometries: The subset geometries in the grid's coordinate system and wrapped state.
+    :type subset_geometries: `sequence` of :class:`shapely.geometry.base.BaseGeometry`
+    :param use_bounds: See :meth:`~ocgis.Grid.get_spatial_subset_operation`.
+    :type use_bounds: :class:`bool` | :class:`str`
+    :returns: For each subset geometry, the sorted flat indices of the unmasked grid elements it intersects. ``None`` if
+     bulk spatial index queries are not available.
+    :rtype: list | None
+    """
+
+    if not _SHAPELY_VECTORIZED:
+        return None
+    if use_bounds == 'auto':
+        use_bounds = grid.abstraction == 'polygon'
+
+    # Only elements near the subset geometries are indexed.
+    buffer_value = grid.resolution * 1.25
+    bounds = np.array([geom.bounds for geom in subset_geometries])
+    bbox = (bounds[:, 0].min() - buffer_value, bounds[:, 1].min() - buffer_value, bounds[:, 2].max() + buffer_value,
+            bounds[:, 3].max() + buffer_value)
+    hint_mask = get_hint_mask_from_geometry_bounds(grid, bbox)
+    mask = grid.get_mask()
+    if mask is not None:
+        hint_mask = np.logical_or(hint_mask, mask)
+
+    flat_index = np.flatnonzero(np.invert(hint_mask))
+    gp = GridGeometryProcessor(grid, None, hint_mask, use_bounds=use_bounds)
+    geometries = gp.get_geometry_array().reshape(-1)[flat_index]
+    tree = STRtree(geometries)
+    subset_index, element_index = tree.query(subset_geometries, predicate='intersects')
+
+    order = np.lexsort((element_index, subset_index))
+    subset_index, element_index = subset_index[order], element_index[order]
+    splits = np.searchsorted(subset_index, np.arange(1, len(subset_geometries)))
+    return [flat_index[e] for e in np.split(element_index, splits)]
+
+
 def get_geometry_variable(grid, value=None, mask=None, use_bounds=True):
     is_empty = grid.is_empty
     if is_empty:
@@ -1188,11 +1256,7 @@ def get_geometry_variable(grid, value=None, mask=None, use_bounds=True):
             mask = grid.get_mask()
         if value is None:
             gp = GridGeometryProcessor(grid, None, mask, use_bounds=use_bounds)
-            itr = gp.get_geometry_iterable()
-            value = np.zeros(grid.shape, dtype=object)
-            for idx, geometry in itr:
-                if geometry is not None:
-                    value[idx] = geometry
+            value = gp.get_geometry_array(fill=np.zeros(grid.shape, dtype=object))
     if grid.abstraction == 'point':
         name = grid._point_name
     else:
@@ -1,11 +1,13 @@
 import logging
 import os
+from collections import OrderedDict, deque
+from multiprocessing import Pool
 
 import netCDF4 as nc
 import numpy as np
 from shapely.geometry import box
 
-from ocgis import constants
+from ocgis import constants, env
 from ocgis.base import AbstractOcgisObject, grid_abstraction_scope
 from ocgis.collection.field import Field
 from ocgis.constants import GridChunkerConstants, RegriddingRole, Topology, WrappedState
@@ -352,14 +354,19 @@ class GridChunker(AbstractOcgisObject):
         out_wds.close()
 
     @staticmethod
-    def insert_weighted(index_path, dst_wd, dst_master_path, data_variables='auto'):
+    def insert_weighted(index_path, dst_wd, dst_master_path, data_variables='auto', block_size=None, workers=None):
         """
-        Inserted weighted, destination variable data into the master destination file.
+        Inserted weighted, destination variable data into the master destination file. The master file is opened once
+        and each destination chunk file is read in blocks along the time dimension.
 
         :param str index_path: Path to the split index netCDF file.
         :param str dst_wd: Working directory containing the destination files holding the weighted data.
         :param str dst_master_path: Path to the destination master weight file.
         :param list data_variables: Optional list of data variables. Otherwise, auto-discovery is used.
+        :param int block_size: The number of time steps to read and write at a time. If ``None``, all time steps for a
+         chunk are inserted at once.
+        :param int workers: If greater than one, read chunk files in the background using a process pool with this
+         many workers while the master file is written.
         """
         if vm.size > 1:
             raise NotImplementedError('serial only')
@@ -384,39 +391,55 @@ class GridChunker(AbstractOcgisObject):
             v = data_variables
 
         dst_master_field = RequestDataset(dst_master_path, variable=v).get()
+        variable_names = []
         for data_variable in dst_master_field.data_variables:
             assert not data_variable.has_allocated_value
-            if data_variable.ndim == 3:
-                for time_index in range(dst_master_field.time.shape[0]):
-                    for vidx, source_path in enumerate(joined):
-                        source_path = os.path.join(dst_wd, source_path)
-                        slc = {dst_master_field.time.dimensions[0].name: time_index,
-                               dst_master_field.y.dimensions[0].name: slice(None),
-                               dst_master_field.x.dimensions[0].name: slice(None)}
-                        source_field = RequestDataset(source_path).create_field()
-                        try:
-                            source_data = source_field[data_variable.name][slc]
-                        except KeyError:
-                            if data_variable.name not in source_field.keys():
-                                msg = "The destination variable '{}' is not in the destination file '{}'. Was SMM applied?".format(
-                                    data_variable.name, source_path)
-                                raise KeyError(msg)
-                            else:
-                                raise
-                        assert not source_data.has_allocated_value
-                        with nc.Dataset(dst_master_path, 'a') as ds:
-                            ds.variables[data_variable.name][time_index, y_bounds[vidx][0]:y_bounds[vidx][1],
-                            x_bounds[vidx][0]:x_bounds[vidx][1]] = source_data.get_value()
-            elif data_variable.ndim == 2:
-                for vidx, source_path in enumerate(joined):
-                    source_path = os.path.join(dst_wd, source_path)
-                    source_data = RequestDataset(source_path).get()[data_variable.name]
-                    assert not source_data.has_allocated_value
-                    with nc.Dataset(dst_master_path, 'a') as ds:
-                        ds.variables[data_variable.name][y_bounds[vidx][0]:y_bounds[vidx][1],
-                        x_bounds[vidx][0]:x_bounds[vidx][1]] = source_data.get_value()
-            else:
+            if data_variable.ndim not in (2, 3):
                 raise NotImplementedError(data_variable.ndim)
+            variable_names.append(data_variable.name)
+
+        y_name = dst_master_field.y.dimensions[0].name
+        x_name = dst_master_field.x.dimensions[0].name
+        if dst_master_field.time is None:
+            time_name = None
+            time_slices = [None]
+        else:
+            time_name = dst_master_field.time.dimensions[0].name
+            time_size = dst_master_field.time.shape[0]
+            if block_size is None:
+                block_size = time_size
+            time_slices = [slice(start, min(start + block_size, time_size)) for start in
+                           range(0, time_size, block_size)]
+
+        tasks = []
+        for vidx, source_path in enumerate(joined):
+            source_path = os.path.join(dst_wd, source_path)
+            for time_slice in time_slices:
+                tasks.append((vidx, (source_path, variable_names, time_name, time_slice)))
+
+        # Create the pool before opening the master file so worker processes do not inherit its open handle.
+        if workers is not None and workers > 1:
+            pool = Pool(processes=workers)
+        else:
+            pool = None
+        try:
+            with nc.Dataset(dst_master_path, 'a') as ds:
+                for vidx, values in iter_weighted_chunk_values(tasks, pool=pool, workers=workers):
+                    spatial_slices = {y_name: slice(y_bounds[vidx][0], y_bounds[vidx][1]),
+                                      x_name: slice(x_bounds[vidx][0], x_bounds[vidx][1])}
+                    for name, (time_slice, value) in values.items():
+                        target = ds.variables[name]
+                        slc = []
+                        for dimension_name in target.dimensions:
+                            if dimension_name == time_name:
+                                slc.append(time_slice)
+                            else:
+                                slc.append(spatial_slices.get(dimension_name, slice(None)))
+                        target[tuple(slc)] = value
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
 
     def iter_dst_grid_slices(self, yield_idx=None):
         """
@@ -624,8 +647,26 @@ class GridChunker(AbstractOcgisObject):
 
     @staticmethod
     def smm(*args, **kwargs):
-        """See :meth:`ocgis.regrid.base.smm`"""
-        from ocgis.regrid.base import smm
+        """
+        See :meth:`ocgis.regrid.base.smm` and :meth:`ocgis.regrid.sparse.smm`.
+
+        :keyword str engine: (``='auto'``) The sparse matrix multiplication engine. ``'esmf'`` uses ESMF route handles
+         created from the weight files. ``'scipy'`` applies the weights with sparse matrices and does not require ESMF.
+         ``'auto'`` uses ESMF if it is available.
+        """
+        engine = kwargs.pop('engine', GridChunkerConstants.SMMEngine.AUTO)
+        if engine == GridChunkerConstants.SMMEngine.AUTO:
+            if env.USE_ESMF:
+                engine = GridChunkerConstants.SMMEngine.ESMF
+            else:
+                engine = GridChunkerConstants.SMMEngine.SCIPY
+
+        if engine == GridChunkerConstants.SMMEngine.ESMF:
+            from ocgis.regrid.base import smm
+        elif engine == GridChunkerConstants.SMMEngine.SCIPY:
+            from ocgis.regrid.sparse import smm
+        else:
+            raise ValueError('SMM engine not recognized: {}'.format(engine))
         smm(*args, **kwargs)
 
     def write_chunks(self):
@@ -847,7 +888,66 @@ def get_grid_object(obj, load=True):
     return res
 
 
+def get_weighted_chunk_values(path, variable_names, time_name, time_slice):
+    """
+    Read weighted values from a destination chunk file. Variables without a time dimension are only read for the
+    first time block.
+
+    :param str path: Path to the destination chunk file.
+    :param list variable_names: Names of the variables to read.
+    :param str time_name: Name of the time dimension. May be ``None``.
+    :param time_slice: The time block to read. May be ``None`` if there is no time dimension.
+    :type time_slice: slice
+    :return: Ordered dictionary with variable names as keys and tuples ``(time slice, value)`` as values.
+    :rtype: :class:`collections.OrderedDict`
+    :raises: KeyError
+    """
+    ret = OrderedDict()
+    with nc.Dataset(path, 'r') as ds:
+        # Write values as they are stored in the chunk file.
+        ds.set_auto_mask(False)
+        for name in variable_names:
+            try:
+                source = ds.variables[name]
+            except KeyError:
+                msg = "The destination variable '{}' is not in the destination file '{}'. Was SMM applied?".format(
+                    name, path)
+                raise KeyError(msg)
+            if time_name in source.dimensions:
+                slc = [time_slice if d == time_name else slice(None) for d in source.dimensions]
+                ret[name] = (time_slice, source[tuple(slc)])
+            elif time_slice is None or time_slice.start == 0:
+                ret[name] = (None, source[:])
+    return ret
+
+
 def global_grid_shape(grid):
     with vm.scoped_by_emptyable('global grid shape', grid):
         if not vm.is_null:
             return grid.shape_global
+
+
+def iter_weighted_chunk_values(tasks, pool=None, workers=None):
+    """
+    Yield weighted chunk values in task order. If a ``pool`` is provided, chunk files are read ahead in the pool. At
+    most ``2 * workers`` reads are pending at any time. The caller owns the pool.
+
+    :param list tasks: Sequence of tuples ``(chunk index, arguments to get_weighted_chunk_values)``.
+    :param pool: The process pool used for reading. If ``None``, chunk files are read in this process.
+    :type pool: :class:`multiprocessing.pool.Pool`
+    :param int workers: Number of reading processes in ``pool``.
+    :rtype: tuple ``(chunk index, values)``
+    """
+    if pool is None:
+        for vidx, args in tasks:
+            yield vidx, get_weighted_chunk_values(*args)
+    else:
+        pending = deque()
+        for vidx, args in tasks:
+            pending.append((vidx, pool.apply_async(get_weighted_chunk_values, args)))
+            if len(pending) >= 2 * workers:
+                vidx_pending, result = pending.popleft()
+                yield vidx_pending, result.get()
+        while len(pending) > 0:
+            vidx_pending, result = pending.popleft()
+            yield vidx_pending, result.get()
@@ -50,7 +50,8 @@ class SpatialSubsetOperation(AbstractOcgisObject):
         return ret
 
     def get_spatial_subset(self, operation, geom, use_spatial_index=env.USE_SPATIAL_INDEX, buffer_value=None,
-                           buffer_crs=None, geom_crs=None, select_nearest=False, optimized_bbox_subset=False):
+                           buffer_crs=None, geom_crs=None, select_nearest=False, optimized_bbox_subset=False,
+                           hint_mask=None):
         """
         Perform a spatial subset operation on ``target``.
 
@@ -72,6 +73,10 @@ class SpatialSubsetOperation(AbstractOcgisObject):
         :type buffer_crs: :class:`ocgis.interface.base.crs.CoordinateReferenceSystem`
         :param bool optimized_bbox_subset: If ``True``, only do a bounding box subset and do not perform more complext
          GIS subset operations such as constructing a spatial index.
+        :param hint_mask: An optional mask for grid subsets. ``True`` values are excluded from spatial consideration.
+         Must include the grid's mask. Used when the candidate elements are already known (i.e. from a bulk spatial
+         index query).
+        :type hint_mask: :class:`numpy.ndarray`
         :raises: ValueError
         """
 
@@ -97,6 +102,10 @@ class SpatialSubsetOperation(AbstractOcgisObject):
         # Prepare the target field.
         self._prepare_target_()
 
+        grid_kwargs = {}
+        if hint_mask is not None:
+            grid_kwargs['original_mask'] = hint_mask
+
         # execute the spatial operation
         if operation == 'intersects':
             if self.field.grid is None:
@@ -104,13 +113,14 @@ class SpatialSubsetOperation(AbstractOcgisObject):
                                                      cascade=True).parent
             else:
                 ret = self.field.grid.get_intersects(base_geometry, cascade=True,
-                                                     optimized_bbox_subset=optimized_bbox_subset).parent
+                                                     optimized_bbox_subset=optimized_bbox_subset,
+                                                     **grid_kwargs).parent
         elif operation in ('clip', 'intersection'):
             if self.field.grid is None:
                 ret = self.field.geom.get_intersection(base_geometry, use_spatial_index=use_spatial_index,
                                                        cascade=True).parent
             else:
-                ret = self.field.grid.get_intersection(base_geometry, cascade=True)
+                ret = self.field.grid.get_intersection(base_geometry, cascade=True, **grid_kwargs)
                 # An intersection with a grid returns a geometry variable. Set this on the field.
                 ret.parent.set_geom(ret)
                 ret = ret.parent
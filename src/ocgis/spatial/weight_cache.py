@@ -0,0 +1,207 @@
+"""
+Persistent, on-disk cache for the overlap weights of grid elements and selection geometries used by spatial averaging.
+Weights are stored as sparse ``(geometry_id, cell_index, area_fraction)`` triplets together with the unioned geometry
+for each selection geometry. Entries are keyed by a fingerprint of the grid (coordinates, bounds, mask, and coordinate
+system), the selection geometries and their unique identifiers, and the spatial operation. Cached weights replace the
+geometric intersections and unions of later aggregations with the same grid and selection geometries. The cache is
+enabled by ``ocgis.env.USE_WEIGHT_CACHE`` and stored under ``ocgis.env.DIR_CACHE``. Its total size is limited by
+``ocgis.env.WEIGHT_CACHE_MAX_BYTES``.
+"""
+import hashlib
+
+import numpy as np
+
+import ocgis
+from ocgis import env
+from ocgis.base import AbstractOcgisObject
+from ocgis.driver.metadata_cache import MetadataCache
+from ocgis.spatial.grid import GridGeometryProcessor, get_intersects_index_sets, _SHAPELY_VECTORIZED
+
+if _SHAPELY_VECTORIZED:
+    import shapely
+
+# Name of the cached item.
+_NAME = 'weights'
+
+
+class WeightCache(MetadataCache):
+    """
+    :param str directory: The cache directory. If ``None``, use ``ocgis.env.DIR_CACHE``.
+    """
+
+    _subdirectory = 'weights'
+
+    @property
+    def max_bytes(self):
+        return env.WEIGHT_CACHE_MAX_BYTES
+
+
+class OverlapWeights(AbstractOcgisObject):
+    """
+    Sparse overlap weights of grid elements and selection geometries. Selection geometries are identified by their
+    position in the sequence of selection geometries.
+
+    :param tuple shape: The grid shape.
+    :param geometry_id: The selection geometry identifier for each weight.
+    :type geometry_id: :class:`numpy.ndarray`
+    :param cell_index: The flat grid index for each weight.
+    :type cell_index: :class:`numpy.ndarray`
+    :param area_fraction: The fraction of the selection geometry's overlap area in each grid element.
+    :type area_fraction: :class:`numpy.ndarray`
+    :param unioned: The unioned geometry for each selection geometry.
+    :type unioned: `sequence` of :class:`shapely.geometry.base.BaseGeometry`
+    """
+
+    def __init__(self, shape, geometry_id, cell_index, area_fraction, unioned):
+        self.shape = tuple(shape)
+        self.geometry_id = geometry_id
+        self.cell_index = cell_index
+        self.area_fraction = area_fraction
+        self.unioned = unioned
+
+    @classmethod
+    def from_cache_item(cls, item):
+        """
+        :param dict item: A cache item created by :meth:`~ocgis.spatial.weight_cache.OverlapWeights.to_cache_item`.
+        :rtype: :class:`~ocgis.spatial.weight_cache.OverlapWeights`
+        """
+        unioned = [shapely.from_wkb(u) for u in item['unioned']]
+        return cls(item['shape'], item['geometry_id'], item['cell_index'], item['area_fraction'], unioned)
+
+    def get_subset(self, geometry_id):
+        """
+        :param int geometry_id: The selection geometry identifier.
+        :returns: A tuple ``(hint_mask, weights, unioned)``. ``hint_mask`` has the grid shape and is ``False`` for
+         grid elements overlapping the selection geometry. ``weights`` are the area fractions for the grid elements in
+         the bounding slice of the overlapping elements. ``weights`` is ``None`` if there are no overlapping elements.
+        :rtype: tuple
+        """
+        select = self.geometry_id == geometry_id
+        cell_index = self.cell_index[select]
+        hint_mask = np.ones(self.shape, dtype=bool)
+        hint_mask.flat[cell_index] = False
+
+        if cell_index.shape[0] == 0:
+            weights = None
+        else:
+            rows, cols = np.unravel_index(cell_index, self.shape)
+            row_start, col_start = rows.min(), cols.min()
+            weights = np.zeros((rows.max() - row_start + 1, cols.max() - col_start + 1))
+            weights[rows - row_start, cols - col_start] = self.area_fraction[select]
+        return hint_mask, weights, self.unioned[geometry_id]
+
+    def to_cache_item(self):
+        """
+        :returns: A picklable dictionary of the weights.
+        :rtype: dict
+        """
+        return {'shape': self.shape, 'geometry_id': self.geometry_id, 'cell_index': self.cell_index,
+                'area_fraction': self.area_fraction, 'unioned': [shapely.to_wkb(u) for u in self.unioned]}
+
+
+def get_grid_fingerprint(grid):
+    """
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :returns: A digest of the grid's coordinates, bounds, mask, and coordinate system.
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    sha.update(repr((grid.shape, grid.abstraction, grid.is_vectorized)).encode('utf-8'))
+    to_hash = [grid.x.get_value(), grid.y.get_value()]
+    if grid.has_bounds:
+        to_hash += [grid.x.bounds.get_value(), grid.y.bounds.get_value()]
+    mask = grid.get_mask()
+    if mask is not None:
+        to_hash.append(mask)
+    for arr in to_hash:
+        arr = np.ascontiguousarray(arr)
+        sha.update(repr((arr.dtype.str, arr.shape)).encode('utf-8'))
+        sha.update(arr.tobytes())
+
+    crs = grid.crs
+    crs_value = getattr(crs, 'value', None)
+    if isinstance(crs_value, dict):
+        crs_value = sorted(crs_value.items())
+    sha.update(repr((crs.__class__.__name__, crs_value)).encode('utf-8'))
+    return sha.hexdigest()
+
+
+def get_overlap_weights(grid, subset_geometries, spatial_operation):
+    """
+    Compute the overlap weights of a polygon grid and selection geometries. Grid elements only touching a selection
+    geometry are excluded. For ``'intersects'``, the weight of a grid element is its area. For ``'clip'``, the weight is
+    the area of the element's intersection with the selection geometry. Weights are normalized to sum to one for each
+    selection geometry.
+
+    :param grid: The target grid.
+    :type grid: :class:`~ocgis.Grid`
+    :param subset_geometries: The selection geometries in the grid's coordinate system and wrapped state.
+    :type subset_geometries: `sequence` of :class:`shapely.geometry.base.BaseGeometry`
+    :param str spatial_operation: Either ``'intersects'`` or ``'clip'``.
+    :returns: ``None`` if bulk spatial index queries are not available.
+    :rtype: :class:`~ocgis.spatial.weight_cache.OverlapWeights` | None
+    """
+    index_sets = get_intersects_index_sets(grid, subset_geometries, use_bounds=True)
+    if index_sets is None:
+        return None
+
+    # Element geometries are only created for elements intersecting a selection geometry.
+    hint_mask = np.ones(grid.shape, dtype=bool)
+    for index in index_sets:
+        hint_mask.flat[index] = False
+    elements = GridGeometryProcessor(grid, None, hint_mask, use_bounds=True).get_geometry_array().reshape(-1)
+
+    geometry_id, cell_index, area_fraction, unioned = [], [], [], []
+    for idx, (subset_geometry, index) in enumerate(zip(subset_geometries, index_sets)):
+        current = elements[index]
+        select = np.invert(shapely.touches(current, subset_geometry))
+        index, current = index[select], current[select]
+        if spatial_operation == 'clip':
+            current = shapely.intersection(current, subset_geometry)
+        area = shapely.area(current)
+        # Elements without area are weighted equally.
+        area[area == 0] = 1.0
+
+        geometry_id.append(np.ones(index.shape[0], dtype=int) * idx)
+        cell_index.append(index)
+        area_fraction.append(area / area.sum())
+        unioned.append(shapely.union_all(current))
+
+    return OverlapWeights(grid.shape, np.concatenate(geometry_id), np.concatenate(cell_index),
+                          np.concatenate(area_fraction), unioned)
+
+
+def get_cached_overlap_weights(grid, subset_geometries, subset_ugids, spatial_operation, cache=None):
+    """
+    Get overlap weights from the cache. Weights are computed with
+    :func:`~ocgis.spatial.weight_cache.get_overlap_weights` and added to the cache if they are not cached.
+
+    :param grid: See :func:`~ocgis.spatial.weight_cache.get_overlap_weights`.
+    :param subset_geometries: See :func:`~ocgis.spatial.weight_cache.get_overlap_weights`.
+    :param subset_ugids: The unique identifier for each selection geometry.
+    :type subset_ugids: `sequence` of int
+    :param str spatial_operation: See :func:`~ocgis.spatial.weight_cache.get_overlap_weights`.
+    :param cache: The weight cache. If ``None``, use the default cache.
+    :type cache: :class:`~ocgis.spatial.weight_cache.WeightCache`
+    :returns: ``None`` if bulk spatial index queries are not available.
+    :rtype: :class:`~ocgis.spatial.weight_cache.OverlapWeights` | None
+    """
+    if not _SHAPELY_VECTORIZED:
+        return None
+    if cache is None:
+        cache = weight_cache
+
+    sha = hashlib.sha1()
+    for ugid, subset_geometry in zip(subset_ugids, subset_geometries):
+        sha.update(repr(int(ugid)).encode('utf-8'))
+        sha.update(shapely.to_wkb(subset_geometry))
+    key = (ocgis.__version__, (get_grid_fingerprint(grid), sha.hexdigest(), spatial_operation))
+
+    def _create_():
+        return get_overlap_weights(grid, subset_geometries, spatial_operation).to_cache_item()
+
+    return OverlapWeights.from_cache_item(cache.get_or_create(key, _NAME, _create_))
+
+
+weight_cache = WeightCache()
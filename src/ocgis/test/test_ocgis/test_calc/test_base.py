@@ -55,6 +55,19 @@ class TestAbstractFunction(AbstractTestField):
         f = MockNeedsUnits(dtype=np.int16)
         self.assertEqual(f.dtype, np.int16)
 
+    def test_calculate_segmented(self):
+        """Test the default segmented calculation calls the calculation for each segment."""
+
+        values = np.ma.array(np.arange(24, dtype=float).reshape(6, 2, 2), mask=False)
+        values.mask[0:2, 0, 1] = True
+        offsets = np.array([0, 2, 5])
+        f = MockNeedsUnitsSet()
+        actual = f.calculate_segmented(values, offsets)
+        self.assertEqual(actual.shape, (3, 2, 2))
+        for idx, sl in enumerate([slice(0, 2), slice(2, 5), slice(5, 6)]):
+            self.assertNumpyAll(actual[idx], np.ma.mean(values[sl], axis=0))
+        self.assertTrue(actual.mask[0, 0, 1])
+
     def test_execute_meta_attrs(self):
         """Test overloaded metadata attributes are appropriately applied."""
 
@@ -401,6 +414,28 @@ class TestAbstractUnivariateFunction(AbstractTestField):
 
 
 class TestAbstractUnivariateSetFunction(AbstractTestField):
+    def test_execute_segmented(self):
+        """Test segmented calculations match the per-group calculation loop."""
+
+        from ocgis.calc.library.math import Sum
+        from ocgis.calc.library.statistics import Max, Mean, Min, StandardDeviation
+        from ocgis.calc.library.thresholds import Threshold
+
+        field = self.get_field(with_value=True, month_count=2)
+        field['tmax'].get_mask(create=True)[0, 3:5, 0, 1, :] = True
+        for grouping in [['month'], [[1, 2], 'year'], [[2, 1], 'unique'], 'all']:
+            tgd = field.temporal.get_grouping(grouping)
+            for klass, parms in [(Max, None), (Mean, None), (Min, None), (StandardDeviation, None), (Sum, None),
+                                 (Threshold, {'threshold': 0.5, 'operation': 'gte'})]:
+                self.assertTrue(klass.has_segmented_calculation)
+                actual = klass(field=field, tgd=tgd, parms=parms, calc_sample_size=True).execute()
+                fallback = klass(field=field, tgd=tgd, parms=parms, calc_sample_size=True)
+                fallback.has_segmented_calculation = False
+                desired = fallback.execute()
+                self.assertEqual(list(actual.keys()), list(desired.keys()))
+                for key in actual.keys():
+                    self.assertNumpyAllClose(actual[key].get_masked_value(), desired[key].get_masked_value())
+
     def test_validate_units(self):
         field = self.get_field(with_value=True)
         tgd = field.temporal.get_grouping(['month'])
@@ -0,0 +1,73 @@
+from unittest import SkipTest
+
+import numpy as np
+from mock import mock
+
+from ocgis import env
+from ocgis.calc.expression import Expression, numexpr
+from ocgis.test.base import TestBase
+
+
+class TestExpression(TestBase):
+    def get_arrays(self):
+        np.random.seed(1)
+        shape = (2, 7, 1, 5, 6)
+        tas = np.ma.array(np.random.rand(*shape).astype(np.float32) * 40 + 260, mask=np.random.rand(*shape) > 0.8)
+        tasmax = np.ma.array(tas.data + 2, mask=np.random.rand(*shape) > 0.8)
+        # Divide by zero is masked.
+        tasmax.data[0, 0, 0, 0, 0] = tas.data[0, 0, 0, 0, 0]
+        return {'tas': tas, 'tasmax': tasmax}
+
+    def test_init(self):
+        expr = Expression('6.1078*exp(log(17.08085)*(tas-273.16))+tas', ['tas', 'tasmax'])
+        self.assertEqual(expr.names, ['tas'])
+
+        bad = ['tas.__class__', 'foo(tas)', 'tas+tasmax', 'exp(tas, 2)', 'lambda: tas', 'tas[0]', '"tas"',
+               'exp(x=tas)', 'tas if tas else 1', 'import os']
+        for b in bad:
+            with self.assertRaises(ValueError):
+                Expression(b, ['tas'])
+
+    def test_evaluate(self):
+        env.USE_NUMEXPR = False
+        arrays = self.get_arrays()
+        tas, tasmax = arrays['tas'], arrays['tasmax']
+        to_test = [('6.1078*exp(17.08085*(tas-273.16)/(234.175+(tas-273.16)))',
+                    6.1078 * np.exp(17.08085 * (tas - 273.16) / (234.175 + (tas - 273.16)))),
+                   ('log(1000*(tasmax-tas))/3', np.log(1000 * (tasmax - tas)) / 3),
+                   ('-tas+abs(tasmax)', -tas + np.abs(tasmax)),
+                   ('tas/(tasmax-tas)', tas / (tasmax - tas)),
+                   ('power(tas, 2)', np.power(tas, 2))]
+        for expr, desired in to_test:
+            out = np.ma.array(np.zeros(tas.shape, dtype=tas.dtype), mask=False)
+            # Use a small block size to test multiple blocks.
+            Expression(expr, ['tas', 'tasmax']).evaluate(arrays, out, block_bytes=64)
+            # Masks and the data under the mask are identical to evaluating the whole arrays.
+            self.assertNumpyAll(out.mask, np.ma.getmaskarray(desired))
+            self.assertNumpyAll(out.data, desired.data)
+            if expr == 'tas/(tasmax-tas)':
+                self.assertTrue(out.mask[0, 0, 0, 0, 0])
+
+    def test_evaluate_numexpr_default(self):
+        """Test numexpr is not used unless requested."""
+
+        env.reset()
+        self.assertFalse(env.USE_NUMEXPR)
+        arrays = self.get_arrays()
+        out = np.ma.array(np.zeros(arrays['tas'].shape, dtype=arrays['tas'].dtype), mask=False)
+        expression = Expression('tas/(tasmax-tas)', ['tas', 'tasmax'])
+        with mock.patch.object(Expression, '_evaluate_numexpr_') as m:
+            expression.evaluate(arrays, out)
+        m.assert_not_called()
+
+    def test_evaluate_numexpr(self):
+        if numexpr is None:
+            raise SkipTest('numexpr not available')
+        env.USE_NUMEXPR = True
+        arrays = self.get_arrays()
+        tas, tasmax = arrays['tas'], arrays['tasmax']
+        out = np.ma.array(np.zeros(tas.shape, dtype=tas.dtype), mask=False)
+        Expression('tas/(tasmax-tas)', ['tas', 'tasmax']).evaluate(arrays, out)
+        desired = tas / (tasmax - tas)
+        self.assertNumpyAll(out.mask, np.ma.getmaskarray(desired))
+        self.assertNumpyAllClose(out.compressed(), desired.compressed())
@@ -34,6 +34,12 @@ class TestDuration(AbstractCalcBase):
         ret = duration.calculate(values, 4, operation='gte', summary='mean')
         self.assertEqual(2.5, ret.flatten()[0])
 
+        # A single duration is returned for any summary
+        values = np.array([1, 5, 5, 5, 2, 1, 1], dtype=float)
+        values = self.get_reshaped(values)
+        ret = duration.calculate(values, 4, operation='gte', summary='std')
+        self.assertEqual(3., ret.flatten()[0])
+
         # Add some masked values
         values = np.array([1, 5, 5, 2, 5, 5, 5], dtype=float)
         mask = [0, 0, 0, 0, 0, 1, 0]
@@ -49,6 +55,27 @@ class TestDuration(AbstractCalcBase):
         ret = duration.calculate(values, 4, operation='gte', summary='mean')
         self.assertNumpyAll(np.ma.array([4., 2., 1.5, 1.5], dtype=ret.dtype), ret.flatten())
 
+    def test_calculate_segmented(self):
+        np.random.seed(1)
+        values = np.ma.array(np.random.rand(30, 3, 4), mask=False)
+        values.mask[:, 1, 2] = True
+        offsets = np.array([0, 7, 19])
+        bounds = [0, 7, 19, 30]
+
+        for summary in ['mean', 'max', 'std']:
+            actual = Duration().calculate_segmented(values, offsets, threshold=0.4, operation='gt', summary=summary)
+            for idx in range(len(offsets)):
+                desired = Duration().calculate(values[bounds[idx]:bounds[idx + 1]], threshold=0.4, operation='gt',
+                                               summary=summary)
+                self.assertNumpyAll(actual[idx], desired)
+            self.assertTrue(actual.mask[:, 1, 2].all())
+
+        actual = FrequencyDuration().calculate_segmented(values, offsets, threshold=0.4, operation='gt')
+        for idx in range(len(offsets)):
+            desired = FrequencyDuration().calculate(values[bounds[idx]:bounds[idx + 1]], threshold=0.4, operation='gt')
+            for a, d in zip(actual[idx].data.flat, desired.data.flat):
+                self.assertNumpyAll(a, d)
+
     @attr('data')
     def test_system_standard_operations(self):
         ret = self.run_standard_operations(
@@ -77,3 +104,8 @@ class TestFrequencyDuration(AbstractCalcBase):
         self.assertEqual(ret.flatten()[0].dtype.names, ('duration', 'count'))
         self.assertNumpyAll(np.array([2, 3, 5]), ret.flatten()[0]['duration'])
         self.assertNumpyAll(np.array([2, 1, 1]), ret.flatten()[0]['count'])
+
+        # Test no occurrences.
+        ret = fduration.calculate(values, threshold=20, operation='gt')
+        self.assertEqual(ret.flatten()[0]['duration'].tolist(), [0])
+        self.assertEqual(ret.flatten()[0]['count'].tolist(), [1])
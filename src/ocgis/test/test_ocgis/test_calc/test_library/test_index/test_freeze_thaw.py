@@ -1,7 +1,7 @@
 import numpy as np
 
 import ocgis
-from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d
+from ocgis.calc.library.index.freeze_thaw import FreezeThaw, freezethaw1d, freezethawnd
 from ocgis.exc import UnitsValidationError
 from ocgis.test.base import AbstractTestField
 
@@ -48,6 +48,22 @@ class TestFreezeThawCycles(AbstractTestField):
         x = np.array([3, 4, 4, 4, 4, 4, 4, 4])
         self.assertEquals(freezethaw1d(x, 2), 0)
 
+    def test_freezethawnd(self):
+        np.random.seed(1)
+        x = np.random.normal(0, 3, (100, 4, 5)) + 4 * np.sin(np.arange(100) / 8.).reshape(-1, 1, 1)
+        mask = np.random.rand(*x.shape) > 0.8
+        mask[:, 2, 3] = True
+        x = np.ma.array(x, mask=mask)
+        for threshold in [1, 2, 15]:
+            actual = freezethawnd(x, threshold)
+            self.assertEqual(actual.shape, (4, 5))
+            self.assertTrue(np.isnan(actual[2, 3]))
+            for ii, jj in [(0, 0), (1, 4), (3, 2)]:
+                self.assertEqual(actual[ii, jj], freezethaw1d(x[:, ii, jj], threshold))
+
+        x = np.array([3, 4, 5, 2, 3, -3, 4, 5, -5, -6, -3, 0, -1, 4, 5, 2, -3, -5, 6])
+        self.assertEqual(freezethawnd(x.reshape(-1, 1), 2).tolist(), [6])
+
     def test_execute(self):
         # Just a smoke test for the class.
         field = self.get_field(with_value=True, month_count=23, name='tas', units='K')
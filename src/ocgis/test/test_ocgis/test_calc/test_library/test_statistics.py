@@ -1,3 +1,6 @@
+import itertools
+from datetime import datetime, timedelta
+
 import numpy as np
 
 import ocgis
@@ -51,6 +54,32 @@ class TestDailyPercentile(AbstractTestField):
 
         self.assertAlmostEqual(vc['daily_perc'].get_value().mean(), 0.76756388346354165)
 
+    def test_get_calendar_day_windows(self):
+        start = datetime(1999, 12, 1, 12)
+        dt_arr = np.array([start + timedelta(days=ii) for ii in range(800)])
+        dp = DailyPercentile.__new__(DailyPercentile)
+        for window_width, only_leap_years in itertools.product([3, 5], [False, True]):
+            caldays, indices, offsets = DailyPercentile.get_calendar_day_windows(dt_arr, window_width,
+                                                                                 only_leap_years=only_leap_years)
+            self.assertEqual(len(caldays), 366)
+            stops = np.append(offsets[1:], indices.shape[0])
+            for (month, day), start_index, stop_index in zip(caldays, offsets, stops):
+                mask = dp.get_mask_dt_arr(dt_arr, month, day, 12, window_width, only_leap_years)
+                desired = np.where(np.invert(mask))[0]
+                self.assertEqual(sorted(indices[start_index:stop_index].tolist()), desired.tolist())
+
+    def test_get_daily_percentile(self):
+        dt_arr = np.array([datetime(2000 + ii // 10, 1, 1 + ii % 10) for ii in range(30)])
+        arr = np.ma.array(np.arange(60, dtype=float).reshape(30, 1, 2), mask=False)
+        arr.mask[:, 0, 1] = True
+        dp = DailyPercentile.__new__(DailyPercentile)
+        actual = dp.get_daily_percentile(arr, dt_arr, 50, 3)
+        self.assertEqual(len(actual), 10)
+        # January 5th uses the 4th through 6th of each year.
+        desired = np.percentile(arr.data[[3, 4, 5, 13, 14, 15, 23, 24, 25], 0, 0], 50)
+        self.assertEqual(actual[1, 5][0, 0], desired)
+        self.assertTrue(actual[1, 5].mask[0, 1])
+
     @attr('data')
     def test_get_daily_percentile_from_request_dataset(self):
         rd = self.test_data.get_rd('cancm4_tas')
@@ -86,6 +115,41 @@ class TestMovingWindow(AbstractTestField):
         values = values.squeeze()
         self.assertEqual(ret[4], np.mean(values[2:7]))
 
+    def test_calculate_masked(self):
+        """Test masked values give the same results as reducing each window individually."""
+
+        np.random.seed(1)
+        values = np.ma.array(np.random.rand(2, 9, 1, 2, 3) + 250, mask=False)
+        values.mask[:, 2:5, :, 0, 0] = True
+        values.mask[0, :, 0, 1, 2] = True
+        values.mask[1, 6, 0, 1, 1] = True
+        k = 3
+
+        def get_desired(operation, mode):
+            fill = values.copy()
+            for ie, il in itertools.product(range(values.shape[0]), range(values.shape[2])):
+                values_slice = values[ie, :, il, :, :]
+                for origin, values_kernel in MovingWindow._iter_kernel_values_(values_slice, k, mode=mode):
+                    fill[ie, origin, il, :, :] = getattr(np, operation)(values_kernel, axis=0)
+            if mode == 'valid':
+                fill.mask[:] = True
+                fill.mask[:, 1:-1, :, :, :] = False
+            return fill
+
+        ma = MovingWindow()
+        for operation, mode in itertools.product(('mean', 'min', 'max', 'median', 'var', 'std'), ('same', 'valid')):
+            actual = ma.calculate(values, k=k, operation=operation, mode=mode)
+            desired = get_desired(operation, mode)
+            self.assertNumpyAll(actual.mask, desired.mask)
+            self.assertNumpyAllClose(actual.data, desired.data)
+
+    def test_calculate_bad_k(self):
+        ma = MovingWindow()
+        values = np.ma.array(np.random.rand(10), dtype=float).reshape(1, -1, 1, 1, 1)
+        for k in [None, 1, 2, 4]:
+            with self.assertRaises(ValueError):
+                ma.calculate(values, k=k, operation='mean')
+
     def test_execute(self):
         field = self.get_field(month_count=1, with_value=True)
         field = field.get_field_slice({'time': slice(0, 4)})
@@ -124,6 +188,14 @@ class TestMovingWindow(AbstractTestField):
     def test_registry(self):
         Calc([{'func': 'moving_window', 'name': 'ma'}])
 
+    def test_validate_definition(self):
+        calc = [{'func': 'moving_window', 'name': 'ma', 'kwds': {'k': 5, 'mode': 'same', 'operation': 'mean'}}]
+        Calc(calc)
+        for k in [1, 4]:
+            calc[0]['kwds']['k'] = k
+            with self.assertRaises(DefinitionValidationError):
+                Calc(calc)
+
     def test_iter_kernel_values_same(self):
         """Test returning kernel values with the 'same' mode."""
 
@@ -203,6 +275,26 @@ class TestFrequencyPercentile(AbstractTestField):
                                  np.ma.array(data=[0.92864656, 0.98615474, 0.95269281, 0.98542988],
                                              mask=False, fill_value=1e+20))
 
+    def test_calculate_segmented(self):
+        np.random.seed(2)
+        values = np.ma.array(np.random.rand(10, 2, 3), mask=False)
+        values.mask[4:6, 0, 1] = True
+        values.mask[5, 1, 2] = True
+        values.mask[7, 1, 0] = True
+        offsets = np.array([0, 5])
+        fp = FrequencyPercentile()
+        actual = fp.calculate_segmented(values, offsets, percentile=75)
+        for idx, sl in enumerate([slice(0, 5), slice(5, 10)]):
+            # The percentile uses the data under the mask and is masked where the first group value is masked.
+            desired = np.ma.array(np.percentile(values.data[sl], 75, axis=0), mask=values.mask[sl.start])
+            self.assertNumpyAllClose(actual[idx], desired)
+            self.assertNumpyAll(actual[idx].mask, desired.mask)
+            self.assertNumpyAll(fp.calculate(values[sl], percentile=75), actual[idx])
+        self.assertTrue(actual.mask[1, 0, 1])
+        self.assertTrue(actual.mask[1, 1, 2])
+        self.assertFalse(actual.mask[0, 0, 1])
+        self.assertFalse(actual.mask[1, 1, 0])
+
 
 class TestMean(AbstractTestField):
     @attr('data')
@@ -239,8 +331,8 @@ class TestMean(AbstractTestField):
         dv = dvc['my_mean']
         self.assertEqual(dv.name, 'my_mean')
         self.assertEqual(dv.get_value().shape, (2, 2, 2, 3, 4))
-        self.assertNumpyAll(np.mean(field['tmax'].get_value()[1, tgd.dgroups[1], 0, :, :], axis=0),
-                            dv.get_value()[1, 1, 0, :, :])
+        self.assertNumpyAllClose(np.mean(field['tmax'].get_value()[1, tgd.dgroups[1], 0, :, :], axis=0),
+                                 dv.get_value()[1, 1, 0, :, :])
 
     @attr('data')
     def test_execute_file_only(self):
@@ -267,8 +359,8 @@ class TestMean(AbstractTestField):
         dv = dvc['my_mean']
         self.assertEqual(dv.name, 'my_mean')
         self.assertEqual(dv.get_value().shape, (2, 2, 2, 3, 4))
-        self.assertNumpyAll(np.mean(field['tmax'].get_value()[1, tgd.dgroups[1], 0, :, :], axis=0),
-                            dv.get_value()[1, 1, 0, :, :])
+        self.assertNumpyAllClose(np.mean(field['tmax'].get_value()[1, tgd.dgroups[1], 0, :, :], axis=0),
+                                 dv.get_value()[1, 1, 0, :, :])
 
         ret = dvc['n_my_mean']
         self.assertNumpyAll(ret.get_masked_value()[0, 0, 0],
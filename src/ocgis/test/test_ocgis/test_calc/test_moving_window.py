@@ -0,0 +1,51 @@
+import itertools
+
+import numpy as np
+
+from ocgis.calc.moving_window import moving_window_reduce
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    def test_moving_window_reduce(self):
+        np.random.seed(1)
+        values = np.random.rand(15, 2, 3) + 250
+        mask = np.random.rand(*values.shape) > 0.7
+        # All values for an element are masked.
+        mask[:, 1, 2] = True
+        values = np.ma.array(values, mask=mask)
+
+        k = 5
+        shift = 2
+        operations = ('mean', 'min', 'max', 'median', 'var', 'std')
+        for operation, mode in itertools.product(operations, ('same', 'valid')):
+            actual = moving_window_reduce(values, k, operation, mode=mode)
+            if mode == 'same':
+                self.assertEqual(actual.shape, values.shape)
+                origins = range(values.shape[0])
+            else:
+                self.assertEqual(actual.shape, (values.shape[0] - k + 1, 2, 3))
+                origins = range(shift, values.shape[0] - shift)
+            for idx, origin in enumerate(origins):
+                window = values[max(origin - shift, 0):origin + shift + 1]
+                if operation == 'median':
+                    # The median follows NumPy which ignores the mask.
+                    desired = np.ma.asarray(np.median(window, axis=0))
+                else:
+                    desired = getattr(np.ma, operation)(window, axis=0)
+                self.assertNumpyAll(actual.mask[idx], np.ma.getmaskarray(desired))
+                self.assertNumpyAllClose(actual[idx].compressed(), desired.compressed())
+
+        # Windows with a single value have no variance.
+        values = np.ma.array(np.ones((5, 1, 1)) * 280.3, mask=[True, True, False, True, True])
+        actual = moving_window_reduce(values, 3, 'std', mode='same')
+        self.assertEqual(actual.compressed().tolist(), [0., 0., 0.])
+
+    def test_moving_window_reduce_short(self):
+        """Test there are no valid windows when the time axis is shorter than the window."""
+
+        values = np.ma.array(np.ones((2, 1, 1)))
+        actual = moving_window_reduce(values, 3, 'mean', mode='valid')
+        self.assertEqual(actual.shape, (0, 1, 1))
+        actual = moving_window_reduce(values, 3, 'max', mode='same')
+        self.assertEqual(actual.tolist(), [[[1.]], [[1.]]])
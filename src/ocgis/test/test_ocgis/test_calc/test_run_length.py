@@ -0,0 +1,43 @@
+import numpy as np
+
+from ocgis.calc.run_length import get_run_lengths, get_run_length_frequencies, summarize_run_lengths
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    def test_get_run_lengths(self):
+        arr = np.array([[1, 1, 0, 1, 1, 1, 0, 1],
+                        [0, 0, 0, 0, 0, 0, 0, 0]], dtype=bool).T
+        keys, lengths = get_run_lengths(arr)
+        self.assertEqual(keys.tolist(), [0, 0, 0])
+        self.assertEqual(lengths.tolist(), [1, 2, 3])
+
+        # Runs do not cross segment boundaries.
+        # Keys combine the segment and element index. The second segment's first element has key 2.
+        keys, lengths = get_run_lengths(arr, offsets=np.array([0, 4]))
+        self.assertEqual(keys.tolist(), [0, 0, 2, 2])
+        self.assertEqual(lengths.tolist(), [1, 2, 1, 2])
+
+        # Masked values break runs.
+        marr = np.ma.array(arr[:, 0], mask=[0, 0, 0, 0, 1, 0, 0, 0])
+        keys, lengths = get_run_lengths(marr)
+        self.assertEqual(lengths.tolist(), [1, 1, 1, 2])
+
+    def test_get_run_length_frequencies(self):
+        keys = np.array([0, 0, 0, 2])
+        lengths = np.array([2, 2, 3, 1])
+        actual = get_run_length_frequencies(keys, lengths)
+        self.assertEqual([a.tolist() for a in actual], [[0, 0, 2], [2, 3, 1], [2, 1, 1]])
+
+    def test_summarize_run_lengths(self):
+        keys = np.array([0, 0, 0, 2])
+        lengths = np.array([1, 2, 6, 4])
+        for summary in ['max', 'mean', 'median', 'min', 'std', 'sum']:
+            actual = summarize_run_lengths(keys, lengths, 3, summary)
+            # A single run reports its length for all summaries.
+            desired = [getattr(np, summary)([1, 2, 6]), 0, 4]
+            self.assertNumpyAllClose(actual, np.array(desired, dtype=float))
+
+        # Summaries with one run per key match the length.
+        actual = summarize_run_lengths(np.array([0, 1]), np.array([3, 5]), 2, 'std')
+        self.assertEqual(actual.tolist(), [3, 5])
@@ -0,0 +1,115 @@
+import itertools
+
+import numpy as np
+
+from ocgis.calc.segmented import get_segment_selection, segmented_count, segmented_max, segmented_mean, \
+    segmented_min, segmented_percentile, segmented_sample_size, segmented_std, segmented_sum, segmented_median, \
+    get_segment_order_statistics
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    def get_values_and_groups(self):
+        np.random.seed(1)
+        values = np.random.rand(20, 3, 4)
+        mask = np.random.rand(*values.shape) > 0.8
+        # Mask all values in a single group element.
+        mask[0:5, 1, 1] = True
+        values = np.ma.array(values, mask=mask)
+        group_indices = [np.arange(0, 5), np.arange(5, 12), np.array([12, 14, 16, 18]), np.array([13, 15, 17, 19])]
+        return values, group_indices
+
+    def test_get_segment_selection(self):
+        selection, offsets = get_segment_selection([np.arange(0, 2), np.arange(2, 5)], 5)
+        self.assertEqual(selection, slice(None))
+        self.assertEqual(offsets.tolist(), [0, 2])
+
+        selection, offsets = get_segment_selection([np.array([0, 2]), np.array([1, 3, 4])], 5)
+        self.assertEqual(selection.tolist(), [0, 2, 1, 3, 4])
+        self.assertEqual(offsets.tolist(), [0, 2])
+
+        self.assertIsNone(get_segment_selection([np.array([0, 1]), np.array([], dtype=int)], 2))
+        self.assertIsNone(get_segment_selection(None, 2))
+
+    def test_segmented_reductions(self):
+        values, group_indices = self.get_values_and_groups()
+        selection, offsets = get_segment_selection(group_indices, values.shape[0])
+        sorted_values = values[selection]
+
+        to_test = [(segmented_max, np.ma.max), (segmented_mean, np.ma.mean), (segmented_min, np.ma.min),
+                   (segmented_std, np.ma.std), (segmented_sum, np.ma.sum)]
+        for segmented, reduction in to_test:
+            actual = segmented(sorted_values, offsets)
+            self.assertEqual(actual.shape, (len(group_indices), 3, 4))
+            for idx, gidx in enumerate(group_indices):
+                desired = reduction(values[gidx], axis=0)
+                self.assertNumpyAll(actual.mask[idx], np.ma.getmaskarray(desired))
+                self.assertNumpyAllClose(actual[idx].compressed(), desired.compressed())
+
+        count = segmented_count(sorted_values, offsets)
+        self.assertEqual(count[0, 1, 1], 0)
+        self.assertEqual(count.sum(), values.count())
+
+        actual = segmented_sample_size(sorted_values, offsets)
+        for idx, gidx in enumerate(group_indices):
+            self.assertNumpyAll(actual[idx].mask, values.mask[gidx[0]])
+
+    def test_segmented_percentile(self):
+        values, group_indices = self.get_values_and_groups()
+        selection, offsets = get_segment_selection(group_indices, values.shape[0])
+        for percentile in [0, 25, 50, 90, 100]:
+            actual = segmented_percentile(values[selection], offsets, percentile)
+            for idx, gidx in enumerate(group_indices):
+                group_values = values[gidx]
+                for ii, jj in itertools.product(range(3), range(4)):
+                    compressed = group_values[:, ii, jj].compressed()
+                    if compressed.size == 0:
+                        self.assertTrue(actual.mask[idx, ii, jj])
+                    else:
+                        self.assertEqual(actual[idx, ii, jj], np.percentile(compressed, percentile))
+
+        # NaN values are excluded.
+        values = np.ma.array([1., np.nan, 3., 4.])
+        actual = segmented_percentile(values, np.array([0, 2]), 50)
+        self.assertEqual(actual.tolist(), [1., 3.5])
+
+    def test_segmented_median(self):
+        values, group_indices = self.get_values_and_groups()
+        values[7, 2, 2] = np.nan
+        selection, offsets = get_segment_selection(group_indices, values.shape[0])
+        actual = segmented_median(values[selection], offsets)
+        for idx, gidx in enumerate(group_indices):
+            desired = np.ma.median(values[gidx], axis=0)
+            self.assertNumpyAll(actual.mask[idx], np.ma.getmaskarray(desired))
+            self.assertTrue(np.array_equal(actual[idx].compressed(), desired.compressed(), equal_nan=True))
+        self.assertTrue(np.isnan(actual[1, 2, 2]))
+
+    def test_segmented_percentile_sequence(self):
+        values, group_indices = self.get_values_and_groups()
+        selection, offsets = get_segment_selection(group_indices, values.shape[0])
+        sorted_values = values[selection]
+
+        # Order statistics are computed once and shared by multiple percentiles.
+        order_statistics = get_segment_order_statistics(sorted_values, offsets)
+        percentiles = [10, 50, 90]
+        actual = segmented_percentile(sorted_values, offsets, percentiles, order_statistics=order_statistics)
+        self.assertEqual(actual.shape, (3, len(group_indices), 3, 4))
+        for idx, percentile in enumerate(percentiles):
+            desired = segmented_percentile(sorted_values, offsets, percentile)
+            self.assertNumpyAll(actual[idx], desired)
+
+        # NaN values are propagated if they are not skipped.
+        values = np.ma.array([1., np.nan, 3., 4.], mask=[False, False, False, True])
+        actual = segmented_percentile(values, np.array([0, 2]), 50, skipna=False)
+        self.assertTrue(np.isnan(actual[0]))
+        self.assertEqual(actual[1], 3.)
+
+    def test_segmented_sum_boolean(self):
+        values, group_indices = self.get_values_and_groups()
+        selection, offsets = get_segment_selection(group_indices, values.shape[0])
+        idx = values[selection] > 0.5
+        actual = segmented_sum(idx, offsets)
+        self.assertTrue(np.issubdtype(actual.dtype, np.integer))
+        for ii, gidx in enumerate(group_indices):
+            desired = np.ma.sum(values[gidx] > 0.5, axis=0)
+            self.assertEqual(actual[ii].compressed().tolist(), desired.compressed().tolist())
@@ -0,0 +1,123 @@
+import os
+from copy import deepcopy
+
+import numpy as np
+from mock import mock
+from ocgis import env, RequestDataset, Variable
+from ocgis.driver.metadata_cache import MetadataCache, metadata_cache, get_metadata_cache_key, \
+    get_is_equal_metadata
+from ocgis.driver.nc import DriverNetcdf
+from ocgis.test.base import TestBase
+from ocgis.variable.crs import CFSpherical
+
+
+class TestMetadataCache(TestBase):
+    def fixture_path(self, name='foo.nc', value=(1, 2, 3)):
+        path = self.get_temporary_file_path(name)
+        Variable(name='foo', value=list(value), dimensions='three', attrs={'units': 'K'}).write(path)
+        return path
+
+    def test_get_or_create(self):
+        path = self.fixture_path()
+        cache = MetadataCache(directory=self.get_temporary_file_path('cache'))
+        key = get_metadata_cache_key(RequestDataset(path).driver)
+
+        func = mock.Mock(return_value={'a': 1})
+        for _ in range(2):
+            self.assertEqual(cache.get_or_create(key, 'metadata', func), {'a': 1})
+        func.assert_called_once_with()
+
+        # A modified file does not use the cached item.
+        os.remove(path)
+        self.fixture_path(value=(1, 2, 3, 4))
+        new_key = get_metadata_cache_key(RequestDataset(path).driver)
+        self.assertNotEqual(key, new_key)
+        with self.assertRaises(KeyError):
+            cache.get(new_key, 'metadata')
+        cache.set(new_key, 'metadata', {'b': 2})
+        # Stale entries are removed.
+        self.assertEqual(len(os.listdir(cache.directory)), 1)
+
+        # Test disabled caching always calls the function.
+        func = mock.Mock(return_value=1)
+        disabled = MetadataCache()
+        self.assertIsNone(disabled.directory)
+        disabled.get_or_create(new_key, 'metadata', func)
+        disabled.get_or_create(new_key, 'metadata', func)
+        self.assertEqual(func.call_count, 2)
+
+    def test_evict(self):
+        cache = MetadataCache(directory=self.get_temporary_file_path('cache'))
+        paths = [self.fixture_path('foo{}.nc'.format(ii)) for ii in range(3)]
+        keys = [get_metadata_cache_key(RequestDataset(p).driver) for p in paths]
+        env.METADATA_CACHE_MAX_BYTES = 0
+        for key in keys:
+            cache.set(key, 'metadata', list(range(100)))
+        self.assertEqual(len(os.listdir(cache.directory)), 0)
+
+    def test_invalidate(self):
+        cache = MetadataCache(directory=self.get_temporary_file_path('cache'))
+        paths = [self.fixture_path('foo{}.nc'.format(ii)) for ii in range(2)]
+        keys = [get_metadata_cache_key(RequestDataset(p).driver) for p in paths]
+        for key in keys:
+            cache.set(key, 'metadata', 1)
+        cache.invalidate(uri=paths[0])
+        with self.assertRaises(KeyError):
+            cache.get(keys[0], 'metadata')
+        self.assertEqual(cache.get(keys[1], 'metadata'), 1)
+        cache.invalidate()
+        self.assertEqual(len(os.listdir(cache.directory)), 0)
+
+    def test_system_request_dataset(self):
+        env.DIR_CACHE = self.get_temporary_file_path('cache')
+        path = self.fixture_path()
+
+        desired = RequestDataset(path)
+        desired_metadata = desired.metadata
+        desired_crs = desired.crs
+        desired_time = desired.dimension_map.get_variable('time')
+        desired.get()
+        # Metadata, raw dimension map, and coordinate system entries for the source remain after a full read.
+        actual = sorted([fn.split('-')[-1] for fn in os.listdir(metadata_cache.directory)])
+        self.assertEqual(actual, ['crs_0.pkl', 'dimension_map_raw_0.pkl', 'metadata.pkl'])
+
+        # All items are read from the cache on the second open. Cache misses add items.
+        with mock.patch.object(DriverNetcdf, '_get_metadata_main_') as m_metadata:
+            with mock.patch('ocgis.driver.base.create_dimension_map_raw') as m_dimension_map:
+                with mock.patch.object(MetadataCache, 'set') as m_set:
+                    rd = RequestDataset(path)
+                    self.assertEqual(rd.metadata, desired_metadata)
+                    self.assertEqual(rd.crs, desired_crs)
+                    self.assertEqual(rd.dimension_map.get_variable('time'), desired_time)
+                    field = rd.get()
+                    self.assertEqual(field['foo'].get_value().tolist(), [1, 2, 3])
+                    m_metadata.assert_not_called()
+                    m_dimension_map.assert_not_called()
+                    m_set.assert_not_called()
+
+    def test_system_request_dataset_array_attribute(self):
+        path = self.get_temporary_file_path('foo.nc')
+        attrs = {'units': 'K', 'valid_range': np.array([0, 10])}
+        Variable(name='foo', value=[1, 2, 3], dimensions='three', attrs=attrs).write(path)
+
+        # Array attributes do not break the metadata comparison with or without caching.
+        for dir_cache in [None, self.get_temporary_file_path('cache')]:
+            env.DIR_CACHE = dir_cache
+            rd = RequestDataset(path)
+            self.assertIsInstance(rd.crs, CFSpherical)
+            self.assertEqual(rd.get()['foo'].attrs['valid_range'].tolist(), [0, 10])
+
+
+class Test(TestBase):
+    def test_get_is_equal_metadata(self):
+        left = {'variables': {'foo': {'attrs': {'valid_range': np.array([0, 10])}}}, 'dims': ['a', 'b']}
+        right = deepcopy(left)
+        self.assertTrue(get_is_equal_metadata(left, right))
+
+        right['variables']['foo']['attrs']['valid_range'] = np.array([0, 11])
+        self.assertFalse(get_is_equal_metadata(left, right))
+        right['variables']['foo']['attrs']['valid_range'] = np.array([0., 10.])
+        self.assertFalse(get_is_equal_metadata(left, right))
+        right['variables']['foo']['attrs']['valid_range'] = [0, 10]
+        self.assertFalse(get_is_equal_metadata(left, right))
+        self.assertFalse(get_is_equal_metadata(left, {'variables': left['variables']}))
@@ -14,7 +14,8 @@ from ocgis.collection.field import Field
 from ocgis.constants import DimensionMapKey, DMK, KeywordArgument, MPIWriteMode
 from ocgis.driver.base import iter_all_group_keys, driver_scope
 from ocgis.driver.dimension_map import DimensionMap
-from ocgis.driver.nc import DriverNetcdf, DriverNetcdfCF, remove_netcdf_attribute, get_crs_variable
+from ocgis.driver.nc import DriverNetcdf, DriverNetcdfCF, remove_netcdf_attribute, get_crs_variable, \
+    get_character_array
 from ocgis.exc import OcgWarning, CannotFormatTimeError, \
     NoDataVariablesFound
 from ocgis.ops.core import OcgOperations
@@ -52,6 +53,13 @@ class Test(TestBase):
         var = get_crs_variable(metadata, False)
         self.assertIsInstance(var, CFRotatedPole)
 
+    def test_get_character_array(self):
+        actual = get_character_array(np.array(['a', 'bcd', ''], dtype=object), 4)
+        self.assertEqual(actual.shape, (3, 4))
+        self.assertEqual(actual.dtype, np.dtype('S1'))
+        self.assertEqual(actual[1].tolist(), [b'b', b'c', b'd', b''])
+        self.assertEqual(actual[2].tolist(), [b''] * 4)
+
     def test_get_variable_value(self):
         path1 = self.get_temporary_file_path('f1.nc')
         path2 = self.get_temporary_file_path('f2.nc')
@@ -476,6 +484,44 @@ class TestDriverNetcdf(TestBase):
 
         self.assertNcEqual(path_in, path_out, ignore_attributes={'var_seven': ['_FillValue']})
 
+    def test_write_variable_collection_streaming(self):
+        path_in = self.get_temporary_file_path('foo.nc')
+        path_out = self.get_temporary_file_path('foo_out.nc')
+        with self.nc_scope(path_in, 'w') as ds:
+            ds.createDimension('time', None)
+            ds.createDimension('y', 5)
+            ds.createDimension('x', 6)
+            ds.createDimension('nchar', 3)
+            var = ds.createVariable('tas', np.float32, dimensions=('time', 'y', 'x'), fill_value=-999.)
+            value = np.arange(10 * 5 * 6, dtype=np.float32).reshape(10, 5, 6)
+            value[2, 3, 4] = -999.
+            var[:] = value
+            var = ds.createVariable('time', int, dimensions=('time',))
+            var[:] = np.arange(10)
+            var.units = 'days since 2000-01-01'
+            var = ds.createVariable('names', 'S1', dimensions=('x', 'nchar'))
+            var[:] = get_character_array(['a', 'bc', 'def', 'g', 'hi', 'j'], 3)
+
+        path_desired = self.get_temporary_file_path('desired.nc')
+        RequestDataset(path_in).get().write(path_desired)
+
+        field = RequestDataset(path_in).get()
+        variable_kwargs_by_name = {'tas': {'zlib': True, 'complevel': 4, 'chunksizes': (1, 5, 3), 'shuffle': True}}
+        field.write(path_out, streaming=True, variable_kwargs_by_name=variable_kwargs_by_name)
+        # Source data variables are streamed and not loaded.
+        self.assertFalse(field['tas']._has_initialized_value)
+
+        self.assertNcEqual(path_desired, path_out)
+        with self.nc_scope(path_out) as ds:
+            var = ds.variables['tas']
+            self.assertEqual(var.chunking(), [1, 5, 3])
+            self.assertTrue(var.filters()['zlib'])
+            self.assertTrue(var.filters()['shuffle'])
+            self.assertTrue(var[2, 3, 4] is np.ma.masked)
+            self.assertEqual(ds.variables['time'].filters()['zlib'], False)
+            actual = np.ma.filled(ds.variables['names'][:], b'')
+            self.assertEqual([b''.join(row).decode() for row in actual], ['a', 'bc', 'def', 'g', 'hi', 'j'])
+
     @attr('mpi')
     def test_write_variable_collection_netcdf4_mpi(self):
         # TODO: TEST: Test writing a grouped netCDF file in parallel.
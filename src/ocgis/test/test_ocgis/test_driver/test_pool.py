@@ -0,0 +1,92 @@
+import time
+
+from mock import mock
+from ocgis import env, RequestDataset, Variable
+from ocgis.driver.base import driver_scope
+from ocgis.driver.nc import DriverNetcdf
+from ocgis.driver.pool import DatasetHandlePool, dataset_pool
+from ocgis.test.base import TestBase
+
+
+class TestDatasetHandlePool(TestBase):
+    def fixture_path(self, name='foo.nc'):
+        path = self.get_temporary_file_path(name)
+        Variable(name='foo', value=[1, 2, 3], dimensions='three').write(path)
+        return path
+
+    def tearDown(self):
+        dataset_pool.clear()
+        super(TestDatasetHandlePool, self).tearDown()
+
+    def test_borrow(self):
+        path = self.fixture_path()
+        pool = DatasetHandlePool()
+
+        key, handle = pool.borrow(DriverNetcdf, path)
+        key2, handle2 = pool.borrow(DriverNetcdf, path)
+        self.assertEqual(key, key2)
+        self.assertIs(handle, handle2)
+        self.assertEqual(len(pool), 1)
+
+        # Borrowed handles are not closed.
+        pool.release(key)
+        pool.clear()
+        self.assertEqual(len(pool), 1)
+        self.assertTrue(handle.isopen())
+
+        pool.release(key2)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+        self.assertFalse(handle.isopen())
+
+    def test_evict(self):
+        paths = [self.fixture_path('foo{}.nc'.format(ii)) for ii in range(3)]
+        pool = DatasetHandlePool()
+
+        env.DATASET_POOL_MAX_OPEN = 2
+        handles = []
+        for path in paths:
+            key, handle = pool.borrow(DriverNetcdf, path)
+            pool.release(key)
+            handles.append(handle)
+        # The least recently used handle is closed.
+        self.assertEqual(len(pool), 2)
+        self.assertEqual([h.isopen() for h in handles], [False, True, True])
+
+        env.DATASET_POOL_IDLE_TIMEOUT = 10.
+        with mock.patch('time.time', return_value=time.time() + 20.):
+            key, handle = pool.borrow(DriverNetcdf, paths[0])
+        self.assertEqual(len(pool), 1)
+        self.assertEqual([h.isopen() for h in handles], [False, False, False])
+        pool.release(key)
+        pool.clear()
+
+    def test_invalidate(self):
+        path = self.fixture_path()
+        pool = DatasetHandlePool()
+        key, handle = pool.borrow(DriverNetcdf, path)
+        pool.release(key)
+        pool.invalidate(uri=self.fixture_path('other.nc'))
+        self.assertTrue(handle.isopen())
+        pool.invalidate(uri=path)
+        self.assertFalse(handle.isopen())
+
+    def test_system_driver_scope(self):
+        env.USE_DATASET_POOL = True
+        path = self.fixture_path()
+        rd = RequestDataset(path)
+        field = rd.get()
+        self.assertEqual(field['foo'].get_value().tolist(), [1, 2, 3])
+        self.assertEqual(len(dataset_pool), 1)
+
+        with driver_scope(rd.driver) as ds1:
+            with driver_scope(rd.driver) as ds2:
+                self.assertIs(ds1, ds2)
+        self.assertTrue(ds1.isopen())
+
+        # Opening the file for writing closes pooled handles.
+        with driver_scope(DriverNetcdf, opened_or_path=path, mode='a') as ds:
+            ds.variables['foo'][:] = [4, 5, 6]
+        self.assertFalse(ds1.isopen())
+        self.assertEqual(len(dataset_pool), 0)
+        self.assertEqual(RequestDataset(path).get()['foo'].get_value().tolist(), [4, 5, 6])
@@ -0,0 +1,100 @@
+import numpy as np
+from mock import mock
+
+from ocgis import RequestDataset
+from ocgis.driver.read_plan import get_chunk_shape, get_index_runs, read_planned
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    def fixture_path(self):
+        path = self.get_temporary_file_path('foo.nc')
+        np.random.seed(1)
+        with self.nc_scope(path, 'w') as ds:
+            ds.createDimension('time', None)
+            ds.createDimension('y', 37)
+            ds.createDimension('x', 53)
+            var = ds.createVariable('tas', 'f4', ('time', 'y', 'x'), chunksizes=(4, 8, 16), zlib=True,
+                                    fill_value=-999.)
+            value = np.random.rand(20, 37, 53).astype('f4')
+            value[3, 4, 5] = -999.
+            var[:] = value
+            var = ds.createVariable('contiguous', 'i4', ('y', 'x'), contiguous=True)
+            var[:] = np.arange(37 * 53).reshape(37, 53)
+            var = ds.createVariable('counts', 'i4', ('y', 'x'), chunksizes=(8, 16), fill_value=-999)
+            value = np.arange(37 * 53).reshape(37, 53)
+            value[4, 5] = -999
+            var[:] = value
+        return path
+
+    def test_get_chunk_shape(self):
+        path = self.fixture_path()
+        with self.nc_scope(path) as ds:
+            self.assertEqual(get_chunk_shape(ds.variables['tas']), (4, 8, 16))
+            self.assertIsNone(get_chunk_shape(ds.variables['contiguous']))
+
+    def test_get_index_runs(self):
+        actual = get_index_runs(np.array([0, 1, 2, 9, 10, 40, 41, 100]), 8)
+        self.assertEqual(actual, [(0, 11, 0, 5), (40, 42, 5, 7), (100, 101, 7, 8)])
+
+        # Long runs are split on chunk boundaries.
+        actual = get_index_runs(np.array([0, 5, 9, 17, 30]), 8, max_length=17)
+        self.assertEqual(actual, [(0, 10, 0, 3), (17, 31, 3, 5)])
+
+    def test_read_planned(self):
+        path = self.fixture_path()
+        np.random.seed(2)
+        with self.nc_scope(path) as ds:
+            for name in ['tas', 'contiguous']:
+                var = ds.variables[name]
+                slcs = [(np.array([1, 2, 3, 9, 15]), slice(0, 37), np.array([0, 1, 30, 52]))[-var.ndim:],
+                        (np.random.rand(var.shape[0]) > 0.5,) + (slice(2, 20),) * (var.ndim - 1),
+                        # Unsorted and repeated indices.
+                        (slice(None),) * (var.ndim - 1) + (np.array([50, 2, 2, 3]),)]
+                for slc in slcs:
+                    desired = var[slc]
+                    for max_block_bytes in [None, 500]:
+                        actual = read_planned(var, slc, max_block_bytes=max_block_bytes)
+                        self.assertNumpyAll(actual, desired)
+
+    def test_read_planned_fill_value(self):
+        path = self.fixture_path()
+        with self.nc_scope(path) as ds:
+            var = ds.variables['counts']
+            # The selection includes a masked element.
+            slc = (np.array([1, 4, 20]), np.array([0, 5, 6, 40]))
+            desired = var[slc]
+            self.assertTrue(desired.mask.any())
+            for max_block_bytes in [None, 100]:
+                actual = read_planned(var, slc, max_block_bytes=max_block_bytes)
+                self.assertEqual(actual.fill_value, -999)
+                self.assertNumpyAll(actual, desired)
+
+    def test_system_get_variable_value(self):
+        """Test fancy slices of source variables are read with the planner."""
+
+        path = self.fixture_path()
+        field = RequestDataset(path, variable='tas').get()
+        sub = field['tas'][:, [1, 4, 30], :]
+        with self.nc_scope(path) as ds:
+            desired = ds.variables['tas'][:, [1, 4, 30], :]
+        self.assertTrue(desired.mask.any())
+        self.assertNumpyAll(sub.get_masked_value(), desired)
+        self.assertEqual(sub.fill_value, -999.)
+
+        field = RequestDataset(path, variable='counts').get()
+        sub = field['counts'][[1, 4, 20], [0, 5, 6, 40]]
+        with self.nc_scope(path) as ds:
+            desired = ds.variables['counts'][[1, 4, 20], [0, 5, 6, 40]]
+        self.assertNumpyAll(sub.get_masked_value(), desired)
+        self.assertEqual(sub.fill_value, -999)
+
+        # Contiguous variables use a direct fancy read.
+        field = RequestDataset(path, variable='contiguous').get()
+        sub = field['contiguous'][[1, 4, 20], [0, 5, 6, 40]]
+        with mock.patch('ocgis.driver.nc.read_planned') as m_read_planned:
+            actual = sub.get_masked_value()
+        m_read_planned.assert_not_called()
+        with self.nc_scope(path) as ds:
+            desired = ds.variables['contiguous'][[1, 4, 20], [0, 5, 6, 40]]
+        self.assertNumpyAll(actual, desired)
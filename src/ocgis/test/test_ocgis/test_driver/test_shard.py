@@ -0,0 +1,125 @@
+import os
+from unittest import SkipTest
+
+import numpy as np
+
+from ocgis import RequestDataset, env, vm
+from ocgis.constants import MPIWriteMode
+from ocgis.driver.nc import DriverNetcdf
+from ocgis.driver.shard import get_shard_path, get_shard_pieces, is_shardable, stitch_shards, write_shard
+from ocgis.test.base import TestBase, attr
+from ocgis.variable.base import Variable, ObjectType
+from ocgis.variable.dimension import Dimension
+
+
+class Test(TestBase):
+    def fixture_path(self):
+        path = self.get_temporary_file_path('foo.nc')
+        with self.nc_scope(path, 'w') as ds:
+            ds.createDimension('time', None)
+            ds.createDimension('y', 5)
+            ds.createDimension('x', 6)
+            var = ds.createVariable('tas', np.float32, dimensions=('time', 'y', 'x'), fill_value=-999.)
+            value = np.arange(10 * 5 * 6, dtype=np.float32).reshape(10, 5, 6)
+            value[2, 3, 4] = -999.
+            var[:] = value
+            var = ds.createVariable('time', int, dimensions=('time',))
+            var[:] = np.arange(10)
+            var = ds.createVariable('height', float)
+            var[:] = 2.
+        return path
+
+    def fixture_desired(self, path):
+        path_desired = self.get_temporary_file_path('desired.nc')
+        RequestDataset(path).get().write(path_desired)
+        return path_desired
+
+    def test_get_shard_pieces(self):
+        variables = [Variable('foo', value=[1, 2], dimensions=Dimension('x', 2, dist=True), mask=[False, True]),
+                     Variable('names', value=['a', 'bc'], dimensions=Dimension('x', 2, dist=True), dtype=str),
+                     Variable('bar', value=[5, 6], dimensions='y')]
+        for v in variables:
+            v.set_string_max_length_global()
+        # The distributed variables are the second block of a larger variable.
+        for v in variables[0:2]:
+            v.dimensions[0].bounds_local = (2, 4)
+
+        actual = get_shard_pieces(variables, DriverNetcdf)
+        self.assertEqual([p[0:2] for p in actual], [('foo', (2,)), ('names', (2, 0)), ('bar', (0,))])
+        self.assertEqual(actual[0][2].mask.tolist(), [False, True])
+        self.assertEqual(actual[1][2].shape, (2, 2))
+
+        actual = get_shard_pieces(variables, DriverNetcdf, include_replicated=False)
+        self.assertEqual([p[0] for p in actual], ['foo', 'names'])
+
+    def test_is_shardable(self):
+        self.assertTrue(is_shardable([Variable('foo', value=[1, 2], dimensions='x')]))
+        vlen = Variable(name='objects', value=[[1, 3], [5]], dtype=ObjectType(int), dimensions='values')
+        self.assertFalse(is_shardable([vlen]))
+
+    def test_stitch_shards(self):
+        path = self.fixture_path()
+        path_out = self.get_temporary_file_path('out.nc')
+        field = RequestDataset(path).get()
+        field.write(path_out, variable_kwargs={'file_only': True})
+
+        # Split the data variable into blocks written to separate shards.
+        env.VALUE_CACHE_BYTES = 200
+        tas = field['tas'].get_masked_value()
+        shard_paths = []
+        for rank, (lower, upper) in enumerate([(0, 3), (3, 10)]):
+            pieces = [('tas', (lower, 0, 0), tas[lower:upper]), ('time', (lower,), np.arange(lower, upper))]
+            if rank == 0:
+                pieces.append(('height', (), np.array(2.)))
+            shard_paths.append(get_shard_path(path_out, rank))
+            write_shard(shard_paths[-1], pieces)
+        stitch_shards(path_out, shard_paths)
+
+        self.assertFalse(any([os.path.exists(p) for p in shard_paths]))
+        self.assertNcEqual(self.fixture_desired(path), path_out)
+
+        # Shard files are removed if stitching fails.
+        shard_paths = [get_shard_path(path_out, rank) for rank in range(2)]
+        for shard_path in shard_paths:
+            write_shard(shard_path, [('missing', (0,), np.arange(3))])
+        with self.assertRaises(KeyError):
+            stitch_shards(path_out, shard_paths)
+        self.assertFalse(any([os.path.exists(p) for p in shard_paths]))
+
+    def test_system_write_shards(self):
+        path = self.fixture_path()
+        path_out = self.get_temporary_file_path('out.nc')
+        field = RequestDataset(path).get()
+        for write_mode in [MPIWriteMode.TEMPLATE, MPIWriteMode.SHARD]:
+            field.write(path_out, write_mode=write_mode)
+        self.assertNcEqual(self.fixture_desired(path), path_out)
+
+    @attr('mpi')
+    def test_system_write_shards_parallel(self):
+        if vm.size < 2:
+            raise SkipTest('vm.size < 2')
+
+        with vm.scoped('fixture', [0]):
+            if not vm.is_null:
+                path = self.fixture_path()
+                path_desired = self.fixture_desired(path)
+                path_out = self.get_temporary_file_path('out.nc')
+            else:
+                path, path_desired, path_out = None, None, None
+        path = vm.bcast(path)
+        path_desired = vm.bcast(path_desired)
+        path_out = vm.bcast(path_out)
+
+        env.USE_NETCDF_SHARDS = True
+        self.assertEqual(DriverNetcdf._get_write_modes_(vm)[-1], MPIWriteMode.SHARD)
+        for aggregators in [None, 1]:
+            env.NETCDF_SHARD_AGGREGATORS = aggregators
+            rd = RequestDataset(path)
+            rd.metadata['dimensions']['y']['dist'] = True
+            field = rd.get()
+            with vm.scoped_by_emptyable('write', field):
+                if not vm.is_null:
+                    field.write(path_out)
+            if vm.rank == 0:
+                self.assertNcEqual(path_desired, path_out)
+            vm.barrier()
@@ -8,6 +8,7 @@ from unittest import SkipTest
 
 import numpy as np
 import ocgis
+from mock import mock
 from ocgis import RequestDataset, vm, Dimension
 from ocgis import constants
 from ocgis import env
@@ -882,6 +883,27 @@ class TestOcgOperationsNoData(TestBase):
             else:
                 self.assertTrue(actual.get_value().sum() > 5)
 
+    def test_system_format_time_parts(self):
+        """Test operations use integer date parts when selected by the request dataset or the operations."""
+
+        path = self.get_temporary_file_path('foo.nc')
+        self.get_field(ntime=62).write(path)
+        kwds = {'calc': [{'func': 'mean', 'name': 'mean'}], 'calc_grouping': ['month'],
+                'time_region': {'month': [1, 2]}}
+
+        desired = OcgOperations(dataset=RequestDataset(path), **kwds).execute().get_element()
+        select_from_parts = TemporalVariable._get_time_region_select_from_parts_
+        for rd_format_time, ops_format_time in [(constants.FORMAT_TIME_PARTS, True),
+                                                (True, constants.FORMAT_TIME_PARTS)]:
+            rd = RequestDataset(path, format_time=rd_format_time)
+            ops = OcgOperations(dataset=rd, format_time=ops_format_time, **kwds)
+            with mock.patch.object(TemporalVariable, '_get_time_region_select_from_parts_', autospec=True,
+                                   side_effect=select_from_parts) as m:
+                actual = ops.execute().get_element()
+            m.assert_called()
+            self.assertNumpyAll(actual['mean'].get_masked_value(), desired['mean'].get_masked_value())
+            self.assertNumpyAll(actual.time.value_datetime, desired.time.value_datetime)
+
     def test_system_geometry_identifer_added(self):
         """Test geometry identifier is added for linked dataset geometry formats."""
 
@@ -1,21 +1,27 @@
 import itertools
 from copy import deepcopy
+from unittest import SkipTest
 
 import numpy as np
 import ocgis
+from mock import mock
 from ocgis import SpatialCollection, Variable
 from ocgis import env
+from ocgis.base import get_variable_names
 from ocgis.collection.field import Field
 from ocgis.constants import TagName, DimensionMapKey
 from ocgis.conv.numpy_ import NumpyConverter
 from ocgis.ops.core import OcgOperations
 from ocgis.ops.engine import OperationsEngine
-from ocgis.spatial.grid import Grid
-from ocgis.test.base import attr, AbstractTestInterface, get_geometry_dictionaries
+from ocgis.spatial.grid import Grid, _SHAPELY_VECTORIZED
+from ocgis.spatial.weight_cache import get_overlap_weights
+from ocgis.test.base import attr, AbstractTestInterface, get_geometry_dictionaries, create_gridxy_global, \
+    create_exact_field
 from ocgis.util.itester import itr_products_keywords
 from ocgis.util.logging_ocgis import ProgressOcgOperations
 from ocgis.variable.crs import Spherical, WGS84, CoordinateReferenceSystem
 from shapely import wkt
+from shapely.geometry import box
 
 
 class TestOperationsEngine(AbstractTestInterface):
@@ -81,6 +87,111 @@ class TestOperationsEngine(AbstractTestInterface):
         self.assertEqual(container.geom.get_value()[0], geom[1]['geom'])
         self.assertEqual(len(coll.children), 3)
 
+    def test_system_batched_spatial_subset(self):
+        """Test subsets with a bulk spatial index query match subsets done for each geometry."""
+
+        grid = create_gridxy_global(resolution=10.0, dist=False)
+        field = create_exact_field(grid, 'exact', ntime=3)
+        mask = np.zeros(grid.shape, dtype=bool)
+        mask[12, 20] = True
+        grid.set_mask(mask)
+        bounds = [(-100., 20., -60., 50.), (10., -30., 40., 10.), (-170., -80., -150., -60.), (-95., 25., -85., 35.)]
+        geom = [{'geom': box(*b), 'properties': {'UGID': ugid}} for ugid, b in enumerate(bounds)]
+        geom.append({'geom': box(*bounds[1]).centroid, 'properties': {'UGID': len(bounds)}})
+
+        for spatial_operation in ['intersects', 'clip']:
+            actual = {}
+            for batch in [True, False]:
+                env.BATCH_SPATIAL_SUBSET = batch
+                ops = OcgOperations(dataset=deepcopy(field), geom=geom, spatial_operation=spatial_operation)
+                actual[batch] = list(OperationsEngine(ops))
+
+            self.assertEqual(len(actual[True]), len(geom))
+            for batched, single in zip(actual[True], actual[False]):
+                for (bfield, _), (sfield, _) in zip(batched.iter_fields(yield_container=True),
+                                                    single.iter_fields(yield_container=True)):
+                    self.assertNumpyAll(bfield.grid.get_value_stacked(), sfield.grid.get_value_stacked())
+                    self.assertNumpyAll(bfield['exact'].get_masked_value(), sfield['exact'].get_masked_value())
+                    if spatial_operation == 'clip':
+                        for bgeom, sgeom in zip(bfield.geom.get_value().flat, sfield.geom.get_value().flat):
+                            self.assertTrue(bgeom.equals(sgeom))
+
+    def test_system_weight_cache(self):
+        """Test spatial averages with cached overlap weights match spatial averages with geometric operations."""
+
+        if not _SHAPELY_VECTORIZED:
+            raise SkipTest('bulk spatial index queries not available')
+        grid = create_gridxy_global(resolution=10.0, dist=False)
+        field = create_exact_field(grid, 'exact', ntime=3)
+        mask = np.zeros(grid.shape, dtype=bool)
+        mask[12, 20] = True
+        grid.set_mask(mask)
+        bounds = [(-100., 20., -60., 50.), (10., -30., 40., 10.), (-95., 25., -85., 35.)]
+        geom = [{'geom': box(*b), 'properties': {'UGID': ugid}} for ugid, b in enumerate(bounds)]
+        # Data with a masked value inside the first selection geometry.
+        masked_field = deepcopy(field)
+        data_mask = masked_field['exact'].get_mask(create=True)
+        data_mask[:, 12, 10] = True
+        masked_field['exact'].set_mask(data_mask)
+
+        sources = {'unmasked': field, 'masked': masked_field}
+        for spatial_operation, source_key in itertools.product(['intersects', 'clip'], sorted(sources)):
+            source = sources[source_key]
+            env.DIR_CACHE = self.get_temporary_file_path('cache_{}_{}'.format(spatial_operation, source_key))
+            actual = {}
+            # The second run with the weight cache uses the cached weights.
+            for use_weight_cache, desired_call_count in [(False, 0), (True, 1), (True, 0)]:
+                env.USE_WEIGHT_CACHE = use_weight_cache
+                dataset = deepcopy(source)
+                desired_mask = dataset['exact'].get_mask()
+                if desired_mask is not None:
+                    desired_mask = desired_mask.copy()
+                ops = OcgOperations(dataset=dataset, geom=geom, spatial_operation=spatial_operation, aggregate=True)
+                with mock.patch('ocgis.spatial.weight_cache.get_overlap_weights',
+                                wraps=get_overlap_weights) as m_get_overlap_weights:
+                    actual[use_weight_cache] = list(OperationsEngine(ops))
+                self.assertEqual(m_get_overlap_weights.call_count, desired_call_count)
+                # The source field's mask is not modified by the subsets.
+                if desired_mask is not None:
+                    self.assertNumpyAll(dataset['exact'].get_mask(), desired_mask)
+
+            self.assertEqual(len(actual[True]), len(bounds))
+            for cached, single in zip(actual[True], actual[False]):
+                for (cfield, _), (sfield, _) in zip(cached.iter_fields(yield_container=True),
+                                                    single.iter_fields(yield_container=True)):
+                    self.assertEqual(cfield['exact'].shape, sfield['exact'].shape)
+                    self.assertNumpyAll(cfield['exact'].get_mask(create=True), sfield['exact'].get_mask(create=True))
+                    self.assertNumpyAllClose(cfield['exact'].get_value(), sfield['exact'].get_value())
+                    self.assertNumpyAll(cfield.geom.ugid.get_value(), sfield.geom.ugid.get_value())
+                    self.assertAlmostEqual(cfield.geom.get_value()[0].symmetric_difference(
+                        sfield.geom.get_value()[0]).area, 0.)
+
+    def test_system_executor_process(self):
+        """Test process execution returns the same collections as serial execution."""
+
+        grid = create_gridxy_global(resolution=10.0, dist=False)
+        field = create_exact_field(grid, 'exact', ntime=62)
+        bounds = [(-100., 20., -60., 50.), (10., -30., 40., 10.), (-170., -80., -150., -60.)]
+        geom = [{'geom': box(*b), 'properties': {'UGID': ugid}} for ugid, b in enumerate(bounds)]
+
+        keywords = {'calc': [None, [{'func': 'mean', 'name': 'mean'}]],
+                    'aggregate': [False, True]}
+        for k in itr_products_keywords(keywords, as_namedtuple=True):
+            calc_grouping = None if k.calc is None else ['month']
+            actual = {}
+            for executor in ['serial', 'process']:
+                ops = OcgOperations(dataset=field, geom=geom, calc=k.calc, calc_grouping=calc_grouping,
+                                    aggregate=k.aggregate, executor=executor, workers=2)
+                actual[executor] = list(OperationsEngine(ops))
+
+            self.assertEqual(len(actual['process']), len(bounds))
+            for serial, process in zip(actual['serial'], actual['process']):
+                self.assertEqual(list(serial.children.keys()), list(process.children.keys()))
+                for (sfield, _), (pfield, _) in zip(serial.iter_fields(yield_container=True),
+                                                    process.iter_fields(yield_container=True)):
+                    for name in get_variable_names(sfield.data_variables):
+                        self.assertNumpyAll(sfield[name].get_masked_value(), pfield[name].get_masked_value())
+
     def test_system_process_geometries(self):
         """Test multiple geometries with coordinate system update."""
 
@@ -0,0 +1,34 @@
+import numpy as np
+
+from ocgis import Variable, SpatialCollection
+from ocgis.collection.field import Field
+from ocgis.ops.executor import dump_collections, load_collections, shared_memory, SHARED_MEMORY_MIN_NBYTES
+from ocgis.test.base import TestBase
+
+
+class Test(TestBase):
+    def test_dump_collections(self):
+        size = SHARED_MEMORY_MIN_NBYTES
+        large = Variable(name='large', value=np.arange(size, dtype=float), dimensions='large', mask=np.arange(size) > 5)
+        small = Variable(name='small', value=[1, 2, 3], dimensions='small')
+        coll = SpatialCollection()
+        coll.add_field(Field(variables=[large, small]), None)
+
+        names, data = dump_collections([coll])
+        if shared_memory is None:
+            self.assertEqual(names, [])
+        else:
+            # Only the large value and mask arrays use shared memory.
+            self.assertEqual(len(names), 2)
+
+        actual = load_collections((names, data))
+        self.assertEqual(len(actual), 1)
+        field = actual[0].get_element()
+        self.assertNumpyAll(field['large'].get_masked_value(), large.get_masked_value())
+        self.assertNumpyAll(field['small'].get_value(), small.get_value())
+
+        # Blocks are removed after loading.
+        if shared_memory is not None:
+            for name in names:
+                with self.assertRaises(OSError):
+                    shared_memory.SharedMemory(name=name)
@@ -494,6 +494,19 @@ class TestDataset(TestBase):
         self.assertIsNone(f2.uid)
 
 
+class TestFormatTime(TestBase):
+    create_dir = False
+
+    def test_init(self):
+        for value, desired in [(True, True), (0, False), ('false', False), ('parts', 'parts'), ('PARTS', 'parts')]:
+            self.assertEqual(FormatTime(value).value, desired)
+        self.assertIn('integer date parts', FormatTime('parts').get_meta()[1])
+
+        for value in ['foo', 5]:
+            with self.assertRaises(DefinitionValidationError):
+                FormatTime(value)
+
+
 class TestGeom(TestBase):
     create_dir = False
 
@@ -1018,3 +1031,13 @@ class TestTimeSubsetFunction(TestBase):
 
         tsf = TimeSubsetFunction(_func_)
         self.assertEqual(tsf.value, _func_)
+
+
+class TestWorkers(TestBase):
+    create_dir = False
+
+    def test_init(self):
+        self.assertIsNone(Workers().value)
+        self.assertEqual(Workers(4).value, 4)
+        with self.assertRaises(DefinitionValidationError):
+            Workers(0)
@@ -0,0 +1,57 @@
+import netCDF4 as nc
+import numpy as np
+
+from ocgis.regrid.sparse import apply_sparse_matrix, get_sparse_matrix, regrid_field_sparse
+from ocgis.test.base import TestBase, create_gridxy_global, create_exact_field
+
+
+class Test(TestBase):
+    def write_weight_file(self, path, row, col, weights):
+        with nc.Dataset(path, 'w') as ds:
+            ds.createDimension('n_s', len(row))
+            for name, value, dtype in [('row', row, np.int32), ('col', col, np.int32), ('S', weights, np.float64)]:
+                var = ds.createVariable(name, dtype, dimensions=('n_s',))
+                var[:] = value
+
+    def test_apply_sparse_matrix(self):
+        path = self.get_temporary_file_path('weights.nc')
+        # Destination element 3 has no weights.
+        self.write_weight_file(path, [1, 1, 2], [1, 2, 3], [0.5, 0.5, 1.0])
+        matrix = get_sparse_matrix(path, (3, 3))
+
+        values = np.ma.array([[1., 3., 5.], [2., 4., 6.]], mask=[[False, False, False], [False, True, False]])
+        actual = apply_sparse_matrix(matrix, values)
+        self.assertNumpyAll(actual.mask, np.array([[False, False, True], [True, False, True]]))
+        self.assertEqual(actual[0, 0], 2.)
+        self.assertEqual(actual[:, 1].tolist(), [5., 6.])
+
+    def test_get_sparse_matrix(self):
+        path = self.get_temporary_file_path('weights.nc')
+        self.write_weight_file(path, [1, 2], [2, 1], [1.0, 1.0])
+        actual = get_sparse_matrix(path, (2, 2))
+        self.assertNumpyAll(actual.toarray(), np.array([[0., 1.], [1., 0.]]))
+        # Matrices are cached.
+        self.assertIs(get_sparse_matrix(path, (2, 2)), actual)
+
+    def test_regrid_field_sparse(self):
+        grid = create_gridxy_global(resolution=45.0, with_bounds=False, dist=False)
+        src_field = create_exact_field(grid, 'exact', ntime=5)
+        mask = np.zeros(grid.shape, dtype=bool)
+        mask[1, 2] = True
+        src_field['exact'].set_mask(np.tile(mask, (5, 1, 1)))
+        dst_field = create_exact_field(grid.copy(), 'dst', fill_data_var=False)
+        dst_field.remove_variable('dst')
+
+        # Identity weights.
+        path = self.get_temporary_file_path('weights.nc')
+        indices = np.arange(1, grid.shape[0] * grid.shape[1] + 1)
+        self.write_weight_file(path, indices, indices, np.ones(indices.size))
+
+        actual = regrid_field_sparse(src_field, dst_field, path, block_size=2)
+        self.assertEqual(actual.grid.shape, grid.shape)
+        actual = actual['exact']
+        self.assertEqual(actual.dimension_names, src_field['exact'].dimension_names)
+        # Values under the mask are not defined by the regridding. Compare the masks and the unmasked values.
+        desired = src_field['exact'].get_masked_value()
+        self.assertNumpyAll(actual.get_mask(), desired.mask)
+        self.assertNumpyAllClose(actual.get_masked_value().compressed(), desired.compressed())
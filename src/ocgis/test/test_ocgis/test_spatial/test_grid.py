@@ -21,7 +21,8 @@ from ocgis.driver.nc_ugrid import DriverNetcdfUGRID
 from ocgis.exc import EmptySubsetError, BoundsAlreadyAvailableError
 from ocgis.spatial.base import create_spatial_mask_variable
 from ocgis.spatial.geomc import AbstractGeometryCoordinates, PointGC, PolygonGC
-from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor, GridUnstruct, arr_intersects_bounds
+from ocgis.spatial.grid import Grid, expand_grid, GridGeometryProcessor, GridUnstruct, arr_intersects_bounds, \
+    get_intersects_index_sets
 from ocgis.test.base import attr, AbstractTestInterface, create_gridxy_global, TestBase
 from ocgis.test.test_ocgis.test_spatial.test_geomc import FixturePointGC, FixturePolygonGC
 from ocgis.util.helpers import make_poly, iter_array
@@ -51,6 +52,25 @@ class Test(AbstractTestInterface):
         for variable in [vx, vy]:
             self.assertEqual(grid.parent[variable.name].ndim, 2)
 
+    def test_get_intersects_index_sets(self):
+        grid = create_gridxy_global(resolution=10.0, dist=False)
+        mask = np.zeros(grid.shape, dtype=bool)
+        mask[12, 20] = True
+        grid.set_mask(mask)
+        subset_geometries = [box(-100., 20., -60., 50.), Point(25., -15.), box(-95., 25., -85., 35.),
+                             box(1000., 1000., 1001., 1001.)]
+
+        actual = get_intersects_index_sets(grid, subset_geometries)
+        if actual is None:
+            raise SkipTest('bulk spatial index queries not available')
+        self.assertEqual(len(actual), len(subset_geometries))
+        polygons = grid.get_abstraction_geometry().get_value().flatten()
+        for subset_geometry, index_set in zip(subset_geometries, actual):
+            desired = [idx for idx, polygon in enumerate(polygons)
+                       if not mask.flat[idx] and polygon.intersects(subset_geometry)]
+            self.assertEqual(index_set.tolist(), desired)
+        self.assertEqual(len(actual[-1]), 0)
+
 
 class TestGridGeometryProcessor(AbstractTestInterface):
     def test(self):
@@ -79,6 +99,30 @@ class TestGridGeometryProcessor(AbstractTestInterface):
                 else:
                     self.assertIsNone(a[2])
 
+    def test_get_geometry_array(self):
+        keywords = {'with_xy_bounds': [False, True], 'with_2d_variables': [False, True]}
+
+        for k in self.iter_product_keywords(keywords, as_namedtuple=False):
+            grid = self.get_gridxy(**k)
+            hint_mask = np.zeros(grid.shape, dtype=bool)
+            hint_mask[1, 2] = True
+
+            gp = GridGeometryProcessor(grid, None, hint_mask)
+            actual = gp.get_geometry_array()
+            with mock.patch('ocgis.spatial.grid._SHAPELY_VECTORIZED', False):
+                desired = GridGeometryProcessor(grid, None, hint_mask).get_geometry_array()
+
+            self.assertEqual(actual.shape, grid.shape)
+            self.assertIsNone(actual[1, 2])
+            self.assertIsNone(desired[1, 2])
+            for idx in np.argwhere(np.invert(hint_mask)):
+                a, d = actual[tuple(idx)], desired[tuple(idx)]
+                if k['with_xy_bounds']:
+                    self.assertIsInstance(a, Polygon)
+                else:
+                    self.assertIsInstance(a, Point)
+                self.assertTrue(a.equals_exact(d, 0))
+
 
 class TestGrid(AbstractTestInterface):
     def assertGridCorners(self, grid):
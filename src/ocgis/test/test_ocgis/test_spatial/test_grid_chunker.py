@@ -1,7 +1,9 @@
 import os
 import sys
 from copy import deepcopy
+from multiprocessing import Pool
 
+import netCDF4 as nc
 import numpy as np
 from mock import mock, PropertyMock
 from ocgis.exc import NoTouching
@@ -340,34 +342,53 @@ class TestGridChunker(AbstractTestInterface, FixtureDriverNetcdfSCRIP):
     def test_insert_weighted(self):
         gs = self.fixture_grid_chunker()
 
-        dst_master_path = self.get_temporary_file_path('out.nc')
-        gs.dst_grid.parent.write(dst_master_path)
-
-        dst_master = RequestDataset(dst_master_path).get()
-        desired_sums = {}
-        for data_variable in dst_master.data_variables:
-            dv_sum = data_variable.get_value().sum()
-            desired_sums[data_variable.name] = dv_sum
-            self.assertNotEqual(dv_sum, 0)
-            data_variable.get_value()[:] = 0
-        dst_master.write(dst_master_path, write_mode=MPIWriteMode.FILL)
-        dst_master = RequestDataset(dst_master_path).get()
-        for data_variable in dst_master.data_variables:
-            self.assertEqual(data_variable.get_value().sum(), 0)
-
         gs.write_chunks()
-
         index_path = gs.create_full_path_from_template('index_file')
-        gs.insert_weighted(index_path, self.current_dir_output, dst_master_path)
-
-        actual_sums = {}
-        dst_master_inserted = RequestDataset(dst_master_path).get()
-        for data_variable in dst_master_inserted.data_variables:
-            dv_value = data_variable.get_value()
-            dv_sum = dv_value.sum()
-            actual_sums[data_variable.name] = dv_sum
-        for k, v in list(actual_sums.items()):
-            self.assertAlmostEqual(v, desired_sums[k])
+
+        for ctr, kwargs in enumerate([{}, {'block_size': 1}, {'block_size': 2, 'workers': 2}]):
+            dst_master_path = self.get_temporary_file_path('out{}.nc'.format(ctr))
+            gs.dst_grid.parent.write(dst_master_path)
+
+            dst_master = RequestDataset(dst_master_path).get()
+            desired_sums = {}
+            for data_variable in dst_master.data_variables:
+                dv_sum = data_variable.get_value().sum()
+                desired_sums[data_variable.name] = dv_sum
+                self.assertNotEqual(dv_sum, 0)
+                data_variable.get_value()[:] = 0
+            dst_master.write(dst_master_path, write_mode=MPIWriteMode.FILL)
+            dst_master = RequestDataset(dst_master_path).get()
+            for data_variable in dst_master.data_variables:
+                self.assertEqual(data_variable.get_value().sum(), 0)
+
+            if 'workers' in kwargs:
+                # The reading pool is created before the master file is opened for writing.
+                events = []
+
+                def pool_(*args, **kwds):
+                    events.append('pool')
+                    return Pool(*args, **kwds)
+
+                def dataset_(path, mode='r', **kwds):
+                    events.append((path, mode))
+                    return nc.Dataset(path, mode, **kwds)
+
+                with mock.patch('ocgis.spatial.grid_chunker.Pool', side_effect=pool_):
+                    with mock.patch('ocgis.spatial.grid_chunker.nc') as m_nc:
+                        m_nc.Dataset.side_effect = dataset_
+                        gs.insert_weighted(index_path, self.current_dir_output, dst_master_path, **kwargs)
+                self.assertLess(events.index('pool'), events.index((dst_master_path, 'a')))
+            else:
+                gs.insert_weighted(index_path, self.current_dir_output, dst_master_path, **kwargs)
+
+            actual_sums = {}
+            dst_master_inserted = RequestDataset(dst_master_path).get()
+            for data_variable in dst_master_inserted.data_variables:
+                dv_value = data_variable.get_value()
+                dv_sum = dv_value.sum()
+                actual_sums[data_variable.name] = dv_sum
+            for k, v in list(actual_sums.items()):
+                self.assertAlmostEqual(v, desired_sums[k])
 
     def test_nchunks_dst(self):
         gc = self.fixture_grid_chunker(nchunks_dst=None)
@@ -0,0 +1,87 @@
+import os
+from unittest import SkipTest
+
+import numpy as np
+from shapely.geometry import box
+
+from ocgis import env
+from ocgis.spatial.grid import _SHAPELY_VECTORIZED
+from ocgis.spatial.weight_cache import WeightCache, get_cached_overlap_weights, get_grid_fingerprint, \
+    get_overlap_weights
+from ocgis.test.base import TestBase, create_gridxy_global
+
+
+class Test(TestBase):
+    def setUp(self):
+        super(Test, self).setUp()
+        if not _SHAPELY_VECTORIZED:
+            raise SkipTest('bulk spatial index queries not available')
+
+    def fixture_grid(self):
+        grid = create_gridxy_global(resolution=10.0, dist=False)
+        mask = np.zeros(grid.shape, dtype=bool)
+        mask[12, 20] = True
+        grid.set_mask(mask)
+        return grid
+
+    def test_get_cached_overlap_weights(self):
+        grid = self.fixture_grid()
+        subset_geometries = [box(-95., 25., -61., 51.), box(15., 25., 35., 45.)]
+        cache = WeightCache(directory=self.get_temporary_file_path('cache'))
+
+        actual = [get_cached_overlap_weights(grid, subset_geometries, [1, 2], 'clip', cache=cache) for _ in range(2)]
+        self.assertEqual(len(os.listdir(cache.directory)), 1)
+        for attr in ['geometry_id', 'cell_index', 'area_fraction']:
+            self.assertNumpyAll(getattr(actual[0], attr), getattr(actual[1], attr))
+        self.assertTrue(actual[0].unioned[1].equals(actual[1].unioned[1]))
+
+        # Different selection geometry identifiers or spatial operations are different entries.
+        get_cached_overlap_weights(grid, subset_geometries, [1, 3], 'clip', cache=cache)
+        get_cached_overlap_weights(grid, subset_geometries, [1, 2], 'intersects', cache=cache)
+        self.assertEqual(len(os.listdir(cache.directory)), 3)
+
+        env.WEIGHT_CACHE_MAX_BYTES = 0
+        get_cached_overlap_weights(grid, subset_geometries[0:1], [1], 'clip', cache=cache)
+        self.assertEqual(len(os.listdir(cache.directory)), 0)
+
+    def test_get_grid_fingerprint(self):
+        grid = self.fixture_grid()
+        desired = get_grid_fingerprint(grid)
+        self.assertEqual(get_grid_fingerprint(self.fixture_grid()), desired)
+
+        grid.set_mask(None)
+        self.assertNotEqual(get_grid_fingerprint(grid), desired)
+
+    def test_get_overlap_weights(self):
+        grid = self.fixture_grid()
+        mask = grid.get_mask()
+        # The second geometry overlaps the masked element. The third geometry only touches elements. The last geometry
+        # is outside the grid.
+        subset_geometries = [box(-95., 25., -61., 51.), box(15., 25., 35., 45.), box(-100., -100., -90., -90.),
+                             box(1000., 1000., 1001., 1001.)]
+        polygons = grid.get_abstraction_geometry().get_value()
+
+        for spatial_operation in ['intersects', 'clip']:
+            actual = get_overlap_weights(grid, subset_geometries, spatial_operation)
+            self.assertEqual(actual.shape, grid.shape)
+            for geometry_id, subset_geometry in enumerate(subset_geometries):
+                hint_mask, weights, unioned = actual.get_subset(geometry_id)
+
+                desired_area = np.zeros(grid.shape)
+                for idx, polygon in enumerate(polygons.flat):
+                    if not mask.flat[idx] and polygon.intersects(subset_geometry) and \
+                            not polygon.touches(subset_geometry):
+                        if spatial_operation == 'clip':
+                            desired_area.flat[idx] = polygon.intersection(subset_geometry).area
+                        else:
+                            desired_area.flat[idx] = polygon.area
+                self.assertNumpyAll(hint_mask, desired_area == 0)
+
+                if geometry_id >= 2:
+                    self.assertIsNone(weights)
+                    self.assertTrue(unioned.is_empty)
+                    continue
+                rows, cols = np.nonzero(desired_area)
+                desired_area = desired_area[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+                self.assertNumpyAllClose(weights, desired_area / desired_area.sum())
+                self.assertAlmostEqual(unioned.area, desired_area.sum())
@@ -650,6 +650,20 @@ class Test2(TestBase):
         self.assertFalse(validate_time_subset([dt(2000, 1, 1), dt(2000, 2, 1)], {'month': [6, 7, 8], 'year': [2008]}))
         self.assertTrue(validate_time_subset([dt(2000, 1, 1), dt(2000, 2, 1)], None))
 
+    def test_iter_array_blocks(self):
+        for shape, max_elements in itertools.product([(2, 5, 1, 3, 4), (7,), (3, 4)], [1, 5, 12, 1000]):
+            arr = np.zeros(shape, dtype=int)
+            for slc in iter_array_blocks(shape, max_elements):
+                self.assertLessEqual(arr[slc].size, max_elements)
+                arr[slc] += 1
+            self.assertTrue(np.all(arr == 1))
+
+        self.assertEqual(list(iter_array_blocks((2, 5, 3), 7)),
+                         [(0, slice(0, 2)), (0, slice(2, 4)), (0, slice(4, 5)), (1, slice(0, 2)), (1, slice(2, 4)),
+                          (1, slice(4, 5))])
+        self.assertEqual(list(iter_array_blocks((2, 3), 6)), [(slice(None),)])
+        self.assertEqual(list(iter_array_blocks((0, 3), 6)), [])
+
     def test_iter_array_masked_objects(self):
         """Test when use mask is False and objects are returned. Ensure the object is operable."""
 
@@ -1,13 +1,17 @@
+import threading
 import time
 
 import numpy as np
+from mock import mock
 import ocgis
 from ocgis import RequestDataset
 from ocgis import Variable
 from ocgis.calc import tile
+from ocgis.driver.nc import DriverNetcdf
 from ocgis.test import create_gridxy_global, create_exact_field
 from ocgis.test.base import TestBase, attr
-from ocgis.util.large_array import compute, set_variable_spatial_mask
+from ocgis.util.large_array import compute, set_variable_spatial_mask, get_source_chunks, get_tile_cell_count, \
+    iter_read_ahead, NETCDF_LOCK
 
 
 class Test(TestBase):
@@ -132,6 +136,76 @@ class Test(TestBase):
         self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
                            ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
 
+    @attr('data')
+    def test_compute_memory_budget(self):
+        grid = create_gridxy_global(resolution=5.0)
+        field = create_exact_field(grid, 'exact')
+        path = self.get_temporary_file_path('foo.nc')
+        field.write(path)
+        rd = RequestDataset(path)
+
+        for read_ahead in [True, False]:
+            ops = ocgis.OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+                                      output_format='nc', geom=self.path_state_boundaries,
+                                      select_ugid=[2, 9, 12, 23, 25], add_auxiliary_files=False, agg_selection=True,
+                                      prefix=str(read_ahead) + '_foo')
+            # The budget is small enough to require multiple tiles.
+            ret = compute(ops, memory_budget=2 ** 10, read_ahead=read_ahead)
+
+            ops.prefix = str(read_ahead)
+            ret_ocgis = ops.execute()
+
+            self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
+                               ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
+
+        with self.assertRaises(ValueError):
+            compute(ops, 5, memory_budget=2 ** 14)
+
+        source_field = rd.get()
+        chunks = get_source_chunks(ops, {rd.field_name: source_field})
+        self.assertEqual(len(chunks), 2)
+        cells = get_tile_cell_count({rd.field_name: source_field}, source_field, 2 ** 10)
+        self.assertGreater(cells, 0)
+        self.assertLess(cells, grid.shape[0] * grid.shape[1])
+
+    def test_compute_read_ahead_source_reads(self):
+        """Test source values are only read with the netCDF lock while the read-ahead loader is running."""
+
+        grid = create_gridxy_global(resolution=10.0)
+        field = create_exact_field(grid, 'exact')
+        path = self.get_temporary_file_path('foo.nc')
+        field.write(path)
+        rd = RequestDataset(path)
+
+        main_thread = threading.current_thread()
+        reads = []
+        get_variable_value = DriverNetcdf.get_variable_value
+
+        def get_variable_value_spy(driver, variable):
+            reads.append((threading.current_thread() is main_thread, NETCDF_LOCK._is_owned(),
+                          threading.active_count()))
+            return get_variable_value(driver, variable)
+
+        ops = ocgis.OcgOperations(dataset=rd, calc=[{'func': 'mean', 'name': 'mean'}], calc_grouping=['month'],
+                                  output_format='nc', add_auxiliary_files=False, prefix='read_ahead')
+        with mock.patch.object(DriverNetcdf, 'get_variable_value', autospec=True,
+                               side_effect=get_variable_value_spy):
+            ret = compute(ops, memory_budget=2 ** 12, read_ahead=True)
+
+        loader_reads = [r for r in reads if not r[0]]
+        self.assertGreater(len(loader_reads), 0)
+        for is_main_thread, is_locked, thread_count in reads:
+            if is_main_thread:
+                # The main thread only reads before the loader starts.
+                self.assertEqual(thread_count, 1)
+            else:
+                self.assertTrue(is_locked)
+
+        ops.prefix = 'ocgis'
+        ret_ocgis = ops.execute()
+        self.assertNcEqual(ret, ret_ocgis, check_fill_value=False, check_types=False,
+                           ignore_attributes={'global': ['history'], 'mean': ['_FillValue']})
+
     @attr('data')
     def test_compute_with_geom(self):
         grid = create_gridxy_global(resolution=5.0)
@@ -208,6 +282,44 @@ class Test(TestBase):
         schema = tile.get_tile_schema(25, 1, 2)
         self.assertEqual(len(schema), 13)
 
+    def test_iter_read_ahead(self):
+        actual = list(iter_read_ahead(lambda x: x * 2, range(5)))
+        self.assertEqual(actual, [0, 2, 4, 6, 8])
+
+        def func(x):
+            if x == 2:
+                raise KeyError(x)
+            return x
+
+        with self.assertRaises(KeyError):
+            list(iter_read_ahead(func, range(5)))
+
+        # The background thread stops when iteration ends early.
+        itr = iter_read_ahead(lambda x: x, range(100))
+        self.assertEqual(next(itr), 0)
+        itr.close()
+
+    def test_tile_get_tile_schema_offset(self):
+        x = np.random.rand(17, 11)
+        y = np.zeros(x.shape)
+        schema = tile.get_tile_schema(17, 11, (4, 3), offset=(6, 1))
+        for value in schema.values():
+            row, col = value['row'], value['col']
+            # Tile boundaries are aligned with the offset grid.
+            self.assertTrue(row[0] == 0 or (row[0] + 6) % 4 == 0)
+            self.assertTrue(col[0] == 0 or (col[0] + 1) % 3 == 0)
+            y[row[0]:row[1], col[0]:col[1]] += x[row[0]:row[1], col[0]:col[1]]
+        self.assertNumpyAll(x, y)
+        self.assertEqual(schema[0], {'row': [0, 2], 'col': [0, 2]})
+
+    def test_tile_get_tile_shape(self):
+        self.assertEqual(tile.get_tile_shape(100, 50, 1200), (24, 50))
+        self.assertEqual(tile.get_tile_shape(100, 50, 1200, chunks=(10, 20)), (20, 50))
+        self.assertEqual(tile.get_tile_shape(100, 50, 300, chunks=(10, 20)), (10, 20))
+        # Chunks larger than the tile are ignored.
+        self.assertEqual(tile.get_tile_shape(100, 50, 150, chunks=(10, 20)), (3, 50))
+        self.assertEqual(tile.get_tile_shape(100, 50, 10 ** 9), (100, 50))
+
     def test_tile_sum(self):
         ntests = 1000
         for ii in range(ntests):
@@ -871,6 +871,38 @@ class TestGeometryVariable(AbstractTestInterface, FixturePolygonWithHole):
         np.testing.assert_almost_equal(pa.get_value()[0], v0, decimal=3)
         np.testing.assert_almost_equal(pa.get_value()[1], v1, decimal=3)
 
+    def test_update_crs_batched(self):
+        """Test the batched transformation matches the OGR transformation path."""
+
+        from_crs = WGS84()
+        to_crs = CoordinateReferenceSystem(epsg=2136)
+        value = [box(-2, 5, -1, 6), Point(1, 2), MultiPoint([(0, 1), (2, 3)]), Point(3, 4)]
+        value = np.ma.array(value, mask=[False, False, False, True], dtype=object)
+
+        actual = GeometryVariable(name='g', value=deepcopy(value), dimensions='gg', crs=from_crs)
+        with mock.patch('ocgis.variable.geom.update_crs_batched', return_value=False) as m:
+            desired = GeometryVariable(name='g', value=deepcopy(value), dimensions='gg', crs=from_crs)
+            desired.update_crs(to_crs)
+            self.assertEqual(m.call_count, 1)
+        actual.update_crs(to_crs)
+
+        self.assertNumpyAll(actual.get_mask(), desired.get_mask())
+        for a, d in zip(actual.get_value(), desired.get_value()):
+            self.assertTrue(a.equals_exact(d, 1e-3))
+
+        # Test masked elements that are not geometries are skipped.
+        value = np.ma.array([Point(1, 2), None], mask=[False, True], dtype=object)
+        gvar = GeometryVariable(name='g', value=value, dimensions='gg', crs=from_crs)
+        gvar.update_crs(to_crs)
+        self.assertIsNone(gvar.get_value()[1])
+        self.assertNumpyAllClose(np.array(gvar.get_value()[0].coords), np.array(actual.get_value()[1].coords))
+
+        # Test an unmasked element that is not a geometry raises an error.
+        value = [Point(1, 2), None]
+        gvar = GeometryVariable(name='g', value=value, dimensions='gg', crs=from_crs)
+        with self.assertRaises(AttributeError):
+            gvar.update_crs(to_crs)
+
     def test_update_crs_to_cartesian(self):
         """Test a spherical to cartesian CRS update."""
 
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+
+from ocgis import RequestDataset, env
+from ocgis.test.base import TestBase
+from ocgis.variable.lazy import LazyArray, SlabCache, get_slab_length
+
+
+class Test(TestBase):
+    def fixture_path(self):
+        path = self.get_temporary_file_path('foo.nc')
+        np.random.seed(1)
+        with self.nc_scope(path, 'w') as ds:
+            ds.createDimension('time', 20)
+            ds.createDimension('y', 7)
+            ds.createDimension('x', 9)
+            var = ds.createVariable('tas', 'f4', ('time', 'y', 'x'), fill_value=-999.)
+            value = np.random.rand(20, 7, 9).astype('f4')
+            value[3, 4, 5] = -999.
+            value[17, 0, 0] = -999.
+            var[:] = value
+        return path
+
+    def test_get_slab_length(self):
+        self.assertEqual(get_slab_length((100, 10), 8, 0, max_bytes=900), 10)
+        self.assertEqual(get_slab_length((100, 10), 8, 1, max_bytes=900), 1)
+        self.assertEqual(get_slab_length((3, 10), 8, 0, max_bytes=10 ** 6), 3)
+
+        # The default slab size fits twice in the slab cache.
+        env.VALUE_CACHE_BYTES = 1800
+        self.assertEqual(get_slab_length((100, 10), 8, 0), 10)
+
+    def test_get_item(self):
+        path = self.fixture_path()
+        field = RequestDataset(path).get()
+        var = field['tas']
+        mask = np.zeros(var.shape, dtype=bool)
+        mask[10, :, 2] = True
+        var.set_mask(mask)
+
+        cache = SlabCache()
+        lazy = LazyArray(lambda slc: field['tas'].get_value()[slc], ('tas',), var.shape, var.dtype,
+                         mask=var.get_mask(), fill_value=var.fill_value, slab_length=3, cache=cache)
+        self.assertEqual(lazy.nslabs, 7)
+        desired = var.get_masked_value()
+
+        slcs = [5, -1, slice(None), slice(2, 11), slice(19, 2, -3), slice(None, None, -1), slice(4, 4),
+                np.array([17, 0, 3, 3]), desired.mask.any(axis=(1, 2)), (Ellipsis, 3), (slice(1, 8), 0, slice(2, 5))]
+        for slc in slcs:
+            actual = lazy[slc]
+            self.assertNumpyAll(np.ma.getmaskarray(actual), np.ma.getmaskarray(desired[slc]))
+            self.assertNumpyAll(np.ma.getdata(actual), np.ma.getdata(desired[slc]))
+        self.assertNumpyAll(np.asarray(lazy), desired.data)
+
+        # Slabs are combined into the full value.
+        actual = np.ma.concatenate([slab for _, slab in lazy.iter_slabs()])
+        self.assertNumpyAll(actual.mask, desired.mask)
+        with self.assertRaises(IndexError):
+            lazy.get_slab(7)
+
+    def test_slab_cache(self):
+        cache = SlabCache()
+        slabs = [np.ma.array(np.zeros(10), mask=False) for _ in range(3)]
+        env.VALUE_CACHE_BYTES = 200
+        for idx, slab in enumerate(slabs):
+            cache.set(idx, slab)
+        # The least recently used slab is removed.
+        self.assertIsNone(cache.get(0))
+        self.assertIs(cache.get(1), slabs[1])
+        self.assertEqual(cache.nbytes, 180)
+
+        cache.set(3, slabs[0])
+        self.assertIsNone(cache.get(2))
+        self.assertIsNotNone(cache.get(1))
+
+        # Slabs larger than the cache are not cached.
+        cache.set(4, np.ma.array(np.zeros(100), mask=False))
+        self.assertIsNone(cache.get(4))
+
+    def test_system_lazy_value(self):
+        """Test lazy source values and writing lazy values to netCDF."""
+
+        path = self.fixture_path()
+        env.USE_LAZY_VALUES = True
+        field = RequestDataset(path).get()
+        sub = field.get_field_slice({'time': slice(2, 18), 'x': slice(1, 6)})
+        lazy = sub['tas'].get_lazy_value(slab_length=4)
+        self.assertEqual(lazy.shape, (16, 7, 5))
+        self.assertNumpyAll(lazy[...], RequestDataset(path).get()['tas'].get_masked_value()[2:18, :, 1:6])
+        self.assertFalse(sub['tas']._has_initialized_value)
+
+        out = self.get_temporary_file_path('out.nc')
+        sub.write(out)
+        self.assertFalse(sub['tas']._has_initialized_value)
+        actual = RequestDataset(out).get()['tas'].get_masked_value()
+        self.assertNumpyAll(actual, lazy[...])
+
+        # Loaded values are not lazy.
+        sub['tas'].load()
+        self.assertIsNone(sub['tas'].get_lazy_value())
+
+        # Cached slabs are not used for a modified file.
+        lazy = RequestDataset(path).get()['tas'].get_lazy_value()
+        self.assertEqual(lazy[0, 0, 0], RequestDataset(path).get()['tas'].get_value()[0, 0, 0])
+        with self.nc_scope(path, 'a') as ds:
+            ds.variables['tas'][0, 0, 0] = 100.
+        os.utime(path, (0, 0))
+        actual = RequestDataset(path).get()['tas'].get_lazy_value()
+        self.assertNotEqual(actual.key, lazy.key)
+        self.assertEqual(actual[0, 0, 0], 100.)
@@ -8,6 +8,7 @@ import numpy as np
 from ocgis import Dimension
 from ocgis import RequestDataset
 from ocgis import constants
+from ocgis import env
 from ocgis import netcdftime
 from ocgis.constants import HeaderName, KeywordArgument, DimensionMapKey
 from ocgis.exc import CannotFormatTimeError, IncompleteSeasonError
@@ -19,7 +20,8 @@ from ocgis.util.units import get_units_object, get_are_units_equal, get_are_unit
 from ocgis.variable.temporal import get_datetime_conversion_state, get_datetime_from_months_time_units, \
     get_datetime_from_template_time_units, get_difference_in_months, get_is_interannual, get_num_from_months_time_units, \
     get_origin_datetime_from_months_units, get_sorted_seasons, TemporalVariable, iter_boolean_groups_from_time_regions, \
-    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime
+    TemporalGroupVariable, get_time_regions, get_datetime_or_netcdftime, get_date_parts_from_numtime, \
+    get_group_indices_from_date_parts, get_seasonal_group_indices_from_date_parts, get_time_parts_from_numtime
 from ocgis.variable.temporal import get_datetime_or_netcdftime as dt
 
 try:
@@ -39,6 +41,42 @@ class AbstractTestTemporal(AbstractTestInterface):
 
 
 class Test(AbstractTestTemporal):
+    def test_get_date_parts_from_numtime(self):
+        for calendar in ['standard', 'noleap', '360_day', 'all_leap', 'proleptic_gregorian']:
+            for units in ['days since 1899-12-01', 'hours since 1950-06-01 06:00:00']:
+                value = np.arange(0, 50000, 0.625)
+                actual = get_date_parts_from_numtime(value, units, calendar)
+                dts = num2date(value, units, calendar=calendar)
+                desired = [[dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second] for dt in dts]
+                self.assertEqual(actual.tolist(), desired)
+
+        # Test unsupported units and calendars.
+        self.assertIsNone(get_date_parts_from_numtime([0, 1], 'months since 2000-01-01', '360_day'))
+        self.assertIsNone(get_date_parts_from_numtime([0, 1], 'days since 2000-01-01', 'julian'))
+        self.assertIsNone(get_date_parts_from_numtime([0, 1], 'days since 1500-01-01', 'standard'))
+
+    def test_get_time_parts_from_numtime(self):
+        value = np.arange(0, 1440, 0.75).reshape(-1, 2)
+        for calendar in ['standard', 'noleap', '360_day']:
+            actual = get_time_parts_from_numtime(value, 'days since 1999-12-01', calendar)
+            self.assertEqual(actual.shape, value.shape)
+            self.assertEqual(actual.year.dtype, np.int16)
+            self.assertEqual(actual.month.dtype, np.int8)
+            self.assertEqual(actual.ordinal.dtype, np.int64)
+            self.assertNumpyAll(np.diff(actual.ordinal.reshape(-1)), np.diff(np.floor(value.reshape(-1))).astype(int))
+            self.assertNumpyAll(actual.get_array(),
+                                get_date_parts_from_numtime(value, 'days since 1999-12-01', calendar).reshape(-1, 2, 6))
+
+            sub = actual[3:5, 1]
+            self.assertEqual(sub.shape, (2,))
+            desired = num2date(value[3:5, 1], 'days since 1999-12-01', calendar=calendar)
+            self.assertEqual(sub.get_datetime().tolist(), [dt(d.year, d.month, d.day, d.hour, d.minute, d.second)
+                                                           for d in desired])
+
+        self.assertIsNone(get_time_parts_from_numtime([0, 1], 'months since 2000-01-01', 'standard'))
+        # Years must fit in 16-bit integers.
+        self.assertIsNone(get_time_parts_from_numtime([0, 12000000], 'days since 2000-01-01', '360_day'))
+
     def test_get_datetime_conversion_state(self):
         archetypes = [45.5, datetime.datetime(2000, 1, 1), netcdftime.datetime(2000, 4, 5)]
         for archetype in archetypes:
@@ -89,6 +127,21 @@ class Test(AbstractTestTemporal):
         distance = get_difference_in_months(datetime.datetime(1978, 12, 1), datetime.datetime(1978, 12, 1))
         self.assertEqual(distance, 0)
 
+    def test_get_group_indices_from_date_parts(self):
+        date_parts = TemporalVariable._date_parts
+        parts = np.array([[2000, 2, 1, 0, 0, 0],
+                          [2000, 1, 1, 0, 0, 0],
+                          [2001, 1, 1, 0, 0, 0],
+                          [2000, 2, 2, 0, 0, 0]])
+        select, group_indices = get_group_indices_from_date_parts(parts, ['month'], date_parts)
+        self.assertEqual(select.tolist(), [[None, 1, None, None, None, None], [None, 2, None, None, None, None]])
+        self.assertEqual([g.tolist() for g in group_indices], [[1, 2], [0, 3]])
+
+        select, group_indices = get_group_indices_from_date_parts(parts, ['month', 'year'], date_parts)
+        self.assertEqual(select.tolist(), [[2000, 1, None, None, None, None], [2000, 2, None, None, None, None],
+                                           [2001, 1, None, None, None, None]])
+        self.assertEqual([g.tolist() for g in group_indices], [[1], [0, 3], [2]])
+
     def test_get_is_interannual(self):
         self.assertTrue(get_is_interannual([11, 12, 1]))
         self.assertFalse(get_is_interannual([10, 11, 12]))
@@ -107,6 +160,24 @@ class Test(AbstractTestTemporal):
         units = "months since 1979-1-1 0"
         self.assertEqual(get_origin_datetime_from_months_units(units), datetime.datetime(1979, 1, 1))
 
+    def test_get_seasonal_group_indices_from_date_parts(self):
+        parts = np.zeros((6, 6), dtype=int)
+        parts[:, 0] = [2000, 2000, 2000, 2001, 2001, 2001]
+        parts[:, 1] = [1, 7, 12, 1, 6, 12]
+        seasons = [[12, 1, 2], [6, 7, 8]]
+
+        select, group_indices = get_seasonal_group_indices_from_date_parts(parts, seasons, True)
+        self.assertEqual(select, [[[12, 1, 2], 2000], [[6, 7, 8], 2000], [[12, 1, 2], 2001], [[6, 7, 8], 2001]])
+        self.assertEqual([g.tolist() for g in group_indices], [[0, 2], [1], [3, 5], [4]])
+
+        select, group_indices = get_seasonal_group_indices_from_date_parts(parts, seasons, False)
+        self.assertEqual(select, [[[12, 1, 2], None], [[6, 7, 8], None]])
+        self.assertEqual([g.tolist() for g in group_indices], [[0, 2, 3, 5], [1, 4]])
+
+        # Seasons without data are removed.
+        select, group_indices = get_seasonal_group_indices_from_date_parts(parts, [[3, 4, 5]], False)
+        self.assertEqual(select, [])
+
     def test_get_sorted_seasons(self):
         calc_grouping = [[9, 10, 11], [12, 1, 2], [6, 7, 8]]
         methods = ['max', 'min']
@@ -302,6 +373,31 @@ class TestTemporalVariable(AbstractTestTemporal):
                     except CannotFormatTimeError:
                         self.assertFalse(format_time)
 
+    def test_system_time_parts(self):
+        """Test the date parts time backend provides the same results as the datetime backend."""
+
+        value = np.arange(0, 800, 0.25) + 0.125
+        groupings = [['month'], ['year', 'month'], ['day'], [[12, 1, 2], 'year']]
+        time_regions = [{'month': [2, 3]}, {'year': [2000], 'month': [12]}]
+        for calendar, has_bounds in itertools.product(['standard', 'noleap', '360_day'], [False, True]):
+            actual = []
+            for format_time in [True, constants.FORMAT_TIME_PARTS]:
+                tv = TemporalVariable(value=value, units='days since 1999-12-01', calendar=calendar,
+                                      format_time=format_time, dimensions='time')
+                if has_bounds:
+                    tv.set_extrapolated_bounds('time_bounds', 'bounds')
+                self.assertEqual(tv.use_time_parts, format_time == constants.FORMAT_TIME_PARTS)
+                result = [tv.value_datetime.tolist()]
+                for time_region in time_regions:
+                    result.append(tv.get_time_region(time_region, return_indices=True)[1].tolist())
+                for grouping in groupings:
+                    tgv = tv.get_grouping(grouping)
+                    result.append([gidx.tolist() for gidx in tgv.group_indices])
+                    result.append(tgv.get_value().tolist())
+                    result.append(tgv.bounds.get_value().tolist())
+                actual.append(result)
+            self.assertEqual(actual[0], actual[1])
+
     def test_bounds(self):
         # Test bounds inherits calendar from parent.
         tv = TemporalVariable(name='time', value=[1, 2], calendar='noleap', dimensions='time')
@@ -518,6 +614,14 @@ class TestTemporalVariable(AbstractTestTemporal):
         tgd = td.get_grouping(['month'])
         self.assertEqual(tuple(tgd.date_parts[0]), (None, 1, None, None, None, None))
         self.assertTrue(tgd.dgroups[0].all())
+        self.assertEqual(tgd.group_indices[0].tolist(), [0, 1])
+
+        # Test group indices are consistent with boolean groups.
+        td = self.get_temporalvariable()
+        tgd = td.get_grouping(['month', 'year'])
+        self.assertEqual(len(tgd.group_indices), 36)
+        for gidx, dgroup in zip(tgd.group_indices, tgd.dgroups):
+            self.assertEqual(gidx.tolist(), np.nonzero(dgroup)[0].tolist())
 
     def test_get_grouping_all(self):
         for b in [True, False]:
@@ -537,7 +641,7 @@ class TestTemporalVariable(AbstractTestTemporal):
     def test_get_grouping_other(self):
         tdim = self.get_temporalvariable()
         grouping = [[12, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11], 'year']
-        new_bounds, date_parts, repr_dt, dgroups = tdim._get_grouping_other_(grouping)
+        new_bounds, date_parts, repr_dt, group_indices = tdim._get_grouping_other_(grouping)
 
         repr_dt = date2num(repr_dt, tdim.units, calendar=tdim.calendar).tolist()
         desired = [693247.0, 693337.0, 693428.0, 693520.0, 693612.0, 693702.0, 693793.0, 693885.0, 693977.0, 694067.0,
@@ -628,7 +732,9 @@ class TestTemporalVariable(AbstractTestTemporal):
                    False, False, False, False, False, False, False, False, False, False, False, False, False, False,
                    False, False, False, False, False, False, False, False, False, False, False, False, False, False,
                    False, False]
-        self.assertEqual(dgroups[4].tolist(), desired)
+        actual = np.zeros(tdim.shape[0], dtype=bool)
+        actual[group_indices[4]] = True
+        self.assertEqual(actual.tolist(), desired)
 
         desired = [([12, 1, 2], 1899), ([3, 4, 5], 1899), ([6, 7, 8], 1899), ([9, 10, 11], 1899), ([12, 1, 2], 1900),
                    ([3, 4, 5], 1900), ([6, 7, 8], 1900), ([9, 10, 11], 1900), ([12, 1, 2], 1901), ([3, 4, 5], 1901),
@@ -1088,6 +1194,38 @@ class TestTemporalVariable(AbstractTestTemporal):
                 self.assertFalse(k.format_time)
             self.assertNumpyAll(td.value_numtime, np.ma.array(value))
 
+    def test_value_parts(self):
+        tv = TemporalVariable(value=[1.5, 2.5, 3.5], units='days since 2000-02-28', calendar='360_day',
+                              dimensions='time', format_time=constants.FORMAT_TIME_PARTS)
+        self.assertTrue(tv.use_time_parts)
+        self.assertEqual(tv.value_parts.get_array().tolist(), [[2000, 2, 29, 12, 0, 0], [2000, 2, 30, 12, 0, 0],
+                                                               [2000, 3, 1, 12, 0, 0]])
+        self.assertEqual(tv[1:].value_parts.day.tolist(), [30, 1])
+        # Dates not supported by datetime objects are created using the calendar.
+        self.assertEqual(tv.value_datetime[1].day, 30)
+
+        # Masked elements have date parts of an unmasked element.
+        tv = TemporalVariable(value=np.ma.array([1., 2., 3.], mask=[False, True, False]),
+                              units='days since 2000-01-01', dimensions='time', format_time=constants.FORMAT_TIME_PARTS)
+        self.assertEqual(tv.value_parts.day.tolist(), [2, 2, 4])
+        self.assertTrue(tv.value_datetime.mask[1])
+
+        # Months in time units are not supported.
+        tv = TemporalVariable(value=[0, 1], units='months since 2000-01', dimensions='time',
+                              format_time=constants.FORMAT_TIME_PARTS)
+        self.assertIsNone(tv.value_parts)
+        self.assertEqual(tv.value_datetime[1], dt(2000, 2, 16))
+
+        # Test the backend may be selected using the environment.
+        tv = TemporalVariable(value=[1.], dimensions='time')
+        self.assertFalse(tv.use_time_parts)
+        env.USE_TIME_PARTS = True
+        self.assertTrue(tv.use_time_parts)
+        tv = TemporalVariable(value=[1.], dimensions='time', format_time=False)
+        self.assertFalse(tv.use_time_parts)
+        with self.assertRaises(CannotFormatTimeError):
+            assert tv.value_parts
+
     def test_write(self):
         tv = self.get_temporalvariable()
         path = self.get_temporary_file_path('foo.nc')
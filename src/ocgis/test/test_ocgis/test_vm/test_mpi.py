@@ -3,6 +3,7 @@ from copy import deepcopy
 from unittest import SkipTest
 
 import numpy as np
+from mock import mock
 from ocgis import vm, RequestDataset
 from ocgis.constants import DataType
 from ocgis.test.base import attr, AbstractTestInterface
@@ -10,7 +11,8 @@ from ocgis.variable.base import Variable, VariableCollection
 from ocgis.variable.dimension import Dimension
 from ocgis.vmachine.mpi import MPI_SIZE, MPI_COMM, create_nd_slices, hgather, \
     get_optimal_splits, get_rank_bounds, OcgDist, get_global_to_local_slice, MPI_RANK, variable_scatter, \
-    variable_collection_scatter, variable_gather, get_standard_comm_state, get_nonempty_ranks, redistribute_by_src_idx
+    variable_collection_scatter, variable_gather, get_standard_comm_state, get_nonempty_ranks, \
+    redistribute_by_src_idx, get_vector_displacements
 
 
 class Test(AbstractTestInterface):
@@ -292,6 +294,23 @@ class Test(AbstractTestInterface):
         else:
             self.assertFalse(actual)
 
+    def test_get_vector_displacements(self):
+        shape = (4, 3, 2)
+        # Blocks split along the first axis are contiguous. Empty blocks have no count.
+        blocks = [[(2, 4), (0, 3), (0, 2)], [(0, 0), (0, 3), (0, 2)], [(0, 2), (0, 3), (0, 2)]]
+        actual = get_vector_displacements(blocks, shape)
+        self.assertEqual(actual, ([12, 0, 12], [12, 0, 0], True))
+
+        # Single rows split along the second axis are contiguous.
+        blocks = [[(1, 2), (0, 1), (0, 2)], [(1, 2), (1, 3), (0, 2)]]
+        actual = get_vector_displacements(blocks, shape)
+        self.assertEqual(actual, ([2, 4], [6, 8], True))
+
+        # Blocks split along the second axis are packed in sequence.
+        blocks = [[(0, 4), (0, 1), (0, 2)], [(0, 4), (1, 3), (0, 2)]]
+        actual = get_vector_displacements(blocks, shape)
+        self.assertEqual(actual, ([8, 16], [0, 8], False))
+
     @attr('mpi')
     def test_variable_gather(self):
         dist = OcgDist()
@@ -349,6 +368,68 @@ class Test(AbstractTestInterface):
             else:
                 self.assertIsNone(gvar)
 
+    @attr('mpi')
+    def test_variable_gather_scatter_buffers(self):
+        """Test buffer-based scatters and gathers match pickled scatters and gathers."""
+
+        dist = OcgDist()
+        dist.create_dimension('y', 7, dist=True)
+        dist.create_dimension('x', 5, dist=True)
+        dist.update_dimension_bounds()
+
+        if vm.rank == 0:
+            np.random.seed(1)
+            value = np.random.rand(7, 5)
+            var = Variable(name='data', value=value, mask=value > 0.7, dimensions=['y', 'x'])
+            Variable(name='index', value=np.arange(7, dtype=np.int32), dimensions='y', parent=var.parent)
+        else:
+            var = None
+
+        actual = {}
+        for use_buffers in [True, False]:
+            svar = variable_scatter(deepcopy(var), dist, use_buffers=use_buffers)
+            if not svar.is_empty:
+                self.assertEqual(svar.parent['index'].get_value().dtype, np.int32)
+            with vm.scoped_by_emptyable('gather buffers', svar):
+                if not vm.is_null:
+                    actual[use_buffers] = (svar, variable_gather(svar, use_buffers=use_buffers))
+
+        if vm.rank == 0:
+            for svar, gvar in actual.values():
+                self.assertNumpyAll(gvar.get_masked_value(), var.get_masked_value())
+        if True in actual:
+            for name in ['data', 'index']:
+                buffered, pickled = [actual[k][0].parent[name] for k in [True, False]]
+                self.assertNumpyAll(buffered.get_masked_value(), pickled.get_masked_value())
+
+    @attr('mpi')
+    def test_variable_gather_buffers_decision(self):
+        """Test buffers are not used for gathers if a non-root rank may not use them."""
+
+        if vm.size < 2:
+            raise SkipTest('vm.size < 2')
+
+        dist = OcgDist()
+        dist.create_dimension('x', 2 * vm.size, dist=True)
+        dist.update_dimension_bounds()
+
+        if vm.rank == 0:
+            var = Variable(name='data', value=np.arange(2 * vm.size, dtype=float), dimensions='x')
+        else:
+            var = None
+        svar = variable_scatter(var, dist)
+
+        # The data type differs on the non-root ranks.
+        if vm.rank != 0:
+            svar.set_value(svar.get_value().astype(np.int32))
+        with mock.patch('ocgis.vmachine.mpi._variable_gather_buffers_') as m_gather_buffers:
+            gvar = variable_gather(svar)
+        m_gather_buffers.assert_not_called()
+        if vm.rank == 0:
+            self.assertEqual(gvar.get_value().tolist(), list(range(2 * vm.size)))
+        else:
+            self.assertIsNone(gvar)
+
     @attr('mpi')
     def test_variable_scatter(self):
         var_value = np.arange(5, dtype=float) + 50
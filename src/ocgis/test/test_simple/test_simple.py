@@ -834,6 +834,47 @@ class TestSimple(TestSimpleBase):
                 constants.DimensionName.TEMPORAL, constants.NAME_DIMENSION_LEVEL,
                 'region'))
 
+        # Test with multiple geometries.
+        geom = [{'geom': Point(-104., 38.), 'properties': {'Name': 'A'}},
+                {'geom': Point(-103., 39.), 'properties': {'Name': 'BCD'}}]
+        ops = self.get_ops(kwds={'geom': geom, 'aggregate': True, 'search_radius_mult': 0.01, 'output_format': 'nc',
+                                 'output_format_options': {'geom_dim': 'region'}, 'prefix': 'multiple'})
+        ret = self.get_ret(ops)
+        with self.nc_scope(ret) as ds:
+            self.assertEqual(ds.variables[self.var].dimensions, (
+                constants.DimensionName.TEMPORAL, constants.NAME_DIMENSION_LEVEL, 'region'))
+            self.assertEqual(len(ds.dimensions['region']), 2)
+            self.assertEqual(ds.variables[HeaderName.ID_GEOMETRY][:].tolist(), [1, 2])
+            self.assertEqual(nc.chartostring(ds.variables['Name'][:]).tolist(), ['A', 'BCD'])
+
+    def test_nc_discrete_geometry_buffer_bytes(self):
+        # Test aggregated outputs are written in blocks when the buffer is too small for all geometries.
+        geom = [{'geom': Point(-104., 38.), 'properties': {'Name': 'A', 'code': 1}},
+                {'geom': Point(-103., 39.), 'properties': {'Name': 'BCD', 'code': 2}},
+                {'geom': Point(-103., 38.), 'properties': {'Name': 'EF', 'code': 3}}]
+
+        rets = []
+        for idx, buffer_bytes in enumerate([None, 1]):
+            output_format_options = {}
+            if buffer_bytes is not None:
+                output_format_options['buffer_bytes'] = buffer_bytes
+            ops = self.get_ops(kwds={'geom': geom, 'aggregate': True, 'search_radius_mult': 0.01,
+                                     'output_format': 'nc', 'output_format_options': output_format_options,
+                                     'prefix': 'buffer{}'.format(idx)})
+            rets.append(ops.execute())
+
+        with self.nc_scope(rets[0]) as ds:
+            self.assertEqual(ds.dimensions[constants.DimensionName.UNIONED_GEOMETRY].size, 3)
+            self.assertEqual(nc.chartostring(ds.variables['Name'][:]).tolist(), ['A', 'BCD', 'EF'])
+            self.assertEqual(ds.variables['code'][:].tolist(), [1, 2, 3])
+            self.assertNumpyAllClose(ds.variables['longitude'][:], np.array([-104., -103., -103.]))
+            # The string length is defined by the first block.
+            with self.nc_scope(rets[1]) as actual:
+                self.assertEqual(nc.chartostring(actual.variables['Name'][:]).tolist(), ['A', 'B', 'E'])
+                for name, var in ds.variables.items():
+                    if name != 'Name' and var.ndim > 0:
+                        self.assertNumpyAll(var[:], actual.variables[name][:])
+
     def test_nc_discrete_geometry_validate(self):
 
         with self.assertRaises(DefinitionValidationError):
@@ -902,6 +902,38 @@ def iter_array(arr, use_mask=True, return_value=False, mask=None):
         yield ret
 
 
+def iter_array_blocks(shape, max_elements):
+    """
+    Yield index tuples splitting an array into contiguous blocks. The last axis whose trailing block does not fit in
+    ``max_elements`` is sliced and the leading axes are iterated.
+
+    :param tuple shape: The array shape.
+    :param int max_elements: The maximum number of elements in a block. Nothing is yielded for empty shapes.
+    :rtype: tuple
+    """
+    shape = tuple(shape)
+    if len(shape) == 0:
+        yield ()
+        return
+    if 0 in shape:
+        return
+
+    # Find the axis to slice. Blocks have the full extent of the following axes.
+    axis = len(shape) - 1
+    trailing = 1
+    while axis >= 0 and trailing * shape[axis] <= max_elements:
+        trailing *= shape[axis]
+        axis -= 1
+    if axis < 0:
+        yield (slice(None),)
+        return
+    step = max(1, max_elements // trailing)
+
+    for indices in itertools.product(*[range(n) for n in shape[:axis]]):
+        for start in range(0, shape[axis], step):
+            yield indices + (slice(start, min(start + step, shape[axis])),)
+
+
 def locate(pattern, root=os.curdir, followlinks=True):
     """
     Locate all files matching supplied filename pattern in and below supplied root directory.
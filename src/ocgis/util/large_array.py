@@ -1,31 +1,55 @@
+import sys
+import threading
 from copy import deepcopy
 
 import netCDF4 as nc
 import numpy as np
+import six
+from six.moves import queue
+
 import ocgis
 from ocgis import constants
 from ocgis.calc import tile
 from ocgis.calc.base import AbstractMultivariateFunction
 from ocgis.calc.engine import CalculationEngine
 from ocgis.constants import TagName
+from ocgis.driver.nc import DriverNetcdf
 from ocgis.ops.core import OcgOperations
 from ocgis.util.helpers import ProgressBar
 
+#: Serializes access to the NetCDF library which is not thread-safe. Only the read-ahead loader's source reads and the
+#: writes to the destination file are serialized. Tile operations execute on fields already loaded by the loader.
+NETCDF_LOCK = threading.RLock()
+# Multiplier for the bytes of the tile being computed accounting for masks and calculation temporaries.
+_CALC_MEMORY_FACTOR = 3
+
 
-def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
+def compute(ops, tile_dimension=None, verbose=False, use_optimizations=True, memory_budget=None, read_ahead=True):
     """
     Used for computations on large arrays where memory limitations are a consideration. It is is also useful for
     extracting data from a server that has limitations on the size of requested data arrays. This function creates an
     empty destination NetCDF file that is then filled by executing the operations on chunks of the requested
     target dataset(s) and filling the destination NetCDF file.
 
+    Tiles are planned from a memory budget by default. Tile boundaries are aligned with the NetCDF chunking of the
+    source data variables. With ``read_ahead``, the next tile is read from source in a background thread while the
+    current tile is computed. Results are written through a single open handle on the destination file.
+
+    Only the background reads and the writes to the destination file hold :attr:`NETCDF_LOCK`. The operations for a
+    read-ahead tile execute without the lock on fields whose values were loaded by the background thread, so they do
+    not read from the source files.
+
     :param ops: The target operations to tile. There must be a calculation associated with
      the operations.
     :type ops: :class:`ocgis.OcgOperations`
-    :param int tile_dimension: The target tile/chunk dimension. This integer value must be greater than zero.
+    :param int tile_dimension: The target tile/chunk dimension. This integer value must be greater than zero. If
+     provided, square tiles are used instead of tiles planned from the memory budget.
     :param bool verbose: If ``True``, print more verbose information to terminal.
     :param bool use_optimizations: If ``True``, cache :class:`~ocgis.Field` and :class:`~ocgis.TemporalGroupVariable`
      objects for reuse during tile iteration.
+    :param int memory_budget: The approximate maximum number of bytes of array data held in memory. Defaults to
+     :attr:`ocgis.constants.LARGE_ARRAY_MEMORY_BUDGET`. Not compatible with ``tile_dimension``.
+    :param bool read_ahead: If ``True``, read the next tile's data in a background thread.
     :raises: AssertionError, ValueError
     :returns: Path to the output NetCDF file.
     :rtype: str
@@ -34,7 +58,7 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     >>> from ocgis.util.large_array import compute
     >>> rd = RequestDataset(uri='/path/to/file', variable='tas')
     >>> ops = OcgOperations(dataset=rd, calc=[{'func':'mean','name':'mean'}],output_format='nc')
-    >>> ret = compute(ops, 25)
+    >>> ret = compute(ops, memory_budget=2 ** 28)
     """
 
     assert isinstance(ops, OcgOperations)
@@ -49,9 +73,17 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
 
         ops.callback = zeropercentagecallback
 
-    tile_dimension = int(tile_dimension)
-    if tile_dimension <= 0:
-        raise ValueError('"tile_dimension" must be greater than 0')
+    if tile_dimension is not None:
+        if memory_budget is not None:
+            raise ValueError('"tile_dimension" and "memory_budget" are mutually exclusive')
+        tile_dimension = int(tile_dimension)
+        if tile_dimension <= 0:
+            raise ValueError('"tile_dimension" must be greater than 0')
+    else:
+        if memory_budget is None:
+            memory_budget = constants.LARGE_ARRAY_MEMORY_BUDGET
+        if memory_budget <= 0:
+            raise ValueError('"memory_budget" must be greater than 0')
 
     # Determine if we are working with a multivariate function.
     if ops.calc is not None:
@@ -120,6 +152,16 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
         template_field = template_rd.get()
         shp = template_field.grid.shape
 
+        # load the source fields. these are used to plan the tiles and are sliced to read the tiles.
+        source_fields = {}
+        for rd in ops.dataset:
+            format_time = ops.format_time
+            # Keep a request dataset's integer date parts unless the operations change time formatting.
+            if format_time is True and rd.format_time == constants.FORMAT_TIME_PARTS:
+                format_time = constants.FORMAT_TIME_PARTS
+            gotten_field = rd.get(format_time=format_time)
+            source_fields.update({rd.field_name: gotten_field})
+
         if use_optimizations:
             # if there is a calculation grouping, optimize for it. otherwise, pass
             # this value as None.
@@ -136,19 +178,23 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
             except TypeError:
                 optimizations = None
 
-            # load the fields and pass those for optimization
-            field_optimizations = {}
-            for rd in ops.dataset:
-                gotten_field = rd.get(format_time=ops.format_time)
-                field_optimizations.update({rd.field_name: gotten_field})
+            # pass the loaded fields for optimization
             optimizations = optimizations or {}
-            optimizations['fields'] = field_optimizations
+            optimizations['fields'] = source_fields
         else:
             optimizations = None
 
         if verbose:
             print('getting tile schema...')
-        schema = tile.get_tile_schema(shp[0], shp[1], tile_dimension)
+        if tile_dimension is None:
+            max_cells = get_tile_cell_count(source_fields, template_field, memory_budget, read_ahead=read_ahead)
+            chunks = get_source_chunks(ops, source_fields)
+            tile_shape = tile.get_tile_shape(shp[0], shp[1], max_cells, chunks=chunks)
+            if verbose:
+                print(('source chunks: {0}, tile shape: {1}'.format(chunks, tile_shape)))
+            schema = tile.get_tile_schema(shp[0], shp[1], tile_shape, offset=(row_offset, col_offset))
+        else:
+            schema = tile.get_tile_schema(shp[0], shp[1], tile_dimension)
         lschema = len(schema)
 
         # Create new callbackfunction where the 0-100% range is converted to a subset corresponding to the no. of
@@ -167,54 +213,61 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
             print(('output file is: {0}'.format(fill_file)))
             print(('tile count: {0}'.format(lschema)))
 
+        # appropriately adjust the slices to account for the spatial subset
+        tiles = [([ii + row_offset for ii in indices['row']], [ii + col_offset for ii in indices['col']])
+                 for indices in schema.values()]
+        if read_ahead:
+            tiles = iter_read_ahead(lambda x: (x, get_tile_fields(source_fields, x[0], x[1])), tiles)
+        else:
+            tiles = ((x, None) for x in tiles)
+
         fds = nc.Dataset(fill_file, 'a')
         try:
             if verbose:
                 progress = ProgressBar('tiles progress')
             if ops.callback is not None and callback:
                 callback(0, "Initializing calculation")
-            for ctr, indices in enumerate(iter(schema.values()), start=1):
-                # appropriate adjust the slices to account for the spatial subset
-                row = [ii + row_offset for ii in indices['row']]
-                col = [ii + col_offset for ii in indices['col']]
-
+            for ctr, ((row, col), tile_fields) in enumerate(tiles, start=1):
                 # copy the operations and modify arguments
                 ops_slice = deepcopy(ops)
                 ops_slice.geom = None
-                ops_slice.slice = [None, None, None, row, col]
                 ops_slice.output_format = constants.OutputFormatName.OCGIS
-                ops_slice.optimizations = optimizations
+                if tile_fields is None:
+                    ops_slice.slice = [None, None, None, row, col]
+                    ops_slice.optimizations = optimizations
+                else:
+                    # the fields are already sliced and loaded for the tile. executing on them does not read from
+                    # source and does not need the netCDF lock.
+                    ops_slice.slice = None
+                    ops_slice.optimizations = dict(optimizations or {})
+                    ops_slice.optimizations['fields'] = tile_fields
                 # return the object slice
                 ret = ops_slice.execute()
 
-                for field in ret.iter_fields():
-                    for variable in field.data_variables:
-                        vref = fds.variables[variable.name]
-                        # we need to remove the offsets to adjust for the zero-based fill file.
-                        slice_row = slice(row[0] - row_offset, row[1] - row_offset)
-                        slice_col = slice(col[0] - col_offset, col[1] - col_offset)
-                        # if there is a spatial mask, update accordingly
-                        if mask_spatial is not None:
-                            set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col)
-                            fill_mask = field.grid.get_mask(create=True)
-                            fill_mask[:, :] = mask_spatial[slice_row, slice_col]
-                            fill_mask = np.ma.array(np.zeros(fill_mask.shape), mask=fill_mask)
-                            fds.variables[field.grid.mask_variable.name][slice_row, slice_col] = fill_mask
-                        fill_value = variable.get_masked_value()
-                        # fill the netCDF container variable adjusting for shape
-                        if len(vref.shape) == 3:
-                            vref[:, slice_row, slice_col] = fill_value
-                        elif len(vref.shape) == 4:
-                            vref[:, :, slice_row, slice_col] = fill_value
-                        else:
-                            raise NotImplementedError(vref.shape)
-
-                        fds.sync()
+                with NETCDF_LOCK:
+                    for field in ret.iter_fields():
+                        for variable in field.data_variables:
+                            vref = fds.variables[variable.name]
+                            # we need to remove the offsets to adjust for the zero-based fill file.
+                            slice_row = slice(row[0] - row_offset, row[1] - row_offset)
+                            slice_col = slice(col[0] - col_offset, col[1] - col_offset)
+                            # if there is a spatial mask, update accordingly
+                            if mask_spatial is not None:
+                                set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col)
+                                fill_mask = field.grid.get_mask(create=True)
+                                fill_mask[:, :] = mask_spatial[slice_row, slice_col]
+                                fill_mask = np.ma.array(np.zeros(fill_mask.shape), mask=fill_mask)
+                                fds.variables[field.grid.mask_variable.name][slice_row, slice_col] = fill_mask
+                            fill_value = variable.get_masked_value()
+                            # fill the netCDF container variable. the spatial dimensions are last.
+                            vref[..., slice_row, slice_col] = fill_value
                 if verbose:
                     progress.progress(int((float(ctr) / lschema) * 100))
                 if ops.callback is not None and callback:
                     percentageDone = ((float(ctr) / lschema) * 100)
         finally:
+            # stop reading ahead if tile iteration ended early
+            tiles.close()
             fds.close()
     finally:
         ocgis.env.OPTIMIZE_FOR_CALC = orig_oc
@@ -225,6 +278,136 @@ def compute(ops, tile_dimension, verbose=False, use_optimizations=True):
     return fill_file
 
 
+def get_source_chunks(ops, fields):
+    """
+    Get the spatial chunk shape of the source data variables. Contiguous variables have a chunk shape of one row.
+
+    :param ops: The operations with the source request datasets.
+    :type ops: :class:`ocgis.OcgOperations`
+    :param dict fields: Maps request dataset field names to their :class:`~ocgis.Field` objects.
+    :returns: The largest ``(row, column)`` chunk shape of the data variables or ``None`` if it is not available (i.e.
+     the source is not a NetCDF file).
+    :rtype: tuple | None
+    """
+
+    ret = None
+    for rd in ops.dataset:
+        if not isinstance(rd.driver, DriverNetcdf) or not isinstance(rd.uri, six.string_types):
+            continue
+        field = fields[rd.field_name]
+        dimension_names = [d.name for d in field.grid.dimensions]
+        with NETCDF_LOCK:
+            with nc.Dataset(rd.uri) as ds:
+                for variable in field.data_variables:
+                    try:
+                        ncvar = ds.variables[variable.source_name]
+                    except KeyError:
+                        continue
+                    chunking = ncvar.chunking()
+                    if chunking == 'contiguous':
+                        chunking = [1] * (ncvar.ndim - 1) + [field.grid.shape[1]]
+                    chunks = dict(zip(ncvar.dimensions, chunking))
+                    current = tuple([chunks.get(n, 1) for n in dimension_names])
+                    if ret is None:
+                        ret = current
+                    else:
+                        ret = tuple(max(a, b) for a, b in zip(ret, current))
+    return ret
+
+
+def get_tile_cell_count(fields, template_field, memory_budget, read_ahead=True):
+    """
+    Estimate the number of grid cells in a tile fitting in the memory budget.
+
+    :param dict fields: Maps request dataset field names to their source :class:`~ocgis.Field` objects.
+    :param template_field: The template field with the output data variables.
+    :type template_field: :class:`~ocgis.Field`
+    :param int memory_budget: The maximum number of bytes of array data held in memory.
+    :param bool read_ahead: If ``True``, account for the input data of tiles read ahead.
+    :rtype: int
+    """
+
+    input_bytes = sum([_get_bytes_per_cell_(field) for field in fields.values()])
+    output_bytes = _get_bytes_per_cell_(template_field)
+    # The tile being computed holds its input, output, masks, and calculation temporaries. Tiles read ahead hold their
+    # input: one waiting to be consumed and one being read.
+    cell_bytes = (input_bytes + output_bytes) * _CALC_MEMORY_FACTOR
+    if read_ahead:
+        cell_bytes += 2 * input_bytes
+    return max(1, int(memory_budget // max(cell_bytes, 1)))
+
+
+def get_tile_fields(fields, row, col):
+    """
+    Slice the fields to a tile and load the tile's values from source.
+
+    :param dict fields: Maps request dataset field names to their source :class:`~ocgis.Field` objects.
+    :param row: The ``[start, stop]`` row indices of the tile.
+    :param col: The ``[start, stop]`` column indices of the tile.
+    :returns: Maps request dataset field names to the loaded tile fields.
+    :rtype: dict
+    """
+
+    ret = {}
+    for name, field in fields.items():
+        ydim, xdim = field.grid.dimensions
+        sub = field[{ydim.name: slice(*row), xdim.name: slice(*col)}]
+        with NETCDF_LOCK:
+            for variable in list(sub.values()):
+                variable.load()
+        ret[name] = sub
+    return ret
+
+
+def iter_read_ahead(func, items, depth=1):
+    """
+    Apply ``func`` to each element of ``items`` in a background thread and yield the results in order. Results are
+    computed ahead of the consumer. Exceptions raised by ``func`` are raised in the consuming thread.
+
+    :param func: The function to apply.
+    :type func: function
+    :param items: The items to iterate.
+    :param int depth: The maximum number of results waiting to be consumed.
+    :rtype: generator
+    """
+
+    results = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    break
+                results.put((None, func(item)))
+        except Exception:
+            results.put((sys.exc_info(), None))
+        else:
+            results.put((None, end))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            exc_info, result = results.get()
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            if result is end:
+                break
+            yield result
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue.
+        while thread.is_alive():
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
 def set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col):
     """
     Update the mask on ``variable`` in-place to match ``mask_spatial``. The array slice updated is constrained by
@@ -246,3 +429,11 @@ def set_variable_spatial_mask(variable, mask_spatial, slice_row, slice_col):
     vmask = variable.get_mask(create=True)
     vmask = np.logical_or(fill_mask, vmask[:, :])
     variable.set_mask(vmask)
+
+
+def _get_bytes_per_cell_(field):
+    ncells = max(int(np.prod(field.grid.shape)), 1)
+    ret = 0
+    for variable in field.data_variables:
+        ret += int(np.prod(variable.shape)) // ncells * np.dtype(variable.dtype).itemsize
+    return ret
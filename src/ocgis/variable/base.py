@@ -25,6 +25,7 @@ from ocgis.util.units import get_units_object, get_conformed_units
 from ocgis.variable.attributes import Attributes
 from ocgis.variable.dimension import Dimension
 from ocgis.variable.iterator import Iterator
+from ocgis.variable.lazy import LazyArray
 from ocgis.vmachine.mpi import create_nd_slices, get_global_to_local_slice
 
 
@@ -1686,6 +1687,44 @@ class SourcedVariable(Variable):
             for var in list(self.parent.values()):
                 var.load()
 
+    def get_lazy_value(self, axis=0, slab_length=None):
+        """
+        Get a proxy for the variable's value that reads the value from source in slabs. The variable's value is not
+        loaded. The proxy uses the variable's current mask, dimensions, and data type.
+
+        :param int axis: The axis along which slabs are read.
+        :param int slab_length: See :class:`~ocgis.variable.lazy.LazyArray`.
+        :returns: ``None`` if the value is loaded, not numeric, has units to conform, or the driver does not support
+         reading slabs.
+        :rtype: :class:`~ocgis.variable.lazy.LazyArray` | None
+        """
+        from ocgis.driver.base import get_variable_metadata_from_request_dataset
+        from ocgis.exc import VariableMissingMetadataError
+
+        rd = self._request_dataset
+        if self.is_empty or self.ndim == 0 or self._value is not None or self._has_initialized_value or rd is None \
+                or rd.uri is None:
+            return None
+        if self.protected:
+            raise PayloadProtectedError(self.name)
+        try:
+            if np.dtype(self.dtype).kind not in 'biuf':
+                return None
+        except TypeError:
+            return None
+        try:
+            if get_variable_metadata_from_request_dataset(rd.driver, self).get('conform_units_to') is not None:
+                return None
+        except VariableMissingMetadataError:
+            return None
+
+        reader = rd.driver.get_variable_value_reader(self)
+        if reader is None:
+            return None
+        key, reader = reader
+        return LazyArray(reader, key, self.shape, self.dtype, mask=self._mask, fill_value=self.fill_value, axis=axis,
+                         slab_length=slab_length)
+
     def _get_value_(self):
         if not self.is_empty and self._value is None and not self._has_initialized_value and self._request_dataset.uri is not None:
             if self.protected:
@@ -20,6 +20,16 @@ from ocgis.exc import ProjectionCoordinateNotFound, ProjectionDoesNotMatch, CRSN
 from ocgis.spatial.wrap import GeometryWrapper, CoordinateArrayWrapper
 from ocgis.util.helpers import iter_array, get_iter
 
+try:
+    from pyproj import Transformer
+except ImportError:
+    # Transformer objects are available in pyproj >= 2.1.
+    Transformer = None
+
+# Transformers keyed by the source and destination PROJ.4 strings. Transformer creation is expensive relative to
+# transforming a coordinate array.
+_TRANSFORMER_CACHE = {}
+
 SpatialReference = osr.SpatialReference
 
 
@@ -1200,6 +1210,35 @@ def create_crs(value, **kwargs):
     return ret
 
 
+def get_transformer(from_crs, to_crs):
+    """
+    Get a cached :class:`pyproj.Transformer` for the coordinate system pair. Transformed coordinates are always in
+    x/y (longitude/latitude) order.
+
+    :param from_crs: The source coordinate system.
+    :type from_crs: :class:`~ocgis.variable.crs.AbstractCRS`
+    :param to_crs: The destination coordinate system.
+    :type to_crs: :class:`~ocgis.variable.crs.AbstractCRS`
+    :return: ``None`` if pyproj transformers are not available or either coordinate system has no PROJ.4
+     representation.
+    :rtype: :class:`pyproj.Transformer` | None
+    """
+
+    if Transformer is None:
+        return None
+    try:
+        key = (from_crs.proj4, to_crs.proj4)
+    except AttributeError:
+        return None
+
+    try:
+        ret = _TRANSFORMER_CACHE[key]
+    except KeyError:
+        ret = Transformer.from_crs(key[0], key[1], always_xy=True)
+        _TRANSFORMER_CACHE[key] = ret
+    return ret
+
+
 def get_lonlat_rotated_pole_transform(lon, lat, transform, inverse=False, is_vectorized=False):
     """
     Transform longitude and latitude coordinates to/from their rotated pole representation.
@@ -12,6 +12,12 @@ from shapely.geometry.polygon import orient
 from shapely.ops import cascaded_union
 from shapely.prepared import prep
 
+try:
+    # Vectorized coordinate transformations are available in Shapely >= 2.0.
+    from shapely import transform as shapely_transform, has_z as shapely_has_z
+except ImportError:
+    shapely_transform = None
+
 from ocgis import Variable, vm
 from ocgis import constants
 from ocgis import env
@@ -27,7 +33,7 @@ from ocgis.util.helpers import iter_array, get_trimmed_array_by_mask, get_swap_c
     iter_exploded_geometries, get_iter
 from ocgis.util.logging_ocgis import ocgis_lh
 from ocgis.variable.base import get_dimension_lengths, ObjectType
-from ocgis.variable.crs import Cartesian
+from ocgis.variable.crs import Cartesian, get_transformer
 from ocgis.variable.dimension import create_distributed_dimension, Dimension
 from ocgis.variable.iterator import Iterator
 
@@ -847,7 +853,8 @@ class GeometryVariable(AbstractSpatialVariable):
             raise NotImplementedError(spatial_op)
         return ret
 
-    def get_unioned(self, dimensions=None, union_dimension=None, spatial_average=None, root=0):
+    def get_unioned(self, dimensions=None, union_dimension=None, spatial_average=None, root=0, weights=None,
+                    unioned=None):
         """
         Unions _unmasked_ geometry objects and applies spatial averaging weights to variables in the parent collection
         if requested. Collective across the current :class:`~ocgis.OcgVM`.
@@ -860,9 +867,18 @@ class GeometryVariable(AbstractSpatialVariable):
         :type spatial_average: tuple(:class:`ocgis.Variable`, ...) | tuple(str, ...)
         :param int root: If executing in parallel, the root rank to send all data. On non-root ranks, ``None`` will be
          returned.
+        :param weights: Spatial averaging weights with the shape of the geometry variable. If ``None``, use
+         :attr:`~ocgis.GeometryVariable.weights`. Only non-zero weights are used to average the variables. Averages
+         are computed for all non-spatial indices at once.
+        :type weights: :class:`numpy.ndarray`
+        :param unioned: The unioned geometry if it is already known. The geometries are not unioned.
+        :type unioned: :class:`shapely.geometry.base.BaseGeometry`
         :rtype: :class:`ocgis.GeometryVariable`
         """
 
+        if (weights is not None or unioned is not None) and vm.size > 1:
+            raise ValueError('Precomputed weights and unioned geometries are not supported in parallel.')
+
         # Get dimension names and lengths for the dimensions to union.
         if dimensions is None:
             dimensions = self.dimensions
@@ -898,6 +914,10 @@ class GeometryVariable(AbstractSpatialVariable):
         for dst_indices in product(*[list(range(dl)) for dl in get_dimension_lengths(new_dimensions)]):
             dst_slc = {new_dimensions[ii].name: dst_indices[ii] for ii in range(len(new_dimensions))}
 
+            if unioned is not None:
+                ret[dst_slc].get_value()[0] = unioned
+                continue
+
             # Select the geometries to union skipping any masked geometries.
             to_union = deque()
             for indices in product(*[list(range(dl)) for dl in dimension_lengths]):
@@ -934,6 +954,11 @@ class GeometryVariable(AbstractSpatialVariable):
         if spatial_average is not None:
             # Get source data to weight.
             for var_to_weight in filter(lambda ii: ii.name in variable_names_to_weight, list(self.parent.values())):
+                if weights is not None:
+                    _set_sparse_spatial_average_(var_to_weight, ret.parent[var_to_weight.name], weights,
+                                                 dimension_names, union_dimension)
+                    continue
+
                 # Holds sizes of dimensions to iterate. These dimension are not squeezed by the weighted averaging.
                 range_to_itr = []
                 # Holds the names of dimensions to squeeze.
@@ -1139,31 +1164,33 @@ class GeometryVariable(AbstractSpatialVariable):
         elif from_crs != to_crs:
             # Be sure and project masked geometries to maintain underlying geometries.
             r_value = self.get_value().reshape(-1)
-            r_loads = wkb.loads
-            r_create = ogr.CreateGeometryFromWkb
-            to_sr = to_crs.sr
-            from_sr = from_crs.sr
 
             the_mask = self.get_mask()
             if the_mask is not None:
                 the_mask = the_mask.flatten()
 
-            for idx, geom in enumerate(r_value.flat):
-                try:
-                    # Get the well known binary representation of the geometry object.
-                    geom_wkb = geom.wkb
-                except AttributeError:
-                    # The geometry may be masked in which case it has no binary whatever. Confirm the geometry is
-                    # masked or raise an exception.
-                    if the_mask is None or not the_mask[idx]:
-                        raise
-                    else:
-                        continue
+            if not update_crs_batched(r_value, the_mask, from_crs, to_crs):
+                r_loads = wkb.loads
+                r_create = ogr.CreateGeometryFromWkb
+                to_sr = to_crs.sr
+                from_sr = from_crs.sr
+
+                for idx, geom in enumerate(r_value.flat):
+                    try:
+                        # Get the well known binary representation of the geometry object.
+                        geom_wkb = geom.wkb
+                    except AttributeError:
+                        # The geometry may be masked in which case it has no binary whatever. Confirm the geometry is
+                        # masked or raise an exception.
+                        if the_mask is None or not the_mask[idx]:
+                            raise
+                        else:
+                            continue
 
-                ogr_geom = r_create(geom_wkb)
-                ogr_geom.AssignSpatialReference(from_sr)
-                ogr_geom.TransformTo(to_sr)
-                r_value[idx] = r_loads(ogr_geom.ExportToWkb())
+                    ogr_geom = r_create(geom_wkb)
+                    ogr_geom.AssignSpatialReference(from_sr)
+                    ogr_geom.TransformTo(to_sr)
+                    r_value[idx] = r_loads(ogr_geom.ExportToWkb())
         # Even if coordinate systems are measured equivalent, for consistency the new crs is the destination CRS.
         self.crs = to_crs
 
@@ -1384,6 +1411,61 @@ def get_split_polygon_by_node_threshold(geom, node_threshold):
     return MultiPolygon(the_multi)
 
 
+def update_crs_batched(value, mask, from_crs, to_crs):
+    """
+    Transform geometries in-place by extracting all coordinates into a single array and transforming them with one
+    vectorized :class:`pyproj.Transformer` call. Masked geometries are skipped when they are not geometry objects.
+
+    :param value: Flat object array of geometries.
+    :type value: :class:`numpy.ndarray`
+    :param mask: Flat boolean mask for ``value`` or ``None``.
+    :type mask: :class:`numpy.ndarray`
+    :param from_crs: The source coordinate system.
+    :type from_crs: :class:`~ocgis.variable.crs.AbstractCRS`
+    :param to_crs: The destination coordinate system.
+    :type to_crs: :class:`~ocgis.variable.crs.AbstractCRS`
+    :return: ``True`` if the geometries were transformed. ``False`` if the batched path is not applicable and the
+     geometries were not modified (e.g. three-dimensional geometries or coordinates that fail to transform).
+    :rtype: bool
+    :raises: AttributeError
+    """
+
+    if shapely_transform is None:
+        return False
+
+    select = np.array([isinstance(geom, BaseGeometry) for geom in value], dtype=bool)
+    if mask is not None:
+        not_geometry = np.invert(select)
+        if np.any(not_geometry & np.invert(mask)):
+            raise AttributeError('Unmasked element is not a geometry object.')
+    elif not select.all():
+        raise AttributeError('Element is not a geometry object.')
+    if not select.any():
+        return True
+
+    geoms = value[select]
+    if shapely_has_z(geoms).any():
+        return False
+    transformer = get_transformer(from_crs, to_crs)
+    if transformer is None:
+        return False
+
+    failed = []
+
+    def _transform_(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        ret = np.column_stack((x, y))
+        if not np.isfinite(ret).all():
+            failed.append(True)
+        return ret
+
+    transformed = shapely_transform(geoms, _transform_)
+    if len(failed) > 0:
+        return False
+    value[select] = transformed
+    return True
+
+
 def geometryvariable_get_mask_from_intersects(gvar, geometry, use_spatial_index=env.USE_SPATIAL_INDEX,
                                               keep_touches=False, original_mask=None):
     # Create the fill array and reference the mask. This is the output geometry value array.
@@ -1419,3 +1501,26 @@ def geometryvariable_get_mask_from_intersects(gvar, geometry, use_spatial_index=
             ref_fill_mask[global_index[idx]] = bool_value
 
     return fill
+
+
+def _set_sparse_spatial_average_(var_to_weight, target, weights, dimension_names, union_dimension):
+    # Spatially average a variable for all non-spatial indices at once. Spatial dimensions are moved to the end and
+    # flattened so only elements with non-zero weights are gathered.
+    spatial_axes = [var_to_weight.dimension_names.index(dn) for dn in dimension_names]
+    new_dimensions = [dim for dim in var_to_weight.dimensions if dim.name not in dimension_names]
+    new_dimensions.append(union_dimension)
+
+    value = var_to_weight.get_masked_value()
+    value = np.moveaxis(value, spatial_axes, list(range(-len(spatial_axes), 0)))
+    value = value.reshape(value.shape[:value.ndim - len(spatial_axes)] + (-1,))
+    weights = weights.reshape(-1)
+    select = np.flatnonzero(weights)
+    weighted_value = np.ma.average(value[..., select], axis=-1, weights=weights[select])
+    weighted_value = np.ma.array(weighted_value).reshape(get_dimension_lengths(new_dimensions))
+
+    target.set_mask(None)
+    target._value = None
+    target.set_dimensions(new_dimensions)
+    target.set_value(weighted_value.data.astype(var_to_weight.dtype, copy=False))
+    if np.ma.getmask(weighted_value) is not np.ma.nomask and weighted_value.mask.any():
+        target.set_mask(weighted_value.mask)
@@ -0,0 +1,291 @@
+"""
+Lazy, memory-bounded access to the values of source variables. A :class:`~ocgis.variable.lazy.LazyArray` reads the
+value of a variable from source in slabs along one axis when it is indexed. Recently used slabs are kept in a least
+recently used cache shared by all lazy arrays. The total size of the cache is limited by
+``ocgis.env.VALUE_CACHE_BYTES``. Consumers of large values iterate over the slabs with
+:meth:`~ocgis.variable.lazy.LazyArray.iter_slabs`.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ocgis import constants, env
+from ocgis.base import AbstractOcgisObject
+
+
+class SlabCache(AbstractOcgisObject):
+    """
+    Least recently used cache of value slabs. The total size of cached slabs is limited by
+    ``ocgis.env.VALUE_CACHE_BYTES``. Cached slabs are read-only.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+        self.nbytes = 0
+
+    @property
+    def max_bytes(self):
+        """
+        :return: The maximum total size of cached slabs in bytes. If ``None``, there is no limit.
+        :rtype: int | None
+        """
+        return env.VALUE_CACHE_BYTES
+
+    def clear(self):
+        """Remove all slabs from the cache."""
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def get(self, key):
+        """
+        :param key: The slab key.
+        :type key: tuple
+        :returns: The cached slab or ``None`` if the slab is not cached.
+        :rtype: :class:`numpy.ma.MaskedArray` | None
+        """
+        with self._lock:
+            try:
+                ret = self._items.pop(key)
+            except KeyError:
+                ret = None
+            else:
+                # Move the slab to the most recently used position.
+                self._items[key] = ret
+        return ret
+
+    def set(self, key, value):
+        """
+        Add a slab to the cache. Least recently used slabs are removed until the cache fits its maximum size. Slabs
+        larger than the maximum size are not cached.
+
+        :param key: The slab key.
+        :type key: tuple
+        :param value: The slab.
+        :type value: :class:`numpy.ma.MaskedArray`
+        """
+        max_bytes = self.max_bytes
+        nbytes = get_slab_nbytes(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= get_slab_nbytes(self._items.pop(key))
+            if max_bytes is not None and nbytes > max_bytes:
+                return
+            self._items[key] = value
+            self.nbytes += nbytes
+            while max_bytes is not None and self.nbytes > max_bytes:
+                _, removed = self._items.popitem(last=False)
+                self.nbytes -= get_slab_nbytes(removed)
+
+
+class LazyArray(AbstractOcgisObject):
+    """
+    Proxy for a variable value read from source in slabs along one axis. Indexing returns masked arrays with the same
+    semantics as indexing the variable's masked value. Only the slabs covering the requested indices are read.
+
+    :param reader: A function taking a tuple of slices (one for each dimension) and returning the value for those
+     slices. See :meth:`~ocgis.driver.base.AbstractDriver.get_variable_value_reader`.
+    :type reader: function
+    :param key: Identifies the source selection. Used as part of the slab cache keys.
+    :type key: tuple
+    :param tuple shape: The value shape.
+    :param dtype: The value data type. Slabs are converted to this data type.
+    :type dtype: :class:`numpy.dtype`
+    :param mask: A mask combined with the source mask using a logical OR.
+    :type mask: :class:`numpy.ndarray`
+    :param fill_value: The fill value of returned masked arrays.
+    :param int axis: The axis along which slabs are read.
+    :param int slab_length: The number of elements along ``axis`` in each slab. If ``None``, see
+     :func:`~ocgis.variable.lazy.get_slab_length`.
+    :param cache: The slab cache. If ``None``, use the default cache.
+    :type cache: :class:`~ocgis.variable.lazy.SlabCache`
+    """
+
+    def __init__(self, reader, key, shape, dtype, mask=None, fill_value=None, axis=0, slab_length=None, cache=None):
+        self._reader = reader
+        self.key = key
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._mask = mask
+        self.fill_value = fill_value
+        self.axis = axis
+        if slab_length is None:
+            slab_length = get_slab_length(self.shape, self.dtype.itemsize, axis)
+        self.slab_length = slab_length
+        if cache is None:
+            cache = slab_cache
+        self._cache = cache
+
+    def __array__(self, dtype=None):
+        ret = np.ma.getdata(self[...])
+        if dtype is not None:
+            ret = ret.astype(dtype)
+        return ret
+
+    def __getitem__(self, slc):
+        slc = self._get_formatted_slice_(slc)
+        axis_slc = slc[self.axis]
+        length = self.shape[self.axis]
+        covered = np.arange(length)[axis_slc]
+
+        # Read the slabs covering the requested indices along the slab axis.
+        if np.size(covered) == 0:
+            start = stop = 0
+        else:
+            start = int(np.min(covered)) // self.slab_length * self.slab_length
+            stop = min(int(np.max(covered)) // self.slab_length * self.slab_length + self.slab_length, length)
+        slabs = [self.get_slab(index) for index in range(start // self.slab_length, -(-stop // self.slab_length))]
+        if len(slabs) == 0:
+            block_shape = list(self.shape)
+            block_shape[self.axis] = 0
+            block = np.ma.array(np.empty(block_shape, dtype=self.dtype), mask=np.zeros(block_shape, dtype=bool),
+                                fill_value=self.fill_value)
+        elif len(slabs) == 1:
+            block = slabs[0]
+        else:
+            block = np.ma.concatenate(slabs, axis=self.axis)
+            block.fill_value = self.fill_value
+
+        # Index the block relative to its start along the slab axis.
+        if isinstance(axis_slc, slice):
+            if np.size(covered) == 0:
+                axis_slc = slice(0, 0)
+            else:
+                sstart, sstop, sstep = axis_slc.indices(length)
+                if sstep < 0 and sstop < start:
+                    sstop = None
+                else:
+                    sstop -= start
+                axis_slc = slice(sstart - start, sstop, sstep)
+        else:
+            axis_slc = covered - start
+        slc = list(slc)
+        slc[self.axis] = axis_slc
+        return block[tuple(slc)]
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def nbytes(self):
+        """
+        :return: The number of bytes of the value's data.
+        :rtype: int
+        """
+        return self.size * self.dtype.itemsize
+
+    @property
+    def ndim(self):
+        """
+        :rtype: int
+        """
+        return len(self.shape)
+
+    @property
+    def nslabs(self):
+        """
+        :return: The number of slabs along the slab axis.
+        :rtype: int
+        """
+        return -(-self.shape[self.axis] // self.slab_length)
+
+    @property
+    def size(self):
+        """
+        :rtype: int
+        """
+        return int(np.prod(self.shape))
+
+    def get_slab(self, index):
+        """
+        :param int index: The slab index.
+        :returns: The slab's value including the mask. The slab data is read-only.
+        :rtype: :class:`numpy.ma.MaskedArray`
+        """
+        slc = self.get_slab_slice(index)
+        cache_key = (self.key, self.dtype.str, self.axis, self.slab_length, index)
+        source = self._cache.get(cache_key)
+        if source is None:
+            value = self._reader(slc)
+            data = np.array(np.ma.getdata(value), dtype=self.dtype)
+            mask = np.array(np.ma.getmaskarray(value))
+            data.flags.writeable = False
+            mask.flags.writeable = False
+            source = np.ma.array(data, mask=mask)
+            self._cache.set(cache_key, source)
+
+        mask = source.mask
+        if self._mask is not None:
+            mask = np.logical_or(mask, self._mask[slc])
+        return np.ma.array(source.data, mask=mask, fill_value=self.fill_value)
+
+    def get_slab_slice(self, index):
+        """
+        :param int index: The slab index.
+        :returns: A slice for each dimension selecting the slab.
+        :rtype: tuple
+        """
+        if not 0 <= index < self.nslabs:
+            raise IndexError('Slab index out of range: {}'.format(index))
+        ret = [slice(None)] * self.ndim
+        start = index * self.slab_length
+        ret[self.axis] = slice(start, min(start + self.slab_length, self.shape[self.axis]))
+        return tuple(ret)
+
+    def iter_slabs(self):
+        """
+        :returns: Yields tuples ``(slc, value)``. ``slc`` is a slice for each dimension selecting the slab and
+         ``value`` is the slab's value. See :meth:`~ocgis.variable.lazy.LazyArray.get_slab`.
+        :rtype: tuple
+        """
+        for index in range(self.nslabs):
+            yield self.get_slab_slice(index), self.get_slab(index)
+
+    def _get_formatted_slice_(self, slc):
+        if not isinstance(slc, tuple):
+            slc = (slc,)
+        ellipsis = [idx for idx, s in enumerate(slc) if s is Ellipsis]
+        if len(ellipsis) > 0:
+            idx = ellipsis[0]
+            slc = slc[:idx] + (slice(None),) * (self.ndim - len(slc) + 1) + slc[idx + 1:]
+        if len(slc) > self.ndim:
+            raise IndexError('Too many indices for a {}-d value.'.format(self.ndim))
+        return slc + (slice(None),) * (self.ndim - len(slc))
+
+
+def get_slab_length(shape, itemsize, axis, max_bytes=None):
+    """
+    :param tuple shape: The value shape.
+    :param int itemsize: The number of bytes for each value element.
+    :param int axis: The slab axis.
+    :param int max_bytes: The maximum number of bytes of a slab including its mask. If ``None``, use
+     :attr:`ocgis.constants.VALUE_SLAB_BYTES` limited so two slabs fit in the slab cache.
+    :returns: The number of elements along ``axis`` in each slab. At least one.
+    :rtype: int
+    """
+    if max_bytes is None:
+        max_bytes = constants.VALUE_SLAB_BYTES
+        cache_bytes = env.VALUE_CACHE_BYTES
+        if cache_bytes is not None and cache_bytes > 0:
+            max_bytes = min(max_bytes, cache_bytes // 2)
+    row_bytes = (itemsize + 1) * int(np.prod([s for idx, s in enumerate(shape) if idx != axis]))
+    return int(max(1, min(shape[axis], max_bytes // max(row_bytes, 1))))
+
+
+def get_slab_nbytes(value):
+    """
+    :param value: The slab.
+    :type value: :class:`numpy.ma.MaskedArray`
+    :returns: The number of bytes of the slab's data and mask.
+    :rtype: int
+    """
+    ret = value.data.nbytes
+    mask = np.ma.getmask(value)
+    if mask is not np.ma.nomask:
+        ret += mask.nbytes
+    return ret
+
+
+slab_cache = SlabCache()
@@ -9,11 +9,24 @@ import numpy as np
 import six
 from ocgis import constants, env, Dimension
 from ocgis import netcdftime
+from ocgis.base import AbstractOcgisObject
 from ocgis.constants import HeaderName, KeywordArgument
 from ocgis.exc import EmptySubsetError, IncompleteSeasonError, CannotFormatTimeError, ResolutionError
 from ocgis.util.helpers import get_is_date_between, iter_array, get_none_or_slice
 from ocgis.variable.base import SourcedVariable, get_attribute_property, set_attribute_property
 
+# Number of days in each month for calendars with a fixed year length.
+_CALENDAR_DAYS_PER_MONTH = {'365_day': [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+                            '366_day': [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+                            '360_day': [30] * 12}
+_CALENDAR_ALIASES = {'noleap': '365_day', 'all_leap': '366_day'}
+# Number of microseconds in each time unit supported by vectorized date part extraction.
+_MICROSECONDS_PER_TIME_UNIT = {'days': 86400000000, 'day': 86400000000, 'd': 86400000000,
+                               'hours': 3600000000, 'hour': 3600000000, 'hrs': 3600000000, 'hr': 3600000000,
+                               'h': 3600000000,
+                               'minutes': 60000000, 'minute': 60000000, 'mins': 60000000, 'min': 60000000,
+                               'seconds': 1000000, 'second': 1000000, 'secs': 1000000, 'sec': 1000000, 's': 1000000}
+
 
 class TemporalVariable(SourcedVariable):
     """
@@ -23,8 +36,11 @@ class TemporalVariable(SourcedVariable):
      the netCDF-CF calendar tyes: http://unidata.github.io/netcdf4-python/netCDF4-module.html#num2date
     :keyword str units: (``='days since 0000-01-01 00:00:00'``) The units string to use when converting from float to
      datetime objects. See: http://unidata.github.io/netcdf4-python/netCDF4-module.html#num2date
-    :keyword bool format_time: (``=True``) If ``False``, do not allow access to ``datetime``-like objects. If these 
-     properties are accessed, raise :class:``~ocgis.exc.CannotFormatTimeError``.
+    :keyword format_time: (``=True``) If ``False``, do not allow access to ``datetime``-like objects. If these
+     properties are accessed, raise :class:``~ocgis.exc.CannotFormatTimeError``. If ``'parts'``, time operations use
+     integer date parts (see :attr:`~ocgis.TemporalVariable.value_parts`) and ``datetime``-like objects are only
+     created when accessed. ``True`` selects this backend if ``ocgis.env.USE_TIME_PARTS`` is ``True``.
+    :type format_time: bool | str
     """
 
     _date_parts = ('year', 'month', 'day', 'hour', 'minute', 'second')
@@ -34,6 +50,7 @@ class TemporalVariable(SourcedVariable):
         self._bounds_datetime = None
         self._value_numtime = None
         self._bounds_numtime = None
+        self._value_parts = None
 
         self.format_time = kwargs.pop('format_time', True)
 
@@ -57,6 +74,7 @@ class TemporalVariable(SourcedVariable):
             slc = slc[self.dimensions[0].name]
         ret._value_numtime = get_none_or_slice(ret._value_numtime, slc)
         ret._value_datetime = get_none_or_slice(ret._value_datetime, slc)
+        ret._value_parts = get_none_or_slice(ret._value_parts, slc)
 
     @property
     def calendar(self):
@@ -106,6 +124,18 @@ class TemporalVariable(SourcedVariable):
             extent = self.get_numtime(extent)
         return tuple(extent)
 
+    @property
+    def use_time_parts(self):
+        """
+        :return: ``True`` if time operations use integer date parts. See ``format_time``.
+        :rtype: bool
+        """
+        if isinstance(self.format_time, six.string_types):
+            ret = self.format_time == constants.FORMAT_TIME_PARTS
+        else:
+            ret = bool(self.format_time) and env.USE_TIME_PARTS
+        return ret
+
     @property
     def value_datetime(self):
         """
@@ -116,8 +146,12 @@ class TemporalVariable(SourcedVariable):
             raise CannotFormatTimeError('value_datetime')
         if self._value_datetime is None:
             if get_datetime_conversion_state(self.get_value().flatten()[0]):
-                self._value_datetime = np.ma.array(self.get_datetime(self.get_value()), mask=self.get_mask(), ndmin=1,
-                                                   fill_value=None)
+                value_parts = self.value_parts if self.use_time_parts else None
+                if value_parts is None:
+                    value = self.get_datetime(self.get_value())
+                else:
+                    value = value_parts.get_datetime(fallback=self._get_datetime_fallback_(self.get_value()))
+                self._value_datetime = np.ma.array(value, mask=self.get_mask(), ndmin=1, fill_value=None)
             else:
                 self._value_datetime = self.get_masked_value()
         return self._value_datetime
@@ -135,6 +169,24 @@ class TemporalVariable(SourcedVariable):
                 self._value_numtime = self.get_masked_value()
         return self._value_numtime
 
+    @property
+    def value_parts(self):
+        """
+        :return: integer date parts of the time value with the same shape as the value. Masked elements have the date
+         parts of an unmasked element. ``None`` if the units or calendar are not supported (i.e. month units, Julian
+         dates) or all elements are masked.
+        :rtype: :class:`~ocgis.variable.temporal.TimeParts` | None
+        """
+        if not self.format_time:
+            raise CannotFormatTimeError('value_parts')
+        if self._value_parts is None and not self._has_months_units:
+            value_numtime = self.value_numtime
+            compressed = value_numtime.compressed()
+            if compressed.shape[0] > 0:
+                self._value_parts = get_time_parts_from_numtime(value_numtime.filled(compressed[0]), str(self.units),
+                                                                self.calendar)
+        return self._value_parts
+
     @property
     def _has_months_units(self):
         # Test if the units are the special case with months in the time units.
@@ -207,7 +259,14 @@ class TemporalVariable(SourcedVariable):
         """
 
         # If there are month units, call the special procedure to convert those to datetime objects.
-        if not self._has_months_units:
+        if self.use_time_parts and not self._has_months_units:
+            parts = get_time_parts_from_numtime(arr, str(self.units), self.calendar)
+        else:
+            parts = None
+
+        if parts is not None:
+            arr = np.atleast_1d(parts.get_datetime(fallback=self._get_datetime_fallback_(arr)))
+        elif not self._has_months_units:
             arr = np.atleast_1d(nc.num2date(arr, str(self.units), calendar=self.calendar))
             dt = get_datetime_or_netcdftime
 
@@ -236,15 +295,18 @@ class TemporalVariable(SourcedVariable):
         :rtype: :class:`~ocgis.variable.temporal.TemporalGroupVariable`
         """
 
+        # Boolean group masks are built lazily from the group indices unless they are provided explicitly.
+        dgroups = None
         # There is no need to go through the process of breaking out datetime parts when the grouping is 'all'.
         if grouping == 'all':
             new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_all_()
+            group_indices = [np.arange(self.shape[0])]
         # The process for getting "unique" seasons is also specialized.
         elif 'unique' in grouping:
-            new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_seasonal_unique_(grouping)
+            new_bounds, date_parts, repr_dt, group_indices = self._get_grouping_seasonal_unique_(grouping)
         # For standard groups ("['month']") or seasons across entire time range.
         else:
-            new_bounds, date_parts, repr_dt, dgroups = self._get_grouping_other_(grouping)
+            new_bounds, date_parts, repr_dt, group_indices = self._get_grouping_other_(grouping)
 
         new_name = 'climatology_bounds'
         time_dimension_name = self.dimensions[0].name
@@ -264,8 +326,9 @@ class TemporalVariable(SourcedVariable):
         new_attrs = deepcopy(self.attrs)
         # new_attrs['climatology'] = new_bounds.name
         tgv = TemporalGroupVariable(grouping=grouping, date_parts=date_parts, bounds=new_bounds, dgroups=dgroups,
-                                    value=repr_dt, units=self.units, calendar=self.calendar, name=self.name,
-                                    attrs=new_attrs, dimensions=new_dimensions[0])
+                                    group_indices=group_indices, source_size=self.shape[0], value=repr_dt,
+                                    units=self.units, calendar=self.calendar, name=self.name, attrs=new_attrs,
+                                    dimensions=new_dimensions[0])
         tgv.attrs.pop(TemporalVariable._bounds_attribute_name, None)
 
         return tgv
@@ -390,6 +453,37 @@ class TemporalVariable(SourcedVariable):
 
         assert isinstance(time_region, dict)
 
+        # remove any none values in the time_region dictionary. this will save
+        # time in iteration.
+        time_region = time_region.copy()
+        time_region = {k: v for k, v in time_region.items() if v is not None}
+        assert len(time_region) > 0
+
+        if self.use_time_parts:
+            select = self._get_time_region_select_from_parts_(time_region)
+        else:
+            select = None
+        if select is None:
+            select = self._get_time_region_select_(time_region)
+
+        if not select.any():
+            raise EmptySubsetError(origin='temporal')
+
+        ret = self[select]
+
+        if return_indices:
+            raw_idx = np.arange(0, self.shape[0])[select]
+            ret = (ret, raw_idx)
+
+        return ret
+
+    def _get_time_region_select_(self, time_region):
+        """
+        :param dict time_region: See :meth:`~ocgis.TemporalVariable.get_time_region`. ``None`` values are removed.
+        :returns: A boolean array with ``True`` for time values in the time region.
+        :rtype: :class:`numpy.ndarray`
+        """
+
         # return the values to use for the temporal region subsetting.
         value = self.value_datetime
         if self.has_bounds:
@@ -400,12 +494,6 @@ class TemporalVariable(SourcedVariable):
         # switch to indicate if bounds or centroid datetimes are to be used.
         use_bounds = False if bounds is None else True
 
-        # remove any none values in the time_region dictionary. this will save
-        # time in iteration.
-        time_region = time_region.copy()
-        time_region = {k: v for k, v in time_region.items() if v is not None}
-        assert len(time_region) > 0
-
         # this is the boolean selection array.
         select = np.zeros(self.shape[0], dtype=bool)
 
@@ -433,16 +521,48 @@ class TemporalVariable(SourcedVariable):
             if row_check.all():
                 select[idx_row] = True
 
-        if not select.any():
-            raise EmptySubsetError(origin='temporal')
+        return select
 
-        ret = self[select]
+    def _get_time_region_select_from_parts_(self, time_region):
+        """
+        Vectorized version of :meth:`~ocgis.TemporalVariable._get_time_region_select_` using integer date parts.
 
-        if return_indices:
-            raw_idx = np.arange(0, self.shape[0])[select]
-            ret = (ret, raw_idx)
+        :param dict time_region: See :meth:`~ocgis.TemporalVariable.get_time_region`. ``None`` values are removed.
+        :returns: A boolean array with ``True`` for time values in the time region. ``None`` if date parts are not
+         available.
+        :rtype: :class:`numpy.ndarray` | None
+        """
 
-        return ret
+        if self.has_bounds:
+            # Bounds intervals are only tested for months and years. See
+            # :func:`~ocgis.util.helpers.get_is_date_between`.
+            if not set(time_region.keys()).issubset({'month', 'year'}):
+                return None
+            parts = self.bounds.value_parts
+        else:
+            parts = self.value_parts
+        if parts is None:
+            return None
+
+        select = np.ones(self.shape[0], dtype=bool)
+        for k, v in time_region.items():
+            part = getattr(parts, k).astype(int)
+            v = np.asarray(v, dtype=int).reshape(-1)
+            if self.has_bounds:
+                part_lower, part_upper = part[:, 0], part[:, 1]
+                # In the case of a year overlap, increment the upper into another year by adding 12 months.
+                part_upper = np.where(part_lower > part_upper, part_upper + 12, part_upper)
+                to_test = v.reshape(1, -1)
+                part_lower, part_upper = part_lower.reshape(-1, 1), part_upper.reshape(-1, 1)
+                is_between = np.where(part_lower != part_upper,
+                                      np.logical_and(to_test >= part_lower, to_test < part_upper),
+                                      np.logical_and(to_test >= part_lower, to_test <= part_upper))
+                fill = is_between.any(axis=1)
+            else:
+                fill = np.in1d(part.reshape(-1), v)
+            select = np.logical_and(select, fill)
+
+        return select
 
     def _get_grouping_all_(self):
         """
@@ -467,134 +587,111 @@ class TemporalVariable(SourcedVariable):
     def _get_grouping_other_(self, grouping):
         """
         Applied to groups other than 'all'.
-        """
-
-        # map date parts to index positions in date part storage array and flip
-        # they key-value pairs
-        group_map = dict(list(zip(list(range(0, len(self._date_parts))), self._date_parts, )))
-        group_map_rev = dict(list(zip(self._date_parts, list(range(0, len(self._date_parts))), )))
-
-        # this array will hold the value data constructed differently depending
-        # on if temporal bounds are present
-        value = np.empty((self.get_value().shape[0], 3), dtype=object)
-
-        # reference the value and bounds datetime object arrays
-        value_datetime = self.value_datetime
-        if self.has_bounds:
-            value_datetime_bounds = self.bounds.value_datetime
-        else:
-            value_datetime_bounds = None
-
-        # populate the value array depending on the presence of bounds
-        if value_datetime_bounds is None:
-            value[:, :] = value_datetime.reshape(-1, 1)
-        # bounds are currently not used for the grouping mechanism
-        else:
-            value[:, 0] = value_datetime_bounds[:, 0]
-            value[:, 1] = value_datetime
-            value[:, 2] = value_datetime_bounds[:, 1]
 
-        def _get_attrs_(dt):
-            return ([dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second])
+        :returns: A tuple of elements necessary to create a :class:`~ocgis.variable.temporal.TemporalGroupVariable`.
+         The last element is a sequence of integer index arrays (one per group) into the time variable.
+        :rtype: tuple
+        """
 
-        # extract the date parts
-        parts = np.empty((len(self.get_value()), len(self._date_parts)), dtype=int)
-        for row in range(parts.shape[0]):
-            parts[row, :] = _get_attrs_(value[row, 1])
+        # Integer date parts with shape (n, 6) ordered as in ``_date_parts``.
+        parts = self._get_date_parts_array_()
 
-        # grouping is different for date part combinations v. seasonal
-        # aggregation.
+        # grouping is different for date part combinations v. seasonal aggregation.
         if all([isinstance(ii, six.string_types) for ii in grouping]):
-            unique = deque()
-            for idx in range(parts.shape[1]):
-                if group_map[idx] in grouping:
-                    fill = np.unique(parts[:, idx])
-                else:
-                    fill = [None]
-                unique.append(fill)
-
-            select = deque()
-            idx2_seq = list(range(len(self._date_parts)))
-            for idx in itertools.product(*[list(range(len(u))) for u in unique]):
-                select.append([unique[idx2][idx[idx2]] for idx2 in idx2_seq])
-            select = np.array(select)
-            dgroups = deque()
-
-            idx_cmp = [group_map_rev[group] for group in grouping]
-
-            keep_select = []
-            for idx in range(select.shape[0]):
-                match = select[idx, idx_cmp] == parts[:, idx_cmp]
-                dgrp = match.all(axis=1)
-                if dgrp.any():
-                    keep_select.append(idx)
-                    dgroups.append(dgrp)
-            select = select[keep_select, :]
-            assert (len(dgroups) == select.shape[0])
-
+            select, group_indices = get_group_indices_from_date_parts(parts, grouping, self._date_parts)
             dtype = [(dp, object) for dp in self._date_parts]
         # this is for seasonal aggregations
         else:
-            # we need to remove the year string from the grouping and do
-            # not want to modify the original list
-            grouping = deepcopy(grouping)
-            # search for a year flag, which will break the temporal groups by
-            # years
+            # search for a year flag, which will break the temporal groups by years. we do not want to modify the
+            # original list.
+            grouping = list(grouping)
             if 'year' in grouping:
                 has_year = True
-                grouping = list(grouping)
                 grouping.remove('year')
-                years = np.unique(parts[:, 0])
             else:
                 has_year = False
-                years = [None]
-
-            dgroups = deque()
-            grouping_season = deque()
-
-            # sort the arrays to ensure the ordered in ascending order
-            years.sort()
             grouping = get_sorted_seasons(grouping, method='min')
-
-            for year, season in itertools.product(years, grouping):
-                subgroup = np.zeros(value.shape[0], dtype=bool)
-                for idx in range(value.shape[0]):
-                    if has_year:
-                        if parts[idx, 1] in season and year == parts[idx, 0]:
-                            subgroup[idx] = True
-                    else:
-                        if parts[idx, 1] in season:
-                            subgroup[idx] = True
-                dgroups.append(subgroup)
-                grouping_season.append([season, year])
+            select, group_indices = get_seasonal_group_indices_from_date_parts(parts, grouping, has_year)
             dtype = [('months', object), ('year', int)]
-            grouping = grouping_season
-
-        # init arrays to hold values and bounds for the grouped data
-        new_value = np.empty((len(dgroups),), dtype=dtype)
-        new_bounds = np.empty((len(dgroups), 2), dtype=object)
+            grouping = select
 
-        for idx, dgrp in enumerate(dgroups):
+        # init arrays to hold values for the grouped data
+        new_value = np.empty((len(group_indices),), dtype=dtype)
+        for idx in range(len(group_indices)):
             # Tuple conversion is required for structure arrays: http://docs.scipy.org/doc/numpy/user/basics.rec.html#filling-structured-arrays
             try:
                 new_value[idx] = tuple(select[idx])
-            # likely a seasonal aggregation with a different group representation
-            except UnboundLocalError:
-                try:
-                    new_value[idx] = (grouping[idx][0], grouping[idx][1])
-                # there is likely no year associated with the seasonal aggregation
-                # and it is a Nonetype
-                except TypeError:
-                    new_value[idx]['months'] = grouping[idx][0]
-            sel = value[dgrp][:, (0, 2)]
-            new_bounds[idx, :] = [sel.min(), sel.max()]
-
-        new_bounds = np.atleast_2d(new_bounds).reshape(-1, 2)
+            # there is likely no year associated with the seasonal aggregation and it is a Nonetype
+            except TypeError:
+                new_value[idx]['months'] = grouping[idx][0]
+
+        new_bounds = self._get_grouping_bounds_(group_indices)
         date_parts = np.atleast_1d(new_value)
         # This is the representative center time for the temporal group.
         repr_dt = self._get_grouping_representative_datetime_(grouping, new_bounds, date_parts)
 
-        return new_bounds, date_parts, repr_dt, dgroups
+        return new_bounds, date_parts, repr_dt, group_indices
+
+    def _get_grouping_bounds_(self, group_indices):
+        """
+        Get the ``datetime`` bounds for each group. The lower bound is the minimum lower time bound (or time value if
+        there are no bounds) in the group. The upper bound is the maximum upper time bound. Only the selected bounding
+        elements are converted to ``datetime`` objects.
+
+        :param group_indices: Sequence of integer index arrays defining the temporal groups.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if self.has_bounds:
+            target = self.bounds
+            numtime = target.value_numtime.data
+            lower, upper = numtime[:, 0], numtime[:, 1]
+        else:
+            target = self
+            lower = upper = target.value_numtime.data.reshape(-1)
+
+        positions = np.empty((len(group_indices), 2), dtype=int)
+        for idx, gidx in enumerate(group_indices):
+            positions[idx, 0] = gidx[np.argmin(lower[gidx])]
+            positions[idx, 1] = gidx[np.argmax(upper[gidx])]
+
+        ret = np.empty((len(group_indices), 2), dtype=object)
+        for col, arr in enumerate([lower, upper]):
+            if self.has_bounds:
+                raw = target.get_value()[positions[:, col], col]
+            else:
+                raw = target.get_value()[positions[:, col]]
+            if len(raw) > 0 and get_datetime_conversion_state(raw[0]):
+                raw = target.get_datetime(arr[positions[:, col]])
+            ret[:, col] = raw
+        return ret
+
+    def _get_date_parts_array_(self):
+        """
+        :returns: An integer array with shape ``(n, 6)`` containing the date parts (see ``_date_parts``) of each time
+         value. Date parts are computed directly from numeric time when the calendar and units allow. Otherwise,
+         ``datetime`` objects are used.
+        :rtype: :class:`numpy.ndarray`
+        """
+
+        if not self.format_time:
+            raise CannotFormatTimeError('date parts')
+
+        ret = None
+        if self.use_time_parts:
+            value_parts = self.value_parts
+            if value_parts is not None:
+                ret = value_parts.reshape(-1).get_array()
+        elif not self._has_months_units:
+            ret = get_date_parts_from_numtime(self.value_numtime.data.reshape(-1), str(self.units), self.calendar)
+
+        if ret is None:
+            value_datetime = self.value_datetime.reshape(-1)
+            ret = np.empty((value_datetime.shape[0], len(self._date_parts)), dtype=int)
+            for row, dt in enumerate(value_datetime):
+                ret[row, :] = [dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second]
+
+        return ret
 
     def _get_grouping_representative_datetime_(self, grouping, bounds, value):
         ref_value = value
@@ -664,8 +761,8 @@ class TemporalVariable(SourcedVariable):
 
         >>> grouping = [[12, 1, 2], [3, 4, 5], [6, 7, 8], [9, 10, 11], 'unique']
 
-        :returns: A tuple of elements necessary to create a :class:`ocgis.interface.base.dimension.temporal.TemporalGroupDimension`
-         object.
+        :returns: A tuple of elements necessary to create a :class:`~ocgis.variable.temporal.TemporalGroupVariable`.
+         The last element is a sequence of integer index arrays (one per group) into the time variable.
         :rtype: tuple
         """
 
@@ -675,21 +772,38 @@ class TemporalVariable(SourcedVariable):
         grouping = get_sorted_seasons(grouping)
         # turn the seasons into time regions
         time_regions = get_time_regions(grouping, self.value_datetime, raise_if_incomplete=False)
-        # holds the boolean selection arrays
-        dgroups = deque()
+        # holds the group index arrays
+        group_indices = deque()
         new_bounds = np.array([], dtype=object).reshape(-1, 2)
         repr_dt = np.array([], dtype=object)
         # return temporal dimensions and convert to groups
         for dgroup, sub in iter_boolean_groups_from_time_regions(time_regions, self, yield_subset=True,
                                                                  raise_if_incomplete=False):
-            dgroups.append(dgroup)
+            group_indices.append(np.nonzero(dgroup)[0])
             sub_value_datetime = sub.value_datetime
             new_bounds = np.vstack((new_bounds, [min(sub_value_datetime), max(sub_value_datetime)]))
             repr_dt = np.append(repr_dt, sub_value_datetime[int(sub.shape[0] / 2)])
         # no date parts yet...
         date_parts = None
 
-        return new_bounds, date_parts, repr_dt, dgroups
+        return new_bounds, date_parts, repr_dt, group_indices
+
+    def _get_datetime_fallback_(self, arr):
+        """
+        :param arr: Numeric time values.
+        :type arr: :class:`numpy.ndarray`
+        :returns: A function converting the element at a flat index of ``arr`` to a ``datetime``-like object using
+         the variable's units and calendar. Used for dates not supported by ``datetime`` objects.
+        :rtype: function
+        """
+
+        arr = np.asarray(arr).reshape(-1)
+        units, calendar = str(self.units), self.calendar
+
+        def _fallback_(index):
+            return nc.num2date(arr[index], units, calendar=calendar)
+
+        return _fallback_
 
     def _get_iter_value_(self):
         if self.format_time:
@@ -707,6 +821,7 @@ class TemporalVariable(SourcedVariable):
         self._value_datetime = None
         self._bounds_numtime = None
         self._bounds_datetime = None
+        self._value_parts = None
         # Set the new value.
         self.set_value(value)
 
@@ -750,8 +865,14 @@ class TemporalGroupVariable(TemporalVariable):
     Additional keyword arguments are:
     
     :keyword grouping: (``=None``) See :meth:`~ocgis.TemporalVariable.get_grouping`.
-    :keyword dgroups: (``=None``) Sequence of boolean arrays defining each unique temporal group.
+    :keyword dgroups: (``=None``) Sequence of boolean arrays defining each unique temporal group. If ``None``, these
+     are created from ``group_indices`` when first accessed.
     :type dgroups: `sequence` of :class:`numpy.ndarray`
+    :keyword group_indices: (``=None``) Sequence of integer index arrays into the source time variable defining each
+     unique temporal group.
+    :type group_indices: `sequence` of :class:`numpy.ndarray`
+    :keyword int source_size: (``=None``) Length of the source time variable. Required to create ``dgroups`` from
+     ``group_indices``.
     :keyword date_parts: (``=None``) Sequence of date part tuples.
     :type date_parts: `sequence` of :class:`tuple`
     """
@@ -759,11 +880,223 @@ class TemporalGroupVariable(TemporalVariable):
 
     def __init__(self, *args, **kwargs):
         self.grouping = kwargs.pop('grouping', None)
-        self.dgroups = kwargs.pop('dgroups', None)
+        self._dgroups = kwargs.pop('dgroups', None)
+        self.group_indices = kwargs.pop('group_indices', None)
+        self.source_size = kwargs.pop('source_size', None)
         self.date_parts = kwargs.pop('date_parts', None)
 
         super(TemporalGroupVariable, self).__init__(*args, **kwargs)
 
+    @property
+    def dgroups(self):
+        """
+        :return: Sequence of boolean arrays defining each unique temporal group.
+        :rtype: `sequence` of :class:`numpy.ndarray`
+        """
+        if self._dgroups is None and self.group_indices is not None:
+            self._dgroups = get_boolean_groups_from_indices(self.group_indices, self.source_size)
+        return self._dgroups
+
+    @dgroups.setter
+    def dgroups(self, value):
+        self._dgroups = value
+
+
+class TimeParts(AbstractOcgisObject):
+    """
+    Integer date parts for an array of time values. Day ordinals are ``int64`` and count days from a calendar-dependent
+    origin. Years are stored as ``int16`` and the remaining date parts as ``int8``. All arrays have the same shape.
+
+    :param ordinal: The day ordinals.
+    :type ordinal: :class:`numpy.ndarray`
+    :param year: The years.
+    :type year: :class:`numpy.ndarray`
+    :param month: The months.
+    :type month: :class:`numpy.ndarray`
+    :param day: The days of the month.
+    :type day: :class:`numpy.ndarray`
+    :param hour: The hours.
+    :type hour: :class:`numpy.ndarray`
+    :param minute: The minutes.
+    :type minute: :class:`numpy.ndarray`
+    :param second: The seconds.
+    :type second: :class:`numpy.ndarray`
+    """
+
+    _fields = ('ordinal',) + TemporalVariable._date_parts
+
+    def __init__(self, ordinal, year, month, day, hour, minute, second):
+        self.ordinal = np.asarray(ordinal, dtype=np.int64)
+        self.year = np.asarray(year, dtype=np.int16)
+        self.month = np.asarray(month, dtype=np.int8)
+        self.day = np.asarray(day, dtype=np.int8)
+        self.hour = np.asarray(hour, dtype=np.int8)
+        self.minute = np.asarray(minute, dtype=np.int8)
+        self.second = np.asarray(second, dtype=np.int8)
+
+    def __getitem__(self, slc):
+        return self.__class__(*[getattr(self, f)[slc] for f in self._fields])
+
+    @property
+    def shape(self):
+        """
+        :rtype: tuple
+        """
+        return self.ordinal.shape
+
+    def get_array(self):
+        """
+        :returns: An integer array with a trailing dimension of size six containing the date parts (see
+         :attr:`~ocgis.TemporalVariable._date_parts`).
+        :rtype: :class:`numpy.ndarray`
+        """
+        return np.stack([getattr(self, dp) for dp in TemporalVariable._date_parts], axis=-1).astype(int)
+
+    def get_datetime(self, fallback=None):
+        """
+        :param fallback: A function taking the flat index of an element and returning a ``datetime``-like object. Used
+         for elements that may not be converted to ``datetime``-like objects (i.e. February 30 in a 360-day calendar).
+         If ``None``, the conversion error is raised.
+        :type fallback: function
+        :returns: An ``object`` array with the same shape containing ``datetime``-like objects.
+        :rtype: :class:`numpy.ndarray`
+        """
+        dt = get_datetime_or_netcdftime
+        ret = np.empty(self.shape, dtype=object)
+        for idx, row in enumerate(self.get_array().reshape(-1, len(TemporalVariable._date_parts)).tolist()):
+            try:
+                ret.flat[idx] = dt(*row)
+            except ValueError:
+                if fallback is None:
+                    raise
+                ret.flat[idx] = fallback(idx)
+        return ret
+
+    def reshape(self, *args):
+        """
+        :returns: Date parts with all arrays reshaped. Arguments are passed to :meth:`numpy.ndarray.reshape`.
+        :rtype: :class:`~ocgis.variable.temporal.TimeParts`
+        """
+        return self.__class__(*[getattr(self, f).reshape(*args) for f in self._fields])
+
+
+def get_boolean_groups_from_indices(group_indices, size):
+    """
+    :param group_indices: Sequence of integer index arrays.
+    :type group_indices: `sequence` of :class:`numpy.ndarray`
+    :param int size: The length of the boolean arrays.
+    :returns: Sequence of boolean arrays with ``True`` values at the group indices.
+    :rtype: :class:`collections.deque`
+    """
+
+    ret = deque()
+    for gidx in group_indices:
+        fill = np.zeros(size, dtype=bool)
+        fill[gidx] = True
+        ret.append(fill)
+    return ret
+
+
+def get_date_parts_from_numtime(arr, units, calendar):
+    """
+    Extract date parts from numeric time values without creating ``datetime`` objects for each element. See
+    :func:`~ocgis.variable.temporal.get_time_parts_from_numtime`.
+
+    >>> arr = np.array([0.5, 31.5])
+    >>> get_date_parts_from_numtime(arr, 'days since 2000-01-01', 'noleap')
+    array([[2000,    1,    1,   12,    0,    0],
+           [2000,    2,    1,   12,    0,    0]])
+
+    :param arr: A one-dimensional array of numeric time values.
+    :type arr: :class:`numpy.ndarray`
+    :param str units: The time units. Must be of the form ``'<time unit> since <origin>'``.
+    :param str calendar: The netCDF-CF calendar.
+    :returns: An integer array with shape ``(n, 6)`` containing year, month, day, hour, minute, and second. ``None`` is
+     returned if the units or calendar are not supported (i.e. month units, Julian dates).
+    :rtype: :class:`numpy.ndarray` | None
+    """
+
+    parts = get_time_parts_from_numtime(np.asarray(arr).reshape(-1), units, calendar)
+    if parts is None:
+        ret = None
+    else:
+        ret = parts.get_array()
+    return ret
+
+
+def get_time_parts_from_numtime(arr, units, calendar):
+    """
+    Decompose numeric time values into integer date parts. A single ``datetime``-like anchor is created for the minimum
+    time value. Remaining values are converted using integer arithmetic in microseconds relative to this anchor.
+
+    :param arr: An array of numeric time values.
+    :type arr: :class:`numpy.ndarray`
+    :param str units: The time units. Must be of the form ``'<time unit> since <origin>'``.
+    :param str calendar: The netCDF-CF calendar.
+    :returns: Date parts with the same shape as ``arr``. ``None`` is returned if the units or calendar are not supported
+     (i.e. month units, Julian dates).
+    :rtype: :class:`~ocgis.variable.temporal.TimeParts` | None
+    """
+
+    shape = np.shape(arr)
+    arr = np.asarray(arr, dtype=float).reshape(-1)
+    try:
+        resolution = _MICROSECONDS_PER_TIME_UNIT[units.split()[0].lower()]
+    except (KeyError, IndexError):
+        return None
+    if arr.shape[0] == 0 or not np.isfinite(arr).all():
+        return None
+
+    calendar = (calendar or constants.DEFAULT_TEMPORAL_CALENDAR).lower()
+    calendar = _CALENDAR_ALIASES.get(calendar, calendar)
+
+    # Round to microseconds as done by netcdftime. Values one microsecond from a whole second are moved to the second.
+    scaled = arr * resolution
+    elapsed = np.rint(scaled).astype(np.int64)
+    remainder = elapsed % 1000000
+    elapsed = np.where(remainder == 1, np.floor(scaled).astype(np.int64), elapsed)
+    elapsed = np.where(remainder == 999999, np.ceil(scaled).astype(np.int64), elapsed)
+
+    idx_anchor = np.argmin(elapsed)
+    anchor = nc.num2date(arr[idx_anchor], units, calendar=calendar)
+    anchor_us = ((anchor.hour * 60 + anchor.minute) * 60 + anchor.second) * 1000000 + anchor.microsecond
+    offsets = elapsed - elapsed[idx_anchor] + anchor_us
+    day_us = _MICROSECONDS_PER_TIME_UNIT['days']
+
+    if calendar in _CALENDAR_DAYS_PER_MONTH:
+        cumdays = np.cumsum([0] + _CALENDAR_DAYS_PER_MONTH[calendar])
+        days_per_year = cumdays[-1]
+        ordinal, time_of_day = np.divmod(offsets, day_us)
+        ordinal += anchor.year * days_per_year + cumdays[anchor.month - 1] + anchor.day - 1
+        year, day_of_year = np.divmod(ordinal, days_per_year)
+        month = np.searchsorted(cumdays, day_of_year, side='right')
+        day = day_of_year - cumdays[month - 1] + 1
+    elif calendar == 'proleptic_gregorian' or (calendar in ('standard', 'gregorian') and
+                                               (anchor.year, anchor.month, anchor.day) >= (1582, 10, 15)):
+        # Mixed Julian/Gregorian dates are not supported. All values are at or after the anchor.
+        if not 1 <= anchor.year <= 9999:
+            return None
+        anchor_dt64 = np.datetime64('{:04d}-{:02d}-{:02d}'.format(anchor.year, anchor.month, anchor.day), 'us')
+        dt64 = anchor_dt64 + offsets.astype('m8[us]')
+        dt64_day = dt64.astype('M8[D]')
+        dt64_month = dt64.astype('M8[M]')
+        ordinal = dt64_day.astype(np.int64)
+        year = dt64.astype('M8[Y]').astype(np.int64) + 1970
+        month = dt64_month.astype(np.int64) % 12 + 1
+        day = (dt64_day - dt64_month.astype('M8[D]')).astype(np.int64) + 1
+        time_of_day = (dt64 - dt64_day).astype(np.int64)
+    else:
+        return None
+
+    # Years must fit the date part storage.
+    year_info = np.iinfo(np.int16)
+    if year.min() < year_info.min or year.max() > year_info.max:
+        return None
+
+    seconds = time_of_day // 1000000
+    ret = TimeParts(ordinal, year, month, day, seconds // 3600, (seconds // 60) % 60, seconds % 60)
+    return ret.reshape(shape)
+
 
 def get_datetime_conversion_state(archetype):
     """
@@ -915,6 +1248,35 @@ def get_difference_in_months(origin, target):
     return diff_months
 
 
+def get_group_indices_from_date_parts(parts, grouping, date_parts):
+    """
+    Find unique date part combinations and the time indices belonging to each.
+
+    :param parts: Integer date part array with shape ``(n, len(date_parts))``.
+    :type parts: :class:`numpy.ndarray`
+    :param grouping: Sequence of date part names to group by.
+    :type grouping: `sequence` of :class:`str`
+    :param date_parts: Date part names corresponding to the columns of ``parts``.
+    :type date_parts: `sequence` of :class:`str`
+    :returns: A tuple ``(select, group_indices)``. ``select`` is an ``object`` array with shape
+     ``(ngroups, len(date_parts))`` containing the group's date part values (``None`` for date parts not in
+     ``grouping``). Groups are sorted in ascending order by date part. ``group_indices`` is a sequence of sorted integer
+     index arrays into ``parts``.
+    :rtype: tuple
+    """
+
+    columns = [idx for idx, dp in enumerate(date_parts) if dp in grouping]
+    keys, inverse = np.unique(parts[:, columns], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind='mergesort')
+    splits = np.searchsorted(inverse[order], np.arange(1, keys.shape[0]))
+    group_indices = np.split(order, splits)
+
+    select = np.empty((keys.shape[0], len(date_parts)), dtype=object)
+    select[:, columns] = keys
+    return select, group_indices
+
+
 def get_is_interannual(sequence):
     """
     Returns ``True`` if an integer sequence representing a season crosses a year boundary.
@@ -978,6 +1340,42 @@ def get_origin_datetime_from_months_units(units):
     return origin
 
 
+def get_seasonal_group_indices_from_date_parts(parts, seasons, has_year):
+    """
+    Find the time indices belonging to each season.
+
+    :param parts: Integer date part array with shape ``(n, 6)``. See :meth:`~ocgis.TemporalVariable._date_parts`.
+    :type parts: :class:`numpy.ndarray`
+    :param seasons: Sequence of integer month sequences.
+
+    >>> seasons = [[12, 1, 2], [6, 7, 8]]
+
+    :param bool has_year: If ``True``, break the seasons by year.
+    :returns: A tuple ``(select, group_indices)``. ``select`` is a list of ``[season, year]`` pairs with ``year`` equal
+     to ``None`` if ``has_year`` is ``False``. Groups are ordered by year then by the order of ``seasons``. Seasons
+     without any time values are excluded. ``group_indices`` is a sequence of sorted integer index arrays into
+     ``parts``.
+    :rtype: tuple
+    """
+
+    keyed = []
+    for idx_season, season in enumerate(seasons):
+        season_indices = np.nonzero(np.isin(parts[:, 1], season))[0]
+        if has_year:
+            years = parts[season_indices, 0]
+            order = np.argsort(years, kind='mergesort')
+            unique_years, starts = np.unique(years[order], return_index=True)
+            for year, gidx in zip(unique_years, np.split(season_indices[order], starts[1:])):
+                keyed.append(((int(year), idx_season), [season, int(year)], gidx))
+        elif season_indices.shape[0] > 0:
+            keyed.append(((0, idx_season), [season, None], season_indices))
+    keyed.sort(key=lambda x: x[0])
+
+    select = [k[1] for k in keyed]
+    group_indices = [k[2] for k in keyed]
+    return select, group_indices
+
+
 def get_sorted_seasons(seasons, method='max'):
     """
     Sorts ``seasons`` sequence by ``method`` of season elements.
@@ -407,6 +407,88 @@ def dgather(elements):
     return grow
 
 
+def gatherv_array(value, blocks, fill, root=0, comm=None):
+    """
+    Gather array blocks from the ranks in the current VM into an array on the root rank using the MPI buffer interface
+    (``Gatherv``). Blocks are written directly into ``fill`` if each block is contiguous in ``fill``. Otherwise, blocks
+    are gathered into a packed buffer and copied into ``fill``.
+
+    This function is collective across the current :class:`~ocgis.OcgVM` or ``comm`` if provided.
+
+    :param value: The local block. Its shape must match the rank's block in ``blocks``.
+    :type value: :class:`numpy.ndarray`
+    :param blocks: Only required on the root rank. The ``(start, stop)`` index bounds along each axis of ``fill`` for
+     each rank.
+    :type blocks: `sequence` of `sequence` of tuple
+    :param fill: Only required on the root rank. The preallocated destination array.
+    :type fill: :class:`numpy.ndarray`
+    :param int root: The root rank.
+    :param comm: The communicator. If ``None``, use the communicator of the current :class:`~ocgis.OcgVM`.
+    :type comm: :class:`mpi4py.MPI.Comm`
+    """
+    from ocgis import vm
+
+    if comm is None:
+        comm = vm.comm
+    rank = comm.Get_rank()
+
+    sendbuf = np.ascontiguousarray(value)
+    datatype = _get_mpi_datatype_(sendbuf.dtype)
+    if rank == root:
+        counts, displs, is_contiguous = get_vector_displacements(blocks, fill.shape)
+        if is_contiguous and fill.flags.c_contiguous:
+            recvbuf = fill.reshape(-1)
+        else:
+            is_contiguous = False
+            recvbuf = np.empty(sum(counts), dtype=fill.dtype)
+            displs = np.append(0, np.cumsum(counts)[:-1]).tolist()
+        recv = [recvbuf, counts, displs, datatype]
+    else:
+        recv = None
+    comm.Gatherv([sendbuf, datatype], recv, root=root)
+
+    if rank == root and not is_contiguous:
+        for block, count, displ in zip(blocks, counts, displs):
+            if count > 0:
+                slc = tuple([slice(*b) for b in block])
+                fill[slc] = recvbuf[displ:displ + count].reshape(fill[slc].shape)
+
+
+def get_vector_displacements(blocks, shape):
+    """
+    Get the counts and displacements of array blocks for vector MPI collectives (i.e. ``Gatherv``).
+
+    :param blocks: The ``(start, stop)`` index bounds along each axis for each block.
+    :type blocks: `sequence` of `sequence` of tuple
+    :param tuple shape: The shape of the array containing the blocks.
+    :returns: A tuple ``(counts, displs, is_contiguous)``. ``is_contiguous`` is ``True`` if each block is contiguous in
+     the flattened (C-order) array. In this case, ``displs`` are the offsets of the blocks in the flattened array.
+     Otherwise, ``displs`` are the offsets of the blocks packed in sequence.
+    :rtype: tuple(list, list, bool)
+    """
+    counts = [0] * len(blocks)
+    displs = [0] * len(blocks)
+    is_contiguous = True
+    for idx, block in enumerate(blocks):
+        lengths = [stop - start for start, stop in block]
+        counts[idx] = int(np.prod(lengths))
+        if counts[idx] == 0:
+            continue
+        # Skip leading axes with a single element. All axes following the first axis with more than one element must
+        # be complete for the block to be contiguous.
+        first = 0
+        while first < len(shape) - 1 and lengths[first] == 1:
+            first += 1
+        if any([lengths[ii] != shape[ii] for ii in range(first + 1, len(shape))]):
+            is_contiguous = False
+        else:
+            displs[idx] = int(np.ravel_multi_index([start for start, _ in block], shape))
+
+    if not is_contiguous:
+        displs = np.append(0, np.cumsum(counts)[:-1]).tolist()
+    return counts, [int(d) for d in displs], is_contiguous
+
+
 def get_global_to_local_slice(start_stop, bounds_local):
     """
     :param start_stop: Two-element, integer sequence for the start and stop global indices.
@@ -752,7 +834,20 @@ def variable_collection_scatter(variable_collection, dest_dist):
     return svc
 
 
-def variable_gather(variable, root=0):
+def variable_gather(variable, root=0, use_buffers=True):
+    """
+    Gather a distributed variable to the root rank. This function is collective across the current
+    :class:`~ocgis.OcgVM`.
+
+    :param variable: The local variable.
+    :type variable: :class:`~ocgis.Variable`
+    :param int root: The root rank.
+    :param bool use_buffers: If ``True``, gather numeric values and masks of variables without bounds using the MPI
+     buffer interface directly into the root's array. Only the block bounds are pickled. If ``False``, the variables
+     are pickled.
+    :returns: The gathered variable on the root rank. ``None`` on other ranks.
+    :rtype: :class:`~ocgis.Variable` | None
+    """
     from ocgis import vm
 
     if variable.is_empty:
@@ -811,6 +906,24 @@ def variable_gather(variable, root=0):
         if vm.rank == root:
             new_variable.set_dimensions(new_dimensions, force=True)
 
+        if use_buffers:
+            # Buffers are only used if the variable on every rank may be sent with the same data type.
+            if not variable.has_bounds and _is_buffer_variable_(variable):
+                buffer_dtype = variable.get_value().dtype
+            else:
+                buffer_dtype = None
+            buffer_dtypes = vm.gather(buffer_dtype, root=root)
+            if vm.rank == root:
+                use_buffers = buffer_dtypes[0] is not None and len(set(buffer_dtypes)) == 1 and \
+                              new_variable.size <= np.iinfo(np.int32).max
+            use_buffers = vm.bcast(use_buffers, root=root)
+        if use_buffers:
+            _variable_gather_buffers_(variable, new_variable, root)
+            if vm.rank == root:
+                return new_variable
+            else:
+                return
+
         gathered_variables = vm.gather(variable)
 
         if vm.rank == root:
@@ -824,7 +937,56 @@ def variable_gather(variable, root=0):
         return new_variable
 
 
-def variable_scatter(variable, dest_dist, root=0, strict=False):
+def _variable_gather_buffers_(variable, new_variable, root):
+    # Gather the value and mask of a variable using the MPI buffer interface. Only block bounds and mask flags are
+    # pickled.
+    from ocgis import vm
+
+    value = variable.get_value()
+    mask = variable.get_mask()
+    block = tuple([tuple(dim.bounds_local) for dim in variable.dimensions])
+    metadata = vm.gather((block, mask is not None), root=root)
+
+    if vm.rank == root:
+        blocks = [m[0] for m in metadata]
+        has_mask = any([m[1] for m in metadata])
+        fill = np.empty(new_variable.shape, dtype=value.dtype)
+    else:
+        blocks, has_mask, fill = None, None, None
+    has_mask = vm.bcast(has_mask, root=root)
+
+    gatherv_array(value, blocks, fill, root=root)
+    if has_mask:
+        if mask is None:
+            mask = np.zeros(value.shape, dtype=bool)
+        if vm.rank == root:
+            fill_mask = np.empty(new_variable.shape, dtype=bool)
+        else:
+            fill_mask = None
+        gatherv_array(mask, blocks, fill_mask, root=root)
+
+    if vm.rank == root:
+        new_variable.set_value(fill)
+        if has_mask:
+            new_variable.set_mask(fill_mask)
+
+
+def variable_scatter(variable, dest_dist, root=0, strict=False, use_buffers=True):
+    """
+    Scatter a variable and its parent collection on the root rank using a destination distribution. This function is
+    collective across the current :class:`~ocgis.OcgVM`.
+
+    :param variable: The variable to scatter. Only required on the root rank.
+    :type variable: :class:`~ocgis.Variable`
+    :param dest_dist: The destination distribution with updated dimensions.
+    :type dest_dist: :class:`~ocgis.vmachine.mpi.OcgDist`
+    :param int root: The root rank.
+    :param bool strict: If ``True``, all dimensions must be in the destination distribution.
+    :param bool use_buffers: If ``True``, scatter numeric values and masks in the parent collection using the MPI buffer
+     interface. Only the remaining variable metadata is pickled. If ``False``, the sliced variables are pickled.
+    :returns: The rank's scattered variable.
+    :rtype: :class:`~ocgis.Variable`
+    """
     from ocgis import vm
 
     if variable is not None:
@@ -910,13 +1072,58 @@ def variable_scatter(variable, dest_dist, root=0, strict=False):
                     variables_to_scatter[idx] = empty_variable
                 else:
                     variables_to_scatter[idx] = variable.parent[slc][variable.name]
+            # Values and masks of numeric variables are scattered using the MPI buffer interface. They are removed from
+            # the sliced variables before pickling.
+            if use_buffers:
+                buffer_variables = [v for v in variable.parent.values() if _is_buffer_variable_(v)]
+                buffer_plan = [(v.name, v.get_value().dtype, v.has_allocated_mask) for v in buffer_variables]
+                for to_scatter in variables_to_scatter:
+                    if not to_scatter.is_empty:
+                        for v in buffer_variables:
+                            sliced = to_scatter.parent[v.name]
+                            sliced._value = None
+                            sliced._mask = None
+            else:
+                buffer_plan = []
         else:
             variables_to_scatter = [variable]
+            buffer_plan = []
     else:
         variables_to_scatter = None
+        buffer_plan = None
+    buffer_plan = vm.bcast(buffer_plan, root=root)
 
     # Scatter the variable across processes.
     scattered_variable = vm.scatter(variables_to_scatter, root=root)
+
+    for name, dtype, has_mask in buffer_plan:
+        if vm.rank == root:
+            source = variable.parent[name]
+            blocks = [None] * size
+            for idx, slc in enumerate(slices):
+                if slc is None:
+                    blocks[idx] = [(0, 0)] * source.ndim
+                else:
+                    blocks[idx] = [slc.get(dim.name, slice(None)).indices(len(dim))[0:2]
+                                   for dim in source.dimensions]
+            source_value = source.get_value()
+            source_mask = source.get_mask()
+        else:
+            blocks, source_value, source_mask = None, None, None
+
+        if scattered_variable.is_empty:
+            target, shape = None, (0,)
+        else:
+            target = scattered_variable.parent[name]
+            shape = target.shape
+        value = scatterv_array(source_value, blocks, shape, dtype, root=root)
+        if has_mask:
+            mask = scatterv_array(source_mask, blocks, shape, bool, root=root)
+        if target is not None:
+            target.set_value(value)
+            if has_mask:
+                target.set_mask(mask)
+
     # Update the scattered variable collection dimensions with the destination dimensions on the process. Everything
     # should align shape-wise.
     scattered_variable.parent._dimensions = dd_dict
@@ -924,6 +1131,48 @@ def variable_scatter(variable, dest_dist, root=0, strict=False):
     return scattered_variable
 
 
+def scatterv_array(value, blocks, shape, dtype, root=0):
+    """
+    Scatter blocks of an array on the root rank to the ranks in the current VM using the MPI buffer interface
+    (``Scatterv``). Blocks are sent directly from ``value`` if each block is contiguous in ``value``. Otherwise, blocks
+    are packed into a send buffer.
+
+    This function is collective across the current :class:`~ocgis.OcgVM`.
+
+    :param value: Only required on the root rank. The array to scatter.
+    :type value: :class:`numpy.ndarray`
+    :param blocks: Only required on the root rank. The ``(start, stop)`` index bounds along each axis of ``value`` for
+     each rank.
+    :type blocks: `sequence` of `sequence` of tuple
+    :param tuple shape: The shape of the rank's block.
+    :param dtype: The array data type.
+    :type dtype: :class:`numpy.dtype`
+    :param int root: The root rank.
+    :returns: The rank's block.
+    :rtype: :class:`numpy.ndarray`
+    """
+    from ocgis import vm
+
+    datatype = _get_mpi_datatype_(dtype)
+    if vm.rank == root:
+        value = np.ascontiguousarray(value)
+        counts, displs, is_contiguous = get_vector_displacements(blocks, value.shape)
+        if is_contiguous:
+            sendbuf = value.reshape(-1)
+        else:
+            sendbuf = np.empty(sum(counts), dtype=value.dtype)
+            for block, count, displ in zip(blocks, counts, displs):
+                if count > 0:
+                    slc = tuple([slice(*b) for b in block])
+                    sendbuf[displ:displ + count] = value[slc].reshape(-1)
+        send = [sendbuf, counts, displs, datatype]
+    else:
+        send = None
+    ret = np.empty(shape, dtype=dtype)
+    vm.comm.Scatterv(send, [ret, datatype], root=root)
+    return ret
+
+
 def vgather(elements):
     n = sum([e.shape[0] for e in elements])
     fill = np.zeros((n, elements[0].shape[1]), dtype=elements[0].dtype)
@@ -945,3 +1194,24 @@ def cancel_free_requests(request_sequence):
             r.Free()
         except:
             pass
+
+
+def _get_mpi_datatype_(dtype):
+    dtype = np.dtype(dtype)
+    try:
+        from mpi4py.util.dtlib import from_numpy_dtype
+    except ImportError:
+        # Versions of mpi4py older than 3.1.
+        return MPI._typedict[dtype.char]
+    return from_numpy_dtype(dtype)
+
+
+def _is_buffer_variable_(variable):
+    # Variables with a numeric, allocated value may be sent using the MPI buffer interface.
+    if variable.ndim == 0 or not variable.has_allocated_value:
+        return False
+    try:
+        dtype = np.dtype(variable.dtype)
+    except TypeError:
+        return False
+    return dtype.kind in 'biufc' and variable.size <= np.iinfo(np.int32).max